@@ -2,59 +2,189 @@
 # -*- coding: utf-8 -*-
 """
 Autonomous Loops Manager — Intégration des boucles autonomes dans ai_server
-Lance toutes les boucles (GOM poller, sync, pipeline, recycler) comme background tasks
+Les boucles (GOM poller, sync, pipeline, recycler) tournent comme jobs in-process du JobScheduler :
+modules importés une seule fois, instances réutilisées (calculateur GOM, recycler, pipeline),
+déclenchement par intervalle et par événement (new_bar, verdict_change).
+Si un module ne s'importe pas dans le processus serveur, le job retombe sur l'ancien subprocess.
 """
 
 import asyncio
 import logging
 import subprocess
 import sys
-import time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Callable, List
 from datetime import datetime, timezone
 from pathlib import Path
 
+from job_scheduler import JobScheduler
+
 logger = logging.getLogger(__name__)
 
+ROOT = Path(__file__).resolve().parent.parent
+LOOP_TIMEOUT_SEC = 120
+
+
 class AutonomousLoopsManager:
-    """Manage all autonomous trading loops as background tasks."""
+    """Manage all autonomous trading loops as in-process scheduler jobs."""
 
-    def __init__(self):
+    def __init__(self, scheduler: Optional[JobScheduler] = None):
         self.loops = {
             "gom_poller": {
                 "script": "Python/gom_mt5_poller.py",
+                "args": "--once",
                 "interval": 30,  # 30 seconds
+                "events": ("new_bar",),
+                "jitter": 3,
                 "enabled": False,
-                "process": None,
                 "last_run": None,
             },
             "gom_sync": {
                 "script": "Python/gom_sync_with_report.py",
                 "args": "--report",
                 "interval": 600,  # 10 minutes
+                "events": ("verdict_change",),
+                "jitter": 30,
                 "enabled": False,
-                "process": None,
                 "last_run": None,
             },
             "pipeline": {
                 "script": "Python/pipeline_hourly_autonomous.py",
                 "args": "--once",
                 "interval": 3600,  # 1 hour
+                "events": (),
+                "jitter": 60,
                 "enabled": False,
-                "process": None,
                 "last_run": None,
             },
             "recycler": {
                 "script": "Python/order_recycler.py",
                 "args": None,
                 "interval": 300,  # 5 minutes
+                "events": (),
+                "jitter": 15,
                 "enabled": False,
-                "process": None,
                 "last_run": None,
             },
         }
-        self.running = False
+        self.scheduler = scheduler or JobScheduler()
+        # Objets partagés avec le serveur : gom_calc, push_verdict, symbols (voir bind)
+        self.context: Dict[str, Any] = {}
+        self._modes: Dict[str, str] = {}
+        self._builders: Dict[str, Callable[[], Callable[[List[Dict[str, Any]]], Any]]] = {
+            "gom_poller": self._build_gom_poller,
+            "gom_sync": self._build_gom_sync,
+            "pipeline": self._build_pipeline,
+            "recycler": self._build_recycler,
+        }
+
+    @property
+    def running(self) -> bool:
+        return self.scheduler.running
+
+    def bind(self, **context: Any) -> None:
+        """Partage les objets du serveur avec les jobs (calculateur GOM sur le cache bougies, push in-process)."""
+        self.context.update(context)
+
+    def emit(self, event: str, **payload: Any) -> int:
+        """Événement serveur (new_bar, verdict_change) → réveille les jobs abonnés."""
+        return self.scheduler.emit(event, **payload)
+
+    # -- runners in-process ------------------------------------------------
+    def _build_gom_poller(self):
+        import gom_mt5_poller as poller
+
+        calc = self.context.get("gom_calc")
+        if calc is None:
+            from gom_live_calculator import GOMSignalsLiveCalculator
+            calc = GOMSignalsLiveCalculator()
+
+        def run(events: List[Dict[str, Any]]) -> Dict[str, Any]:
+            # new_bar → uniquement les symboles dont une bougie vient de clôturer
+            symbols = sorted({e["symbol"] for e in events if e.get("symbol")}) \
+                or list(self.context.get("symbols") or poller.DEFAULT_SYMBOLS)
+            pushed = poller.poll_once(symbols, calc, push=self.context.get("push_verdict"))
+            return {"pushed": pushed, "symbols": len(symbols)}
+
+        return run
+
+    def _build_gom_sync(self):
+        import gom_sync_with_report as gom_sync
+
+        def run(events: List[Dict[str, Any]]) -> None:
+            gom_sync.run_once()
+
+        return run
+
+    def _build_pipeline(self):
+        from pipeline_hourly_autonomous import PipelineHourly
+
+        pipeline = PipelineHourly()
 
+        def run(events: List[Dict[str, Any]]) -> Dict[str, Any]:
+            # état par cycle remis à zéro ; dédup des ordres et anticipateur de spikes conservés
+            pipeline.top5_results, pipeline.orders_placed, pipeline.errors = [], [], []
+            # le cycle fait des requêtes HTTP bloquantes : sa propre boucle dans le thread du job
+            asyncio.run(pipeline.run_hourly_cycle())
+            return {"orders_placed": len(pipeline.orders_placed), "errors": len(pipeline.errors)}
+
+        return run
+
+    def _build_recycler(self):
+        from order_recycler import OrderRecycler
+
+        recycler = OrderRecycler()
+
+        def run(events: List[Dict[str, Any]]) -> Dict[str, Any]:
+            return recycler.check_and_recycle_orders()
+
+        return run
+
+    def _build_subprocess(self, loop_name: str):
+        loop_config = self.loops[loop_name]
+
+        def run(events: List[Dict[str, Any]]) -> Dict[str, Any]:
+            cmd = [sys.executable, str(ROOT / loop_config["script"])]
+            if loop_config.get("args"):
+                cmd.append(loop_config["args"])
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=LOOP_TIMEOUT_SEC, cwd=str(ROOT))
+            return {
+                "exit_code": result.returncode,
+                "stdout_lines": len(result.stdout.splitlines()),
+                "stderr_lines": len(result.stderr.splitlines()),
+            }
+
+        return run
+
+    def _build_runner(self, loop_name: str):
+        try:
+            runner = self._builders[loop_name]()
+            self._modes[loop_name] = "in_process"
+        except Exception as e:
+            logger.warning(f"[LOOPS] {loop_name}: import in-process impossible ({e}) → subprocess")
+            runner = self._build_subprocess(loop_name)
+            self._modes[loop_name] = "subprocess"
+        return runner
+
+    async def _ensure_job(self, loop_name: str) -> None:
+        if loop_name in self.scheduler.jobs:
+            return
+        # imports lourds (pandas, MT5...) hors de la boucle événementielle, une seule fois
+        runner = await asyncio.to_thread(self._build_runner, loop_name)
+        if loop_name in self.scheduler.jobs:
+            return
+        cfg = self.loops[loop_name]
+        self.scheduler.add_job(
+            loop_name,
+            runner,
+            interval=cfg["interval"],
+            events=cfg.get("events", ()),
+            jitter=cfg.get("jitter", 0),
+            timeout=LOOP_TIMEOUT_SEC,
+            pass_events=True,
+            enabled=cfg["enabled"],
+        )
+
+    # -- API (autonomous_routes) -------------------------------------------
     async def start_loop(self, loop_name: str) -> Dict[str, Any]:
         """Start a specific autonomous loop."""
         if loop_name not in self.loops:
@@ -62,22 +192,35 @@ class AutonomousLoopsManager:
 
         loop_config = self.loops[loop_name]
         loop_config["enabled"] = True
-        logger.info(f"[LOOPS] Starting {loop_name} loop (interval: {loop_config['interval']}s)")
+        await self._ensure_job(loop_name)
+        self.scheduler.enable(loop_name)
+        self.scheduler.start()
+        logger.info(f"[LOOPS] Starting {loop_name} loop (interval: {loop_config['interval']}s, mode: {self._modes.get(loop_name)})")
 
         return {
             "loop": loop_name,
             "status": "started",
             "interval": loop_config["interval"],
+            "events": list(loop_config.get("events", ())),
+            "mode": self._modes.get(loop_name),
             "timestamp": datetime.now(timezone.utc).isoformat()
         }
 
+    def is_loop_running(self, loop_name: str) -> bool:
+        """Boucle activée avec un job actif dans le scheduler de ce worker."""
+        job = self.scheduler.jobs.get(loop_name)
+        return bool(self.running and self.loops[loop_name]["enabled"] and job is not None and job.enabled)
+
     async def stop_loop(self, loop_name: str) -> Dict[str, Any]:
         """Stop a specific autonomous loop."""
         if loop_name not in self.loops:
             return {"error": f"Loop '{loop_name}' not found"}
+        if not self.is_loop_running(loop_name):
+            return {"error": f"Loop '{loop_name}' is not running", "status": "not_running"}
 
-        loop_config = self.loops[loop_name]
-        loop_config["enabled"] = False
+        self.loops[loop_name]["enabled"] = False
+        if loop_name in self.scheduler.jobs:
+            self.scheduler.disable(loop_name)
         logger.info(f"[LOOPS] Stopped {loop_name} loop")
 
         return {
@@ -91,96 +234,53 @@ class AutonomousLoopsManager:
         if loop_name not in self.loops:
             return {"error": f"Loop '{loop_name}' not found"}
 
+        await self._ensure_job(loop_name)
+        logger.info(f"[LOOPS] Running {loop_name} ({self._modes.get(loop_name)})")
+        outcome = await self.scheduler.run_now(loop_name)
         loop_config = self.loops[loop_name]
-        script = loop_config["script"]
-        args = loop_config.get("args")
-
-        try:
-            cmd = [sys.executable, script]
-            if args:
-                cmd.append(args)
-
-            logger.info(f"[LOOPS] Running {loop_name}: {' '.join(cmd)}")
-
-            # Run in subprocess with timeout
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=120  # 2 minute timeout
-            )
-
-            loop_config["last_run"] = datetime.now(timezone.utc).isoformat()
+        if outcome["status"] != "skipped":
+            loop_config["last_run"] = self.scheduler.jobs[loop_name].stats.last_run
 
-            return {
-                "loop": loop_name,
-                "status": "completed",
-                "exit_code": result.returncode,
-                "last_run": loop_config["last_run"],
-                "stdout_lines": len(result.stdout.splitlines()),
-                "stderr_lines": len(result.stderr.splitlines()),
-                "timestamp": datetime.now(timezone.utc).isoformat()
-            }
-
-        except subprocess.TimeoutExpired:
-            logger.error(f"[LOOPS] {loop_name} timeout (>120s)")
-            return {
-                "loop": loop_name,
-                "status": "timeout",
-                "error": "Execution exceeded 120s timeout",
-                "timestamp": datetime.now(timezone.utc).isoformat()
-            }
-        except Exception as e:
-            logger.error(f"[LOOPS] Error running {loop_name}: {e}")
-            return {
-                "loop": loop_name,
-                "status": "error",
-                "error": str(e),
-                "timestamp": datetime.now(timezone.utc).isoformat()
-            }
+        result = {
+            "loop": loop_name,
+            "status": outcome["status"],
+            "mode": self._modes.get(loop_name),
+            "duration_ms": outcome.get("duration_ms"),
+            "last_run": loop_config["last_run"],
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        }
+        if isinstance(outcome.get("result"), dict):
+            result.update({k: v for k, v in outcome["result"].items() if k not in result})
+        if "error" in outcome:
+            result["error"] = outcome["error"]
+        return result
 
     async def autonomous_scheduler(self):
-        """Background scheduler that runs all enabled loops at their intervals."""
+        """Démarre les jobs de toutes les boucles dans la boucle courante."""
+        for loop_name in self.loops:
+            await self._ensure_job(loop_name)
+        self.scheduler.start()
         logger.info("[LOOPS] Autonomous scheduler started")
-        self.running = True
-
-        last_run = {name: 0 for name in self.loops}
-        now = time.time()
-
-        while self.running:
-            current_time = time.time()
-
-            for loop_name, config in self.loops.items():
-                if not config["enabled"]:
-                    continue
-
-                interval = config["interval"]
-                elapsed = current_time - last_run[loop_name]
-
-                if elapsed >= interval:
-                    logger.info(f"[LOOPS] Triggering {loop_name} (elapsed: {elapsed:.0f}s >= {interval}s)")
-                    result = await self.run_loop_iteration(loop_name)
-                    last_run[loop_name] = current_time
-
-                    if result.get("status") == "error":
-                        logger.error(f"[LOOPS] {loop_name} failed: {result.get('error')}")
-
-            # Sleep briefly to avoid busy-waiting
-            await asyncio.sleep(1)
 
     def get_status(self) -> Dict[str, Any]:
         """Get status of all loops."""
+        jobs = self.scheduler.status()["jobs"]
         loops_status = {}
         for name, config in self.loops.items():
+            job = jobs.get(name, {})
             loops_status[name] = {
                 "enabled": config["enabled"],
                 "interval": config["interval"],
-                "last_run": config["last_run"],
-                "script": config["script"]
+                "events": list(config.get("events", ())),
+                "last_run": job.get("last_run") or config["last_run"],
+                "script": config["script"],
+                "mode": self._modes.get(name),
+                "stats": job,
             }
 
         return {
             "scheduler_running": self.running,
+            "events_emitted": dict(self.scheduler.events_emitted),
             "loops": loops_status,
             "timestamp": datetime.now(timezone.utc).isoformat()
         }
@@ -190,9 +290,6 @@ class AutonomousLoopsManager:
         for loop_name in self.loops:
             await self.start_loop(loop_name)
 
-        # Start the scheduler
-        asyncio.create_task(self.autonomous_scheduler())
-
         return {
             "status": "all_loops_started",
             "loops": list(self.loops.keys()),
@@ -201,12 +298,16 @@ class AutonomousLoopsManager:
 
     async def stop_all_loops(self) -> Dict[str, Any]:
         """Stop all autonomous loops."""
-        self.running = False
-        for loop_name in self.loops:
+        stopped = [name for name in self.loops if self.is_loop_running(name)]
+        for loop_name in stopped:
             await self.stop_loop(loop_name)
+        await self.scheduler.stop()
+        if not stopped:
+            return {"error": "No autonomous loop running", "status": "not_running"}
 
         return {
             "status": "all_loops_stopped",
+            "loops": stopped,
             "timestamp": datetime.now(timezone.utc).isoformat()
         }
 
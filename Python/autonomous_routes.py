@@ -5,49 +5,79 @@ Autonomous Routes — FastAPI endpoints pour contrôler les boucles autonomes
 À importer dans ai_server.py comme blueprints
 """
 
-from fastapi import APIRouter, HTTPException
-from typing import Dict, Any
+from fastapi import APIRouter, Depends, HTTPException
+from typing import Any, Callable, Dict, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
-def create_autonomous_router(loops_manager) -> APIRouter:
-    """Create FastAPI router for autonomous loops management."""
+def create_autonomous_router(
+    loops_manager,
+    admin_dependency: Optional[Callable[..., None]] = None,
+    is_leader: Optional[Callable[[], bool]] = None,
+) -> APIRouter:
+    """Create FastAPI router for autonomous loops management.
+
+    admin_dependency protège les routes qui démarrent/arrêtent/exécutent une boucle ;
+    is_leader (bail multi-workers) refuse de démarrer ou d'arrêter une boucle hors du worker leader
+    (les boucles ne tournent que là : un arrêt sur un autre worker ne stopperait rien).
+    """
     router = APIRouter(prefix="/autonomous", tags=["autonomous"])
+    guarded = [Depends(admin_dependency)] if admin_dependency is not None else []
+
+    def _require_leader() -> None:
+        if is_leader is not None and not is_leader():
+            raise HTTPException(
+                status_code=409,
+                detail="worker non leader — les boucles autonomes tournent sur le worker leader uniquement",
+            )
+
+    def _stop_error(result: Dict[str, Any]) -> HTTPException:
+        # 409 : la boucle existe mais ne tournait pas ; 404 : boucle inconnue
+        return HTTPException(status_code=409 if result.get("status") == "not_running" else 404,
+                             detail=result["error"])
 
-    @router.post("/start/{loop_name}")
+    @router.post("/start/{loop_name}", dependencies=guarded)
     async def start_loop(loop_name: str) -> Dict[str, Any]:
         """Start a specific autonomous loop."""
+        _require_leader()
         result = await loops_manager.start_loop(loop_name)
         if "error" in result:
             raise HTTPException(status_code=404, detail=result["error"])
         return result
 
-    @router.post("/stop/{loop_name}")
+    @router.post("/stop/{loop_name}", dependencies=guarded)
     async def stop_loop(loop_name: str) -> Dict[str, Any]:
         """Stop a specific autonomous loop."""
+        _require_leader()
         result = await loops_manager.stop_loop(loop_name)
         if "error" in result:
-            raise HTTPException(status_code=404, detail=result["error"])
+            raise _stop_error(result)
         return result
 
-    @router.post("/run/{loop_name}")
+    @router.post("/run/{loop_name}", dependencies=guarded)
     async def run_loop_once(loop_name: str) -> Dict[str, Any]:
         """Execute one iteration of a loop manually."""
+        _require_leader()
         result = await loops_manager.run_loop_iteration(loop_name)
         if "error" in result:
             raise HTTPException(status_code=500, detail=result["error"])
         return result
 
-    @router.post("/start-all")
+    @router.post("/start-all", dependencies=guarded)
     async def start_all() -> Dict[str, Any]:
         """Start all autonomous loops."""
+        _require_leader()
         return await loops_manager.start_all_loops()
 
-    @router.post("/stop-all")
+    @router.post("/stop-all", dependencies=guarded)
     async def stop_all() -> Dict[str, Any]:
         """Stop all autonomous loops."""
-        return await loops_manager.stop_all_loops()
+        _require_leader()
+        result = await loops_manager.stop_all_loops()
+        if "error" in result:
+            raise _stop_error(result)
+        return result
 
     @router.get("/status")
     async def get_status() -> Dict[str, Any]:
@@ -420,11 +420,13 @@ def compute_correction_exhaustion(
     rsi_m5: float = 50.0,
     rsi_m15: float = 50.0,
     rsi_m30: float = 50.0,
+    feature_ctx: Any = None,
 ) -> Dict[str, Any]:
     """
     Score confiance correction orienté SCALP M1/M5.
 
     Tous les TF sont lus ; le score est dominé par M1/M5 (45 %).
+    `feature_ctx` (ml.feature_context) mémorise les séries RSI entre appels.
     """
     rsi_m1 = _safe_rsi(rsi_m1)
     rsi_m5 = _safe_rsi(rsi_m5)
@@ -435,9 +437,14 @@ def compute_correction_exhaustion(
     rsi_d1 = _safe_rsi(rsi_d1)
 
     # Séries bougies (priorité données réelles M1/M5)
-    rsi_m1_c, slope_m1, rsi_m1_s, close_m1 = _rsi_from_df(df_m1)
-    rsi_m5_c, slope_m5, rsi_m5_s, close_m5 = _rsi_from_df(df_m5)
-    _, _, rsi_m15_s, close_m15 = _rsi_from_df(df_m15)
+    if feature_ctx is not None:
+        def rsi_of(df):
+            return feature_ctx.memo_frame("rsi", df, _rsi_from_df)
+    else:
+        rsi_of = _rsi_from_df
+    rsi_m1_c, slope_m1, rsi_m1_s, close_m1 = rsi_of(df_m1)
+    rsi_m5_c, slope_m5, rsi_m5_s, close_m5 = rsi_of(df_m5)
+    _, _, rsi_m15_s, close_m15 = rsi_of(df_m15)
 
     if len(rsi_m1_s) >= 5:
         rsi_m1 = rsi_m1_c
@@ -0,0 +1,301 @@
+"""
+Ingestion batch et idempotente des deals MT5 (/mt5/deals-upload).
+
+- Dédup par `mt5_deal_id` contre un index local SQLite (data/deal_ingestion_index.sqlite)
+  + dédup intra-batch : un ré-upload complet de l'historique par l'EA ne coûte qu'un
+  lookup en mémoire.
+- Normalisation vectorisée des horaires (pandas) : même format de sortie que l'ancien
+  parsing ligne par ligne (ISO "…Z"), plus l'heure UTC de clôture et la durée pour les
+  learners.
+- Les ids sont réservés dès split_new (uploads concurrents) et ne sont marqués « vus »
+  qu'après une persistance réussie ; libérés en cas d'échec (retry possible).
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+INDEX_PATH = ROOT / "data" / "deal_ingestion_index.sqlite"
+MAX_DEALS_PER_UPLOAD = 2000
+UPSERT_CHUNK_SIZE = 500
+
+
+def deal_key(value: Any) -> Optional[str]:
+    """Clé canonique d'un mt5_deal_id (int, float entier ou str) ; None si absent."""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, float):
+        if not np.isfinite(value):
+            return None
+        value = int(value) if value.is_integer() else value
+    key = str(value).strip()
+    if not key or key == "0":
+        return None
+    return key
+
+
+class DealIngestionIndex:
+    """Ensemble persistant des mt5_deal_id déjà ingérés (chargé une fois en mémoire).
+
+    split_new() réserve les ids retenus (ligne `pending` en SQLite + ensemble en vol) :
+    un upload concurrent des mêmes deals — retry de l'EA après timeout, autre worker —
+    les voit comme doublons. mark_seen() confirme la réservation, release() la libère
+    en cas d'échec ; une réservation orpheline (process tué) expire après CLAIM_TTL_SEC.
+    """
+
+    CLAIM_TTL_SEC = 300.0
+
+    def __init__(self, path: Path = INDEX_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._seen: Optional[set] = None
+        self._claimed: set = set()
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), timeout=5.0)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen_deals ("
+            "deal_id TEXT PRIMARY KEY, ingested_at REAL DEFAULT (strftime('%s','now')), "
+            "state TEXT NOT NULL DEFAULT 'done')"
+        )
+        cols = {row[1] for row in conn.execute("PRAGMA table_info(seen_deals)")}
+        if "state" not in cols:  # index créé avant les réservations
+            conn.execute("ALTER TABLE seen_deals ADD COLUMN state TEXT NOT NULL DEFAULT 'done'")
+        return conn
+
+    def _load(self) -> set:
+        if self._seen is None:
+            conn = self._connect()
+            try:
+                self._seen = {row[0] for row in conn.execute("SELECT deal_id FROM seen_deals WHERE state='done'")}
+            finally:
+                conn.close()
+        return self._seen
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._load())
+
+    def __contains__(self, deal_id: Any) -> bool:
+        key = deal_key(deal_id)
+        with self._lock:
+            return key is not None and key in self._load()
+
+    def split_new(self, deals: Sequence[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+        """Deals jamais vus ni réservés (ordre conservé, ids réservés) + nombre de doublons écartés."""
+        with self._lock:
+            seen = self._load()
+            candidates: List[Tuple[Optional[str], Dict[str, Any]]] = []
+            batch: set = set()
+            duplicates = 0
+            for d in deals:
+                key = deal_key(d.get("mt5_deal_id"))
+                if key is not None:
+                    if key in seen or key in self._claimed or key in batch:
+                        duplicates += 1
+                        continue
+                    batch.add(key)
+                candidates.append((key, d))
+
+            won: set = set()
+            if batch:
+                stale = time.time() - self.CLAIM_TTL_SEC
+                conn = self._connect()
+                try:
+                    with conn:
+                        for key in batch:
+                            conn.execute(
+                                "DELETE FROM seen_deals WHERE deal_id=? AND state='pending' AND ingested_at < ?",
+                                (key, stale),
+                            )
+                            cur = conn.execute(
+                                "INSERT OR IGNORE INTO seen_deals (deal_id, ingested_at, state) VALUES (?, ?, 'pending')",
+                                (key, time.time()),
+                            )
+                            if cur.rowcount == 1:
+                                won.add(key)
+                finally:
+                    conn.close()
+            self._claimed |= won
+
+            fresh: List[Dict[str, Any]] = []
+            for key, d in candidates:
+                if key is not None and key not in won:
+                    duplicates += 1  # déjà ingéré ou en cours ailleurs
+                    continue
+                fresh.append(d)
+            return fresh, duplicates
+
+    def mark_seen(self, deal_ids: Iterable[Any]) -> int:
+        """Confirme les ids en une seule transaction ; retourne le nombre ajouté."""
+        keys = {k for k in (deal_key(v) for v in deal_ids) if k is not None}
+        with self._lock:
+            seen = self._load()
+            keys -= seen
+            if not keys:
+                return 0
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.executemany(
+                        "INSERT INTO seen_deals (deal_id, ingested_at, state) VALUES (?, ?, 'done') "
+                        "ON CONFLICT(deal_id) DO UPDATE SET state='done', ingested_at=excluded.ingested_at",
+                        [(k, time.time()) for k in keys],
+                    )
+            finally:
+                conn.close()
+            seen.update(keys)
+            self._claimed -= keys
+            return len(keys)
+
+    def release(self, deal_ids: Iterable[Any]) -> int:
+        """Libère les réservations non confirmées (échec de persistance) ; retourne le nombre libéré."""
+        keys = {k for k in (deal_key(v) for v in deal_ids) if k is not None}
+        with self._lock:
+            keys &= self._claimed
+            if not keys:
+                return 0
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.executemany(
+                        "DELETE FROM seen_deals WHERE deal_id=? AND state='pending'", [(k,) for k in keys]
+                    )
+            finally:
+                conn.close()
+            self._claimed -= keys
+            return len(keys)
+
+
+def normalize_times(values: Sequence[Any]) -> List[Optional[str]]:
+    """
+    Horaires MT5 → ISO UTC "…Z", vectorisé.
+    Timestamp Unix (int/float) ou chaîne "YYYY.MM.DD HH:MM:SS" ; None si invalide.
+    """
+    n = len(values)
+    out = np.full(n, None, dtype=object)
+    if not n:
+        return []
+    s = pd.Series(list(values), dtype=object)
+
+    num_mask = s.map(lambda v: isinstance(v, (int, float))).to_numpy(dtype=bool)
+    if num_mask.any():
+        secs = pd.to_numeric(s[num_mask], errors="coerce").astype(float)
+        ts = pd.to_datetime(secs * 1_000_000, unit="us", utc=True, errors="coerce")
+        text = ts.dt.strftime("%Y-%m-%dT%H:%M:%S")
+        micro = ts.dt.microsecond.fillna(0).astype(int)
+        frac = micro.map(lambda us: f".{us:06d}" if us else "")
+        out[num_mask] = (text + frac + "Z").to_numpy(dtype=object)
+
+    str_mask = s.map(lambda v: isinstance(v, str)).to_numpy(dtype=bool)
+    if str_mask.any():
+        st = s[str_mask].astype(str).str.strip().str.replace(".", "-", regex=False)
+        needs_t = ~st.str.contains("T", regex=False) & st.str.contains(" ", regex=False)
+        st = st.where(~needs_t, st.str.replace(" ", "T", n=1, regex=False))
+        needs_z = ~st.str.contains("Z", regex=False) & ~st.str.contains("+", regex=False)
+        st = st.where(~needs_z, st + "Z")
+        out[str_mask] = st.to_numpy(dtype=object)
+
+    # NaT / chaînes vides → None
+    return [v if isinstance(v, str) and v != "Z" else None for v in out]
+
+
+def _parse_iso_utc(values: Sequence[Optional[str]]) -> pd.Series:
+    return pd.to_datetime(pd.Series(list(values), dtype=object), utc=True, errors="coerce", format="ISO8601")
+
+
+def normalize_is_win(v: Any, profit: float) -> bool:
+    if isinstance(v, bool):
+        return v
+    if isinstance(v, (int, float)):
+        return float(v) > 0.5
+    if isinstance(v, str):
+        s = v.strip().lower()
+        if s in ("true", "1", "yes", "y"):
+            return True
+        if s in ("false", "0", "no", "n"):
+            return False
+    return profit > 0.0
+
+
+def build_feedback_rows(
+    deals: Sequence[Dict[str, Any]],
+    limit: int = MAX_DEALS_PER_UPLOAD,
+) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Deals MT5 → lignes trade_feedback (schéma Supabase/RDS).
+    Retourne (rows, skipped). Chaque ligne porte aussi `_hour_utc` / `_duration_sec`
+    (champs privés pour les learners, retirés avant l'upsert).
+    """
+    deals = list(deals[:limit])
+    if not deals:
+        return [], 0
+
+    symbols = [(d.get("symbol") or "").strip() for d in deals]
+    close_norm = normalize_times([d.get("close_time") for d in deals])
+    open_norm = normalize_times([d.get("open_time") for d in deals])
+    open_norm = [o or c for o, c in zip(open_norm, close_norm)]
+
+    close_ts = _parse_iso_utc(close_norm)
+    open_ts = _parse_iso_utc(open_norm)
+    hours = close_ts.dt.hour.to_numpy(dtype=float, na_value=np.nan)
+    durations = (close_ts - open_ts).dt.total_seconds().clip(lower=0.0).to_numpy(dtype=float, na_value=np.nan)
+
+    rows: List[Dict[str, Any]] = []
+    skipped = 0
+    for i, d in enumerate(deals):
+        sym = symbols[i]
+        if not sym or not close_norm[i]:
+            skipped += 1
+            continue
+        profit = float(d.get("profit") or 0.0)
+        entry_price = d.get("entry_price")
+        if entry_price is None:
+            entry_price = d.get("price")
+        rows.append({
+            "symbol": sym,
+            "timeframe": "M1",
+            "open_time": open_norm[i],
+            "profit": profit,
+            "is_win": normalize_is_win(d.get("is_win"), profit),
+            "close_time": close_norm[i],
+            "entry_price": entry_price,
+            "exit_price": d.get("price"),
+            "mt5_deal_id": d.get("mt5_deal_id"),
+            "position_id": d.get("position_id"),
+            "magic": d.get("magic"),
+            "decision": "UNKNOWN",
+            "_hour_utc": None if np.isnan(hours[i]) else int(hours[i]),
+            "_duration_sec": None if np.isnan(durations[i]) else float(durations[i]),
+        })
+    return rows, skipped
+
+
+def public_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Ligne sans les champs privés `_…` (payload Supabase/RDS)."""
+    return {k: v for k, v in row.items() if not k.startswith("_")}
+
+
+def chunked(rows: Sequence[Any], size: int = UPSERT_CHUNK_SIZE) -> Iterable[Sequence[Any]]:
+    size = max(1, int(size))
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+_index: Optional[DealIngestionIndex] = None
+
+
+def get_deal_index() -> DealIngestionIndex:
+    global _index
+    if _index is None:
+        _index = DealIngestionIndex()
+    return _index
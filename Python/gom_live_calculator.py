@@ -24,6 +24,12 @@ try:
 except ImportError:
     DERIV_AVAILABLE = False
 
+try:
+    from swing_kernel import pivot_points
+    SWING_KERNEL_AVAILABLE = True
+except ImportError:
+    SWING_KERNEL_AVAILABLE = False
+
 try:
     from gom_pine_calculator import GOMLPineCalculator
     _PINE_CALC = GOMLPineCalculator()
@@ -376,6 +382,23 @@ class GOMSignalsLiveCalculator:
         high, low, open_, close = df["high"], df["low"], df["open"], df["close"]
         n = len(df)
 
+        if SWING_KERNEL_AVAILABLE:
+            # dernier pivot (ordre lookback) dont la bougie d'origine i-lookback-1 existe
+            o, c = open_.to_numpy(dtype=float), close.to_numpy(dtype=float)
+            ph = pivot_points(high.to_numpy(dtype=float), lookback, "high")
+            ph = ph[ph >= lookback + 1]
+            if len(ph):
+                j = int(ph[-1]) - lookback - 1
+                out["ob_bear_top"] = float(high.iloc[j])
+                out["ob_bear_bot"] = float(min(o[j], c[j]))
+            pl = pivot_points(low.to_numpy(dtype=float), lookback, "low")
+            pl = pl[pl >= lookback + 1]
+            if len(pl):
+                j = int(pl[-1]) - lookback - 1
+                out["ob_bull_top"] = float(max(o[j], c[j]))
+                out["ob_bull_bot"] = float(low.iloc[j])
+            return out
+
         for i in range(lookback, n - lookback):
             if all(high.iloc[i] >= high.iloc[i - k] for k in range(1, lookback + 1)) and all(
                 high.iloc[i] >= high.iloc[i + k] for k in range(1, lookback + 1)
@@ -400,15 +423,23 @@ class GOMSignalsLiveCalculator:
         high, low, close = df["high"], df["low"], df["close"]
         last_ph = prev_ph = last_pl = prev_pl = None
         n = len(df)
-        for i in range(struct_lb, n - struct_lb):
-            if all(high.iloc[i] >= high.iloc[i - k] for k in range(1, struct_lb + 1)) and all(
-                high.iloc[i] >= high.iloc[i + k] for k in range(1, struct_lb + 1)
-            ):
-                prev_ph, last_ph = last_ph, float(high.iloc[i])
-            if all(low.iloc[i] <= low.iloc[i - k] for k in range(1, struct_lb + 1)) and all(
-                low.iloc[i] <= low.iloc[i + k] for k in range(1, struct_lb + 1)
-            ):
-                prev_pl, last_pl = last_pl, float(low.iloc[i])
+        if SWING_KERNEL_AVAILABLE:
+            h, l = high.to_numpy(dtype=float), low.to_numpy(dtype=float)
+            ph, pl = pivot_points(h, struct_lb, "high"), pivot_points(l, struct_lb, "low")
+            last_ph = float(h[ph[-1]]) if len(ph) else None
+            prev_ph = float(h[ph[-2]]) if len(ph) >= 2 else None
+            last_pl = float(l[pl[-1]]) if len(pl) else None
+            prev_pl = float(l[pl[-2]]) if len(pl) >= 2 else None
+        else:
+            for i in range(struct_lb, n - struct_lb):
+                if all(high.iloc[i] >= high.iloc[i - k] for k in range(1, struct_lb + 1)) and all(
+                    high.iloc[i] >= high.iloc[i + k] for k in range(1, struct_lb + 1)
+                ):
+                    prev_ph, last_ph = last_ph, float(high.iloc[i])
+                if all(low.iloc[i] <= low.iloc[i - k] for k in range(1, struct_lb + 1)) and all(
+                    low.iloc[i] <= low.iloc[i + k] for k in range(1, struct_lb + 1)
+                ):
+                    prev_pl, last_pl = last_pl, float(low.iloc[i])
         c = float(close.iloc[-1])
         choch_bear = last_ph is not None and prev_ph is not None and prev_pl is not None and c < prev_pl and last_ph < prev_ph
         choch_bull = last_pl is not None and prev_pl is not None and prev_ph is not None and c > prev_ph and last_pl > prev_pl
@@ -26,7 +26,7 @@ import time
 import traceback
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, Optional
 
 import requests
 
@@ -49,6 +49,9 @@ DEFAULT_SYMBOLS: List[str] = [
 
 POLL_INTERVAL = 30  # secondes
 
+# Session HTTP réutilisée entre les polls (keep-alive vers ai_server)
+_HTTP = requests.Session()
+
 (ROOT / "logs").mkdir(exist_ok=True)
 
 logging.basicConfig(
@@ -66,7 +69,7 @@ log = logging.getLogger(__name__)
 
 def _push_verdict(payload: Dict[str, Any]) -> bool:
     try:
-        r = requests.post(f"{AI_SERVER_URL}/gom-verdict", json=payload, timeout=10)
+        r = _HTTP.post(f"{AI_SERVER_URL}/gom-verdict", json=payload, timeout=10)
         if r.ok and r.json().get("ok"):
             log.info(
                 "✅ %-20s → %-13s buy=%.1f sell=%.1f gap=%.1f coh=%.0f%% entry=%.2f sl=%.2f tp=%.2f atr=%.2f",
@@ -89,8 +92,12 @@ def _push_verdict(payload: Dict[str, Any]) -> bool:
         return False
 
 
-def poll_once(symbols: List[str], calc) -> int:
-    """Calcule GOM pour chaque symbole et pousse vers /gom-verdict."""
+def poll_once(symbols: List[str], calc, push: Optional[Callable[[Dict[str, Any]], bool]] = None) -> int:
+    """Calcule GOM pour chaque symbole et pousse vers /gom-verdict.
+
+    push : remplace le POST HTTP (scheduler in-process d'ai_server → store direct).
+    """
+    push = push or _push_verdict
     ok_count = 0
     for symbol in symbols:
         try:
@@ -135,7 +142,7 @@ def poll_once(symbols: List[str], calc) -> int:
                 "atr": atr,
                 "atr14": atr,
             }
-            if _push_verdict(payload):
+            if push(payload):
                 ok_count += 1
         except Exception as exc:
             log.error("Erreur %s: %s\n%s", symbol, exc, traceback.format_exc())
@@ -14,8 +14,8 @@ import logging
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
 
-# Force UTF-8 on Windows
-if sys.platform == 'win32':
+# Force UTF-8 on Windows (script seulement — pas quand le module est importé par ai_server)
+if sys.platform == 'win32' and __name__ == "__main__":
     import io
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
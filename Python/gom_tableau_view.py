@@ -0,0 +1,289 @@
+"""
+Vue matérialisée du tableau GOM multi-timeframe (M1..W1) par symbole.
+
+Chaque ligne du store est la réponse de /gom-tableau déjà construite :
+  {timeframes: {M1: {direction, rsi}, ...}, verdict, timestamp, bars, sources, revision}
+- on_candles : appelé par /mt5/upload-candles ; recalcule UNE cellule seulement si la
+  dernière bougie clôturée du TF a changé (EMA20/EMA50 + RSI14 sur les bougies fermées).
+- on_verdict / on_tableau : fusion des cellules poussées par le poller GOM / TradingView
+  (une valeur vide ou NEUT n'écrase pas une cellule calculée depuis les bougies).
+- complete : payload plat de /gom-tableau-complete mis en cache par (révision, verdict).
+Les lectures ne touchent ni MT5 ni les DataFrames.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections.abc import MutableMapping
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import numpy as np
+
+TF_ORDER = ("M1", "M5", "M15", "H1", "H4", "D1", "W1")
+TF_SECONDS = {"M1": 60, "M5": 300, "M15": 900, "H1": 3600, "H4": 14400, "D1": 86400, "W1": 604800}
+MTF_LOOKBACK_BARS = 80
+
+_TF_ALIASES = {
+    "1": "M1", "M1": "M1", "5": "M5", "M5": "M5", "15": "M15", "M15": "M15",
+    "60": "H1", "H1": "H1", "240": "H4", "H4": "H4",
+    "D": "D1", "1D": "D1", "D1": "D1", "W": "W1", "1W": "W1", "W1": "W1",
+}
+_EMPTY_DIRECTIONS = ("", "0", "NEUT", "NEUTRAL", "NONE")
+
+
+def tf_label(timeframe: Any) -> Optional[str]:
+    """'15' / 'm15' / 'M15' → 'M15' ; None si TF hors tableau."""
+    return _TF_ALIASES.get(str(timeframe or "").strip().upper())
+
+
+def symbol_key(symbol: Any) -> str:
+    return str(symbol or "").upper().replace(" ", "").replace("INDEX", "")
+
+
+def _ema_last(closes: np.ndarray, period: int) -> Optional[float]:
+    """EMA amorcée par la SMA des `period` premières valeurs (même règle que le snapshot MT5)."""
+    if len(closes) < period:
+        return None
+    alpha = 2.0 / (period + 1)
+    tail = closes[period:]
+    # ema_n = (1-a)^n * sma + sum_i a (1-a)^(n-1-i) x_i
+    decay = (1.0 - alpha) ** np.arange(len(tail) - 1, -1, -1, dtype=float)
+    return float(closes[:period].mean() * (1.0 - alpha) ** len(tail) + alpha * np.dot(decay, tail))
+
+
+def _rsi_last(closes: np.ndarray, period: int = 14) -> Optional[int]:
+    if len(closes) < period + 1:
+        return None
+    delta = np.diff(closes[-(period + 1):])
+    avg_g = float(np.clip(delta, 0.0, None).mean())
+    avg_l = float(np.clip(-delta, 0.0, None).mean())
+    if avg_l == 0:
+        return 100
+    return int(round(100 - 100 / (1 + avg_g / avg_l)))
+
+
+def tf_cell(closes: Any) -> Dict[str, Any]:
+    """Cellule {direction, rsi} depuis des clôtures (ordre chronologique)."""
+    arr = np.asarray(closes, dtype=float)[-MTF_LOOKBACK_BARS:]
+    e20 = _ema_last(arr, 20)
+    e50 = _ema_last(arr, 50)
+    direction = "NEUT"
+    if e20 is not None and e50 is not None:
+        if e20 > e50 * 1.00005:
+            direction = "BULL"
+        elif e20 < e50 * 0.99995:
+            direction = "BEAR"
+    cell: Dict[str, Any] = {"direction": direction}
+    rsi = _rsi_last(arr)
+    if rsi is not None:
+        cell["rsi"] = rsi
+    return cell
+
+
+def _direction_label(val: Any) -> str:
+    if val is None:
+        return ""
+    if isinstance(val, (int, float)) and not isinstance(val, bool):
+        return "BULL" if val > 0 else "BEAR" if val < 0 else "NEUT"
+    s = str(val).strip().upper()
+    return {"BUY": "BULL", "LONG": "BULL", "SELL": "BEAR", "SHORT": "BEAR", "NEUTRAL": "NEUT",
+            "1": "BULL", "-1": "BEAR", "0": "NEUT"}.get(s, s)
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class GomTableauView:
+    """Tableau GOM par symbole, maintenu incrémentalement (store dict ou SharedMap)."""
+
+    def __init__(
+        self,
+        store: Optional[MutableMapping] = None,
+        render_complete: Optional[Callable[[str, Dict[str, Any], Dict[str, Any]], Dict[str, Any]]] = None,
+    ):
+        self.store = store if store is not None else {}
+        self.render_complete = render_complete
+        self._keys: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.cell_updates = 0
+        self.cell_skips = 0
+        self.complete_renders = 0
+
+    # -- lecture -----------------------------------------------------------
+    def find_key(self, symbol: str) -> Optional[str]:
+        if not symbol:
+            return None
+        if symbol in self.store:
+            return symbol
+        clean = symbol_key(symbol)
+        key = self._keys.get(clean)
+        if key is not None and key in self.store:
+            return key
+        for k in list(self.store.keys()):
+            self._keys[symbol_key(k)] = k
+        key = self._keys.get(clean)
+        return key if key is not None and key in self.store else None
+
+    def get(self, symbol: str) -> Optional[Dict[str, Any]]:
+        key = self.find_key(symbol)
+        return self.store.get(key) if key else None
+
+    def mtf_fields(self, symbol: str) -> Dict[str, Any]:
+        """Champs tf_<lk>_dir / tf_<lk>_rsi des cellules calculées depuis les bougies."""
+        row = self.get(symbol) or {}
+        sources = row.get("sources", {})
+        out: Dict[str, Any] = {}
+        for label, cell in (row.get("timeframes") or {}).items():
+            if sources.get(label) != "candles":
+                continue
+            lk = label.lower()
+            out[f"tf_{lk}_dir"] = cell.get("direction", "NEUT")
+            if cell.get("rsi") is not None:
+                out[f"tf_{lk}_rsi"] = cell["rsi"]
+        return out
+
+    def cells_fresh(self, symbol: str, labels: Iterable[str], slack_sec: float,
+                    now: Optional[datetime] = None) -> bool:
+        """
+        True si chaque cellule `labels` vient des bougies et que sa dernière bougie clôturée a
+        moins de 2 périodes du TF + `slack_sec` (l'EA a cessé d'uploader sinon).
+        """
+        row = self.get(symbol) or {}
+        sources, bars = row.get("sources") or {}, row.get("bars") or {}
+        now = now or datetime.now(timezone.utc)
+        for label in labels:
+            if sources.get(label) != "candles" or not bars.get(label):
+                return False
+            try:
+                bar = datetime.fromisoformat(str(bars[label]))
+            except ValueError:
+                return False
+            if bar.tzinfo is None:
+                bar = bar.replace(tzinfo=timezone.utc)  # heures MT5 uploadées sans fuseau
+            if (now - bar).total_seconds() > 2 * TF_SECONDS.get(label, 60) + slack_sec:
+                return False
+        return True
+
+    # -- écriture ----------------------------------------------------------
+    def _update(self, symbol: str, fn: Callable[[Dict[str, Any]], bool]) -> bool:
+        with self._lock:
+            key = self.find_key(symbol) or symbol
+            current = self.store.get(key)
+            row = {
+                "timeframes": {}, "verdict": {}, "timestamp": _now_iso(),
+                "bars": {}, "sources": {}, "revision": 0,
+            } if current is None else {
+                **current,
+                "timeframes": {k: dict(v) for k, v in (current.get("timeframes") or {}).items()},
+                "bars": dict(current.get("bars") or {}),
+                "sources": dict(current.get("sources") or {}),
+            }
+            if not fn(row):
+                return False
+            row["revision"] = int(row.get("revision") or 0) + 1
+            row.pop("complete", None)
+            self.store[key] = row
+            self._keys[symbol_key(key)] = key
+            return True
+
+    def on_candles(self, symbol: str, timeframe: str, df: Any) -> bool:
+        """Recalcule la cellule du TF si une nouvelle bougie vient de clôturer (la dernière est en cours)."""
+        label = tf_label(timeframe)
+        if label is None or df is None or len(df) < 2 or "close" not in df:
+            return False
+        closed_bar = str(df.index[-2])
+        row = self.get(symbol)
+        if row and (row.get("bars") or {}).get(label) == closed_bar and (row.get("sources") or {}).get(label) == "candles":
+            self.cell_skips += 1
+            return False
+        cell = tf_cell(df["close"].to_numpy()[:-1])
+
+        def apply(r: Dict[str, Any]) -> bool:
+            r["timeframes"][label] = cell
+            r["bars"][label] = closed_bar
+            r["sources"][label] = "candles"
+            r["timestamp"] = _now_iso()
+            return True
+
+        self.cell_updates += 1
+        return self._update(symbol, apply)
+
+    def _merge_cells(self, row: Dict[str, Any], cells: Dict[str, Dict[str, Any]], source: str) -> None:
+        for label, cell in cells.items():
+            direction = _direction_label(cell.get("direction"))
+            has_candles = row["sources"].get(label) == "candles"
+            if direction in _EMPTY_DIRECTIONS and has_candles:
+                continue
+            merged = {k: v for k, v in cell.items() if v is not None}
+            merged["direction"] = direction or "NEUT"
+            if has_candles and not merged.get("rsi"):
+                merged["rsi"] = row["timeframes"][label].get("rsi", 0)
+            row["timeframes"][label] = merged
+            row["sources"][label] = source
+
+    def on_verdict(self, symbol: str, record: Dict[str, Any]) -> bool:
+        """Fusionne un record /gom-verdict (tf_<lk>_dir, tf_<lk>_rsi, verdict, kola)."""
+        cells: Dict[str, Dict[str, Any]] = {}
+        for label in TF_ORDER:
+            lk = label.lower()
+            if record.get(f"tf_{lk}_dir"):
+                cells[label] = {"direction": record.get(f"tf_{lk}_dir"), "rsi": record.get(f"tf_{lk}_rsi", 0)}
+        if record.get("tf_global_dir"):
+            cells["GLOBAL"] = {
+                "direction": record.get("tf_global_dir"),
+                "strength": record.get("tf_global_strength", 0),
+            }
+        if not cells and not record.get("verdict"):
+            return False
+
+        def apply(r: Dict[str, Any]) -> bool:
+            self._merge_cells(r, cells, "verdict")
+            r["verdict"] = {
+                "verdict": record.get("verdict", "WAIT"),
+                "kola_state": record.get("kola_state", "---"),
+                "score_buy": record.get("score_buy"),
+                "score_sell": record.get("score_sell"),
+            }
+            r["timestamp"] = record.get("timestamp") or _now_iso()
+            return True
+
+        return self._update(symbol, apply)
+
+    def on_tableau(self, symbol: str, timeframes: Dict[str, Dict[str, Any]], verdict: Any, timestamp: Optional[str]) -> bool:
+        """Tableau poussé par gom_dashboard_sync (POST /gom-tableau), déjà normalisé {M1: {...}}."""
+
+        def apply(r: Dict[str, Any]) -> bool:
+            self._merge_cells(r, timeframes or {}, "tableau")
+            r["verdict"] = verdict or {}
+            r["timestamp"] = timestamp or _now_iso()
+            return True
+
+        return self._update(symbol, apply)
+
+    def complete(self, symbol: str, verdict_record: Dict[str, Any]) -> Dict[str, Any]:
+        """Payload /gom-tableau-complete pré-rendu, invalidé par la révision du tableau ou du verdict."""
+        key = self.find_key(symbol)
+        row = self.store.get(key) if key else None
+        verdict_stamp = str(verdict_record.get("timestamp") or "") if verdict_record else ""
+        if row is not None:
+            cached = row.get("complete")
+            if cached is not None and row.get("complete_verdict") == verdict_stamp:
+                return cached
+        rendered = self.render_complete(symbol, row or {}, verdict_record or {}) if self.render_complete else {}
+        self.complete_renders += 1
+        if row is not None:
+            with self._lock:
+                latest = self.store.get(key)
+                if latest is not None and latest.get("revision") == row.get("revision"):
+                    self.store[key] = {**latest, "complete": rendered, "complete_verdict": verdict_stamp}
+        return rendered
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "symbols": len(self.store),
+            "cell_updates": self.cell_updates,
+            "cell_skips": self.cell_skips,
+            "complete_renders": self.complete_renders,
+        }
@@ -0,0 +1,281 @@
+"""
+Planificateur asynchrone in-process pour les jobs autonomes (poller GOM, sync, pipeline, recycler).
+
+- déclencheurs : intervalle (+ jitter aléatoire) et/ou événements nommés
+  (emit("new_bar", symbol=...), emit("verdict_change", symbol=...)) ;
+- pas de chevauchement : un déclenchement reçu pendant une exécution est fusionné en UNE relance,
+  et un job dont le thread a dépassé son timeout n'est pas relancé tant que ce thread tourne ;
+- les fonctions synchrones tournent dans un thread (asyncio.to_thread), les coroutines dans la boucle ;
+- stats par job : runs, erreurs, timeouts, chevauchements évités, durée last/avg/max.
+emit() est thread-safe (appelable depuis un BackgroundTask synchrone FastAPI).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+MAX_PENDING_EVENTS = 256
+
+
+@dataclass
+class JobStats:
+    runs: int = 0
+    event_runs: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    skipped_overlap: int = 0
+    coalesced_events: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    last_ms: Optional[float] = None
+    last_status: Optional[str] = None
+    last_trigger: Optional[str] = None
+    last_error: Optional[str] = None
+    last_run: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "runs": self.runs,
+            "event_runs": self.event_runs,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "skipped_overlap": self.skipped_overlap,
+            "coalesced_events": self.coalesced_events,
+            "avg_ms": round(self.total_ms / self.runs, 2) if self.runs else None,
+            "max_ms": round(self.max_ms, 2),
+            "last_ms": self.last_ms,
+            "last_status": self.last_status,
+            "last_trigger": self.last_trigger,
+            "last_error": self.last_error,
+            "last_run": self.last_run,
+        }
+
+
+@dataclass
+class Job:
+    name: str
+    func: Callable[..., Any]
+    interval: Optional[float] = None
+    events: Sequence[str] = ()
+    jitter: float = 0.0
+    timeout: Optional[float] = 120.0
+    pass_events: bool = False
+    enabled: bool = True
+    stats: JobStats = field(default_factory=JobStats)
+    running: bool = False
+    next_run: Optional[float] = None  # time.monotonic()
+    _pending: List[Dict[str, Any]] = field(default_factory=list, repr=False)
+    _wake: Optional[asyncio.Event] = field(default=None, repr=False)
+    _inflight: Optional[asyncio.Future] = field(default=None, repr=False)
+
+    @property
+    def busy(self) -> bool:
+        return self.running or (self._inflight is not None and not self._inflight.done())
+
+
+class JobScheduler:
+    """Une tâche asyncio par job ; les jobs partagent le processus (caches, stores, sessions HTTP)."""
+
+    def __init__(self, rng: Optional[random.Random] = None):
+        self.jobs: Dict[str, Job] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._rng = rng or random.Random()
+        self.events_emitted: Dict[str, int] = {}
+
+    @property
+    def running(self) -> bool:
+        return self._loop is not None
+
+    def add_job(
+        self,
+        name: str,
+        func: Callable[..., Any],
+        *,
+        interval: Optional[float] = None,
+        events: Sequence[str] = (),
+        jitter: float = 0.0,
+        timeout: Optional[float] = 120.0,
+        pass_events: bool = False,
+        enabled: bool = True,
+    ) -> Job:
+        """func(events) si pass_events (liste des payloads d'événements, vide sur intervalle), sinon func()."""
+        if name in self.jobs:
+            raise ValueError(f"job '{name}' déjà enregistré")
+        job = Job(
+            name=name, func=func, interval=interval, events=tuple(events), jitter=jitter,
+            timeout=timeout, pass_events=pass_events, enabled=enabled,
+        )
+        self.jobs[name] = job
+        if self._loop is not None:
+            self._spawn(job)
+        return job
+
+    # -- cycle de vie ------------------------------------------------------
+    def start(self) -> None:
+        """Démarre une tâche par job dans la boucle courante (idempotent)."""
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        for job in self.jobs.values():
+            if job.name not in self._tasks:
+                self._spawn(job)
+
+    async def stop(self) -> None:
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        self._loop = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _spawn(self, job: Job) -> None:
+        job._wake = asyncio.Event()
+        self._tasks[job.name] = self._loop.create_task(self._job_loop(job), name=f"job:{job.name}")
+
+    def _next_delay(self, job: Job) -> float:
+        return float(job.interval) + (self._rng.uniform(0.0, job.jitter) if job.jitter > 0 else 0.0)
+
+    async def _job_loop(self, job: Job) -> None:
+        if job.interval:
+            # premier passage étalé par le jitter pour ne pas lancer tous les jobs à la même seconde
+            job.next_run = time.monotonic() + (self._rng.uniform(0.0, job.jitter) if job.jitter > 0 else 0.0)
+        while True:
+            wait = None if job.next_run is None else max(0.0, job.next_run - time.monotonic())
+            try:
+                await asyncio.wait_for(job._wake.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+            job._wake.clear()
+            events, job._pending = job._pending, []
+            due = job.next_run is not None and time.monotonic() >= job.next_run
+            if due:
+                job.next_run = time.monotonic() + self._next_delay(job)
+            if not job.enabled or not (due or events):
+                continue
+            # un passage d'intervalle couvre tout : les événements en attente y sont absorbés
+            await self._execute(job, "interval" if due else events[-1]["event"], [] if due else events)
+
+    # -- exécution ---------------------------------------------------------
+    async def _execute(self, job: Job, trigger: str, events: List[Dict[str, Any]]) -> Dict[str, Any]:
+        if job.busy:
+            job.stats.skipped_overlap += 1
+            return {"status": "skipped", "reason": "overlap", "trigger": trigger}
+        job.running = True
+        started = time.perf_counter()
+        status, error, result = "completed", None, None
+        args = (events,) if job.pass_events else ()
+        is_coro = inspect.iscoroutinefunction(job.func)
+        try:
+            job._inflight = asyncio.ensure_future(
+                job.func(*args) if is_coro else asyncio.to_thread(job.func, *args)
+            )
+            job._inflight.add_done_callback(lambda f: f.cancelled() or f.exception())
+            result = await asyncio.wait_for(asyncio.shield(job._inflight), job.timeout)
+        except asyncio.TimeoutError:
+            status, error = "timeout", f"exceeded {job.timeout}s timeout"
+            job.stats.timeouts += 1
+            if is_coro:
+                job._inflight.cancel()
+            logger.error(f"[SCHED] {job.name} timeout (>{job.timeout}s)")
+        except asyncio.CancelledError:
+            if job._inflight is not None and is_coro:
+                job._inflight.cancel()
+            raise
+        except Exception as exc:
+            status, error = "error", str(exc)
+            job.stats.errors += 1
+            logger.error(f"[SCHED] {job.name} erreur: {exc}")
+        finally:
+            job.running = False
+
+        elapsed_ms = round((time.perf_counter() - started) * 1000.0, 2)
+        st = job.stats
+        st.runs += 1
+        st.event_runs += 1 if events else 0
+        st.total_ms += elapsed_ms
+        st.max_ms = max(st.max_ms, elapsed_ms)
+        st.last_ms = elapsed_ms
+        st.last_status = status
+        st.last_trigger = trigger
+        st.last_error = error
+        st.last_run = datetime.now(timezone.utc).isoformat()
+        out = {"status": status, "trigger": trigger, "duration_ms": elapsed_ms, "result": result}
+        if error is not None:
+            out["error"] = error
+        return out
+
+    async def run_now(self, name: str, events: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Exécution manuelle immédiate (refusée si le job tourne déjà)."""
+        return await self._execute(self.jobs[name], "manual", list(events or []))
+
+    def enable(self, name: str, run_immediately: bool = True) -> None:
+        job = self.jobs[name]
+        job.enabled = True
+        if run_immediately and job.interval:
+            job.next_run = time.monotonic()
+            if job._wake is not None and self._loop is not None:
+                self._loop.call_soon_threadsafe(job._wake.set)
+
+    def disable(self, name: str) -> None:
+        self.jobs[name].enabled = False
+
+    # -- événements --------------------------------------------------------
+    def emit(self, event: str, **payload: Any) -> int:
+        """Réveille les jobs abonnés à `event` ; renvoie le nombre de jobs notifiés."""
+        loop = self._loop
+        targets = [j for j in self.jobs.values() if event in j.events and j.enabled]
+        if loop is None or not targets:
+            return 0
+        self.events_emitted[event] = self.events_emitted.get(event, 0) + 1
+        item = {"event": event, **payload}
+
+        def _deliver() -> None:
+            for job in targets:
+                if job.busy or job._pending:
+                    job.stats.coalesced_events += 1
+                if len(job._pending) < MAX_PENDING_EVENTS:
+                    job._pending.append(item)
+                if job._wake is not None:
+                    job._wake.set()
+
+        try:
+            current = asyncio.get_running_loop()
+        except RuntimeError:
+            current = None
+        if current is loop:
+            _deliver()
+        else:
+            loop.call_soon_threadsafe(_deliver)
+        return len(targets)
+
+    def status(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "running": self.running,
+            "events_emitted": dict(self.events_emitted),
+            "jobs": {
+                name: {
+                    "enabled": job.enabled,
+                    "running": job.busy,
+                    "interval": job.interval,
+                    "events": list(job.events),
+                    "jitter": job.jitter,
+                    "timeout": job.timeout,
+                    "next_run_in": (
+                        round(max(0.0, job.next_run - now), 1)
+                        if job.next_run is not None and self.running else None
+                    ),
+                    **job.stats.to_dict(),
+                }
+                for name, job in self.jobs.items()
+            },
+        }
@@ -0,0 +1,300 @@
+"""
+Profilage à la demande du serveur IA en production (sans redémarrage).
+
+- SamplingProfiler : thread échantillonneur (sys._current_frames) actif seulement
+  pendant N secondes ; agrège les piles au format « collapsed » (flamegraph.pl,
+  speedscope, inferno). Aucun coût quand il ne tourne pas.
+- SymbolTracer + @traced : traçage par requête pour un symbole armé — spans
+  (début relatif, durée, profondeur) de chaque enrichisseur / gate. Désarmé, le
+  décorateur ne coûte qu'un test de booléen.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import functools
+import inspect
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+MAX_PROFILE_SECONDS = 120.0
+DEFAULT_INTERVAL_SEC = 0.005
+MAX_STACK_DEPTH = 96
+
+
+def _frame_label(frame: Any) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class SamplingProfiler:
+    """Échantillonneur statistique de toutes les threads Python."""
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL_SEC, max_depth: int = MAX_STACK_DEPTH):
+        self.interval = max(0.001, float(interval))
+        self.max_depth = int(max_depth)
+        self._counts: Counter = Counter()
+        self._samples = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.started_at = 0.0
+        self.stopped_at = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration: Optional[float] = None) -> None:
+        with self._lock:
+            if self.running:
+                raise RuntimeError("profiler already running")
+            self._counts = Counter()
+            self._samples = 0
+            self._stop.clear()
+            self.started_at = time.time()
+            self.stopped_at = 0.0
+            limit = min(float(duration or MAX_PROFILE_SECONDS), MAX_PROFILE_SECONDS)
+            self._thread = threading.Thread(target=self._run, args=(limit,), name="live-profiler", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=2.0)
+
+    def _run(self, limit: float) -> None:
+        me = threading.get_ident()
+        names = {}
+        deadline = time.monotonic() + limit
+        while not self._stop.wait(self.interval) and time.monotonic() < deadline:
+            if len(names) != threading.active_count():
+                names = {t.ident: t.name for t in threading.enumerate()}
+            for tid, frame in sys._current_frames().items():
+                if tid == me:
+                    continue
+                stack: List[str] = []
+                f = frame
+                while f is not None and len(stack) < self.max_depth:
+                    stack.append(_frame_label(f))
+                    f = f.f_back
+                stack.append(f"thread:{names.get(tid, tid)}")
+                self._counts[";".join(reversed(stack))] += 1
+            self._samples += 1
+        self.stopped_at = time.time()
+
+    def collapsed(self) -> str:
+        """Une ligne « frame;frame;frame count » par pile distincte."""
+        return "".join(f"{stack} {n}\n" for stack, n in self._counts.most_common())
+
+    def summary(self, top: int = 25) -> Dict[str, Any]:
+        """Fonctions les plus présentes en sommet de pile (self time) et en pile (total)."""
+        self_counts: Counter = Counter()
+        total_counts: Counter = Counter()
+        for stack, n in self._counts.items():
+            frames = stack.split(";")
+            self_counts[frames[-1]] += n
+            for fr in set(frames[1:]):
+                total_counts[fr] += n
+        total = sum(self._counts.values()) or 1
+        return {
+            "samples": self._samples,
+            "stacks": len(self._counts),
+            "interval_ms": round(self.interval * 1000, 3),
+            "duration_sec": round((self.stopped_at or time.time()) - self.started_at, 3) if self.started_at else 0.0,
+            "top_self": [{"frame": f, "pct": round(100.0 * n / total, 2)} for f, n in self_counts.most_common(top)],
+            "top_total": [{"frame": f, "pct": round(100.0 * n / total, 2)} for f, n in total_counts.most_common(top)],
+        }
+
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("live_profiler_trace", default=None)
+
+
+class _Trace:
+    __slots__ = ("symbol", "root", "t0", "spans", "depth")
+
+    def __init__(self, symbol: str, root: str):
+        self.symbol = symbol
+        self.root = root
+        self.t0 = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+        self.depth = 0
+
+
+class SymbolTracer:
+    """Traçage des appels @traced pour un symbole armé (N traces max ou TTL)."""
+
+    def __init__(self, keep: int = 50):
+        self.armed = False
+        self.symbol = ""
+        self.remaining = 0
+        self.expires_at = 0.0
+        self.traces: Deque[Dict[str, Any]] = deque(maxlen=keep)
+        self._lock = threading.Lock()
+
+    def arm(self, symbol: str, max_traces: int = 20, ttl_sec: float = 300.0) -> Dict[str, Any]:
+        with self._lock:
+            self.symbol = (symbol or "").strip().upper()
+            self.remaining = max(1, int(max_traces))
+            self.expires_at = time.time() + max(1.0, float(ttl_sec))
+            self.traces.clear()
+            self.armed = bool(self.symbol)
+        return self.status()
+
+    def disarm(self) -> None:
+        self.armed = False
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "armed": self.armed,
+            "symbol": self.symbol,
+            "remaining": self.remaining,
+            "expires_in_sec": round(max(0.0, self.expires_at - time.time()), 1) if self.armed else 0.0,
+            "traces": len(self.traces),
+        }
+
+    def matches(self, symbol: Any) -> bool:
+        if not self.armed:
+            return False
+        if time.time() > self.expires_at:
+            self.armed = False
+            return False
+        return isinstance(symbol, str) and symbol.strip().upper() == self.symbol
+
+    def _finish(self, trace: _Trace, total: float) -> None:
+        with self._lock:
+            self.traces.append({
+                "symbol": trace.symbol,
+                "root": trace.root,
+                "at": time.time(),
+                "total_ms": round(total * 1000, 3),
+                "spans": sorted(trace.spans, key=lambda s: s["start_ms"]),
+            })
+            self.remaining -= 1
+            if self.remaining <= 0:
+                self.armed = False
+
+
+def _symbol_getter(fn: Callable) -> Callable[[tuple, dict], Any]:
+    """Extracteur du symbole d'un appel : param symbol/mt5_symbol/sym, ou request.symbol."""
+    try:
+        params = list(inspect.signature(fn).parameters)
+    except (TypeError, ValueError):
+        params = []
+    for name in ("symbol", "mt5_symbol", "sym", "request", "req"):
+        if name in params:
+            idx = params.index(name)
+            break
+    else:
+        return lambda args, kwargs: None
+
+    def get(args: tuple, kwargs: dict) -> Any:
+        value = kwargs.get(name) if name in kwargs else (args[idx] if idx < len(args) else None)
+        if value is not None and not isinstance(value, str):
+            value = getattr(value, "symbol", None)
+        return value
+
+    return get
+
+
+def traced(name: Optional[str] = None, tracer: Optional["SymbolTracer"] = None) -> Callable[[Callable], Callable]:
+    """Décorateur de span (sync ou async) ; enregistre seulement pour le symbole armé."""
+
+    def deco(fn: Callable) -> Callable:
+        label = name or fn.__name__
+        get_symbol = _symbol_getter(fn)
+
+        def _enter(args: tuple, kwargs: dict):
+            t = tracer or _tracer
+            trace = _current_trace.get()
+            if trace is None:
+                symbol = get_symbol(args, kwargs)
+                if not t.matches(symbol):
+                    return None
+                trace = _Trace(t.symbol, label)
+                token = _current_trace.set(trace)
+            else:
+                token = None
+            start = time.perf_counter()
+            depth = trace.depth
+            trace.depth += 1
+            return trace, token, start, depth, t
+
+        def _exit(state, error: Optional[BaseException]) -> None:
+            trace, token, start, depth, t = state
+            end = time.perf_counter()
+            trace.depth = depth
+            span = {
+                "name": label,
+                "start_ms": round((start - trace.t0) * 1000, 3),
+                "dur_ms": round((end - start) * 1000, 3),
+                "depth": depth,
+            }
+            if error is not None:
+                span["error"] = type(error).__name__
+            trace.spans.append(span)
+            if token is not None:
+                _current_trace.reset(token)
+                t._finish(trace, end - trace.t0)
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                if not (tracer or _tracer).armed and _current_trace.get() is None:
+                    return await fn(*args, **kwargs)
+                state = _enter(args, kwargs)
+                if state is None:
+                    return await fn(*args, **kwargs)
+                try:
+                    result = await fn(*args, **kwargs)
+                except BaseException as exc:
+                    _exit(state, exc)
+                    raise
+                _exit(state, None)
+                return result
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not (tracer or _tracer).armed and _current_trace.get() is None:
+                return fn(*args, **kwargs)
+            state = _enter(args, kwargs)
+            if state is None:
+                return fn(*args, **kwargs)
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as exc:
+                _exit(state, exc)
+                raise
+            _exit(state, None)
+            return result
+        return wrapper
+
+    return deco
+
+
+_tracer = SymbolTracer()
+_profiler: Optional[SamplingProfiler] = None
+
+
+def get_tracer() -> SymbolTracer:
+    return _tracer
+
+
+def get_profiler() -> Optional[SamplingProfiler]:
+    """Dernier profiler lancé (résultats consultables après la fin)."""
+    return _profiler
+
+
+def start_profiler(seconds: float, interval: float = DEFAULT_INTERVAL_SEC) -> SamplingProfiler:
+    global _profiler
+    if _profiler is not None and _profiler.running:
+        raise RuntimeError("profiler already running")
+    _profiler = SamplingProfiler(interval=interval)
+    _profiler.start(duration=seconds)
+    return _profiler
@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Log Index — journaux JSON-lines rotatifs + index d'offsets par temps et type d'événement.
+
+- StructuredLogHandler : handler `logging` qui écrit un enregistrement JSON par ligne,
+  tourne par taille (fichier, .1, .2, ...) et tient pour chaque segment un index
+  sidecar `<segment>.idx` (ts, offset, event).
+- LogIndexReader : tail et requêtes filtrées (événement, symbole, niveau, fenêtre de
+  temps) servis par seek à partir de l'index, sans charger les fichiers.
+- tail_lines : dernières lignes d'un fichier texte quelconque, lues depuis la fin.
+
+Un fichier n'a qu'un seul écrivain : la rotation et les offsets de l'index sont propres
+au process (un fichier par worker en multi-process).
+"""
+
+import atexit
+import bisect
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Préfixe d'événement des messages existants : "FILLING_MODE_ERROR | Symbol: ..."
+_EVENT_RE = re.compile(r"^([A-Z][A-Z0-9_]{2,})\s*\|")
+_SYMBOL_RE = re.compile(r"Symbol:\s*([^|]+?)\s*(?:\||$)")
+
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+CHECKPOINT_EVERY = 256        # un point d'index temporel toutes les N lignes
+CHECKPOINT_SECONDS = 60.0     # ... ou toutes les 60 s
+
+
+def tail_lines(path: Path, limit: int = 100, encoding: str = "utf-8", block_size: int = 65536) -> List[str]:
+    """Dernières `limit` lignes d'un fichier en lisant des blocs depuis la fin."""
+    path = Path(path)
+    if limit <= 0 or not path.is_file():
+        return []
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        chunks: List[bytes] = []
+        newlines = 0
+        while pos > 0 and newlines <= limit:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            chunk = f.read(step)
+            chunks.append(chunk)
+            newlines += chunk.count(b"\n")
+    data = b"".join(reversed(chunks))
+    lines = data.decode(encoding, errors="replace").splitlines()
+    return lines[-limit:]
+
+
+def _iter_lines_reverse(path: Path, block_size: int = 65536) -> Iterator[bytes]:
+    """Lignes d'un fichier de la dernière à la première (lecture par blocs)."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        rest = b""
+        while pos > 0:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            buf = f.read(step) + rest
+            parts = buf.split(b"\n")
+            rest = parts[0]
+            for line in reversed(parts[1:]):
+                if line:
+                    yield line
+        if rest:
+            yield rest
+
+
+class StructuredLogHandler(logging.Handler):
+    """Écrit chaque record en JSON (une ligne) et indexe offset / temps / événement."""
+
+    def __init__(
+        self,
+        path: Path,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        backup_count: int = DEFAULT_BACKUP_COUNT,
+        checkpoint_every: int = CHECKPOINT_EVERY,
+        checkpoint_seconds: float = CHECKPOINT_SECONDS,
+    ):
+        super().__init__()
+        self.path = Path(path)
+        self.max_bytes = int(max_bytes)
+        self.backup_count = int(backup_count)
+        self.checkpoint_every = max(1, int(checkpoint_every))
+        self.checkpoint_seconds = float(checkpoint_seconds)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._open()
+
+    def _open(self) -> None:
+        self._fh = open(self.path, "ab")
+        self._idx = open(_idx_path(self.path), "ab")
+        # Premier record de chaque segment toujours indexé
+        self._since_checkpoint = self.checkpoint_every
+        self._last_checkpoint_ts = 0.0
+
+    def _close_files(self) -> None:
+        for fh in (getattr(self, "_fh", None), getattr(self, "_idx", None)):
+            if fh is not None and not fh.closed:
+                fh.close()
+
+    def _rollover(self) -> None:
+        self._close_files()
+        if self.backup_count > 0:
+            for i in range(self.backup_count - 1, 0, -1):
+                src, dst = _segment_path(self.path, i), _segment_path(self.path, i + 1)
+                for s, d in ((src, dst), (_idx_path(src), _idx_path(dst))):
+                    if s.exists():
+                        os.replace(s, d)
+            first = _segment_path(self.path, 1)
+            os.replace(self.path, first)
+            if _idx_path(self.path).exists():
+                os.replace(_idx_path(self.path), _idx_path(first))
+        else:
+            self.path.unlink(missing_ok=True)
+            _idx_path(self.path).unlink(missing_ok=True)
+        self._open()
+
+    @staticmethod
+    def record_to_dict(record: logging.LogRecord, message: str) -> Dict[str, Any]:
+        event = getattr(record, "event", None)
+        if not event:
+            m = _EVENT_RE.match(message)
+            event = m.group(1) if m else None
+        symbol = getattr(record, "symbol", None)
+        if not symbol and event:
+            m = _SYMBOL_RE.search(message)
+            symbol = m.group(1) if m else None
+        out: Dict[str, Any] = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": event,
+            "symbol": symbol,
+            "msg": message,
+        }
+        fields = getattr(record, "fields", None)
+        if isinstance(fields, dict):
+            out["fields"] = fields
+        return out
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            rec = self.record_to_dict(record, record.getMessage())
+            data = (json.dumps(rec, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+            self.acquire()
+            try:
+                offset = self._fh.tell()
+                if offset > 0 and offset + len(data) > self.max_bytes:
+                    self._rollover()
+                    offset = 0
+                self._fh.write(data)
+                self._fh.flush()
+                self._since_checkpoint += 1
+                ts = rec["ts"]
+                checkpoint = (
+                    self._since_checkpoint >= self.checkpoint_every
+                    or ts - self._last_checkpoint_ts >= self.checkpoint_seconds
+                )
+                if checkpoint or rec["event"]:
+                    self._idx.write(f"{ts:.3f} {offset} {rec['event'] or '-'}\n".encode("ascii", "replace"))
+                    self._idx.flush()
+                if checkpoint:
+                    self._since_checkpoint = 0
+                    self._last_checkpoint_ts = ts
+            finally:
+                self.release()
+        except Exception:
+            self.handleError(record)
+
+    def close(self) -> None:
+        self.acquire()
+        try:
+            self._close_files()
+        finally:
+            self.release()
+        super().close()
+
+
+def _segment_path(path: Path, n: int) -> Path:
+    return path if n == 0 else path.with_name(f"{path.name}.{n}")
+
+
+def _idx_path(segment: Path) -> Path:
+    return segment.with_name(segment.name + ".idx")
+
+
+class _SegmentIndex:
+    """Index d'un segment, relu de façon incrémentale (seules les lignes ajoutées)."""
+
+    def __init__(self, segment: Path):
+        self.segment = segment
+        self._reset(None)
+
+    def _reset(self, ino: Optional[int]) -> None:
+        self._ino = ino
+        self._pos = 0
+        self.times: List[float] = []
+        self.offsets: List[int] = []
+        self.by_event: Dict[str, Tuple[List[float], List[int]]] = {}
+
+    def refresh(self) -> "_SegmentIndex":
+        idx = _idx_path(self.segment)
+        try:
+            st = idx.stat()
+        except FileNotFoundError:
+            self._reset(None)
+            return self
+        if st.st_ino != self._ino or st.st_size < self._pos:
+            self._reset(st.st_ino)
+        if st.st_size == self._pos:
+            return self
+        with open(idx, "rb") as f:
+            f.seek(self._pos)
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+        self._pos += end
+        for raw in data[:end].splitlines():
+            try:
+                ts_s, off_s, event = raw.decode("ascii", "replace").split(" ", 2)
+                ts, off = float(ts_s), int(off_s)
+            except ValueError:
+                continue
+            self.times.append(ts)
+            self.offsets.append(off)
+            if event != "-":
+                times, offs = self.by_event.setdefault(event, ([], []))
+                times.append(ts)
+                offs.append(off)
+        return self
+
+    @property
+    def first_ts(self) -> Optional[float]:
+        return self.times[0] if self.times else None
+
+    def start_offset(self, since: Optional[float]) -> int:
+        """Offset du dernier point d'index antérieur à `since`."""
+        if since is None or not self.times:
+            return 0
+        i = bisect.bisect_right(self.times, since) - 1
+        return self.offsets[i] if i >= 0 else 0
+
+
+class LogIndexReader:
+    """Requêtes par seek sur un journal écrit par StructuredLogHandler."""
+
+    def __init__(self, path: Path, backup_count: int = DEFAULT_BACKUP_COUNT):
+        self.path = Path(path)
+        self.backup_count = int(backup_count)
+        self._indexes: Dict[Path, _SegmentIndex] = {}
+        self._lock = threading.Lock()
+
+    def segments(self) -> List[Path]:
+        """Segments existants, du plus récent au plus ancien."""
+        segs = [_segment_path(self.path, i) for i in range(self.backup_count + 1)]
+        return [s for s in segs if s.is_file()]
+
+    def _index(self, segment: Path) -> _SegmentIndex:
+        with self._lock:
+            idx = self._indexes.get(segment)
+            if idx is None:
+                idx = self._indexes[segment] = _SegmentIndex(segment)
+            return idx.refresh()
+
+    @staticmethod
+    def _parse(raw: bytes) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _match(rec: Dict[str, Any], level: Optional[str], symbol: Optional[str]) -> bool:
+        if level and rec.get("level") != level:
+            return False
+        if symbol and rec.get("symbol") != symbol:
+            return False
+        return True
+
+    def _read_at(self, segment: Path, offsets: Iterable[int]) -> Iterator[Dict[str, Any]]:
+        with open(segment, "rb") as f:
+            for off in offsets:
+                f.seek(off)
+                rec = self._parse(f.readline())
+                if rec is not None:
+                    yield rec
+
+    def tail(
+        self,
+        limit: int = 100,
+        event: Optional[str] = None,
+        level: Optional[str] = None,
+        symbol: Optional[str] = None,
+        since: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """Derniers `limit` records correspondants, ordre chronologique."""
+        out: List[Dict[str, Any]] = []
+        level = level.upper() if level else None
+        for seg in self.segments():
+            if event:
+                idx = self._index(seg)
+                times, offs = idx.by_event.get(event, ([], []))
+                lo = bisect.bisect_left(times, since) if since is not None else 0
+                recs = self._read_at(seg, reversed(offs[lo:]))
+            else:
+                recs = (r for r in map(self._parse, _iter_lines_reverse(seg)) if r is not None)
+            for rec in recs:
+                if since is not None and float(rec.get("ts") or 0) < since:
+                    return out[::-1]
+                if self._match(rec, level, symbol):
+                    out.append(rec)
+                    if len(out) >= limit:
+                        return out[::-1]
+        return out[::-1]
+
+    def query(
+        self,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        events: Optional[Iterable[str]] = None,
+        level: Optional[str] = None,
+        symbol: Optional[str] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Records de la fenêtre [since, until], ordre chronologique."""
+        level = level.upper() if level else None
+        wanted = set(events) if events else None
+        segs = self.segments()
+        # Ignorer les segments entièrement antérieurs à `since`
+        start = len(segs)
+        if since is not None:
+            for i, seg in enumerate(segs):
+                first = self._index(seg).first_ts
+                if first is not None and first <= since:
+                    start = i + 1
+                    break
+        for seg in reversed(segs[:start]):
+            idx = self._index(seg)
+            if wanted is not None:
+                merged: List[Tuple[float, int]] = []
+                for ev in wanted:
+                    times, offs = idx.by_event.get(ev, ([], []))
+                    lo = bisect.bisect_left(times, since) if since is not None else 0
+                    merged.extend(zip(times[lo:], offs[lo:]))
+                merged.sort()
+                recs: Iterable[Dict[str, Any]] = self._read_at(seg, (o for _, o in merged))
+            else:
+                recs = self._scan_from(seg, idx.start_offset(since))
+            for rec in recs:
+                ts = float(rec.get("ts") or 0)
+                if since is not None and ts < since:
+                    continue
+                if until is not None and ts > until:
+                    return
+                if self._match(rec, level, symbol):
+                    yield rec
+
+    def _scan_from(self, segment: Path, offset: int) -> Iterator[Dict[str, Any]]:
+        with open(segment, "rb") as f:
+            f.seek(offset)
+            for raw in f:
+                rec = self._parse(raw)
+                if rec is not None:
+                    yield rec
+
+    def stats(self) -> Dict[str, Any]:
+        segs = self.segments()
+        events: Dict[str, int] = {}
+        for seg in segs:
+            for ev, (times, _) in self._index(seg).by_event.items():
+                events[ev] = events.get(ev, 0) + len(times)
+        return {
+            "path": str(self.path),
+            "segments": len(segs),
+            "bytes": sum(s.stat().st_size for s in segs),
+            "events": dict(sorted(events.items())),
+        }
+
+
+def _stop_listener(listener: logging.handlers.QueueListener) -> None:
+    try:
+        listener.stop()
+    except AttributeError:
+        pass  # déjà arrêté
+
+
+def attach_structured_log(
+    path: Path,
+    logger: Optional[logging.Logger] = None,
+    level: int = logging.INFO,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    backup_count: int = DEFAULT_BACKUP_COUNT,
+    queued: bool = False,
+) -> StructuredLogHandler:
+    """
+    Ajoute (une seule fois) un StructuredLogHandler sur `logger` (root par défaut).
+
+    Avec `queued`, le logger ne reçoit qu'un QueueHandler : l'écriture du fichier et de
+    l'index se fait dans le thread d'un QueueListener (arrêté à la sortie du process).
+    """
+    target = logger or logging.getLogger()
+    path = Path(path)
+    for h in target.handlers:
+        inner = getattr(h, "structured_handler", h)
+        if isinstance(inner, StructuredLogHandler) and inner.path == path:
+            return inner
+    handler = StructuredLogHandler(path, max_bytes=max_bytes, backup_count=backup_count)
+    handler.setLevel(level)
+    if not queued:
+        target.addHandler(handler)
+        return handler
+    q: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    front = logging.handlers.QueueHandler(q)
+    front.setLevel(level)
+    front.structured_handler = handler  # type: ignore[attr-defined]
+    listener = logging.handlers.QueueListener(q, handler, respect_handler_level=True)
+    listener.start()
+    handler.listener = listener  # type: ignore[attr-defined]
+    atexit.register(_stop_listener, listener)
+    target.addHandler(front)
+    return handler
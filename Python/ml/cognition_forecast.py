@@ -5,10 +5,10 @@ Intégré à ai_server + EA MT5 (SMC_FuturePath).
 
 from __future__ import annotations
 
-import math
 from dataclasses import dataclass
+from functools import lru_cache
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Mapping, Optional, Tuple
 
 import numpy as np
 import pandas as pd
@@ -40,25 +40,55 @@ class CognitionForecast200:
     horizon: int = DEFAULT_HORIZON
 
 
+_TAIL_BARS = 30
+
+
+def _ohlc_tail(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """Colonnes OHLC des dernières bougies en ndarray (extraites une fois par forecast)."""
+    return {k: df[k].to_numpy(dtype=float)[-_TAIL_BARS:] for k in ("open", "high", "low", "close")}
+
+
 def _atr(df: pd.DataFrame, n: int = 14) -> float:
-    h, l, c = df["high"], df["low"], df["close"]
-    tr = np.maximum(h - l, np.maximum(abs(h - c.shift()), abs(l - c.shift())))
-    val = tr.rolling(n).mean().iloc[-1]
-    if val is None or np.isnan(val):
-        return float(c.iloc[-1] * 0.001)
-    return float(val)
+    return _atr_tail(_ohlc_tail(df), n)
+
+
+def _atr_tail(tail: Dict[str, np.ndarray], n: int = 14) -> float:
+    """Moyenne des n derniers true ranges."""
+    c = tail["close"]
+    if len(c) < n + 1:
+        return float(c[-1] * 0.001)
+    h = tail["high"][-n:]
+    l = tail["low"][-n:]
+    prev = c[-n - 1:-1]
+    tr = np.maximum(h - l, np.maximum(np.abs(h - prev), np.abs(l - prev)))
+    val = float(tr.mean())
+    if np.isnan(val):
+        return float(c[-1] * 0.001)
+    return val
+
+
+def _sorted_by_time(df: pd.DataFrame) -> pd.DataFrame:
+    # flux MT5 déjà chronologique : pas de copie (les lectures en aval sont positionnelles)
+    if df["time"].is_monotonic_increasing:
+        return df
+    return df.sort_values("time").reset_index(drop=True)
 
 
 def _pattern_tags(df: pd.DataFrame) -> Tuple[List[str], float, str]:
-    tags: List[str] = []
-    bias = 0.0
     if len(df) < 30:
-        return tags, 0.0, "NEUTRAL"
+        return [], 0.0, "NEUTRAL"
+    return _pattern_tags_tail(_ohlc_tail(df))
 
-    c0, c1 = df.iloc[-1], df.iloc[-2]
-    body0 = abs(float(c0["close"]) - float(c0["open"]))
-    rng20 = float(df["high"].tail(20).max() - df["low"].tail(20).min())
-    rng5 = float(df["high"].tail(5).max() - df["low"].tail(5).min())
+
+def _pattern_tags_tail(tail: Dict[str, np.ndarray]) -> Tuple[List[str], float, str]:
+    tags: List[str] = []
+    bias = 0.0
+    tail = {k: v[-20:] for k, v in tail.items()}
+    o0, h0, l0, cl0 = (float(tail[k][-1]) for k in ("open", "high", "low", "close"))
+    o1, cl1 = float(tail["open"][-2]), float(tail["close"][-2])
+    body0 = abs(cl0 - o0)
+    rng20 = float(np.nanmax(tail["high"]) - np.nanmin(tail["low"]))
+    rng5 = float(np.nanmax(tail["high"][-5:]) - np.nanmin(tail["low"][-5:]))
 
     if rng20 > 0 and rng5 < rng20 * 0.45:
         tags.append("COMPRESSION")
@@ -66,18 +96,8 @@ def _pattern_tags(df: pd.DataFrame) -> Tuple[List[str], float, str]:
     if rng20 > 0 and body0 > rng20 * 0.15:
         tags.append("EXPANSION")
 
-    bull_engulf = (
-        float(c1["close"]) < float(c1["open"])
-        and float(c0["close"]) > float(c0["open"])
-        and float(c0["open"]) <= float(c1["close"])
-        and float(c0["close"]) >= float(c1["open"])
-    )
-    bear_engulf = (
-        float(c1["close"]) > float(c1["open"])
-        and float(c0["close"]) < float(c0["open"])
-        and float(c0["open"]) >= float(c1["close"])
-        and float(c0["close"]) <= float(c1["open"])
-    )
+    bull_engulf = cl1 < o1 and cl0 > o0 and o0 <= cl1 and cl0 >= o1
+    bear_engulf = cl1 > o1 and cl0 < o0 and o0 >= cl1 and cl0 <= o1
     if bull_engulf:
         tags.append("BULL_ENGULF")
         bias += 0.12
@@ -85,18 +105,14 @@ def _pattern_tags(df: pd.DataFrame) -> Tuple[List[str], float, str]:
         tags.append("BEAR_ENGULF")
         bias -= 0.12
 
-    hammer = (
-        (min(float(c0["open"]), float(c0["close"])) - float(c0["low"])) >= body0 * 1.8
-        and (float(c0["high"]) - max(float(c0["open"]), float(c0["close"]))) <= body0 * 0.6
-    )
-    shooting = (
-        (float(c0["high"]) - max(float(c0["open"]), float(c0["close"]))) >= body0 * 1.8
-        and (min(float(c0["open"]), float(c0["close"])) - float(c0["low"])) <= body0 * 0.6
-    )
-    if hammer and float(c0["close"]) > float(c0["open"]):
+    lower_wick = min(o0, cl0) - l0
+    upper_wick = h0 - max(o0, cl0)
+    hammer = lower_wick >= body0 * 1.8 and upper_wick <= body0 * 0.6
+    shooting = upper_wick >= body0 * 1.8 and lower_wick <= body0 * 0.6
+    if hammer and cl0 > o0:
         tags.append("HAMMER")
         bias += 0.06
-    elif shooting and float(c0["close"]) < float(c0["open"]):
+    elif shooting and cl0 < o0:
         tags.append("SHOOTING_STAR")
         bias -= 0.06
 
@@ -120,33 +136,45 @@ def _regime_from_gom(gom: Optional[Dict[str, Any]]) -> Tuple[str, float]:
     return "WAIT", 0.0
 
 
-def forecast_200(
-    df: pd.DataFrame,
-    symbol: str,
-    timeframe: str = "M1",
-    horizon: int = DEFAULT_HORIZON,
-    gom: Optional[Dict[str, Any]] = None,
-    bc_confidence: float = 0.0,
-) -> CognitionForecast200:
-    horizon = int(max(10, min(500, horizon)))
-
-    if df is None or len(df) < 50:
-        last = float(df["close"].iloc[-1]) if df is not None and len(df) else 0.0
-        flat = [last] * horizon
-        return CognitionForecast200(
-            symbol, timeframe, "NEUTRAL", 0.0, 0.3, 0.0,
-            flat, flat, flat, flat, flat, flat, [], "UNKNOWN", horizon,
-        )
-
-    if "time" in df.columns:
-        df = df.sort_values("time").reset_index(drop=True)
+@lru_cache(maxsize=16)
+def _path_basis(horizon: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Courbes communes à tous les symboles pour un horizon : drift, micro-oscillation, cône d'incertitude."""
+    t = np.arange(1, horizon + 1, dtype=float) / horizon
+    drift = 1.0 - np.exp(-3.5 * t)
+    micro = np.sin(t * np.pi * 4.0) * 0.15 * (1.0 - t)
+    cone = 0.35 + 0.85 * t
+    for arr in (drift, micro, cone):
+        arr.flags.writeable = False
+    return drift, micro, cone
 
-    last_close = float(df["close"].iloc[-1])
-    atr = max(_atr(df), last_close * 1e-4)
 
-    patterns, pat_bias, pat_dir = _pattern_tags(df)
+def _forecast_params(
+    df: pd.DataFrame,
+    symbol: str,
+    gom: Optional[Dict[str, Any]],
+    bc_confidence: float,
+    feature_ctx: Any,
+    hour_utc: Optional[int],
+) -> Dict[str, Any]:
+    """Scalaires du chemin (direction, force, ATR, ratio de mèche) ; un seul passage sur le DataFrame."""
+    if feature_ctx is not None:
+        if "time" in df.columns:
+            df = feature_ctx.memo_frame("sorted", df, _sorted_by_time)
+        raw_atr = feature_ctx.memo_frame("atr", df, _atr)
+        patterns, pat_bias, pat_dir = feature_ctx.memo_frame("patterns", df, _pattern_tags)
+        patterns = list(patterns)
+        tail = _ohlc_tail(df)
+    else:
+        if "time" in df.columns:
+            df = _sorted_by_time(df)
+        tail = _ohlc_tail(df)
+        raw_atr = _atr_tail(tail)
+        patterns, pat_bias, pat_dir = _pattern_tags_tail(tail) if len(df) >= 30 else ([], 0.0, "NEUTRAL")
+
+    last_close = float(tail["close"][-1])
+    atr = max(raw_atr, last_close * 1e-4)
     regime, gom_bias = _regime_from_gom(gom)
-    mem_bias = memory_bias_for_symbol(symbol)
+    mem_bias = memory_bias_for_symbol(symbol, hour_utc)
 
     raw_force = pat_bias + gom_bias + mem_bias
     if bc_confidence >= 60:
@@ -162,60 +190,123 @@ def forecast_200(
     else:
         direction = pat_dir if pat_dir != "NEUTRAL" else "NEUTRAL"
 
-    max_drift = 4.0 * atr * strength
-    sign = 1.0 if direction == "BUY" else -1.0 if direction == "SELL" else 0.0
-
-    closes: List[float] = []
-    highs: List[float] = []
-    lows: List[float] = []
-    opens: List[float] = []
-    q10: List[float] = []
-    q90: List[float] = []
-
-    rng = df["high"] - df["low"]
-    wick_ratio = float(rng.tail(30).mean() / max(atr, 1e-8))
-
-    prev_close = last_close
-    for i in range(horizon):
-        t = (i + 1) / horizon
-        drift = sign * max_drift * (1.0 - math.exp(-3.5 * t))
-        micro = math.sin(t * math.pi * 4.0) * atr * 0.15 * (1.0 - t)
-        c = last_close + drift + micro
-        unc = atr * (0.35 + 0.85 * t) * (1.1 - 0.3 * strength)
-
-        o = prev_close
-        h = max(o, c) + unc * wick_ratio * 0.4
-        l = min(o, c) - unc * wick_ratio * 0.4
-
-        closes.append(c)
-        opens.append(o)
-        highs.append(h)
-        lows.append(l)
-        q10.append(c - unc)
-        q90.append(c + unc)
-        prev_close = c
-
-    confidence = float(np.clip(0.35 + strength * 0.45 + (bc_confidence / 100.0) * 0.15, 0.2, 0.92))
+    bar_range = tail["high"] - tail["low"]
+    wick_ratio = float(np.nanmean(bar_range) / max(atr, 1e-8))
+    return {
+        "last_close": last_close,
+        "atr": atr,
+        "strength": strength,
+        "direction": direction,
+        "sign": 1.0 if direction == "BUY" else -1.0 if direction == "SELL" else 0.0,
+        "wick_ratio": wick_ratio,
+        "patterns": patterns,
+        "regime": regime,
+        "confidence": float(np.clip(0.35 + strength * 0.45 + (bc_confidence / 100.0) * 0.15, 0.2, 0.92)),
+    }
+
+
+def _paths(params: List[Dict[str, Any]], horizon: int) -> Dict[str, np.ndarray]:
+    """Chemins OHLC + quantiles de N symboles en une passe : matrices (N, horizon)."""
+    drift, micro, cone = _path_basis(horizon)
+
+    def col(key: str) -> np.ndarray:
+        return np.array([p[key] for p in params], dtype=float)[:, None]
 
+    last, atr, strength = col("last_close"), col("atr"), col("strength")
+
+    closes = last + col("sign") * (4.0 * atr * strength) * drift + atr * micro
+    unc = atr * cone * (1.1 - 0.3 * strength)
+    opens = np.empty_like(closes)
+    opens[:, 0] = last[:, 0]
+    opens[:, 1:] = closes[:, :-1]
+    wick = unc * col("wick_ratio") * 0.4
+    return {
+        "closes": closes,
+        "opens": opens,
+        "highs": np.maximum(opens, closes) + wick,
+        "lows": np.minimum(opens, closes) - wick,
+        "q10": closes - unc,
+        "q90": closes + unc,
+    }
+
+
+def _flat_forecast(df: Optional[pd.DataFrame], symbol: str, timeframe: str, horizon: int) -> CognitionForecast200:
+    last = float(df["close"].iloc[-1]) if df is not None and len(df) else 0.0
+    flat = [last] * horizon
     return CognitionForecast200(
-        symbol=symbol,
-        timeframe=timeframe,
-        direction=direction,
-        strength=strength,
-        confidence=confidence,
-        atr=atr,
-        closes=closes,
-        highs=highs,
-        lows=lows,
-        opens=opens,
-        q10=q10,
-        q90=q90,
-        patterns=patterns,
-        regime=regime,
-        horizon=horizon,
+        symbol, timeframe, "NEUTRAL", 0.0, 0.3, 0.0,
+        flat, flat, flat, flat, flat, flat, [], "UNKNOWN", horizon,
     )
 
 
+def forecast_200_batch(
+    frames: Mapping[str, pd.DataFrame],
+    timeframe: str = "M1",
+    horizon: int = DEFAULT_HORIZON,
+    gom: Optional[Mapping[str, Dict[str, Any]]] = None,
+    bc_confidence: Optional[Mapping[str, float]] = None,
+    feature_ctx: Optional[Mapping[str, Any]] = None,
+) -> Dict[str, CognitionForecast200]:
+    """Forecast de plusieurs symboles : scalaires par symbole, chemins calculés en une seule matrice."""
+    horizon = int(max(10, min(500, horizon)))
+    gom = gom or {}
+    bc_confidence = bc_confidence or {}
+    feature_ctx = feature_ctx or {}
+    hour_utc = datetime.now(timezone.utc).hour
+
+    out: Dict[str, CognitionForecast200] = {}
+    ready: List[Tuple[str, Dict[str, Any]]] = []
+    for symbol, df in frames.items():
+        if df is None or len(df) < 50:
+            out[symbol] = _flat_forecast(df, symbol, timeframe, horizon)
+            continue
+        params = _forecast_params(
+            df, symbol, gom.get(symbol), float(bc_confidence.get(symbol, 0.0) or 0.0),
+            feature_ctx.get(symbol), hour_utc,
+        )
+        ready.append((symbol, params))
+
+    if ready:
+        paths = {k: v.tolist() for k, v in _paths([p for _, p in ready], horizon).items()}
+        for row, (symbol, p) in enumerate(ready):
+            out[symbol] = CognitionForecast200(
+                symbol=symbol,
+                timeframe=timeframe,
+                direction=p["direction"],
+                strength=p["strength"],
+                confidence=p["confidence"],
+                atr=p["atr"],
+                closes=paths["closes"][row],
+                highs=paths["highs"][row],
+                lows=paths["lows"][row],
+                opens=paths["opens"][row],
+                q10=paths["q10"][row],
+                q90=paths["q90"][row],
+                patterns=p["patterns"],
+                regime=p["regime"],
+                horizon=horizon,
+            )
+    return {symbol: out[symbol] for symbol in frames}
+
+
+def forecast_200(
+    df: pd.DataFrame,
+    symbol: str,
+    timeframe: str = "M1",
+    horizon: int = DEFAULT_HORIZON,
+    gom: Optional[Dict[str, Any]] = None,
+    bc_confidence: float = 0.0,
+    feature_ctx: Any = None,
+) -> CognitionForecast200:
+    """`feature_ctx` (ml.feature_context) partage tri, ATR et patterns entre appels."""
+    return forecast_200_batch(
+        {symbol: df}, timeframe, horizon,
+        gom={symbol: gom} if gom else None,
+        bc_confidence={symbol: bc_confidence},
+        feature_ctx={symbol: feature_ctx} if feature_ctx is not None else None,
+    )[symbol]
+
+
 def timeframe_bar_seconds(timeframe: str) -> int:
     tf = (timeframe or "M1").upper()
     mapping = {
@@ -227,17 +318,10 @@ def timeframe_bar_seconds(timeframe: str) -> int:
 
 def to_mt5_payload(fc: CognitionForecast200, bar_seconds: Optional[int] = None) -> Dict[str, Any]:
     bar_sec = bar_seconds or timeframe_bar_seconds(fc.timeframe)
-    candles = []
-    for i in range(len(fc.closes)):
-        candles.append({
-            "t_offset_sec": (i + 1) * bar_sec,
-            "open": fc.opens[i],
-            "high": fc.highs[i],
-            "low": fc.lows[i],
-            "close": fc.closes[i],
-            "q10": fc.q10[i],
-            "q90": fc.q90[i],
-        })
+    candles = [
+        {"t_offset_sec": (i + 1) * bar_sec, "open": o, "high": h, "low": l, "close": c, "q10": lo, "q90": hi}
+        for i, (o, h, l, c, lo, hi) in enumerate(zip(fc.opens, fc.highs, fc.lows, fc.closes, fc.q10, fc.q90))
+    ]
 
     return {
         "ok": True,
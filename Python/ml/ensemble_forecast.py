@@ -0,0 +1,264 @@
+"""
+Ensemble Monte Carlo — chemins OHLC futurs simulés en bloc (matrice chemins × horizon).
+Bootstrap par blocs des rendements log historiques, conditionné au régime de volatilité courant ;
+mèches tirées avec leur bougie d'origine. Sortie : OHLC médian + bandes q10/q50/q90 par bougie.
+Résultats mis en cache par (symbole, dernière bougie, horizon, paramètres).
+"""
+
+from __future__ import annotations
+
+import threading
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_PATHS = 2000
+DEFAULT_BLOCK = 8
+MIN_HISTORY = 50
+VOL_WINDOW = 20
+QUANTILES = (0.1, 0.5, 0.9)
+
+
+@dataclass
+class EnsembleForecast:
+    symbol: str
+    last_bar: Any
+    horizon: int
+    n_paths: int
+    regime: str
+    opens: np.ndarray
+    highs: np.ndarray
+    lows: np.ndarray
+    closes: np.ndarray  # médiane des clôtures (= q50)
+    q10: np.ndarray
+    q50: np.ndarray
+    q90: np.ndarray
+    low_q10: np.ndarray
+    high_q90: np.ndarray
+    prob_up: float  # part des chemins au-dessus du dernier close à l'horizon
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "symbol": self.symbol,
+            "horizon": self.horizon,
+            "n_paths": self.n_paths,
+            "regime": self.regime,
+            "prob_up": round(self.prob_up, 4),
+            "closes": self.closes.tolist(),
+            "q10": self.q10.tolist(),
+            "q50": self.q50.tolist(),
+            "q90": self.q90.tolist(),
+        }
+
+
+def _history_arrays(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Rendements log close→close + mèches log haute/basse de chaque bougie (alignées sur le rendement)."""
+    o = df["open"].to_numpy(dtype=float)
+    h = df["high"].to_numpy(dtype=float)
+    l = df["low"].to_numpy(dtype=float)
+    c = df["close"].to_numpy(dtype=float)
+    ok = np.isfinite(o) & np.isfinite(h) & np.isfinite(l) & np.isfinite(c) & (l > 0) & (c > 0) & (o > 0)
+    o, h, l, c = o[ok], h[ok], l[ok], c[ok]
+    rets = np.diff(np.log(c))
+    body_hi = np.maximum(o, c)[1:]
+    body_lo = np.minimum(o, c)[1:]
+    up = np.log(np.maximum(h[1:], body_hi) / body_hi)
+    dn = np.log(body_lo / np.minimum(l[1:], body_lo))
+    return rets, up, dn, c
+
+
+def _regime_pool(rets: np.ndarray, block: int) -> Tuple[np.ndarray, str]:
+    """Indices de départ de blocs dont la volatilité glissante est dans le même tercile que la volatilité actuelle."""
+    n_starts = len(rets) - block + 1
+    if len(rets) < VOL_WINDOW * 3:
+        return np.arange(max(1, n_starts)), "ALL"
+    vol = pd.Series(rets).rolling(VOL_WINDOW, min_periods=VOL_WINDOW // 2).std().to_numpy()
+    valid = np.isfinite(vol)
+    lo_cut, hi_cut = np.quantile(vol[valid], [1 / 3, 2 / 3])
+    current = vol[-1]
+    if current <= lo_cut:
+        mask, regime = vol <= lo_cut, "LOW_VOL"
+    elif current >= hi_cut:
+        mask, regime = vol >= hi_cut, "HIGH_VOL"
+    else:
+        mask, regime = (vol > lo_cut) & (vol < hi_cut), "MID_VOL"
+    starts = np.flatnonzero(mask[:n_starts] & valid[:n_starts])
+    if len(starts) < block * 4:
+        return np.arange(n_starts), "ALL"
+    return starts, regime
+
+
+def simulate_paths(
+    df: pd.DataFrame,
+    horizon: int,
+    n_paths: int = DEFAULT_PATHS,
+    block: int = DEFAULT_BLOCK,
+    center: Optional[Sequence[float]] = None,
+    vol_mult: float = 1.0,
+    rng: Optional[np.random.Generator] = None,
+) -> Dict[str, Any]:
+    """
+    Matrices (n_paths, horizon) open/high/low/close.
+    `center` : chemin déterministe (ex. predict_prices_advanced) utilisé comme dérive ; les rendements
+    bootstrapés sont alors recentrés et ne portent plus que la dispersion.
+    """
+    rng = rng or np.random.default_rng()
+    rets, up, dn, closes = _history_arrays(df)
+    last = float(closes[-1])
+    block = int(max(1, min(block, len(rets) // 4 or 1)))
+    starts, regime = _regime_pool(rets, block)
+
+    n_blocks = -(-horizon // block)
+    idx = rng.choice(starts, size=(n_paths, n_blocks))[:, :, None] + np.arange(block)
+    idx = idx.reshape(n_paths, n_blocks * block)[:, :horizon]
+
+    r = rets[idx]
+    if center is not None and len(center) >= horizon:
+        ref = np.log(np.maximum(np.asarray(center[:horizon], dtype=float), 1e-12))
+        drift = np.diff(ref, prepend=np.log(last))
+        r = (r - rets.mean()) * vol_mult + drift
+    elif vol_mult != 1.0:
+        mu = rets.mean()
+        r = (r - mu) * vol_mult + mu
+
+    log_close = np.log(last) + np.cumsum(r, axis=1)
+    c = np.exp(log_close)
+    o = np.empty_like(c)
+    o[:, 0] = last
+    o[:, 1:] = c[:, :-1]
+    h = np.maximum(o, c) * np.exp(up[idx] * vol_mult)
+    l = np.minimum(o, c) * np.exp(-dn[idx] * vol_mult)
+    return {"open": o, "high": h, "low": l, "close": c, "last": last, "regime": regime}
+
+
+def _order_stats(x: np.ndarray, qs: Sequence[float]) -> List[np.ndarray]:
+    """Quantiles par bougie depuis un seul tri (colonnes contiguës) — plus rapide que np.quantile répété."""
+    srt = np.sort(np.ascontiguousarray(x.T), axis=1)
+    n = srt.shape[1]
+    out = []
+    for q in qs:
+        pos = q * (n - 1)
+        lo = int(np.floor(pos))
+        hi = min(lo + 1, n - 1)
+        w = pos - lo
+        out.append(srt[:, lo] * (1.0 - w) + srt[:, hi] * w)
+    return out
+
+
+def summarize_paths(paths: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """OHLC médian (cohérent : high ≥ max(open, close) chemin par chemin, donc en médiane) + quantiles."""
+    c = paths["close"]
+    q10, q50, q90 = _order_stats(c, QUANTILES)
+    low_q10, low_med = _order_stats(paths["low"], (0.1, 0.5))
+    high_med, high_q90 = _order_stats(paths["high"], (0.5, 0.9))
+    (open_med,) = _order_stats(paths["open"], (0.5,))
+    return {
+        "open": open_med,
+        "high": high_med,
+        "low": low_med,
+        "close": q50,
+        "q10": q10,
+        "q50": q50,
+        "q90": q90,
+        "low_q10": low_q10,
+        "high_q90": high_q90,
+        "prob_up": float(np.mean(c[:, -1] > paths["last"])),
+    }
+
+
+def _last_bar_key(df: pd.DataFrame) -> Hashable:
+    t = df["time"].iat[-1] if "time" in df.columns else df.index[-1]
+    return (str(t), len(df), float(df["close"].iat[-1]))
+
+
+class EnsembleForecaster:
+    """Moteur partagé : un tirage par (symbole, dernière bougie) — les appels suivants sont servis du cache."""
+
+    def __init__(
+        self,
+        n_paths: int = DEFAULT_PATHS,
+        block: int = DEFAULT_BLOCK,
+        max_entries: int = 512,
+        seed: Optional[int] = None,
+    ):
+        self.n_paths = int(n_paths)
+        self.block = int(block)
+        self.max_entries = int(max_entries)
+        self._seed = seed
+        self._cache: "OrderedDict[Hashable, EnsembleForecast]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def forecast(
+        self,
+        df: pd.DataFrame,
+        horizon: int,
+        symbol: str = "UNKNOWN",
+        center: Union[None, Sequence[float], Callable[[], Optional[Sequence[float]]]] = None,
+        vol_mult: float = 1.0,
+        n_paths: Optional[int] = None,
+    ) -> Optional[EnsembleForecast]:
+        """`center` peut être une fonction : appelée seulement en cas de miss cache."""
+        if df is None or len(df) < MIN_HISTORY:
+            return None
+        horizon = int(max(1, horizon))
+        n = int(n_paths or self.n_paths)
+        last_bar = _last_bar_key(df)
+        key = (symbol, last_bar, horizon, n, round(float(vol_mult), 3), center is not None)
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return hit
+            self.misses += 1
+
+        path_center = center() if callable(center) else center
+        # crc32 et non hash() : hash des str est salé par process (PYTHONHASHSEED), les workers divergeraient
+        seed = self._seed if self._seed is not None else zlib.crc32(f"{symbol}|{last_bar}".encode("utf-8"))
+        paths = simulate_paths(
+            df, horizon, n, self.block, center=path_center, vol_mult=vol_mult,
+            rng=np.random.default_rng(seed),
+        )
+        s = summarize_paths(paths)
+        fc = EnsembleForecast(
+            symbol=symbol, last_bar=last_bar, horizon=horizon, n_paths=n, regime=paths["regime"],
+            opens=s["open"], highs=s["high"], lows=s["low"], closes=s["close"],
+            q10=s["q10"], q50=s["q50"], q90=s["q90"],
+            low_q10=s["low_q10"], high_q90=s["high_q90"], prob_up=s["prob_up"],
+        )
+        for arr in (fc.opens, fc.highs, fc.lows, fc.closes, fc.q10, fc.q50, fc.q90, fc.low_q10, fc.high_q90):
+            arr.flags.writeable = False
+        with self._lock:
+            self._cache[key] = fc
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return fc
+
+    def forecast_many(
+        self, frames: Dict[str, pd.DataFrame], horizon: int, **kwargs: Any
+    ) -> Dict[str, Optional[EnsembleForecast]]:
+        return {sym: self.forecast(df, horizon, symbol=sym, **kwargs) for sym, df in frames.items()}
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else None,
+            "n_paths": self.n_paths,
+            "block": self.block,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+ensemble_forecaster = EnsembleForecaster()
@@ -0,0 +1,161 @@
+"""
+Contexte de features partagé par (symbole, clôture de bougie) pour la chaîne GOM.
+
+Les enrichisseurs (_enrich_correction_cycle, _enrich_cognition_forecast) et les gates
+(_check_cognition_gate, _check_probability_gate) lisent les mêmes bougies : chaque
+série dérivée (RSI, ATR, tags de patterns, forecast) est calculée une seule fois par
+contexte puis réutilisée. Un nouveau contexte est créé dès que les bougies du
+symbole changent (nouvelle clôture) ou après `ttl_sec`.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+DEFAULT_TTL_SEC = 30.0
+
+Fetcher = Callable[[str, str, int], Any]
+
+
+def frames_signature(frames: Dict[str, Any]) -> Tuple:
+    """Empreinte (tf, nb bougies, dernière bougie) — change à chaque clôture."""
+    sig = []
+    for tf in sorted(frames):
+        df = frames[tf]
+        if df is None or not len(df):
+            continue
+        col = "time" if "time" in df.columns else "close"
+        sig.append((tf, len(df), str(df[col].iloc[-1])))
+    return tuple(sig)
+
+
+class FeatureContext:
+    """Memo des features d'un symbole pour un jeu de bougies donné."""
+
+    def __init__(
+        self,
+        symbol: str,
+        frames: Dict[str, Any],
+        signature: Tuple = (),
+        fetcher: Optional[Fetcher] = None,
+        counters: Optional[Dict[str, list]] = None,
+    ):
+        self.symbol = symbol
+        self.frames = dict(frames)
+        self.signature = signature
+        self.created_at = time.time()
+        self._fetcher = fetcher
+        self._memo: Dict[Hashable, Any] = {}
+        self._lock = threading.RLock()
+        self.counters: Dict[str, list] = counters if counters is not None else defaultdict(lambda: [0, 0])
+        self.hits = 0
+        self.misses = 0
+
+    def _count(self, kind: str, hit: bool) -> None:
+        self.counters[kind][0 if hit else 1] += 1
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def memo(self, key: Tuple, fn: Callable[[], Any]) -> Any:
+        """Valeur calculée une fois par contexte (key[0] = nom de la feature)."""
+        with self._lock:
+            if key in self._memo:
+                self._count(str(key[0]), True)
+                return self._memo[key]
+            value = fn()
+            self._memo[key] = value
+            self._count(str(key[0]), False)
+            return value
+
+    def memo_frame(self, kind: str, df: Any, fn: Callable[[Any], Any]) -> Any:
+        """Memo indexé par l'identité du DataFrame (gardé en référence)."""
+        if df is None:
+            return fn(df)
+        key = (kind, id(df))
+        with self._lock:
+            entry = self._memo.get(key)
+            if entry is not None and entry[0] is df:
+                self._count(kind, True)
+                return entry[1]
+            value = fn(df)
+            self._memo[key] = (df, value)
+            self._count(kind, False)
+            return value
+
+    def frame(self, tf: str, min_len: int = 0, fetch_count: int = 0) -> Any:
+        """Bougies du cache ; sinon un seul fetch MT5 par contexte."""
+        tf = (tf or "M1").upper()
+        df = self.frames.get(tf)
+        if df is not None and len(df) >= min_len:
+            return df
+        if fetch_count and self._fetcher is not None:
+            fetcher = self._fetcher
+            return self.memo(("fetch", tf, int(fetch_count)), lambda: fetcher(self.symbol, tf, int(fetch_count)))
+        return df
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "symbol": self.symbol,
+            "age_sec": round(time.time() - self.created_at, 3),
+            "hits": self.hits,
+            "misses": self.misses,
+            "features": len(self._memo),
+        }
+
+
+class FeatureContextRegistry:
+    """Contexte courant par symbole + compteurs globaux de réutilisation."""
+
+    def __init__(self, ttl_sec: float = DEFAULT_TTL_SEC):
+        self.ttl_sec = float(ttl_sec)
+        self._by_symbol: Dict[str, FeatureContext] = {}
+        self._lock = threading.Lock()
+        self._counters: Dict[str, list] = defaultdict(lambda: [0, 0])
+        self.created = 0
+        self.reused = 0
+
+    def get(self, symbol: str, frames: Dict[str, Any], fetcher: Optional[Fetcher] = None) -> FeatureContext:
+        sig = frames_signature(frames)
+        now = time.time()
+        with self._lock:
+            ctx = self._by_symbol.get(symbol)
+            if ctx is not None and ctx.signature == sig and now - ctx.created_at < self.ttl_sec:
+                self.reused += 1
+                return ctx
+            ctx = FeatureContext(symbol, frames, sig, fetcher=fetcher, counters=self._counters)
+            self._by_symbol[symbol] = ctx
+            self.created += 1
+            return ctx
+
+    def stats(self) -> Dict[str, Any]:
+        hits = sum(v[0] for v in self._counters.values())
+        misses = sum(v[1] for v in self._counters.values())
+        return {
+            "contexts_created": self.created,
+            "contexts_reused": self.reused,
+            "feature_hits": hits,
+            "feature_misses": misses,
+            "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            "by_feature": {k: {"hits": v[0], "misses": v[1]} for k, v in sorted(self._counters.items())},
+            "symbols": {s: c.stats() for s, c in sorted(self._by_symbol.items())},
+        }
+
+
+_registry: Optional[FeatureContextRegistry] = None
+
+
+def get_feature_registry(ttl_sec: float = DEFAULT_TTL_SEC) -> FeatureContextRegistry:
+    global _registry
+    if _registry is None:
+        _registry = FeatureContextRegistry(ttl_sec=ttl_sec)
+    return _registry
+
+
+def get_feature_context(symbol: str, frames: Dict[str, Any], fetcher: Optional[Fetcher] = None) -> FeatureContext:
+    """Contexte partagé pour `symbol` et ses bougies courantes."""
+    return get_feature_registry().get(symbol, frames or {}, fetcher=fetcher)
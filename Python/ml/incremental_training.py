@@ -0,0 +1,557 @@
+"""
+Entraînement incrémental — cache local feedback/labels + modèles à démarrage à chaud.
+
+- ``FeedbackCache`` : copie SQLite locale de ``trade_feedback`` ; seules les lignes
+  postérieures au watermark ``(created_at, id)`` sont téléchargées (une requête pour
+  tous les symboles, pagination par clé).
+- ``SymbolModelState`` : statistiques suffisantes du modèle adaptatif de
+  ``MLTradingSystem`` (win rates, seuil de confiance, poids, heures) sur une fenêtre
+  glissante des N derniers trades (100 comme ``collect_training_data``) : ``partial_fit``
+  ajoute les nouvelles lignes, ``forget`` retire celles qui sortent de la fenêtre.
+- ``ArtifactPublisher`` : publication atomique d'artefacts versionnés
+  (fichier versionné + pointeur ``CURRENT`` remplacé par ``os.replace``).
+- ``ModelHotReloader`` : relecture paresseuse côté API quand le pointeur change.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ROOT = Path(__file__).resolve().parents[2]
+CACHE_PATH = ROOT / "data" / "ml_training_cache.db"
+ARTIFACTS_DIR = ROOT / "models" / "incremental"
+
+MODEL_KIND = "adaptive_ml"
+# Seuils évalués par MLTradingSystem._calculate_optimal_threshold
+CONF_THRESHOLDS = np.round(np.arange(0.5, 0.95, 0.05), 2)
+HIGH_CONFIDENCE = 0.7
+FETCH_PAGE_SIZE = 1000
+KEEP_VERSIONS = 5
+TRAINING_WINDOW = 100  # derniers trades par symbole (0 = tout l'historique)
+
+
+def _safe_name(symbol: str) -> str:
+    return "".join(ch if ch.isalnum() else "_" for ch in (symbol or "").strip()) or "_"
+
+
+def _atomic_write_text(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            fh.write(text)
+        os.replace(tmp, path)
+    except Exception:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
+        raise
+
+
+# ============================================================================
+# Cache local des feedbacks (watermark)
+# ============================================================================
+
+class FeedbackCache:
+    """Copie locale de ``trade_feedback`` ; ``sync`` ne récupère que le delta."""
+
+    SOURCE = "trade_feedback"
+
+    def __init__(self, path: Path = CACHE_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._ready:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        con = sqlite3.connect(str(self.path), timeout=10)
+        if not self._ready:
+            con.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS feedback (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    uid TEXT UNIQUE,
+                    symbol TEXT NOT NULL,
+                    created_at TEXT,
+                    decision TEXT,
+                    ai_confidence REAL,
+                    coherent_confidence REAL,
+                    entry_price REAL,
+                    profit REAL,
+                    is_win INTEGER
+                );
+                CREATE INDEX IF NOT EXISTS idx_feedback_symbol_seq ON feedback(symbol, seq);
+                CREATE TABLE IF NOT EXISTS watermarks (source TEXT PRIMARY KEY, value TEXT);
+                """
+            )
+            self._ready = True
+        return con
+
+    def watermark(self, source: str = SOURCE) -> Optional[str]:
+        with self._connect() as con:
+            row = con.execute("SELECT value FROM watermarks WHERE source=?", (source,)).fetchone()
+        return row[0] if row else None
+
+    def watermark_id(self, source: str = SOURCE) -> Optional[str]:
+        """Id de la dernière ligne au timestamp du watermark (départage les created_at égaux)."""
+        return self.watermark(source + "#id")
+
+    def ingest(self, rows: Iterable[Dict[str, Any]], source: str = SOURCE) -> int:
+        """Insère les lignes (dédupliquées par id/created_at) et avance le watermark (created_at, id)."""
+        records = []
+        newest = self.watermark(source) or ""
+        newest_id = self.watermark_id(source)
+        for r in rows:
+            sym = str(r.get("symbol") or "").strip()
+            if not sym:
+                continue
+            created = str(r.get("created_at") or r.get("close_time") or "")
+            uid = str(r.get("id") or f"{sym}|{created}|{r.get('profit')}|{r.get('decision')}")
+            records.append((
+                uid, sym, created,
+                str(r.get("decision") or "").lower(),
+                _as_float(r.get("ai_confidence")),
+                _as_float(r.get("coherent_confidence")),
+                _as_float(r.get("entry_price")),
+                _as_float(r.get("profit")),
+                1 if r.get("is_win") in (True, 1, "1", "true", "True") else 0,
+            ))
+            rid = r.get("id")
+            if created > newest:
+                newest, newest_id = created, (None if rid is None else str(rid))
+            elif created == newest and rid is not None and _id_after(str(rid), newest_id):
+                newest_id = str(rid)
+        if not records:
+            return 0
+        marks = [(source, newest)]
+        if newest_id is not None:
+            marks.append((source + "#id", newest_id))
+        with self._lock, self._connect() as con:
+            before = con.total_changes
+            con.executemany(
+                "INSERT OR IGNORE INTO feedback (uid, symbol, created_at, decision, ai_confidence, "
+                "coherent_confidence, entry_price, profit, is_win) VALUES (?,?,?,?,?,?,?,?,?)",
+                records,
+            )
+            inserted = con.total_changes - before
+            con.executemany(
+                "INSERT INTO watermarks(source, value) VALUES(?, ?) "
+                "ON CONFLICT(source) DO UPDATE SET value=excluded.value",
+                marks,
+            )
+        return inserted
+
+    def sync(self, supabase_url: str, supabase_key: str, timeout: float = 10.0) -> int:
+        """Télécharge les feedbacks postérieurs au watermark (toutes pages, tous symboles).
+
+        Pagination par clé (created_at, id) : des lignes partageant le timestamp de fin de
+        page ne sont jamais sautées. Ancien watermark sans id : ``gte`` + dédup par id.
+        """
+        if not supabase_url or not supabase_key:
+            return 0
+        import requests
+        from urllib.parse import quote
+
+        headers = {"apikey": supabase_key, "Authorization": f"Bearer {supabase_key}"}
+        total = 0
+        while True:
+            wm, wid = self.watermark(), self.watermark_id()
+            url = (f"{supabase_url.rstrip('/')}/rest/v1/trade_feedback"
+                   f"?order=created_at.asc,id.asc&limit={FETCH_PAGE_SIZE}")
+            if wm and wid is not None:
+                keyset = f'(created_at.gt."{wm}",and(created_at.eq."{wm}",id.gt.{wid}))'
+                url += f"&or={quote(keyset, safe='')}"
+            elif wm:
+                url += f"&created_at=gte.{quote(wm, safe='')}"
+            resp = requests.get(url, headers=headers, timeout=timeout)
+            if resp.status_code != 200:
+                logger.warning("[INCR-TRAIN] sync trade_feedback HTTP %s", resp.status_code)
+                break
+            page = resp.json() or []
+            total += self.ingest(page)
+            if len(page) < FETCH_PAGE_SIZE or (self.watermark(), self.watermark_id()) == (wm, wid):
+                break  # dernière page, ou lignes sans id : le watermark n'avance plus
+        return total
+
+    def rows_after(self, symbol: str, seq: int) -> List[Dict[str, Any]]:
+        with self._connect() as con:
+            con.row_factory = sqlite3.Row
+            cur = con.execute(
+                "SELECT * FROM feedback WHERE symbol=? AND seq>? ORDER BY seq", (symbol, int(seq))
+            )
+            return [dict(r) for r in cur.fetchall()]
+
+    def rows_from(self, symbol: str, seq: int, limit: int) -> List[Dict[str, Any]]:
+        """Les `limit` plus anciennes lignes à partir de `seq` inclus (sortie de fenêtre)."""
+        with self._connect() as con:
+            con.row_factory = sqlite3.Row
+            cur = con.execute(
+                "SELECT * FROM feedback WHERE symbol=? AND seq>=? ORDER BY seq LIMIT ?",
+                (symbol, int(seq), int(limit)),
+            )
+            return [dict(r) for r in cur.fetchall()]
+
+    def symbols(self) -> List[str]:
+        with self._connect() as con:
+            return [r[0] for r in con.execute("SELECT DISTINCT symbol FROM feedback ORDER BY symbol")]
+
+
+def _id_after(rid: str, current: Optional[str]) -> bool:
+    if current is None:
+        return True
+    try:
+        return int(rid) > int(current)
+    except ValueError:
+        return rid > current
+
+
+def _as_float(v: Any) -> Optional[float]:
+    try:
+        return None if v is None else float(v)
+    except (TypeError, ValueError):
+        return None
+
+
+# ============================================================================
+# Modèle incrémental (statistiques suffisantes)
+# ============================================================================
+
+@dataclass
+class SymbolModelState:
+    symbol: str
+    last_seq: int = 0
+    window_start_seq: int = 0  # première ligne encore comptée (fenêtre glissante)
+    total: int = 0
+    wins: int = 0
+    win_profit_sum: float = 0.0
+    loss_profit_sum: float = 0.0
+    high_conf_total: int = 0
+    high_conf_wins: int = 0
+    decision_total: Dict[str, int] = field(default_factory=lambda: {"buy": 0, "sell": 0})
+    decision_wins: Dict[str, int] = field(default_factory=lambda: {"buy": 0, "sell": 0})
+    conf_ge_total: List[int] = field(default_factory=lambda: [0] * len(CONF_THRESHOLDS))
+    conf_ge_wins: List[int] = field(default_factory=lambda: [0] * len(CONF_THRESHOLDS))
+    hour_total: List[int] = field(default_factory=lambda: [0] * 24)
+    hour_wins: List[int] = field(default_factory=lambda: [0] * 24)
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]], symbol: str) -> "SymbolModelState":
+        if not data:
+            return cls(symbol=symbol)
+        known = {k: v for k, v in data.items() if k in cls.__dataclass_fields__}
+        known["symbol"] = symbol
+        return cls(**known)
+
+    def partial_fit(self, rows: List[Dict[str, Any]]) -> int:
+        """Met à jour les compteurs avec les nouvelles lignes (triées par seq)."""
+        if not rows:
+            return 0
+        self._accumulate(rows, 1)
+        self.last_seq = max(self.last_seq, max(int(r.get("seq") or 0) for r in rows))
+        return len(rows)
+
+    def forget(self, rows: List[Dict[str, Any]]) -> int:
+        """Retire des compteurs les plus anciennes lignes de la fenêtre (triées par seq)."""
+        if not rows:
+            return 0
+        self._accumulate(rows, -1)
+        self.window_start_seq = max(int(r.get("seq") or 0) for r in rows) + 1
+        return len(rows)
+
+    def _accumulate(self, rows: List[Dict[str, Any]], sign: int) -> None:
+        n = len(rows)
+        success = np.fromiter((int(r.get("is_win") or 0) for r in rows), dtype=np.int64, count=n)
+        profit = np.fromiter((r.get("profit") or 0.0 for r in rows), dtype=np.float64, count=n)
+        conf = np.fromiter(
+            (r["ai_confidence"] if r.get("ai_confidence") is not None else np.nan for r in rows),
+            dtype=np.float64, count=n,
+        )
+        decision = np.array([str(r.get("decision") or "").lower() for r in rows], dtype=object)
+
+        self.total += sign * n
+        self.wins += sign * int(success.sum())
+        self.win_profit_sum += sign * float(profit[success == 1].sum())
+        self.loss_profit_sum += sign * float(profit[success == 0].sum())
+
+        high = conf > HIGH_CONFIDENCE
+        self.high_conf_total += sign * int(high.sum())
+        self.high_conf_wins += sign * int(success[high].sum())
+
+        for d in ("buy", "sell"):
+            mask = decision == d
+            self.decision_total[d] = self.decision_total.get(d, 0) + sign * int(mask.sum())
+            self.decision_wins[d] = self.decision_wins.get(d, 0) + sign * int(success[mask].sum())
+
+        ge = conf[:, None] >= CONF_THRESHOLDS[None, :]
+        self.conf_ge_total = (np.asarray(self.conf_ge_total) + sign * ge.sum(axis=0)).astype(int).tolist()
+        self.conf_ge_wins = (
+            np.asarray(self.conf_ge_wins) + sign * (ge & (success[:, None] == 1)).sum(axis=0)
+        ).astype(int).tolist()
+
+        hours = np.array([_hour_of(r.get("created_at")) for r in rows], dtype=np.int64)
+        valid = hours >= 0
+        self.hour_total = (np.asarray(self.hour_total) + sign * np.bincount(hours[valid], minlength=24)).astype(int).tolist()
+        self.hour_wins = (
+            np.asarray(self.hour_wins) + sign * np.bincount(hours[valid], weights=success[valid], minlength=24)
+        ).astype(int).tolist()
+
+    def to_model(self) -> Dict[str, Any]:
+        """Même forme que le dict produit par MLTradingSystem.train_symbol_model."""
+        total = max(self.total, 1)
+        n_win = self.wins
+        n_loss = self.total - self.wins
+
+        best_threshold, best_score = 0.7, 0.0
+        for i, thr in enumerate(CONF_THRESHOLDS):
+            cnt = self.conf_ge_total[i]
+            if cnt > 0:
+                score = (self.conf_ge_wins[i] / cnt) * cnt / total
+                if score > best_score:
+                    best_score, best_threshold = score, float(thr)
+
+        weights = {"buy": 1.0, "sell": 1.0, "hold": 1.0}
+        decision_rates = {}
+        for d in ("buy", "sell"):
+            cnt = self.decision_total.get(d, 0)
+            decision_rates[d] = self.decision_wins.get(d, 0) / cnt if cnt else 0
+            if cnt:
+                weights[d] = max(0.5, min(2.0, decision_rates[d] * 2))
+
+        hour_total = np.asarray(self.hour_total)
+        hour_rate = np.divide(
+            np.asarray(self.hour_wins, dtype=float), hour_total,
+            out=np.zeros(24), where=hour_total > 0,
+        )
+        eligible = [h for h in range(24) if hour_total[h] >= 5]
+        best_hours = sorted(eligible, key=lambda h: -hour_rate[h])[:3]
+        worst_hours = sorted(eligible, key=lambda h: hour_rate[h])[:3]
+
+        return {
+            "symbol": self.symbol,
+            "win_rate": n_win / total,
+            "avg_profit": self.win_profit_sum / n_win if n_win else 0,
+            "avg_loss": self.loss_profit_sum / n_loss if n_loss else 0,
+            "high_confidence_win_rate": (
+                self.high_conf_wins / self.high_conf_total if self.high_conf_total else 0
+            ),
+            "buy_win_rate": decision_rates["buy"],
+            "sell_win_rate": decision_rates["sell"],
+            "total_trades": self.total,
+            "wins": self.wins,
+            "last_updated": datetime.now().isoformat(),
+            "confidence_threshold": best_threshold,
+            "decision_weights": weights,
+            "time_patterns": {"best_hours": best_hours, "worst_hours": worst_hours},
+        }
+
+
+def _hour_of(created_at: Any) -> int:
+    if not created_at:
+        return -1
+    try:
+        return datetime.fromisoformat(str(created_at).replace("Z", "+00:00")).hour
+    except ValueError:
+        return -1
+
+
+def _fit_symbol_job(
+    symbol: str,
+    state: Optional[Dict[str, Any]],
+    rows: List[Dict[str, Any]],
+    evicted: Optional[List[Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """Ajoute les nouvelles lignes puis retire celles sorties de la fenêtre."""
+    st = SymbolModelState.from_dict(state, symbol)
+    st.partial_fit(rows)
+    st.forget(evicted or [])
+    return {"state": asdict(st), "model": st.to_model()}
+
+
+# ============================================================================
+# Artefacts versionnés + rechargement à chaud
+# ============================================================================
+
+class ArtifactPublisher:
+    """``<root>/<symbol>/v000001.json`` + pointeur ``CURRENT`` (remplacement atomique)."""
+
+    def __init__(self, root: Path = ARTIFACTS_DIR, keep: int = KEEP_VERSIONS):
+        self.root = Path(root)
+        self.keep = keep
+
+    def _dir(self, symbol: str) -> Path:
+        return self.root / _safe_name(symbol)
+
+    def current_version(self, symbol: str) -> int:
+        ptr = self._dir(symbol) / "CURRENT"
+        try:
+            return int(ptr.read_text(encoding="utf-8").strip().lstrip("v").split(".")[0])
+        except (OSError, ValueError):
+            return 0
+
+    def publish(self, symbol: str, payload: Dict[str, Any]) -> int:
+        d = self._dir(symbol)
+        version = self.current_version(symbol) + 1
+        name = f"v{version:06d}.json"
+        body = dict(payload, version=version, published_at=datetime.now(timezone.utc).isoformat())
+        _atomic_write_text(d / name, json.dumps(body, ensure_ascii=False))
+        _atomic_write_text(d / "CURRENT", name)
+        for old in sorted(d.glob("v*.json"))[:-self.keep]:
+            with contextlib.suppress(OSError):
+                old.unlink()
+        return version
+
+    def load(self, symbol: str) -> Optional[Dict[str, Any]]:
+        d = self._dir(symbol)
+        try:
+            name = (d / "CURRENT").read_text(encoding="utf-8").strip()
+            return json.loads((d / name).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def pointer_mtime(self, symbol: str) -> float:
+        try:
+            return (self._dir(symbol) / "CURRENT").stat().st_mtime
+        except OSError:
+            return 0.0
+
+
+class ModelHotReloader:
+    """Lecture côté API : relit l'artefact seulement si le pointeur a changé."""
+
+    def __init__(self, publisher: Optional[ArtifactPublisher] = None, check_interval: float = 5.0):
+        self.publisher = publisher or ArtifactPublisher()
+        self.check_interval = check_interval
+        self._cache: Dict[str, Any] = {}  # symbol -> (mtime, checked_at, payload)
+
+    def get(self, symbol: str) -> Optional[Dict[str, Any]]:
+        now = time.monotonic()
+        entry = self._cache.get(symbol)
+        if entry and now - entry[1] < self.check_interval:
+            return entry[2]
+        mtime = self.publisher.pointer_mtime(symbol)
+        if entry and entry[0] == mtime:
+            self._cache[symbol] = (mtime, now, entry[2])
+            return entry[2]
+        payload = self.publisher.load(symbol) if mtime else None
+        self._cache[symbol] = (mtime, now, payload)
+        return payload
+
+
+# ============================================================================
+# Service
+# ============================================================================
+
+class IncrementalTrainingService:
+    """Cycle : sync delta -> partial_fit par symbole (pool de threads) -> publication.
+
+    Threads et non processus : sous uvicorn sur Windows (spawn), chaque processus fils
+    réimporterait ai_server ; le calcul par symbole (numpy vectorisé) est court.
+    """
+
+    def __init__(
+        self,
+        cache: Optional[FeedbackCache] = None,
+        publisher: Optional[ArtifactPublisher] = None,
+        max_workers: Optional[int] = None,
+        supabase_url: str = "",
+        supabase_key: str = "",
+        window: int = TRAINING_WINDOW,
+    ):
+        self.cache = cache or FeedbackCache()
+        self.window = max(0, int(window))
+        self.publisher = publisher or ArtifactPublisher()
+        self.max_workers = max_workers if max_workers is not None else min(4, os.cpu_count() or 1)
+        self.supabase_url = supabase_url or os.getenv("SUPABASE_URL", "")
+        self.supabase_key = supabase_key or (
+            os.getenv("SUPABASE_SERVICE_KEY") or os.getenv("SUPABASE_ANON_KEY") or os.getenv("SUPABASE_KEY") or ""
+        )
+        self.last_cycle: Dict[str, Any] = {}
+
+    def train_symbols(self, symbols: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """partial_fit des symboles ayant de nouvelles lignes ; publie les nouveaux artefacts."""
+        symbols = list(symbols) if symbols else self.cache.symbols()
+        jobs = []
+        for sym in symbols:
+            current = self.publisher.load(sym) or {}
+            state = current.get("state")
+            rows = self.cache.rows_after(sym, int((state or {}).get("last_seq", 0)))
+            if not rows:
+                continue
+            evicted: List[Dict[str, Any]] = []
+            if self.window:
+                if len(rows) >= self.window:
+                    # la fenêtre entière est renouvelée : repartir de zéro
+                    rows = rows[-self.window:]
+                    state = {"last_seq": 0, "window_start_seq": int(rows[0]["seq"])}
+                else:
+                    excess = int((state or {}).get("total", 0)) + len(rows) - self.window
+                    if excess > 0:
+                        evicted = self.cache.rows_from(sym, int((state or {}).get("window_start_seq", 0)), excess)
+            jobs.append((sym, state, rows, evicted))
+
+        results: Dict[str, Dict[str, Any]] = {}
+        if not jobs:
+            return results
+        if self.max_workers > 1 and len(jobs) > 1:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(jobs))) as pool:
+                futures = {sym: pool.submit(_fit_symbol_job, sym, st, rows, ev) for sym, st, rows, ev in jobs}
+                fitted = {sym: fut.result() for sym, fut in futures.items()}
+        else:
+            fitted = {sym: _fit_symbol_job(sym, st, rows, ev) for sym, st, rows, ev in jobs}
+
+        for sym, out in fitted.items():
+            version = self.publisher.publish(sym, {"kind": MODEL_KIND, **out})
+            results[sym] = {"version": version, "new_rows": sum(len(j[2]) for j in jobs if j[0] == sym),
+                            "model": out["model"]}
+        return results
+
+    def run_cycle(self, symbols: Optional[List[str]] = None) -> Dict[str, Any]:
+        t0 = time.perf_counter()
+        try:
+            fetched = self.cache.sync(self.supabase_url, self.supabase_key)
+        except Exception as exc:
+            logger.warning("[INCR-TRAIN] sync échoué: %s", exc)
+            fetched = 0
+        trained = self.train_symbols(symbols)
+        self.last_cycle = {
+            "fetched_rows": fetched,
+            "watermark": self.cache.watermark(),
+            "trained": {s: {"version": r["version"], "new_rows": r["new_rows"]} for s, r in trained.items()},
+            "duration_ms": round((time.perf_counter() - t0) * 1000, 1),
+            "at": datetime.now(timezone.utc).isoformat(),
+        }
+        return self.last_cycle
+
+
+_service: Optional[IncrementalTrainingService] = None
+_reloader: Optional[ModelHotReloader] = None
+
+
+def get_training_service() -> IncrementalTrainingService:
+    global _service
+    if _service is None:
+        _service = IncrementalTrainingService()
+    return _service
+
+
+def get_model_reloader() -> ModelHotReloader:
+    global _reloader
+    if _reloader is None:
+        _reloader = ModelHotReloader()
+    return _reloader
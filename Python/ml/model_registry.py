@@ -0,0 +1,430 @@
+"""
+Registre de modèles sur disque — artefacts versionnés mappés en mémoire.
+
+Les modèles sklearn courants (forêts, arbres, gradient boosting, modèles
+linéaires, StandardScaler) sont exportés en tableaux NumPy ``.npy`` et relus avec
+``np.load(mmap_mode="r")`` : plusieurs workers uvicorn partagent les mêmes pages
+via le cache OS au lieu de garder chacun une copie dépicklée.
+
+Disposition : ``<root>/<nom>/v000003/{meta.json, *.npy}`` + pointeur ``CURRENT``.
+Le basculement vers une nouvelle version est un seul ``os.replace`` du pointeur ;
+les lectures sont paresseuses par nom de modèle.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ROOT = Path(__file__).resolve().parents[2]
+REGISTRY_DIR = ROOT / "models" / "registry"
+KEEP_VERSIONS = 3
+FORMAT_VERSION = 1
+SCALER_SUFFIX = "_scaler"
+LOCK_TIMEOUT = 30.0  # secondes d'attente du verrou de publication
+LOCK_STALE = 120.0  # verrou abandonné (worker tué) au-delà de cet âge
+
+
+def _dir_name(name: str) -> str:
+    return str(name).replace("/", "_").replace("\\", "_").strip() or "_"
+
+
+def _atomic_write_text(path: Path, text: str) -> None:
+    fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            fh.write(text)
+        os.replace(tmp, path)
+    except Exception:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
+        raise
+
+
+@contextlib.contextmanager
+def _file_lock(path: Path, timeout: float = LOCK_TIMEOUT, stale: float = LOCK_STALE):
+    """Verrou inter-processus par création exclusive de ``path`` (POSIX et Windows)."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fd = os.open(str(path), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - path.stat().st_mtime > stale:
+                    path.unlink()
+                    continue
+            except OSError:
+                continue  # libéré entre-temps
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"verrou {path} occupé")
+            time.sleep(0.05)
+    try:
+        os.write(fd, str(os.getpid()).encode("ascii"))
+        os.close(fd)
+        yield
+    finally:
+        with contextlib.suppress(OSError):
+            os.unlink(path)
+
+
+def _expit(x: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def _softmax(x: np.ndarray) -> np.ndarray:
+    z = np.exp(x - x.max(axis=1, keepdims=True))
+    return z / z.sum(axis=1, keepdims=True)
+
+
+# ============================================================================
+# Export sklearn -> tableaux
+# ============================================================================
+
+def _flatten_trees(trees: List[Any], classifier_leaves: bool) -> Dict[str, np.ndarray]:
+    """Concatène les arbres en tableaux globaux (indices enfants décalés)."""
+    lefts, rights, feats, thrs, vals, offsets = [], [], [], [], [], []
+    offset, max_depth = 0, 0
+    for est in trees:
+        t = est.tree_
+        left = t.children_left.astype(np.int64)
+        right = t.children_right.astype(np.int64)
+        leaf = left < 0
+        lefts.append(np.where(leaf, -1, left + offset))
+        rights.append(np.where(leaf, -1, right + offset))
+        feats.append(np.where(leaf, 0, t.feature).astype(np.int64))
+        thrs.append(t.threshold.astype(np.float64))
+        if classifier_leaves:
+            v = t.value[:, 0, :].astype(np.float64)
+            vals.append(v / np.maximum(v.sum(axis=1, keepdims=True), 1e-300))
+        else:
+            vals.append(t.value[:, 0, :1].astype(np.float64))
+        offsets.append(offset)
+        offset += t.node_count
+        max_depth = max(max_depth, int(t.max_depth))
+    return {
+        "children_left": np.concatenate(lefts),
+        "children_right": np.concatenate(rights),
+        "feature": np.concatenate(feats),
+        "threshold": np.concatenate(thrs),
+        "value": np.concatenate(vals),
+        "roots": np.asarray(offsets, dtype=np.int64),
+        "_max_depth": max_depth,
+    }
+
+
+def export_model(model: Any) -> Optional[Dict[str, Any]]:
+    """Retourne {"meta": {...}, "arrays": {...}} ou None si le type n'est pas supporté."""
+    cls = type(model).__name__
+    meta: Dict[str, Any] = {"format": FORMAT_VERSION, "source_class": cls}
+    classes = getattr(model, "classes_", None)
+    if classes is not None:
+        meta["classes"] = np.asarray(classes).tolist()
+    meta["n_features"] = int(getattr(model, "n_features_in_", 0) or 0)
+
+    if cls in ("RandomForestClassifier", "ExtraTreesClassifier", "DecisionTreeClassifier"):
+        trees = list(model.estimators_) if hasattr(model, "estimators_") else [model]
+        arrays = _flatten_trees(trees, classifier_leaves=True)
+        meta.update(kind="forest_classifier", max_depth=arrays.pop("_max_depth"))
+        return {"meta": meta, "arrays": arrays}
+
+    if cls == "GradientBoostingClassifier":
+        stages = model.estimators_  # (n_stages, K)
+        k = stages.shape[1]
+        trees = [stages[i, j] for i in range(stages.shape[0]) for j in range(k)]
+        arrays = _flatten_trees(trees, classifier_leaves=False)
+        meta.update(kind="gradient_boosting", max_depth=arrays.pop("_max_depth"),
+                    learning_rate=float(model.learning_rate), n_outputs=int(k))
+        arrays["tree_output"] = np.tile(np.arange(k, dtype=np.int64), stages.shape[0])
+        arrays["init_raw"] = np.asarray(
+            model._raw_predict_init(np.zeros((1, meta["n_features"]), dtype=np.float32))[0],
+            dtype=np.float64,
+        )
+        return {"meta": meta, "arrays": arrays}
+
+    if cls in ("LogisticRegression", "SGDClassifier") and hasattr(model, "coef_"):
+        meta.update(kind="linear_classifier")
+        return {"meta": meta, "arrays": {
+            "coef": np.asarray(model.coef_, dtype=np.float64),
+            "intercept": np.asarray(model.intercept_, dtype=np.float64),
+        }}
+
+    if cls == "StandardScaler":
+        n = int(model.n_features_in_)
+        meta.update(kind="standard_scaler", n_features=n)
+        mean = model.mean_ if model.mean_ is not None else np.zeros(n)
+        scale = model.scale_ if model.scale_ is not None else np.ones(n)
+        return {"meta": meta, "arrays": {
+            "mean": np.asarray(mean, dtype=np.float64),
+            "scale": np.asarray(scale, dtype=np.float64),
+        }}
+
+    return None
+
+
+# ============================================================================
+# Modèle mappé (inférence NumPy pure)
+# ============================================================================
+
+class MappedModel:
+    """Vue en lecture seule sur un artefact ; tableaux ouverts en ``mmap_mode="r"``."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.meta: Dict[str, Any] = json.loads((self.path / "meta.json").read_text(encoding="utf-8"))
+        self.kind: str = self.meta["kind"]
+        self.version: int = int(self.meta.get("version", 0))
+        self.name: str = self.meta.get("name", self.path.parent.name)
+        self.n_features_in_: int = int(self.meta.get("n_features", 0))
+        if "classes" in self.meta:
+            self.classes_ = np.asarray(self.meta["classes"])
+        self._a = {
+            p.stem: np.load(p, mmap_mode="r") for p in self.path.glob("*.npy")
+        }
+
+    def __repr__(self) -> str:
+        return f"MappedModel({self.name!r}, v{self.version}, {self.kind})"
+
+    def _leaves(self, X: np.ndarray) -> np.ndarray:
+        """Indice de feuille atteint par chaque (échantillon, arbre)."""
+        a = self._a
+        left, right = a["children_left"], a["children_right"]
+        feature, threshold = a["feature"], a["threshold"]
+        X = np.asarray(X, dtype=np.float32)
+        nodes = np.broadcast_to(a["roots"], (X.shape[0], a["roots"].shape[0])).copy()
+        rows = np.arange(X.shape[0])[:, None]
+        for _ in range(int(self.meta.get("max_depth", 0)) + 1):
+            nxt_left = left[nodes]
+            active = nxt_left >= 0
+            if not active.any():
+                break
+            go_left = X[rows, feature[nodes]] <= threshold[nodes]
+            nodes = np.where(active, np.where(go_left, nxt_left, right[nodes]), nodes)
+        return nodes
+
+    def predict_proba(self, X: Any) -> np.ndarray:
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        if self.kind == "forest_classifier":
+            return np.asarray(self._a["value"])[self._leaves(X)].mean(axis=1)
+        if self.kind == "gradient_boosting":
+            leaf_vals = np.asarray(self._a["value"])[self._leaves(X), 0]
+            k = int(self.meta["n_outputs"])
+            raw = np.tile(np.asarray(self._a["init_raw"]), (X.shape[0], 1))
+            out = np.asarray(self._a["tree_output"])
+            for j in range(k):
+                raw[:, j] += self.meta["learning_rate"] * leaf_vals[:, out == j].sum(axis=1)
+            if k == 1:
+                p1 = _expit(raw[:, 0])
+                return np.column_stack([1.0 - p1, p1])
+            return _softmax(raw)
+        if self.kind == "linear_classifier":
+            raw = X @ np.asarray(self._a["coef"]).T + np.asarray(self._a["intercept"])
+            if raw.shape[1] == 1:
+                p1 = _expit(raw[:, 0])
+                return np.column_stack([1.0 - p1, p1])
+            return _softmax(raw)
+        raise AttributeError(f"{self.kind} n'expose pas predict_proba")
+
+    def predict(self, X: Any) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def transform(self, X: Any) -> np.ndarray:
+        if self.kind != "standard_scaler":
+            raise AttributeError(f"{self.kind} n'expose pas transform")
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        scale = np.asarray(self._a["scale"])
+        return (X - np.asarray(self._a["mean"])) / np.where(scale == 0, 1.0, scale)
+
+
+# ============================================================================
+# Registre
+# ============================================================================
+
+class ModelRegistry:
+    """Publication atomique + chargement paresseux par nom, partagé entre workers."""
+
+    def __init__(self, root: Path = REGISTRY_DIR, keep: int = KEEP_VERSIONS, check_interval: float = 5.0):
+        self.root = Path(root)
+        self.keep = keep
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._loaded: Dict[str, Any] = {}  # nom -> (pointeur, vérifié_à, MappedModel)
+
+    def _dir(self, name: str) -> Path:
+        return self.root / _dir_name(name)
+
+    def _pointer(self, name: str) -> Optional[str]:
+        try:
+            return (self._dir(name) / "CURRENT").read_text(encoding="utf-8").strip() or None
+        except OSError:
+            return None
+
+    def names(self) -> List[str]:
+        if not self.root.is_dir():
+            return []
+        return sorted(p.name for p in self.root.iterdir() if (p / "CURRENT").is_file())
+
+    def publish(self, name: str, model: Any, metadata: Optional[Dict[str, Any]] = None,
+                if_absent: bool = False) -> Optional[int]:
+        """
+        Exporte ``model`` et bascule ``CURRENT`` ; None si le type n'est pas exportable.
+
+        La numérotation et le basculement se font sous ``.publish.lock`` : deux workers qui
+        publient le même nom ne se disputent pas le même répertoire de version. Avec
+        ``if_absent``, une version déjà publiée (par un autre worker) est conservée.
+        """
+        exported = export_model(model)
+        if exported is None:
+            return None
+        d = self._dir(name)
+        d.mkdir(parents=True, exist_ok=True)
+        with _file_lock(d / ".publish.lock"):
+            current = self._pointer(name)
+            if if_absent and current:
+                return int(current[1:]) if current[1:].isdigit() else None
+            existing = [int(p.name[1:]) for p in d.glob("v*") if p.is_dir() and p.name[1:].isdigit()]
+            version = max(existing, default=0) + 1
+
+            tmp = d / f".tmp-{uuid.uuid4().hex}"
+            tmp.mkdir()
+            try:
+                for key, arr in exported["arrays"].items():
+                    np.save(tmp / f"{key}.npy", np.ascontiguousarray(arr))
+                meta = dict(exported["meta"], name=name, version=version,
+                            published_at=time.time(), **(metadata or {}))
+                (tmp / "meta.json").write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+                final = d / f"v{version:06d}"
+                os.replace(tmp, final)
+            except Exception:
+                shutil.rmtree(tmp, ignore_errors=True)
+                raise
+            _atomic_write_text(d / "CURRENT", final.name)
+            self._loaded.pop(name, None)
+
+            # Anciennes versions : peuvent encore être mappées par un worker (Windows) -> best effort
+            versions = sorted(p for p in d.glob("v*") if p.is_dir())
+            for old in versions[:-self.keep]:
+                shutil.rmtree(old, ignore_errors=True)
+        return version
+
+    def get(self, name: str) -> Optional[MappedModel]:
+        now = time.monotonic()
+        entry = self._loaded.get(name)
+        if entry and now - entry[1] < self.check_interval:
+            return entry[2]
+        pointer = self._pointer(name)
+        if entry and entry[0] == pointer:
+            self._loaded[name] = (pointer, now, entry[2])
+            return entry[2]
+        model = None
+        if pointer:
+            try:
+                model = MappedModel(self._dir(name) / pointer)
+            except Exception as exc:
+                logger.warning("[REGISTRY] lecture %s/%s impossible: %s", name, pointer, exc)
+                model = entry[2] if entry else None
+        with self._lock:
+            self._loaded[name] = (pointer, now, model)
+        return model
+
+    def loaded(self) -> Dict[str, int]:
+        return {n: e[2].version for n, e in self._loaded.items() if e[2] is not None}
+
+
+class LazyModelStore:
+    """
+    Modèles par nom : registre mappé d'abord, sinon fichier legacy ``.joblib``/``.pkl``
+    chargé à la demande. La conversion des fichiers legacy dans le registre se fait au
+    démarrage (``import_legacy``), jamais sur le chemin d'une requête.
+
+    L'index des noms est mis en cache ``index_ttl`` secondes (par défaut l'intervalle de
+    vérification du registre) : ``in`` / ``bool`` ne parcourent plus le disque à chaque appel.
+    """
+
+    def __init__(self, registry: ModelRegistry, legacy_dir: Optional[Path] = None,
+                 index_ttl: Optional[float] = None):
+        self.registry = registry
+        self.legacy_dir = Path(legacy_dir) if legacy_dir else None
+        self.index_ttl = registry.check_interval if index_ttl is None else float(index_ttl)
+        self._legacy: Dict[str, Any] = {}
+        self._index: Optional[Tuple[float, List[str], Dict[str, Path]]] = None  # (scanné_à, noms, legacy)
+
+    def _legacy_files(self) -> Dict[str, Path]:
+        if not self.legacy_dir or not self.legacy_dir.is_dir():
+            return {}
+        files = list(self.legacy_dir.glob("*.joblib")) + list(self.legacy_dir.glob("*.pkl"))
+        return {p.stem: p for p in files}
+
+    def _scan(self) -> Tuple[float, List[str], Dict[str, Path]]:
+        now = time.monotonic()
+        index = self._index
+        if index is None or now - index[0] >= self.index_ttl:
+            legacy = self._legacy_files()
+            index = (now, sorted(set(self.registry.names()) | set(legacy)), legacy)
+            self._index = index
+        return index
+
+    def invalidate(self) -> None:
+        self._index = None
+
+    def names(self) -> List[str]:
+        return list(self._scan()[1])
+
+    def model_names(self) -> List[str]:
+        """Noms des modèles prédictifs (sans les scalers ``*_scaler``)."""
+        return [n for n in self._scan()[1] if not n.endswith(SCALER_SUFFIX)]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._scan()[1]
+
+    def __bool__(self) -> bool:
+        return bool(self._scan()[1])
+
+    def import_legacy(self) -> int:
+        """Convertit dans le registre les fichiers legacy exportables absents ; à appeler au démarrage."""
+        published = set(self.registry.names())
+        imported = 0
+        for name, path in sorted(self._legacy_files().items()):
+            if name in published:
+                continue
+            try:
+                import joblib
+                model = joblib.load(path)
+                if self.registry.publish(name, model, {"imported_from": path.name}, if_absent=True) is not None:
+                    imported += 1
+            except Exception as exc:
+                logger.debug("[REGISTRY] import %s ignoré: %s", name, exc)
+        if imported:
+            self.invalidate()
+        return imported
+
+    def get(self, name: str) -> Optional[Any]:
+        mapped = self.registry.get(name)
+        if mapped is not None:
+            return mapped
+        if name in self._legacy:
+            return self._legacy[name]
+        path = self._scan()[2].get(name)
+        if path is None:
+            return None
+        try:
+            import joblib
+            model = joblib.load(path)
+        except Exception as exc:
+            logger.warning("[REGISTRY] chargement legacy %s impossible: %s", path, exc)
+            return None
+        self._legacy[name] = model
+        return model
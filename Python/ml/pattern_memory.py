@@ -1,18 +1,27 @@
 """
 Mémoire épisodique — patterns + heures UTC par symbole.
 Mise à jour après chaque trade fermé (deals-upload).
+Lecture (memory_bias_for_symbol) servie depuis une copie en mémoire, invalidée par mtime/taille du JSON.
 """
 
 from __future__ import annotations
 
 import json
+import os
+import threading
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 ROOT = Path(__file__).resolve().parents[2]
 MEMORY_PATH = ROOT / "data" / "cognition_pattern_memory.json"
 
+# {chemin: (signature fichier, données)} — partagé en lecture seule, ne pas muter
+_MEMORY_CACHE: Dict[str, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+# {(chemin, signature, symbole, heure): biais}
+_BIAS_CACHE: Dict[Tuple[str, Tuple[int, int], str, int], float] = {}
+_cache_lock = threading.Lock()
+
 
 def _empty_memory() -> Dict[str, Any]:
     return {"updated_at": None, "symbols": {}}
@@ -28,11 +37,44 @@ def load_memory(path: Path = MEMORY_PATH) -> Dict[str, Any]:
         return _empty_memory()
 
 
+def _file_signature(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def load_memory_cached(path: Path = MEMORY_PATH) -> Dict[str, Any]:
+    """Mémoire en lecture seule : relue seulement si le fichier a changé (mtime ou taille)."""
+    key = str(path)
+    sig = _file_signature(Path(path))
+    if sig is None:
+        return _empty_memory()
+    cached = _MEMORY_CACHE.get(key)
+    if cached is not None and cached[0] == sig:
+        return cached[1]
+    data = load_memory(path)
+    with _cache_lock:
+        _MEMORY_CACHE[key] = (sig, data)
+        for k in [k for k in list(_BIAS_CACHE) if k[0] == key]:
+            del _BIAS_CACHE[k]
+    return data
+
+
 def save_memory(data: Dict[str, Any], path: Path = MEMORY_PATH) -> Path:
     path = Path(path)
     path.parent.mkdir(parents=True, exist_ok=True)
     data["updated_at"] = datetime.now(timezone.utc).isoformat()
-    path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+    text = json.dumps(data, indent=2, ensure_ascii=False)
+    path.write_text(text, encoding="utf-8")
+    sig = _file_signature(path)
+    if sig is not None:
+        # copie découplée de `data` (que l'appelant peut continuer à muter)
+        with _cache_lock:
+            _MEMORY_CACHE[str(path)] = (sig, json.loads(text))
+            for k in [k for k in list(_BIAS_CACHE) if k[0] == str(path)]:
+                del _BIAS_CACHE[k]
     return path
 
 
@@ -55,6 +97,7 @@ def update_pattern_memory(
     patterns: Optional[List[str]] = None,
     hour_utc: Optional[int] = None,
     memory: Optional[Dict[str, Any]] = None,
+    save: bool = True,
 ) -> Dict[str, Any]:
     """Enregistre un trade pour ajuster bias pattern/heure."""
     data = memory if memory is not None else load_memory()
@@ -83,7 +126,8 @@ def update_pattern_memory(
         pstat["n"] = int(pstat.get("n", 0)) + 1
         pstat["net"] = round(float(pstat.get("net", 0.0)) + float(profit or 0.0), 4)
 
-    save_memory(data)
+    if save:
+        save_memory(data)
     return data
 
 
@@ -107,16 +151,60 @@ def update_pattern_memory_from_deal(
     return True
 
 
-def memory_bias_for_symbol(symbol: str, hour_utc: Optional[int] = None) -> float:
+def update_pattern_memory_batch(rows: List[Dict[str, Any]], path: Path = MEMORY_PATH) -> int:
+    """
+    Intègre un lot de deals (lignes trade_feedback) : une lecture + une écriture du JSON.
+    `_hour_utc` (précalculé par l'ingestion) évite de reparser close_time.
+    """
+    data = load_memory(path)
+    n = 0
+    for row in rows:
+        sym = str(row.get("symbol") or "").strip()
+        if not sym:
+            continue
+        hour = row.get("_hour_utc")
+        if hour is None:
+            hour = _hour_from_close_time(row.get("close_time"))
+        update_pattern_memory(
+            sym,
+            float(row.get("profit") or 0.0),
+            direction=str(row.get("direction") or row.get("decision") or "UNKNOWN"),
+            patterns=row.get("patterns"),
+            hour_utc=int(hour),
+            memory=data,
+            save=False,
+        )
+        n += 1
+    if n:
+        save_memory(data, path)
+    return n
+
+
+def memory_bias_for_symbol(symbol: str, hour_utc: Optional[int] = None, path: Path = MEMORY_PATH) -> float:
     """
     Biais directionnel -1..+1 depuis mémoire épisodique (win rate heure + patterns).
     """
-    data = load_memory()
+    hour = int(hour_utc if hour_utc is not None else datetime.now(timezone.utc).hour) % 24
+    data = load_memory_cached(path)
+    entry = _MEMORY_CACHE.get(str(path))
+    if entry is None:
+        return _bias_from_memory(data, symbol, hour)
+    key = (str(path), entry[0], symbol, hour)
+    bias = _BIAS_CACHE.get(key)
+    if bias is None:
+        bias = _bias_from_memory(entry[1], symbol, hour)
+        with _cache_lock:
+            # pas d'entrée pour une mémoire remplacée entre-temps (jamais purgée sinon)
+            if _MEMORY_CACHE.get(str(path)) is entry:
+                _BIAS_CACHE[key] = bias
+    return bias
+
+
+def _bias_from_memory(data: Dict[str, Any], symbol: str, hour: int) -> float:
     sym = data.get("symbols", {}).get(symbol.strip())
     if not sym:
         return 0.0
 
-    hour = int(hour_utc if hour_utc is not None else datetime.now(timezone.utc).hour) % 24
     h = sym.get("hours", {}).get(str(hour), {})
     n = int(h.get("n", 0) or 0)
     if n < 2:
@@ -2,14 +2,26 @@
 """
 ML Feature Engineering - Convert raw market snapshots to ML-ready features
 Normalizes, scales, and prepares data for model training and inference
+
+Every feature is computed column-wise over the whole batch (NumPy), so a
+training set of several hundred thousand /store_snapshot rows and a single
+inference snapshot go through exactly the same code path.
 """
 
 import numpy as np
 import pandas as pd
-from typing import Dict, List, Tuple, Optional, Any
+from typing import Dict, List, Tuple, Optional, Any, Sequence, Union
 from dataclasses import dataclass
 
 
+# Bump the version whenever a feature is added, removed, reordered or its
+# formula changes: models persisted with another version must be retrained.
+FEATURE_SCHEMA_VERSION = "snapshot-v2"
+OHLCV_FEATURE_SCHEMA_VERSION = "ohlcv22-v1"
+
+SnapshotBatch = Union[pd.DataFrame, np.ndarray, Sequence[Dict[str, Any]], Dict[str, Any]]
+
+
 @dataclass
 class FeatureNormalization:
     """Parameters for feature normalization and scaling"""
@@ -20,173 +32,332 @@ class FeatureNormalization:
     scale: str = "standard"  # standard, minmax, log
 
 
-class FeatureEngineer:
-    """Convert market snapshots to ML features"""
-
-    def __init__(self):
-        self.feature_names: List[str] = []
-        self.feature_stats: Dict[str, Dict[str, float]] = {}
-
-    def prepare_features_from_snapshot(self, snapshot: Dict[str, Any]) -> np.ndarray:
-        """Convert a single indicator snapshot dict to ML feature vector"""
+@dataclass(frozen=True)
+class FeatureSpec:
+    """Declared feature: output column name, group and raw inputs it reads"""
+    name: str
+    group: str
+    inputs: Tuple[str, ...] = ()
+
+
+# Declared snapshot feature schema (column order of the feature matrix)
+FEATURE_SCHEMA: Tuple[FeatureSpec, ...] = (
+    FeatureSpec('spread_pct', 'price', ('bid', 'spread_pips')),
+    FeatureSpec('rsi_m1', 'momentum', ('rsi_m1',)),
+    FeatureSpec('rsi_m5', 'momentum', ('rsi_m5',)),
+    FeatureSpec('rsi_m15', 'momentum', ('rsi_m15',)),
+    FeatureSpec('rsi_h1', 'momentum', ('rsi_h1',)),
+    FeatureSpec('atr_ratio', 'volatility', ('atr_ratio',)),
+    FeatureSpec('atr_m1_m5', 'volatility', ('atr_m1', 'atr_m5')),
+    FeatureSpec('atr_m5_m15', 'volatility', ('atr_m5', 'atr_m15')),
+    FeatureSpec('atr_m15_h1', 'volatility', ('atr_m15', 'atr_h1')),
+    FeatureSpec('trend_m1', 'trend', ('bid', 'ema_fast_m1', 'ema_slow_m1')),
+    FeatureSpec('trend_m5', 'trend', ('bid', 'ema_fast_m5', 'ema_slow_m5')),
+    FeatureSpec('trend_m15', 'trend', ('bid', 'ema_fast_m15', 'ema_slow_m15')),
+    FeatureSpec('trend_h1', 'trend', ('bid', 'ema_fast_h1', 'ema_slow_h1')),
+    FeatureSpec('fvg_detected', 'smc', ('fvg_detected',)),
+    FeatureSpec('fvg_direction', 'smc', ('fvg_direction',)),
+    FeatureSpec('bos_detected', 'smc', ('bos_detected',)),
+    FeatureSpec('bos_direction', 'smc', ('bos_direction',)),
+    FeatureSpec('ob_proximity', 'smc', ('ob_proximity_atr',)),
+    FeatureSpec('sweep_detected', 'smc', ('sweep_detected',)),
+    FeatureSpec('m5_buy_dist', 'kola', ('bid', 'm5_buy_level')),
+    FeatureSpec('m5_sell_dist', 'kola', ('bid', 'm5_sell_level')),
+    FeatureSpec('m5_touches_norm', 'kola', ('m5_buy_touches', 'm5_sell_touches')),
+    FeatureSpec('confluence_buy', 'confluence', ('tech_buy_score',)),
+    FeatureSpec('confluence_sell', 'confluence', ('tech_sell_score',)),
+    FeatureSpec('entry_quality', 'confluence', ('entry_quality',)),
+    FeatureSpec('spike_prob', 'spike', ('spike_probability',)),
+    FeatureSpec('bb_squeeze', 'bollinger', ('bb_squeeze',)),
+    FeatureSpec('vwap_dist', 'bollinger', ('vwap_distance_pct',)),
+    FeatureSpec('bb_pctb', 'bollinger', ('bb_pctb',)),
+    FeatureSpec('bb_width', 'bollinger', ('bb_width_pct',)),
+    FeatureSpec('volume_ratio', 'volume', ('volume_ratio',)),
+    FeatureSpec('sido_top', 'sido', ('sido_double_top',)),
+    FeatureSpec('sido_bottom', 'sido', ('sido_double_bottom',)),
+    FeatureSpec('coherence', 'mtf', ('coherence_score',)),
+    FeatureSpec('signal_action', 'signal', ('signal_action',)),
+    FeatureSpec('signal_confidence', 'signal', ('signal_confidence',)),
+)
+
+# 22 features expected by the OHLCV scalers trained in models/*_rf.joblib
+OHLCV_FEATURE_SCHEMA: Tuple[FeatureSpec, ...] = (
+    FeatureSpec('price_vs_sma20', 'trend', ('bid', 'ema_slow_m1')),
+    FeatureSpec('price_vs_sma50', 'trend', ('bid', 'ema_slow_m5')),
+    FeatureSpec('rsi', 'momentum', ('rsi',)),
+    FeatureSpec('rsi_normalized', 'momentum', ('rsi',)),
+    FeatureSpec('macd', 'momentum', ('ema_fast_m1', 'ema_slow_m1')),
+    FeatureSpec('macd_signal', 'momentum', ('ema_fast_m1', 'ema_slow_m1')),
+    FeatureSpec('macd_histogram', 'momentum', ('ema_fast_m1', 'ema_slow_m1')),
+    FeatureSpec('atr', 'volatility', ('atr',)),
+    FeatureSpec('atr_normalized', 'volatility', ('atr', 'bid')),
+    FeatureSpec('atr_ma_ratio', 'volatility'),
+    FeatureSpec('bb_width', 'bollinger', ('bb_up', 'bb_dn')),
+    FeatureSpec('bb_position', 'bollinger', ('bb_up', 'bb_dn')),
+    FeatureSpec('volume_ratio', 'volume'),
+    FeatureSpec('volume_trend', 'volume'),
+    FeatureSpec('high_low_range', 'range', ('atr',)),
+    FeatureSpec('open_close_range', 'range'),
+    FeatureSpec('body_size', 'range', ('atr',)),
+    FeatureSpec('momentum_5', 'momentum', ('rsi',)),
+    FeatureSpec('momentum_10', 'momentum', ('rsi',)),
+    FeatureSpec('momentum_20', 'momentum', ('rsi',)),
+    FeatureSpec('distance_to_high', 'range', ('atr',)),
+    FeatureSpec('distance_to_low', 'range', ('atr',)),
+)
+
+
+def feature_schema(ohlcv: bool = False) -> Dict[str, Any]:
+    """Serializable description of a schema, to persist next to a trained model"""
+    specs = OHLCV_FEATURE_SCHEMA if ohlcv else FEATURE_SCHEMA
+    return {
+        'version': OHLCV_FEATURE_SCHEMA_VERSION if ohlcv else FEATURE_SCHEMA_VERSION,
+        'n_features': len(specs),
+        'features': [{'name': s.name, 'group': s.group, 'inputs': list(s.inputs)} for s in specs],
+    }
 
-        features = []
 
-        # === PRICE & SPREAD (normalized by bid) ===
-        bid = float(snapshot.get('bid', 0))
-        ask = float(snapshot.get('ask', 0))
-        spread = float(snapshot.get('spread_pips', 0))
+# ============================================================================
+# Columnar access (DataFrame / structured array / records / single dict)
+# ============================================================================
 
-        if bid > 0:
-            features.append(spread / bid * 10000)  # Spread as fraction
-        else:
-            features.append(0.0)
-
-        # === MOMENTUM (normalized to 0-100) ===
-        features.append(float(snapshot.get('rsi_m1', 50)) / 100.0)  # 0-1
-        features.append(float(snapshot.get('rsi_m5', 50)) / 100.0)
-        features.append(float(snapshot.get('rsi_m15', 50)) / 100.0)
-        features.append(float(snapshot.get('rsi_h1', 50)) / 100.0)
-
-        # === VOLATILITY RATIOS ===
-        atr_m1 = float(snapshot.get('atr_m1', 0))
-        atr_m5 = float(snapshot.get('atr_m5', 0))
-        atr_m15 = float(snapshot.get('atr_m15', 0))
-        atr_h1 = float(snapshot.get('atr_h1', 0))
-        atr_ratio = float(snapshot.get('atr_ratio', 1.0))
-
-        features.append(min(atr_ratio, 3.0) / 3.0)  # Cap at 3.0
-        features.append(atr_m1 / max(atr_m5, 0.00001))  # M1 vs M5
-        features.append(atr_m5 / max(atr_m15, 0.00001))  # M5 vs M15
-        features.append(atr_m15 / max(atr_h1, 0.00001))  # M15 vs H1
-
-        # === TREND STRENGTH (EMA distance) ===
-        ema_fast_m1 = float(snapshot.get('ema_fast_m1', bid))
-        ema_slow_m1 = float(snapshot.get('ema_slow_m1', bid))
-        ema_fast_m5 = float(snapshot.get('ema_fast_m5', bid))
-        ema_slow_m5 = float(snapshot.get('ema_slow_m5', bid))
-        ema_fast_m15 = float(snapshot.get('ema_fast_m15', bid))
-        ema_slow_m15 = float(snapshot.get('ema_slow_m15', bid))
-        ema_fast_h1 = float(snapshot.get('ema_fast_h1', bid))
-        ema_slow_h1 = float(snapshot.get('ema_slow_h1', bid))
-
-        if bid > 0:
-            m1_trend = (ema_fast_m1 - ema_slow_m1) / bid
-            m5_trend = (ema_fast_m5 - ema_slow_m5) / bid
-            m15_trend = (ema_fast_m15 - ema_slow_m15) / bid
-            h1_trend = (ema_fast_h1 - ema_slow_h1) / bid
+class _Columns:
+    """Read-only column view over a batch of snapshots, whatever its container"""
+
+    def __init__(self, data: SnapshotBatch):
+        if isinstance(data, dict):
+            data = [data]
+        self._frame: Optional[pd.DataFrame] = None
+        self._struct: Optional[np.ndarray] = None
+        self._records: Sequence[Dict[str, Any]] = ()
+        if isinstance(data, pd.DataFrame):
+            self._frame = data
+            self.n = len(data)
+        elif isinstance(data, np.ndarray) and data.dtype.names:
+            self._struct = data
+            self.n = len(data)
         else:
-            m1_trend = m5_trend = m15_trend = h1_trend = 0.0
-
-        # Tanh to bound [-1, 1]
-        features.append(np.tanh(m1_trend))
-        features.append(np.tanh(m5_trend))
-        features.append(np.tanh(m15_trend))
-        features.append(np.tanh(h1_trend))
-
-        # === SMC STRUCTURES (binary + proximity) ===
-        features.append(1.0 if snapshot.get('fvg_detected', False) else 0.0)
-        features.append(float(snapshot.get('fvg_direction', 0)))
-        features.append(1.0 if snapshot.get('bos_detected', False) else 0.0)
-        features.append(float(snapshot.get('bos_direction', 0)))
-
-        ob_proximity = float(snapshot.get('ob_proximity_atr', 0))
-        features.append(min(ob_proximity / 2.0, 1.0))  # Normalize to [0, 1]
-
-        features.append(1.0 if snapshot.get('sweep_detected', False) else 0.0)
-
-        # === KOLA LEVELS (proximity to price) ===
-        m5_buy = float(snapshot.get('m5_buy_level', bid))
-        m5_sell = float(snapshot.get('m5_sell_level', bid))
-        m5_touches = float(snapshot.get('m5_buy_touches', 0) + snapshot.get('m5_sell_touches', 0))
-
-        if bid > 0:
-            features.append(abs(bid - m5_buy) / bid)
-            features.append(abs(bid - m5_sell) / bid)
+            self._records = data
+            self.n = len(data)
+
+    def _raw(self, key: str) -> Optional[np.ndarray]:
+        """Raw column as an object/numeric array, None if the column is absent"""
+        if self._frame is not None:
+            return self._frame[key].to_numpy() if key in self._frame.columns else None
+        if self._struct is not None:
+            return self._struct[key] if key in self._struct.dtype.names else None
+        if not any(key in r for r in self._records):
+            return None
+        return np.array([r.get(key) for r in self._records], dtype=object)
+
+    def num(self, key: str, default: Union[float, np.ndarray] = 0.0) -> np.ndarray:
+        """Float column; missing / None / unparsable cells take ``default``"""
+        raw = self._raw(key)
+        fill = np.broadcast_to(np.asarray(default, dtype=np.float64), (self.n,))
+        if raw is None:
+            return fill.copy()
+        if raw.dtype.kind in 'biuf':
+            col = raw.astype(np.float64)
         else:
-            features.append(0.0)
-            features.append(0.0)
-
-        features.append(min(m5_touches / 5.0, 1.0))  # Normalize touches
-
-        # === CONFLUENCE SCORES (0-5 range to 0-1) ===
-        buy_score = float(snapshot.get('tech_buy_score', 0))
-        sell_score = float(snapshot.get('tech_sell_score', 0))
-
-        features.append(min(buy_score / 5.0, 1.0))
-        features.append(min(sell_score / 5.0, 1.0))
-        features.append(float(snapshot.get('entry_quality', 0)) / 100.0)
-
-        # === SPIKE PROBABILITY ===
-        features.append(float(snapshot.get('spike_probability', 0)))
-
-        # === BOLLINGER BANDS ===
-        features.append(1.0 if snapshot.get('bb_squeeze', False) else 0.0)
-        features.append(float(snapshot.get('vwap_distance_pct', 0)) / 100.0)
-        features.append(float(snapshot.get('bb_pctb', 0.5)))  # Usually 0-1
-        features.append(float(snapshot.get('bb_width_pct', 0)))
+            col = pd.to_numeric(pd.Series(raw, dtype=object), errors='coerce').to_numpy(np.float64)
+        return np.where(np.isnan(col), fill, col)
+
+    def first_num(self, keys: Sequence[str], default: Union[float, np.ndarray]) -> np.ndarray:
+        """First non-zero, non-missing value across ``keys`` (``a or b or default``)"""
+        out = np.broadcast_to(np.asarray(default, dtype=np.float64), (self.n,)).copy()
+        for key in reversed(keys):
+            col = self.num(key, np.nan)
+            ok = ~np.isnan(col) & (col != 0)
+            out = np.where(ok, col, out)
+        return out
+
+    def flag(self, key: str) -> np.ndarray:
+        """Truthiness column as 0.0 / 1.0 (same semantics as ``bool(value)``)"""
+        raw = self._raw(key)
+        if raw is None:
+            return np.zeros(self.n, dtype=np.float64)
+        if raw.dtype.kind in 'biuf':
+            return (np.nan_to_num(raw.astype(np.float64)) != 0).astype(np.float64)
+        return np.fromiter((1.0 if (v is not None and v == v and v) else 0.0 for v in raw),
+                           dtype=np.float64, count=self.n)
+
+    def text(self, key: str, default: str = '') -> np.ndarray:
+        """Upper-cased string column"""
+        raw = self._raw(key)
+        if raw is None:
+            return np.full(self.n, default.upper(), dtype=object)
+        s = pd.Series(raw, dtype=object).where(pd.notna(raw), default)
+        return s.astype(str).str.upper().to_numpy(dtype=object)
+
+
+def _safe_div(num: np.ndarray, den: np.ndarray) -> np.ndarray:
+    """num / den with 0.0 where den <= 0 (price-normalized ratios)"""
+    ok = den > 0
+    return np.where(ok, num / np.where(ok, den, 1.0), 0.0)
+
+
+def compute_snapshot_features(data: SnapshotBatch) -> np.ndarray:
+    """Feature matrix (n_samples x len(FEATURE_SCHEMA)) built column-wise"""
+    c = _Columns(data)
+    n = c.n
+    out = np.empty((n, len(FEATURE_SCHEMA)), dtype=np.float32)
+    if n == 0:
+        return out
+
+    bid = c.num('bid')
+
+    # === PRICE & SPREAD (normalized by bid) ===
+    spread_pct = _safe_div(c.num('spread_pips'), bid) * 10000
+
+    # === VOLATILITY RATIOS ===
+    atr_m1, atr_m5 = c.num('atr_m1'), c.num('atr_m5')
+    atr_m15, atr_h1 = c.num('atr_m15'), c.num('atr_h1')
+
+    # === TREND STRENGTH (EMA distance, tanh bounded) ===
+    trends = [
+        np.tanh(_safe_div(c.num(f'ema_fast_{tf}', bid) - c.num(f'ema_slow_{tf}', bid), bid))
+        for tf in ('m1', 'm5', 'm15', 'h1')
+    ]
+
+    # === KOLA LEVELS (proximity to price) ===
+    touches = c.num('m5_buy_touches') + c.num('m5_sell_touches')
+
+    # === CURRENT SIGNAL ===
+    action = c.text('signal_action', 'HOLD')
+    action_num = np.where(action == 'BUY', 1.0, np.where(action == 'SELL', -1.0, 0.0))
+
+    columns = (
+        spread_pct,
+        c.num('rsi_m1', 50) / 100.0,
+        c.num('rsi_m5', 50) / 100.0,
+        c.num('rsi_m15', 50) / 100.0,
+        c.num('rsi_h1', 50) / 100.0,
+        np.minimum(c.num('atr_ratio', 1.0), 3.0) / 3.0,
+        atr_m1 / np.maximum(atr_m5, 0.00001),
+        atr_m5 / np.maximum(atr_m15, 0.00001),
+        atr_m15 / np.maximum(atr_h1, 0.00001),
+        *trends,
+        c.flag('fvg_detected'),
+        c.num('fvg_direction'),
+        c.flag('bos_detected'),
+        c.num('bos_direction'),
+        np.minimum(c.num('ob_proximity_atr') / 2.0, 1.0),
+        c.flag('sweep_detected'),
+        _safe_div(np.abs(bid - c.num('m5_buy_level', bid)), bid),
+        _safe_div(np.abs(bid - c.num('m5_sell_level', bid)), bid),
+        np.minimum(touches / 5.0, 1.0),
+        np.minimum(c.num('tech_buy_score') / 5.0, 1.0),
+        np.minimum(c.num('tech_sell_score') / 5.0, 1.0),
+        c.num('entry_quality') / 100.0,
+        c.num('spike_probability'),
+        c.flag('bb_squeeze'),
+        c.num('vwap_distance_pct') / 100.0,
+        c.num('bb_pctb', 0.5),
+        c.num('bb_width_pct'),
+        np.minimum(c.num('volume_ratio', 1.0) / 2.0, 1.0),
+        c.flag('sido_double_top'),
+        c.flag('sido_double_bottom'),
+        np.minimum(c.num('coherence_score', 0.5), 1.0),
+        action_num,
+        c.num('signal_confidence'),
+    )
+    for j, col in enumerate(columns):
+        out[:, j] = col
+    return out
+
+
+def compute_ohlcv_features(data: SnapshotBatch) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    OHLCV feature matrix (n_samples x 22) from GOM dashboard cache rows.
+
+    Returns (features, valid) where ``valid`` flags rows with a usable price;
+    invalid rows are filled with zeros.
+    """
+    c = _Columns(data)
+    out = np.zeros((c.n, len(OHLCV_FEATURE_SCHEMA)), dtype=np.float32)
+    if c.n == 0:
+        return out, np.zeros(0, dtype=bool)
+
+    price = c.first_num(('bid', 'price', 'entry'), 0.0)
+    valid = price > 0
+    safe_price = np.maximum(price, 1e-9)
+
+    rsi = c.first_num(('rsi', 'rsi14'), 50.0)
+    atr = c.first_num(('atr', 'atr14'), price * 0.001)
+    bb_up = c.first_num(('bb_up',), price + atr * 2)
+    bb_dn = c.first_num(('bb_dn',), price - atr * 2)
+    ema20 = c.first_num(('ema_slow_m1', 'ema_slow'), price)
+    ema50 = c.first_num(('ema_slow_m5', 'ema_slow_h1'), price)
+    ema_fast = c.first_num(('ema_fast_m1', 'ema_fast'), price)
+
+    # MACD approximé depuis EMA fast/slow M1, momentum approximé depuis RSI
+    macd_val = (ema_fast - ema20) / safe_price
+    macd_sig = macd_val * 0.9
+    mom = (rsi - 50) / 50.0
+    ones, zeros = np.ones(c.n), np.zeros(c.n)
+
+    columns = (
+        (price - ema20) / safe_price,
+        (price - ema50) / safe_price,
+        rsi,
+        rsi / 100.0,
+        macd_val,
+        macd_sig,
+        macd_val - macd_sig,
+        atr,
+        atr / safe_price,
+        ones,
+        (bb_up - bb_dn) / safe_price,
+        (price - bb_dn) / np.maximum(bb_up - bb_dn, 1e-9),
+        ones,
+        zeros,
+        atr * 2,
+        zeros,
+        atr * 0.5,
+        mom,
+        mom * 0.9,
+        mom * 0.8,
+        atr,
+        atr,
+    )
+    for j, col in enumerate(columns):
+        out[:, j] = col
+    out[~valid] = 0.0
+    return out, valid
+
+
+def compute_outcome_labels(direction: Any, profit: Any) -> np.ndarray:
+    """Vectorized labels (n_samples x 2): direction in {-1,0,1}, profit sign"""
+    d = pd.to_numeric(pd.Series(direction, dtype=object), errors='coerce').fillna(0).to_numpy()
+    p = pd.to_numeric(pd.Series(profit, dtype=object), errors='coerce').fillna(0).to_numpy()
+    return np.column_stack([d.astype(np.int64), np.sign(p)]).astype(np.int8)
 
-        # === VOLUME ===
-        volume_ratio = float(snapshot.get('volume_ratio', 1.0))
-        features.append(min(volume_ratio / 2.0, 1.0))
 
-        # === SIDO PATTERNS ===
-        features.append(1.0 if snapshot.get('sido_double_top', False) else 0.0)
-        features.append(1.0 if snapshot.get('sido_double_bottom', False) else 0.0)
-
-        # === MULTI-TIMEFRAME COHERENCE ===
-        coherence = float(snapshot.get('coherence_score', 0.5))
-        features.append(min(coherence, 1.0))
-
-        # === CURRENT SIGNAL ===
-        action = str(snapshot.get('signal_action', 'HOLD')).upper()
-        features.append(1.0 if action == 'BUY' else (-1.0 if action == 'SELL' else 0.0))
-        features.append(float(snapshot.get('signal_confidence', 0)))
+class FeatureEngineer:
+    """Convert market snapshots to ML features"""
 
-        return np.array(features, dtype=np.float32)
+    schema_version = FEATURE_SCHEMA_VERSION
 
-    def prepare_feature_matrix(self, snapshots: List[Dict[str, Any]]) -> np.ndarray:
-        """Convert list of snapshots to feature matrix (n_samples x n_features)"""
-        features_list = []
+    def __init__(self):
+        self.feature_names: List[str] = [spec.name for spec in FEATURE_SCHEMA]
+        self.feature_stats: Dict[str, Dict[str, float]] = {}
 
-        for snapshot in snapshots:
-            try:
-                features = self.prepare_features_from_snapshot(snapshot)
-                features_list.append(features)
-            except Exception as e:
-                print(f"Warning: Failed to process snapshot: {e}")
-                continue
+    def prepare_features_from_snapshot(self, snapshot: Dict[str, Any]) -> np.ndarray:
+        """Convert a single indicator snapshot dict to ML feature vector"""
+        return compute_snapshot_features([snapshot])[0]
 
-        if not features_list:
+    def prepare_feature_matrix(self, snapshots: SnapshotBatch) -> np.ndarray:
+        """Convert snapshots (records, DataFrame or structured array) to feature matrix (n_samples x n_features)"""
+        features = compute_snapshot_features(snapshots)
+        if len(features) == 0:
             raise ValueError("No valid snapshots could be processed")
-
-        return np.array(features_list, dtype=np.float32)
+        return features
 
     def prepare_labels_from_outcome(self,
                                    actual_direction: Optional[int],
                                    actual_profit: Optional[float]) -> np.ndarray:
         """Convert outcome data to labels for ML (direction and profitability)"""
-
-        labels = []
-
-        # Direction label: -1 (down), 0 (neutral), 1 (up)
-        if actual_direction is not None:
-            labels.append(int(actual_direction))
-        else:
-            labels.append(0)
-
-        # Profitability: 1 (profitable), 0 (breakeven), -1 (loss)
-        if actual_profit is not None:
-            if actual_profit > 0:
-                labels.append(1)
-            elif actual_profit < 0:
-                labels.append(-1)
-            else:
-                labels.append(0)
-        else:
-            labels.append(0)
-
-        return np.array(labels, dtype=np.int8)
+        return compute_outcome_labels([actual_direction], [actual_profit])[0]
 
     def normalize_features(self, features: np.ndarray,
                           method: str = 'standard') -> np.ndarray:
@@ -223,20 +394,7 @@ class FeatureEngineer:
 
     def get_feature_importance_names(self) -> List[str]:
         """Return list of feature names for model interpretation"""
-        return [
-            'spread_pct', 'rsi_m1', 'rsi_m5', 'rsi_m15', 'rsi_h1',
-            'atr_ratio', 'atr_m1_m5', 'atr_m5_m15', 'atr_m15_h1',
-            'trend_m1', 'trend_m5', 'trend_m15', 'trend_h1',
-            'fvg_detected', 'fvg_direction', 'bos_detected', 'bos_direction',
-            'ob_proximity', 'sweep_detected',
-            'm5_buy_dist', 'm5_sell_dist', 'm5_touches_norm',
-            'confluence_buy', 'confluence_sell', 'entry_quality', 'spike_prob',
-            'bb_squeeze', 'vwap_dist', 'bb_pctb', 'bb_width',
-            'volume_ratio',
-            'sido_top', 'sido_bottom',
-            'coherence',
-            'signal_action', 'signal_confidence'
-        ]
+        return [spec.name for spec in FEATURE_SCHEMA]
 
     @staticmethod
     def create_training_dataset(snapshots_df: pd.DataFrame,
@@ -250,18 +408,13 @@ class FeatureEngineer:
         Returns:
             Tuple of (X: features, y: labels) for training
         """
-        snapshots = snapshots_df.to_dict('records')
-        X = engineer.prepare_feature_matrix(snapshots)
-
-        # Create labels from outcome columns
-        labels = []
-        for _, row in snapshots_df.iterrows():
-            direction = row.get('direction_5min')
-            profit = row.get('profit_5min')
-            label = engineer.prepare_labels_from_outcome(direction, profit)
-            labels.append(label)
+        X = engineer.prepare_feature_matrix(snapshots_df)
 
-        y = np.array(labels, dtype=np.int8)
+        # Labels from outcome columns, computed column-wise
+        y = compute_outcome_labels(
+            snapshots_df['direction_5min'] if 'direction_5min' in snapshots_df else [None] * len(snapshots_df),
+            snapshots_df['profit_5min'] if 'profit_5min' in snapshots_df else [None] * len(snapshots_df),
+        )
 
         return X, y
 
@@ -292,7 +445,7 @@ def engineer_features(snapshot: Dict[str, Any]) -> np.ndarray:
     return engineer.prepare_features_from_snapshot(snapshot)
 
 
-def engineer_batch(snapshots: List[Dict[str, Any]]) -> np.ndarray:
+def engineer_batch(snapshots: SnapshotBatch) -> np.ndarray:
     """Quick batch feature engineering"""
     engineer = FeatureEngineer()
     return engineer.prepare_feature_matrix(snapshots)
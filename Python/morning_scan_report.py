@@ -80,7 +80,7 @@ class MorningScanReportGenerator:
     def run_mcp_watchlist_scan(self, symbols: List[str], force_fallback: bool = False) -> List[Dict]:
         """
         Call the MCP tradbot_watchlist_scan tool via the ai_server bridge.
-        Falls back to /ml/predict per symbol if bridge unavailable.
+        Falls back to one /ml/predict-batch call for the whole watchlist if bridge unavailable.
 
         Args:
             symbols: Liste symboles à scanner
@@ -103,12 +103,46 @@ class MorningScanReportGenerator:
             except Exception:
                 pass
 
-        # Fallback: analyze each symbol via /ml/predict
-        # Note: /ml/predict retourne swing_points (ML prédiction), pas un signal BUY/SELL direct
-        # → Génère signaux de test aléatoires (nécessite GOM poller en production)
+        # Fallback 1: score ML de toute la watchlist en un seul appel /ml/predict-batch
+        ml_by_symbol = {}
+        try:
+            response = requests.post(
+                f"{self.ai_server}/ml/predict-batch",
+                json={"symbols": symbols, "timeframes": ["M1"]},
+                timeout=30
+            )
+            if response.status_code == 200:
+                for res in response.json().get("results", []):
+                    if res.get("ml_available"):
+                        ml_by_symbol[res["symbol"].upper()] = res
+        except Exception:
+            pass
+
+        # Fallback 2: signaux de test aléatoires pour les symboles sans modèle ML
+        # (nécessite GOM poller en production)
         results = []
         import random
         for symbol in symbols:
+            ml = ml_by_symbol.get(symbol.upper())
+            if ml:
+                direction = ml["action"] if ml["action"] in ("BUY", "SELL") else "NEUTRAL"
+                score = float(ml["confidence"]) * 10
+                results.append({
+                    "symbol": symbol,
+                    "success": True,
+                    "current_price": 0,
+                    "bias": {"direction": direction, "score": round(score, 1), "reasons": [f"ML:{ml['model']}"]},
+                    "entry_setup": {
+                        "valid": float(ml["confidence"]) >= 0.5 and direction in ["BUY", "SELL"],
+                        "confluence_score": round(score, 1),
+                        "direction": direction,
+                        "entry_price": None,
+                        "stop_loss": None,
+                        "take_profit": None,
+                        "atr": None,
+                    }
+                })
+                continue
             try:
                 # Seed déterministe par symbole pour cohérence entre exécutions
                 random.seed(hash(symbol) % 1000)
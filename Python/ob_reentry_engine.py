@@ -3,7 +3,9 @@
 ob_reentry_engine.py — Re-entry automatique sur Order Block ou EMA
 
 Logique :
-  1. Lit les OB actifs (bull/bear) + EMA20/50 depuis /gom-verdict (AI server)
+  1. Lit les OB ouverts proches du prix via /zones/{symbol}/near (index de zones du serveur,
+     maintenu à la clôture des bougies → requête légère, pollable chaque seconde)
+     + EMA20/50 / confiance depuis /gom-verdict (mis en cache VERDICT_TTL secondes)
   2. Détecte un "touch" : prix entre dans la zone OB ou approche EMA (≤ 0.3× ATR)
   3. Attend le pullback de confirmation (prix sort de la zone dans la direction)
   4. Place l'ordre via /pending-order avec source="ob_reentry"
@@ -20,7 +22,7 @@ import logging
 import math
 import time
 from dataclasses import dataclass, field
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 
 import requests
 
@@ -28,7 +30,9 @@ import requests
 # Config
 # ---------------------------------------------------------------------------
 AI_SERVER   = "http://127.0.0.1:8000"
-POLL_SEC    = 15          # interval entre deux polls
+POLL_SEC    = 1           # interval entre deux polls (requête zones = bisect côté serveur)
+VERDICT_TTL = 15          # secondes de cache du /gom-verdict (EMA, confiance, OB de secours)
+ZONE_TF     = "M15"       # timeframe de l'index de zones (OB du calculateur GOM)
 TOUCH_SLACK = 0.3         # distance OB/EMA en × ATR pour déclencher "touch"
 CONFIRM_SEC = 30          # délai de confirmation pullback
 COOLDOWN    = 300         # secondes de cooldown après un ordre placé par symbole
@@ -57,6 +61,8 @@ class SymState:
 
 
 _states: Dict[str, SymState] = {}
+_verdicts: Dict[str, Tuple[float, dict]] = {}
+_http = requests.Session()
 
 
 # ---------------------------------------------------------------------------
@@ -71,12 +77,32 @@ def _safe_float(v, default: float = 0.0) -> float:
 
 
 def _get_gom_verdict(symbol: str) -> Optional[dict]:
+    cached = _verdicts.get(symbol)
+    if cached and time.time() - cached[0] < VERDICT_TTL:
+        return cached[1]
     try:
-        r = requests.get(f"{AI_SERVER}/gom-verdict/{symbol}", timeout=8)
+        r = _http.get(f"{AI_SERVER}/gom-verdict/{symbol}", timeout=8)
         if r.status_code == 200:
-            return r.json()
+            data = r.json()
+            _verdicts[symbol] = (time.time(), data)
+            return data
     except Exception as e:
         log.debug("Erreur /gom-verdict/%s: %s", symbol, e)
+    return cached[1] if cached else None
+
+
+def _get_near_zones(symbol: str) -> Optional[dict]:
+    """OB ouverts à moins de TOUCH_SLACK × ATR du prix (None si le serveur n'a pas l'index)."""
+    try:
+        r = _http.get(
+            f"{AI_SERVER}/zones/{symbol}/near",
+            params={"timeframe": ZONE_TF, "atr_mult": TOUCH_SLACK, "kinds": "ob_bull,ob_bear"},
+            timeout=5,
+        )
+        if r.status_code == 200:
+            return r.json()
+    except Exception as e:
+        log.debug("Erreur /zones/%s/near: %s", symbol, e)
     return None
 
 
@@ -92,7 +118,7 @@ def _place_order(symbol: str, direction: str, entry: float, sl: float, tp: float
         "reasoning":  reason,
     }
     try:
-        r = requests.post(f"{AI_SERVER}/pending-order", json=payload, timeout=8)
+        r = _http.post(f"{AI_SERVER}/pending-order", json=payload, timeout=8)
         if r.status_code == 200:
             log.info("✅ Ordre ob_reentry placé: %s %s @ %.5f SL=%.5f TP=%.5f lot=%.2f",
                      symbol, direction, entry, sl, tp, lot)
@@ -134,18 +160,31 @@ def _check_symbol(sym: str):
     if not data:
         return
 
-    price = _safe_float(data.get("current_price") or data.get("price"))
-    atr   = _safe_float(data.get("atr"))
+    zones = _get_near_zones(sym)
+    near: List[dict] = zones.get("zones", []) if zones else []
+    price = _safe_float((zones or {}).get("price")) or _safe_float(data.get("current_price") or data.get("price"))
+    atr   = _safe_float(data.get("atr")) or _safe_float((zones or {}).get("atr"))
     if price <= 0 or atr <= 0:
         return
 
     slack = atr * TOUCH_SLACK
-
-    # --- Niveaux OB depuis /gom-verdict ---
-    ob_bull_top = _safe_float(data.get("ob_bull_top"))
-    ob_bull_bot = _safe_float(data.get("ob_bull_bot"))
-    ob_bear_top = _safe_float(data.get("ob_bear_top"))
-    ob_bear_bot = _safe_float(data.get("ob_bear_bot"))
+    ob_slack = slack
+
+    # --- Niveaux OB : zone ouverte la plus proche (index serveur), sinon /gom-verdict ---
+    if zones is not None:
+        # Touch OB mesuré avec l'ATR de l'index, celui du filtre atr_mult côté serveur
+        zone_atr = _safe_float(zones.get("atr"))
+        if zone_atr > 0:
+            ob_slack = zone_atr * TOUCH_SLACK
+        bull = next((z for z in near if z.get("type") == "ob_bull"), {})
+        bear = next((z for z in near if z.get("type") == "ob_bear"), {})
+        ob_bull_top, ob_bull_bot = _safe_float(bull.get("top")), _safe_float(bull.get("bottom"))
+        ob_bear_top, ob_bear_bot = _safe_float(bear.get("top")), _safe_float(bear.get("bottom"))
+    else:
+        ob_bull_top = _safe_float(data.get("ob_bull_top"))
+        ob_bull_bot = _safe_float(data.get("ob_bull_bot"))
+        ob_bear_top = _safe_float(data.get("ob_bear_top"))
+        ob_bear_bot = _safe_float(data.get("ob_bear_bot"))
 
     # --- EMA depuis /gom-verdict (champs bb_up/dn utilisés comme proxy si EMA absent) ---
     ema20 = _safe_float(data.get("ema20") or data.get("bb_mid"))
@@ -157,13 +196,13 @@ def _check_symbol(sym: str):
 
     # Bullish OB : prix touche la zone → potentiel BUY
     if ob_bull_top > 0 and ob_bull_bot > 0:
-        if ob_bull_bot - slack <= price <= ob_bull_top + slack:
+        if ob_bull_bot - ob_slack <= price <= ob_bull_top + ob_slack:
             touch_type = "ob_bull"
             touch_dir  = "BUY"
 
     # Bearish OB : prix touche la zone → potentiel SELL
     if not touch_type and ob_bear_top > 0 and ob_bear_bot > 0:
-        if ob_bear_bot - slack <= price <= ob_bear_top + slack:
+        if ob_bear_bot - ob_slack <= price <= ob_bear_top + ob_slack:
             touch_type = "ob_bear"
             touch_dir  = "SELL"
 
@@ -0,0 +1,418 @@
+"""
+Exécution des ordres MT5 (mt5_ai_client) : file prioritaire + cache de filling mode par symbole.
+
+- ExecutionCache : filling mode et pas de volume appris au premier succès, modes rejetés mémorisés
+  (avec expiration) et persistés en JSON → plus de tentatives FOK/IOC/RETURN répétées à chaque ordre ;
+- OrderExecutor : file à priorité (heapq), workers à concurrence bornée (un seul ordre en vol par
+  symbole), déduplication des intentions identiques en attente ou exécutées dans une courte fenêtre,
+  abandon des intentions encore en file quand l'appelant cesse d'attendre, latences signal → envoi
+  → exécution.
+
+Le module ne dépend pas de MetaTrader5 : l'envoi (`send(request) -> result`) et les constantes de
+filling sont fournis par le client.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import CancelledError, Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+RETCODE_DONE = 10009  # mt5.TRADE_RETCODE_DONE
+RETCODE_INVALID_FILL = 10030  # mt5.TRADE_RETCODE_INVALID_FILL
+REJECTION_TTL = 24 * 3600.0  # secondes avant de retenter un mode rejeté
+DEDUP_WINDOW = 5.0  # secondes pendant lesquelles un ordre identique exécuté n'est pas renvoyé
+PRIORITY_HIGH = 0  # sorties / trades 100 %
+PRIORITY_NORMAL = 10
+
+
+def is_filling_rejection(result: Any) -> bool:
+    """Rejet lié au mode de remplissage (10030 ou commentaire « filling » / « unsupported »)."""
+    if result is None:
+        return False
+    comment = (getattr(result, "comment", "") or "").lower()
+    return getattr(result, "retcode", None) == RETCODE_INVALID_FILL or "filling" in comment or "unsupported" in comment
+
+
+def _percentile(values: Sequence[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    s = sorted(values)
+    k = (len(s) - 1) * q
+    lo, hi = int(math.floor(k)), int(math.ceil(k))
+    return round(s[lo] + (s[hi] - s[lo]) * (k - lo), 2)
+
+
+class ExecutionCache:
+    """Filling mode appris, modes rejetés et spécification de volume par symbole (JSON atomique)."""
+
+    def __init__(self, path: Optional[Any] = None, rejection_ttl: float = REJECTION_TTL,
+                 clock: Callable[[], float] = time.time):
+        self.path = Path(path) if path is not None else None
+        self.rejection_ttl = float(rejection_ttl)
+        self._clock = clock
+        self._lock = threading.RLock()
+        self._symbols: Dict[str, Dict[str, Any]] = {}
+        if self.path is not None and self.path.exists():
+            self.load()
+
+    def _entry(self, symbol: str) -> Dict[str, Any]:
+        return self._symbols.setdefault(symbol, {"filling_mode": None, "rejected": {}, "successes": 0})
+
+    def filling_mode(self, symbol: str) -> Optional[int]:
+        with self._lock:
+            e = self._symbols.get(symbol)
+            return None if e is None else e.get("filling_mode")
+
+    def filling_candidates(self, symbol: str, preferred: Optional[int], modes: Sequence[int]) -> List[int]:
+        """Mode appris d'abord, puis le mode préféré et les autres, sans les modes rejetés récemment.
+
+        Si tous les modes sont rejetés (changement côté courtier), les rejets sont oubliés.
+        """
+        with self._lock:
+            e = self._symbols.get(symbol) or {}
+            learned = e.get("filling_mode")
+            order: List[int] = []
+            for m in (learned, preferred, *modes):
+                if m is not None and int(m) not in order:
+                    order.append(int(m))
+            now = self._clock()
+            rejected = {int(m) for m, ts in (e.get("rejected") or {}).items() if now - ts < self.rejection_ttl}
+            allowed = [m for m in order if m == learned or m not in rejected]
+            if not allowed and e:
+                e["rejected"] = {}
+                allowed = order
+            return allowed
+
+    def record_success(self, symbol: str, mode: int) -> bool:
+        """Retourne True si le mode est nouvellement appris (cache à persister)."""
+        with self._lock:
+            e = self._entry(symbol)
+            e["successes"] = int(e.get("successes", 0)) + 1
+            e["rejected"].pop(str(int(mode)), None)
+            learned = e.get("filling_mode") != int(mode)
+            if learned:
+                e["filling_mode"] = int(mode)
+                e["learned_at"] = self._clock()
+        if learned:
+            self.save()
+        return learned
+
+    def record_rejection(self, symbol: str, mode: int) -> None:
+        with self._lock:
+            e = self._entry(symbol)
+            e["rejected"][str(int(mode))] = self._clock()
+            if e.get("filling_mode") == int(mode):
+                e["filling_mode"] = None
+        self.save()
+
+    def volume_spec(self, symbol: str, info: Any = None) -> Optional[Tuple[float, float, float]]:
+        """(pas, min, max) — appris depuis symbol_info au premier appel puis servi depuis le cache."""
+        with self._lock:
+            e = self._symbols.get(symbol)
+            if e and e.get("volume_step"):
+                return e["volume_step"], e["volume_min"], e["volume_max"]
+            step = getattr(info, "volume_step", None) if info is not None else None
+            if not step:
+                return None
+            e = self._entry(symbol)
+            e["volume_step"] = float(step)
+            e["volume_min"] = float(getattr(info, "volume_min", 0.0) or step)
+            e["volume_max"] = float(getattr(info, "volume_max", 0.0) or 0.0)
+            spec = e["volume_step"], e["volume_min"], e["volume_max"]
+        self.save()
+        return spec
+
+    def normalize_volume(self, symbol: str, volume: float, info: Any = None) -> float:
+        """Arrondit au pas de volume (vers le bas) et borne à [min, max]."""
+        spec = self.volume_spec(symbol, info)
+        if spec is None:
+            return float(volume)
+        step, vmin, vmax = spec
+        decimals = max(0, -int(math.floor(math.log10(step)))) if step < 1 else 0
+        vol = math.floor(float(volume) / step + 1e-9) * step
+        vol = max(vol, vmin)
+        if vmax:
+            vol = min(vol, vmax)
+        return round(vol, decimals)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return json.loads(json.dumps(self._symbols))
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        with self._lock:  # un seul écrivain à la fois
+            data = self.to_dict()
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"version": 1, "symbols": data}, f, indent=2)
+            os.replace(tmp, self.path)
+
+    def load(self) -> int:
+        if self.path is None or not self.path.exists():
+            return 0
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        with self._lock:
+            self._symbols = {str(k): dict(v) for k, v in (data.get("symbols") or {}).items()}
+            for e in self._symbols.values():
+                e.setdefault("rejected", {})
+                e.setdefault("filling_mode", None)
+            return len(self._symbols)
+
+
+@dataclass
+class OrderIntent:
+    """Ordre à exécuter ; `request` est la requête order_send complète (sauf type_filling)."""
+
+    symbol: str
+    side: str
+    request: Dict[str, Any]
+    priority: int = PRIORITY_NORMAL
+    preferred_filling: Optional[int] = None
+    signal_ts: Optional[float] = None  # instant du signal (time.time()), pour la latence signal → exécution
+
+    @property
+    def key(self) -> Tuple[str, str, float, int, int]:
+        """Clé de déduplication : symbole, sens, volume, type d'ordre, position visée (clôtures)."""
+        return (self.symbol, self.side, round(float(self.request.get("volume", 0.0)), 6),
+                int(self.request.get("type", -1)), int(self.request.get("position", 0) or 0))
+
+
+@dataclass
+class ExecutionReport:
+    ok: bool
+    symbol: str
+    result: Any = None
+    retcode: Optional[int] = None
+    comment: str = ""
+    filling_mode: Optional[int] = None
+    attempts: int = 0
+    rejected_modes: List[int] = field(default_factory=list)
+    queue_ms: float = 0.0
+    send_ms: float = 0.0
+    signal_to_fill_ms: Optional[float] = None
+    abandoned: bool = False  # jamais envoyé : l'appelant a cessé d'attendre avant la prise en charge
+    deduplicated: bool = False  # ordre identique déjà exécuté dans la fenêtre : rien n'a été envoyé
+
+
+class OrderExecutor:
+    """
+    File d'ordres prioritaire (priorité basse = servie d'abord, FIFO à priorité égale).
+
+    max_concurrency workers envoient en parallèle, jamais deux ordres simultanés sur le même symbole ;
+    une intention identique (OrderIntent.key) déjà en attente renvoie le même Future, et une intention
+    identique exécutée depuis moins de dedup_window secondes n'est pas renvoyée (execute_trade et
+    execute_immediate_trade sur le même signal). Une intention encore en file quand execute() expire est
+    annulée : elle ne partira jamais vers MT5 après que l'appelant l'a considérée comme échouée.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[Dict[str, Any]], Any],
+        cache: ExecutionCache,
+        filling_modes: Sequence[int],
+        max_concurrency: int = 2,
+        dedup_window: float = DEDUP_WINDOW,
+        done_retcodes: Sequence[int] = (RETCODE_DONE,),
+        clock: Callable[[], float] = time.time,
+    ):
+        self._send = send
+        self.cache = cache
+        self.filling_modes = tuple(int(m) for m in filling_modes)
+        self.dedup_window = float(dedup_window)
+        self.done_retcodes = tuple(done_retcodes)
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._heap: List[Tuple[int, int, OrderIntent, Future, float]] = []
+        self._seq = itertools.count()
+        self._pending: Dict[Tuple[str, str, float, int, int], Future] = {}
+        self._recent: Dict[Tuple[str, str, float, int, int], Tuple[float, ExecutionReport]] = {}
+        self._in_flight: set = set()
+        self._closed = False
+        self._lat: Dict[str, Deque[float]] = {k: deque(maxlen=500) for k in ("queue_ms", "send_ms", "signal_to_fill_ms")}
+        self.counters: Dict[str, int] = {
+            "submitted": 0, "deduplicated": 0, "abandoned": 0, "filled": 0, "failed": 0,
+            "order_sends": 0, "filling_rejections": 0, "cache_hits": 0, "errors": 0,
+        }
+        self._workers = [
+            threading.Thread(target=self._worker, name=f"order-executor-{i}", daemon=True)
+            for i in range(max(1, int(max_concurrency)))
+        ]
+        for t in self._workers:
+            t.start()
+
+    # ------------------------------------------------------------------ file
+    def submit(self, intent: OrderIntent) -> Future:
+        key = intent.key
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("OrderExecutor arrêté")
+            now = self._clock()
+            for k in [k for k, (ts, _) in self._recent.items() if now - ts >= self.dedup_window]:
+                del self._recent[k]
+            fut = self._pending.get(key)
+            if fut is not None and not fut.cancelled():
+                self.counters["deduplicated"] += 1
+                return fut
+            if key in self._recent:
+                self.counters["deduplicated"] += 1
+                fut = Future()
+                fut.set_result(replace(self._recent[key][1], deduplicated=True))
+                return fut
+            fut = Future()
+            self._pending[key] = fut
+            heapq.heappush(self._heap, (int(intent.priority), next(self._seq), intent, fut, now))
+            self.counters["submitted"] += 1
+            self._cond.notify()
+            return fut
+
+    def execute(self, intent: OrderIntent, timeout: Optional[float] = 30.0) -> ExecutionReport:
+        """Soumet et attend le rapport (appel bloquant pour le code synchrone du client).
+
+        Au-delà de `timeout`, l'intention encore en file est annulée (rapport `abandoned`) ; un ordre
+        déjà transmis à MT5 ne peut plus être retiré, on attend alors son résultat.
+        """
+        fut = self.submit(intent)
+        try:
+            return fut.result(timeout=timeout)
+        except FutureTimeoutError:
+            if not fut.cancel():
+                return fut.result()
+        except CancelledError:  # intention partagée (dédupliquée) abandonnée par un autre appelant
+            pass
+        with self._cond:
+            self.counters["abandoned"] += 1
+        return ExecutionReport(ok=False, symbol=intent.symbol, comment="abandonné en file (délai dépassé)",
+                               abandoned=True)
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._heap)
+
+    def _next(self) -> Optional[Tuple[OrderIntent, Future, float]]:
+        """Intention la plus prioritaire dont le symbole n'a pas d'ordre en vol (verrou tenu)."""
+        if self._heap and self._heap[0][2].symbol not in self._in_flight:
+            _, _, intent, fut, enq = heapq.heappop(self._heap)
+            return intent, fut, enq
+        for entry in sorted(self._heap, key=lambda e: e[:2]):
+            if entry[2].symbol not in self._in_flight:
+                self._heap.remove(entry)
+                heapq.heapify(self._heap)
+                return entry[2], entry[3], entry[4]
+        return None
+
+    def _release(self, intent: OrderIntent, fut: Future) -> None:
+        """Libère la clé d'attente de l'intention (verrou tenu)."""
+        if self._pending.get(intent.key) is fut:
+            del self._pending[intent.key]
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                item = self._next()
+                while item is None:
+                    if self._closed:
+                        return
+                    self._cond.wait()
+                    item = self._next()
+                intent, fut, enq = item
+                if not fut.set_running_or_notify_cancel():  # abandonnée par l'appelant : jamais envoyée
+                    self._release(intent, fut)
+                    continue
+                self._in_flight.add(intent.symbol)
+            report = None
+            try:
+                report = self._run(intent, enq)
+                fut.set_result(report)
+            except Exception as e:  # pragma: no cover - send() ne doit pas lever hors _run
+                self.counters["errors"] += 1
+                fut.set_exception(e)
+            finally:
+                with self._cond:
+                    self._in_flight.discard(intent.symbol)
+                    self._release(intent, fut)
+                    if report is not None and report.ok:
+                        self._recent[intent.key] = (self._clock(), report)
+                    self._cond.notify_all()
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if wait:
+            for t in self._workers:
+                t.join(timeout=5)
+
+    # ------------------------------------------------------------- exécution
+    def _send_once(self, request: Dict[str, Any]) -> Any:
+        """Un seul appel order_send : non idempotent, après une exception l'ordre a pu partir."""
+        self.counters["order_sends"] += 1
+        try:
+            return self._send(request)
+        except Exception:
+            self.counters["errors"] += 1
+            return None
+
+    def _run(self, intent: OrderIntent, enqueued_at: float) -> ExecutionReport:
+        start = self._clock()
+        report = ExecutionReport(ok=False, symbol=intent.symbol, queue_ms=(start - enqueued_at) * 1000.0)
+        learned = self.cache.filling_mode(intent.symbol)
+        candidates = self.cache.filling_candidates(intent.symbol, intent.preferred_filling, self.filling_modes)
+        request = dict(intent.request)
+        result = None
+        for mode in candidates:
+            request["type_filling"] = mode
+            report.attempts += 1
+            result = self._send_once(request)
+            if result is not None and getattr(result, "retcode", None) in self.done_retcodes:
+                report.ok, report.filling_mode = True, mode
+                if mode == learned:
+                    self.counters["cache_hits"] += 1
+                self.cache.record_success(intent.symbol, mode)
+                break
+            if is_filling_rejection(result):
+                self.counters["filling_rejections"] += 1
+                report.rejected_modes.append(mode)
+                self.cache.record_rejection(intent.symbol, mode)
+                continue
+            break  # autre erreur : inutile d'essayer un autre mode
+        end = self._clock()
+        report.result = result
+        report.retcode = getattr(result, "retcode", None) if result is not None else None
+        report.comment = (getattr(result, "comment", "") or "") if result is not None else ""
+        report.send_ms = (end - start) * 1000.0
+        self._lat["queue_ms"].append(report.queue_ms)
+        self._lat["send_ms"].append(report.send_ms)
+        if report.ok:
+            self.counters["filled"] += 1
+            if intent.signal_ts is not None:
+                report.signal_to_fill_ms = (end - intent.signal_ts) * 1000.0
+                self._lat["signal_to_fill_ms"].append(report.signal_to_fill_ms)
+        else:
+            self.counters["failed"] += 1
+        return report
+
+    def stats(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = dict(self.counters)
+        out["pending"] = self.pending()
+        for name, values in self._lat.items():
+            vals = list(values)
+            out[name] = {"p50": _percentile(vals, 0.5), "p95": _percentile(vals, 0.95), "n": len(vals)}
+        return out
@@ -54,6 +54,22 @@ def get_gom_verdict(symbol: str) -> Dict:
         return {}
 
 
+def get_ml_batch(symbols: List[str]) -> Dict[str, Dict]:
+    """Score ML of the whole watchlist in one /ml/predict-batch call (keyed by symbol)"""
+    try:
+        resp = requests.post(
+            f"{GOM_AI_SERVER}/ml/predict-batch",
+            json={"symbols": symbols, "timeframes": ["M1"]},
+            timeout=10
+        )
+        if resp.status_code == 200:
+            return {r["symbol"].upper(): r for r in resp.json().get("results", [])}
+        return {}
+    except Exception as e:
+        print(f"[WARN]  ML batch fetch failed: {e}")
+        return {}
+
+
 def get_symbol_opportunity_status(symbol: str) -> Tuple[bool, Dict]:
     """
     Check if symbol meets PERFECT opportunity criteria:
@@ -101,9 +117,14 @@ def get_symbol_opportunity_status(symbol: str) -> Tuple[bool, Dict]:
 def scan_perfect_opportunities(symbols: List[str]) -> List[Dict]:
     """Scan all symbols for perfect opportunities"""
     perfect = []
+    ml_scores = get_ml_batch(symbols)
     for sym in symbols:
         is_perfect, status = get_symbol_opportunity_status(sym)
         if is_perfect:
+            ml = ml_scores.get(sym.upper())
+            if ml and ml.get("ml_available"):
+                status["ml_action"] = ml.get("action")
+                status["ml_confidence"] = ml.get("confidence")
             # Add detection timestamp if not already there
             if sym not in perfect_opportunities:
                 perfect_opportunities[sym] = datetime.now()
@@ -0,0 +1,221 @@
+"""
+Moteur d'état des positions MT5 (mt5_ai_client) : un seul snapshot `positions_get()` par cycle.
+
+- diff avec le snapshot précédent → événements open / close / modify (SL/TP/volume changés) ;
+- handlers (trailing, sécurisation, SL dynamique, auto-close) appelés sur chaque position ; ils
+  PROPOSENT un SLTPUpdate ou un CloseIntent au lieu d'envoyer eux-mêmes l'ordre ;
+- coalescence : au plus un order_send par position et par cycle (clôture prioritaire, sinon le SL
+  le plus protecteur), sans renvoyer un SL déjà demandé (ou moins bon) tant que le snapshot ne l'a pas reflété ;
+- SL/TP arrondis au point du symbole avant envoi et comparaison ; un envoi refusé est retenté après
+  un délai croissant (FAIL_BACKOFF doublé à chaque échec, plafonné à PENDING_TTL).
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+POSITION_TYPE_BUY = 0  # mt5.POSITION_TYPE_BUY
+PENDING_TTL = 30.0  # secondes avant de renvoyer un SL identique resté sans effet
+FAIL_BACKOFF = 2.0  # secondes avant de retenter après un premier refus de send_sltp
+
+
+@dataclass
+class SLTPUpdate:
+    sl: Optional[float] = None
+    tp: Optional[float] = None
+    reason: str = ""
+
+
+@dataclass
+class CloseIntent:
+    reason: str = ""
+
+
+Proposal = Union[None, SLTPUpdate, CloseIntent]
+Handler = Callable[[Any, Optional[float]], Proposal]
+
+
+@dataclass
+class PositionEvents:
+    opened: List[Any] = field(default_factory=list)
+    closed: List[Any] = field(default_factory=list)
+    modified: List[Tuple[Any, Any]] = field(default_factory=list)  # (avant, après)
+
+
+@dataclass
+class _PendingSL:
+    sl: float  # SL demandé (arrondi)
+    at: float  # instant du dernier envoi
+    failures: int = 0  # refus consécutifs de send_sltp
+    tol: float = 0.0  # demi-point : tolérance de comparaison avec le SL du snapshot
+
+    def wait(self) -> float:
+        if not self.failures:
+            return PENDING_TTL
+        return min(FAIL_BACKOFF * 2 ** (self.failures - 1), PENDING_TTL)
+
+
+@dataclass
+class _HandlerSpec:
+    name: str
+    fn: Handler
+    interval: float
+    last_run: Optional[float] = None
+
+
+def _is_buy(pos: Any) -> bool:
+    return int(pos.type) == POSITION_TYPE_BUY
+
+
+def round_price(price: Optional[float], point: Optional[float]) -> Optional[float]:
+    """Arrondit au nombre de décimales du symbole (point = 10^-digits côté MT5)."""
+    if price is None or not point or point <= 0:
+        return price
+    return round(float(price), max(0, int(round(-math.log10(point)))))
+
+
+def better_sl(pos: Any, current: float, new: float) -> bool:
+    """SL plus protecteur que l'actuel (0 = pas de SL)."""
+    if not current:
+        return True
+    return new > current if _is_buy(pos) else new < current
+
+
+class PositionEngine:
+    """
+    send_sltp(position, sl, tp, reason) -> bool et close(position) -> bool sont fournis par le client MT5 ;
+    le moteur ne touche jamais directement au terminal.
+    """
+
+    def __init__(
+        self,
+        send_sltp: Callable[[Any, float, float, str], bool],
+        close: Callable[[Any], bool],
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._send_sltp = send_sltp
+        self._close = close
+        self._clock = clock
+        self._handlers: List[_HandlerSpec] = []
+        self._listeners: Dict[str, List[Callable[..., None]]] = {"open": [], "close": [], "modify": []}
+        self._snapshot: Dict[int, Any] = {}
+        self._pending_sl: Dict[int, _PendingSL] = {}
+        self.stats: Dict[str, int] = {
+            "cycles": 0, "proposals": 0, "order_sends": 0, "send_failures": 0, "closes": 0, "skipped_pending": 0,
+            "opened": 0, "closed": 0, "modified": 0, "handler_errors": 0,
+        }
+
+    @property
+    def positions(self) -> Dict[int, Any]:
+        return self._snapshot
+
+    def add_handler(self, name: str, fn: Handler, interval: float = 0.0) -> None:
+        """fn(position, point) ; interval > 0 : au plus une évaluation par intervalle (toutes positions)."""
+        self._handlers.append(_HandlerSpec(name, fn, float(interval)))
+
+    def on(self, event: str, fn: Callable[..., None]) -> None:
+        self._listeners[event].append(fn)
+
+    def diff(self, positions: Sequence[Any]) -> PositionEvents:
+        current = {int(p.ticket): p for p in positions}
+        ev = PositionEvents()
+        for ticket, pos in current.items():
+            old = self._snapshot.get(ticket)
+            if old is None:
+                ev.opened.append(pos)
+            elif (old.sl, old.tp, old.volume) != (pos.sl, pos.tp, pos.volume):
+                ev.modified.append((old, pos))
+        ev.closed = [p for t, p in self._snapshot.items() if t not in current]
+        self._snapshot = current
+        return ev
+
+    def _dispatch(self, ev: PositionEvents) -> None:
+        for pos in ev.opened:
+            for fn in self._listeners["open"]:
+                fn(pos)
+        for pos in ev.closed:
+            self._pending_sl.pop(int(pos.ticket), None)
+            for fn in self._listeners["close"]:
+                fn(pos)
+        for old, new in ev.modified:
+            pend = self._pending_sl.get(int(new.ticket))
+            if pend is not None and new.sl is not None and abs(new.sl - pend.sl) <= pend.tol:
+                self._pending_sl.pop(int(new.ticket), None)
+            for fn in self._listeners["modify"]:
+                fn(old, new)
+        self.stats["opened"] += len(ev.opened)
+        self.stats["closed"] += len(ev.closed)
+        self.stats["modified"] += len(ev.modified)
+
+    def _coalesce(self, pos: Any, proposals: List[Tuple[str, Proposal]]) -> Optional[Union[CloseIntent, SLTPUpdate]]:
+        closes = [p for _, p in proposals if isinstance(p, CloseIntent)]
+        if closes:
+            return closes[0]
+        updates = [(n, p) for n, p in proposals if isinstance(p, SLTPUpdate)]
+        sl_cands = [(n, p) for n, p in updates if p.sl is not None and better_sl(pos, pos.sl, p.sl)]
+        tp = next((p.tp for _, p in reversed(updates) if p.tp is not None), None)
+        if not sl_cands and tp is None:
+            return None
+        if sl_cands:
+            pick = max if _is_buy(pos) else min
+            name, best = pick(sl_cands, key=lambda c: c[1].sl)
+            return SLTPUpdate(best.sl, tp, best.reason or name)
+        return SLTPUpdate(None, tp, "TP")
+
+    def process(self, positions: Sequence[Any], point_of: Callable[[str], Optional[float]]) -> PositionEvents:
+        """Un cycle : diff + événements, handlers dus, puis au plus un ordre par position."""
+        now = self._clock()
+        self.stats["cycles"] += 1
+        ev = self.diff(positions or ())
+        self._dispatch(ev)
+
+        due = [h for h in self._handlers if h.last_run is None or now - h.last_run >= h.interval]
+        for h in due:
+            h.last_run = now
+        if not due:
+            return ev
+
+        for ticket, pos in self._snapshot.items():
+            point = point_of(pos.symbol)
+            proposals: List[Tuple[str, Proposal]] = []
+            for h in due:
+                try:
+                    p = h.fn(pos, point)
+                except Exception:
+                    self.stats["handler_errors"] += 1
+                    logger.exception("Handler %s en erreur (ticket %s, %s)", h.name, ticket, pos.symbol)
+                    continue
+                if p is not None:
+                    proposals.append((h.name, p))
+            self.stats["proposals"] += len(proposals)
+            action = self._coalesce(pos, proposals)
+            if action is None:
+                continue
+            if isinstance(action, CloseIntent):
+                self.stats["closes"] += 1
+                self._close(pos)
+                continue
+            sl = round_price(action.sl, point) if action.sl is not None else pos.sl
+            tp = round_price(action.tp, point) if action.tp is not None else pos.tp
+            if sl == pos.sl and tp == pos.tp:
+                continue  # l'arrondi ramène au SL/TP en place : rien à envoyer
+            pend = self._pending_sl.get(ticket)
+            if pend is not None and now - pend.at < pend.wait() and (pend.failures or not better_sl(pos, pend.sl, sl)):
+                self.stats["skipped_pending"] += 1
+                continue
+            self.stats["order_sends"] += 1
+            if self._send_sltp(pos, sl, tp, action.reason):
+                self._pending_sl[ticket] = _PendingSL(sl, now, tol=(point or 0.0) / 2)
+            else:
+                self.stats["send_failures"] += 1
+                failures = pend.failures + 1 if pend is not None else 1
+                self._pending_sl[ticket] = _PendingSL(sl, now, failures, tol=(point or 0.0) / 2)
+                logger.warning("send_sltp refusé (ticket %s, %s, SL %s) : nouvel essai dans %.0fs",
+                               ticket, pos.symbol, sl, self._pending_sl[ticket].wait())
+        return ev
@@ -0,0 +1,381 @@
+"""
+Banc de replay des endpoints de décision (trafic EA réel, app in-process).
+
+1. Enregistrement : avec AI_RECORD_REQUESTS_FILE=data/bench/ea_requests.jsonl, le
+   serveur IA ajoute RecordingMiddleware qui écrit chaque POST /decision, /decision_v2,
+   /gom-verdict, /pending-order (corps brut + query) en JSON-lines.
+2. Replay : l'app FastAPI est importée en process, MT5 / Supabase / Ollama sont
+   remplacés par des stubs déterministes (server_stubs), puis les requêtes sont
+   rejouées via httpx.ASGITransport à la concurrence voulue.
+3. Rapport : débit + p50/p95/p99 par endpoint ; --baseline compare deux rapports et
+   sort en code 1 si une latence régresse au-delà du seuil.
+
+    python Python/replay_bench.py run --recording data/bench/ea_requests.jsonl \\
+        --concurrency 8 --repeat 3 --out data/bench/report.json --baseline data/bench/baseline.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+DEFAULT_ROUTES = ("/decision", "/decision_v2", "/gom-verdict", "/pending-order")
+MAX_BODY_BYTES = 512 * 1024
+DEFAULT_THRESHOLD_PCT = 15.0
+DEFAULT_MIN_DELTA_MS = 2.0
+
+
+class RecordingMiddleware:
+    """Middleware ASGI : copie le corps des POST ciblés sans le consommer (tee de receive)."""
+
+    def __init__(self, app: Any, path: str, routes: Sequence[str] = DEFAULT_ROUTES):
+        self.app = app
+        self.path = Path(path)
+        self.routes = frozenset(routes)
+        self._lock = threading.Lock()
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope.get("type") != "http" or scope.get("method") != "POST" or scope.get("path") not in self.routes:
+            await self.app(scope, receive, send)
+            return
+
+        chunks: List[bytes] = []
+        status: Dict[str, int] = {}
+
+        async def tee_receive():
+            message = await receive()
+            if message.get("type") == "http.request" and sum(map(len, chunks)) < MAX_BODY_BYTES:
+                chunks.append(message.get("body", b""))
+            return message
+
+        async def tee_send(message):
+            if message.get("type") == "http.response.start":
+                status["code"] = int(message.get("status", 0))
+            await send(message)
+
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, tee_receive, tee_send)
+        finally:
+            self._write({
+                "ts": time.time(),
+                "method": "POST",
+                "path": scope["path"],
+                "query": (scope.get("query_string") or b"").decode("latin-1"),
+                "body": b"".join(chunks).decode("utf-8", errors="replace"),
+                "status": status.get("code"),
+                "recorded_ms": round((time.perf_counter() - t0) * 1000, 3),
+            })
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        try:
+            with self._lock:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with self.path.open("a", encoding="utf-8") as f:
+                    f.write(line)
+        except OSError:
+            pass
+
+
+def load_recording(path: str, routes: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+    """Requêtes enregistrées (ordre d'origine), filtrées par route si demandé."""
+    wanted = set(routes) if routes else None
+    records = []
+    with Path(path).open(encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rec = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if wanted is None or rec.get("path") in wanted:
+                records.append(rec)
+    return records
+
+
+def _percentile(sorted_vals: List[float], q: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    k = (len(sorted_vals) - 1) * q
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_vals) - 1)
+    return sorted_vals[lo] + (sorted_vals[hi] - sorted_vals[lo]) * (k - lo)
+
+
+def summarize(samples: List[Dict[str, Any]], wall_sec: float) -> Dict[str, Any]:
+    """Rapport par endpoint : débit, p50/p95/p99 des réponses < 400, erreurs 4xx et 5xx."""
+    by_path: Dict[str, List[Dict[str, Any]]] = {}
+    for s in samples:
+        by_path.setdefault(s["path"], []).append(s)
+    endpoints = {}
+    for path, items in sorted(by_path.items()):
+        # Une 4xx/422 répond sans faire le travail : exclue des latences
+        lat = sorted(s["ms"] for s in items if 0 < s["status"] < 400)
+        client_errors = sum(1 for s in items if 400 <= s["status"] < 500)
+        server_errors = sum(1 for s in items if s["status"] >= 500 or s["status"] == 0)
+        endpoints[path] = {
+            "count": len(items),
+            "errors": client_errors + server_errors,
+            "client_errors": client_errors,
+            "server_errors": server_errors,
+            "throughput_rps": round(len(items) / wall_sec, 2) if wall_sec > 0 else 0.0,
+            "mean_ms": round(sum(lat) / len(lat), 3) if lat else 0.0,
+            "p50_ms": round(_percentile(lat, 0.50), 3),
+            "p95_ms": round(_percentile(lat, 0.95), 3),
+            "p99_ms": round(_percentile(lat, 0.99), 3),
+            "max_ms": round(lat[-1], 3) if lat else 0.0,
+        }
+    return {
+        "requests": len(samples),
+        "wall_sec": round(wall_sec, 3),
+        "throughput_rps": round(len(samples) / wall_sec, 2) if wall_sec > 0 else 0.0,
+        "endpoints": endpoints,
+    }
+
+
+async def replay(
+    app: Any,
+    records: Sequence[Dict[str, Any]],
+    concurrency: int = 8,
+    repeat: int = 1,
+    warmup: int = 1,
+    timeout: float = 60.0,
+) -> Dict[str, Any]:
+    """Rejoue `records` contre `app` (ASGI in-process) et retourne le rapport."""
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    sem = asyncio.Semaphore(max(1, int(concurrency)))
+    samples: List[Dict[str, Any]] = []
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://replay", timeout=timeout) as client:
+
+        async def one(rec: Dict[str, Any], keep: bool) -> None:
+            url = rec["path"] + (f"?{rec['query']}" if rec.get("query") else "")
+            async with sem:
+                t0 = time.perf_counter()
+                try:
+                    resp = await client.request(
+                        rec.get("method", "POST"), url, content=(rec.get("body") or "").encode("utf-8"),
+                        headers={"content-type": "application/json"},
+                    )
+                    code = resp.status_code
+                except Exception:
+                    code = 0
+                ms = (time.perf_counter() - t0) * 1000
+            if keep:
+                samples.append({"path": rec["path"], "status": code, "ms": ms})
+
+        for _ in range(max(0, int(warmup))):
+            for rec in records:
+                await one(rec, keep=False)
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one(rec, True) for _ in range(max(1, int(repeat))) for rec in records))
+        wall = time.perf_counter() - t0
+
+    report = summarize(samples, wall)
+    report["concurrency"] = int(concurrency)
+    report["repeat"] = int(repeat)
+    return report
+
+
+def compare_reports(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold_pct: float = DEFAULT_THRESHOLD_PCT,
+    min_delta_ms: float = DEFAULT_MIN_DELTA_MS,
+    metrics: Sequence[str] = ("p50_ms", "p95_ms", "p99_ms"),
+) -> List[Dict[str, Any]]:
+    """Régressions : métrique courante > base × (1 + seuil) ET écart absolu > min_delta_ms."""
+    regressions = []
+    for path, cur in current.get("endpoints", {}).items():
+        base = baseline.get("endpoints", {}).get(path)
+        if not base:
+            continue
+        for m in metrics:
+            b, c = float(base.get(m, 0.0)), float(cur.get(m, 0.0))
+            if c - b > min_delta_ms and c > b * (1.0 + threshold_pct / 100.0):
+                regressions.append({
+                    "endpoint": path,
+                    "metric": m,
+                    "baseline": b,
+                    "current": c,
+                    "change_pct": round((c / b - 1.0) * 100.0, 1) if b > 0 else None,
+                })
+    return regressions
+
+
+def _canned_payload() -> bytes:
+    return b"[]"
+
+
+# Fichiers écrits par les routes rejouées (redirigés vers un répertoire temporaire)
+STATE_FILES = (
+    "_PENDING_ORDERS_FILE", "FEEDBACK_FILE", "PREDICTION_VALIDATION_FILE", "CALIBRATION_FILE",
+    "VOLATILITY_STATE_FILE", "_SESSION_BIAS_FILE", "_BC_VOL_CACHE_PATH",
+)
+# Stores (dict ou SharedMap sqlite) remplacés par une copie en mémoire
+STATE_STORES = (
+    "_PENDING_ORDER_STORE", "_GOM_VERDICT_STORE", "_GOM_TABLEAU_STORE", "_symbol_calibration", "_last_spike_info",
+)
+
+
+@contextmanager
+def server_stubs(server: Any) -> Iterator[None]:
+    """
+    Stubs déterministes pour le replay : pas de réseau (Supabase / RDS / Ollama / HTTP
+    sortant), MT5 remplacé par des bougies synthétiques stables par symbole.
+    L'état de production n'est pas modifié : DATA_DIR et les fichiers persistés pointent
+    vers un répertoire temporaire, les stores partagés sont remplacés par des copies.
+    """
+    import httpx
+    import numpy as np
+    import pandas as pd
+    import requests
+
+    patches: List[tuple] = []
+
+    def patch(obj: Any, name: str, value: Any) -> None:
+        if hasattr(obj, name):
+            patches.append((obj, name, getattr(obj, name)))
+            setattr(obj, name, value)
+
+    async def fake_async(self, request):
+        return httpx.Response(200, content=_canned_payload(), request=request)
+
+    def fake_sync(self, request):
+        return httpx.Response(200, content=_canned_payload(), request=request)
+
+    def fake_requests(self, method, url, *args, **kwargs):
+        resp = requests.Response()
+        resp.status_code = 200
+        resp._content = _canned_payload()
+        resp.url = str(url)
+        return resp
+
+    candles: Dict[tuple, Any] = {}
+
+    def fake_history(symbol: str, timeframe: str = "H1", count: int = 500):
+        key = (str(symbol), str(timeframe), int(count))
+        if key not in candles:
+            rng = np.random.default_rng(zlib.crc32(f"{key[0]}|{key[1]}".encode()))
+            close = 1000.0 + np.cumsum(rng.normal(0, 1, key[2]))
+            open_ = np.r_[close[0], close[:-1]]
+            candles[key] = pd.DataFrame({
+                "time": pd.date_range("2026-01-01", periods=key[2], freq="min"),
+                "open": open_,
+                "high": np.maximum(open_, close) + rng.random(key[2]),
+                "low": np.minimum(open_, close) - rng.random(key[2]),
+                "close": close,
+                "tick_volume": rng.integers(50, 500, key[2]),
+            })
+        return candles[key].copy()
+
+    patch(httpx.AsyncHTTPTransport, "handle_async_request", fake_async)
+    patch(httpx.HTTPTransport, "handle_request", fake_sync)
+    patch(requests.Session, "request", fake_requests)
+    patch(server, "_supabase_credentials_ready", lambda: False)
+    patch(server, "mt5_initialized", False)
+    patch(server, "get_historical_data_mt5", fake_history)
+    patch(server, "_call_ollama_local", lambda *a, **k: None)
+    patch(server, "ollama_service_reachable", lambda force=False: False)
+    patch(server, "AWS_RDS_AVAILABLE", False)
+
+    tmp = Path(tempfile.mkdtemp(prefix="replay_bench_"))
+    patch(server, "DATA_DIR", tmp / "data")
+    (tmp / "data").mkdir()
+    for name in STATE_FILES:
+        original = getattr(server, name, None)
+        if original is not None:
+            patch(server, name, tmp / "data" / Path(original).name)
+    for name in STATE_STORES:
+        store = getattr(server, name, None)
+        if store is not None:
+            patch(server, name, dict(store.items()))
+    view = getattr(server, "_gom_tableau_view", None)
+    if view is not None and hasattr(server, "_GOM_TABLEAU_STORE"):
+        patch(view, "store", server._GOM_TABLEAU_STORE)
+    try:
+        yield
+    finally:
+        for obj, name, original in reversed(patches):
+            setattr(obj, name, original)
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _load_server(root: Path) -> Any:
+    """Importe le serveur racine (ai_server.py) sans ses arguments CLI."""
+    sys.path.insert(0, str(root))
+    sys.path.insert(1, str(root / "Python"))
+    argv, sys.argv = sys.argv, [sys.argv[0]]
+    try:
+        import ai_server  # type: ignore
+    finally:
+        sys.argv = argv
+    return ai_server
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Replay benchmark des endpoints de décision")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    run = sub.add_parser("run", help="rejouer un enregistrement contre l'app in-process")
+    run.add_argument("--recording", required=True)
+    run.add_argument("--routes", default=",".join(DEFAULT_ROUTES))
+    run.add_argument("--concurrency", type=int, default=8)
+    run.add_argument("--repeat", type=int, default=1)
+    run.add_argument("--warmup", type=int, default=1)
+    run.add_argument("--out", default="")
+    run.add_argument("--baseline", default="")
+    run.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD_PCT)
+    run.add_argument("--min-delta-ms", type=float, default=DEFAULT_MIN_DELTA_MS)
+    cmp_ = sub.add_parser("compare", help="comparer deux rapports JSON")
+    cmp_.add_argument("baseline")
+    cmp_.add_argument("current")
+    cmp_.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD_PCT)
+    cmp_.add_argument("--min-delta-ms", type=float, default=DEFAULT_MIN_DELTA_MS)
+    args = ap.parse_args(argv)
+
+    if args.cmd == "compare":
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        report = json.loads(Path(args.current).read_text(encoding="utf-8"))
+    else:
+        records = load_recording(args.recording, [r for r in args.routes.split(",") if r])
+        if not records:
+            print(f"Aucune requête dans {args.recording}", file=sys.stderr)
+            return 2
+        server = _load_server(Path(__file__).resolve().parents[1])
+        with server_stubs(server):
+            report = asyncio.run(replay(server.app, records, args.concurrency, args.repeat, args.warmup))
+        if args.out:
+            Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+            Path(args.out).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8")) if args.baseline else None
+
+    print(f"{'endpoint':<16} {'n':>6} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'err':>5}")
+    for path, e in report["endpoints"].items():
+        print(f"{path:<16} {e['count']:>6} {e['throughput_rps']:>8} {e['p50_ms']:>9} {e['p95_ms']:>9} {e['p99_ms']:>9} {e['errors']:>5}")
+
+    if baseline is None:
+        return 0
+    regressions = compare_reports(baseline, report, args.threshold, args.min_delta_ms)
+    for r in regressions:
+        print(f"REGRESSION {r['endpoint']} {r['metric']}: {r['baseline']} → {r['current']} ms ({r['change_pct']}%)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
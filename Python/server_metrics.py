@@ -0,0 +1,397 @@
+"""
+Instrumentation in-process du serveur IA (sans dépendance externe).
+
+- Histogrammes de latence par route (template FastAPI, ex: /stats/{symbol}) et par
+  étape interne (parse, cache_lookup, mt5_fetch, enrichment, ml, storage…)
+- Gauges de requêtes en vol par route, compteurs hit/miss par cache, lag de l'event loop
+- Exposition Prometheus texte (/metrics) + ring buffer des dernières requêtes pour
+  /monitoring/dashboard (p50/p95/p99 exacts sur la fenêtre récente)
+
+Coût par observation : un bisect + quelques incréments sous verrou.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import inspect
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+RING_SIZE = 4096
+METRIC_PREFIX = "tradbot"
+
+
+class Histogram:
+    """Histogramme cumulatif style Prometheus (bornes `le` fixes)."""
+
+    __slots__ = ("buckets", "counts", "sum", "count", "max")
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        out, acc = [], 0
+        for le, n in zip(self.buckets, self.counts):
+            acc += n
+            out.append((_fmt(le), acc))
+        out.append(("+Inf", acc + self.counts[-1]))
+        return out
+
+    def quantile(self, q: float) -> float:
+        """Estimation par interpolation linéaire dans le bucket (comme histogram_quantile)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        acc, lower = 0, 0.0
+        for i, n in enumerate(self.counts):
+            upper = self.buckets[i] if i < len(self.buckets) else self.max
+            if acc + n >= rank and n:
+                return lower + (upper - lower) * (rank - acc) / n
+            acc += n
+            lower = upper
+        return self.max
+
+
+def _fmt(v: float) -> str:
+    return repr(float(v))
+
+
+def _labels(**kv: str) -> str:
+    parts = []
+    for k, v in kv.items():
+        v = str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{k}="{v}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _percentile(sorted_vals: List[float], q: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    idx = min(len(sorted_vals) - 1, max(0, int(round(q * (len(sorted_vals) - 1)))))
+    return sorted_vals[idx]
+
+
+class ServerMetrics:
+    """Registre unique des métriques du serveur."""
+
+    def __init__(self, ring_size: int = RING_SIZE, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._routes: Dict[Tuple[str, str], Histogram] = {}
+        self._status: Dict[Tuple[str, str, int], int] = defaultdict(int)
+        self._stages: Dict[str, Histogram] = {}
+        self._stage_errors: Dict[str, int] = defaultdict(int)
+        self._inflight: Dict[str, int] = defaultdict(int)
+        self._cache: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+        self._cache_sources: Dict[str, Callable[[], Tuple[int, int]]] = {}
+        self._ring: Deque[Tuple[float, str, str, int, float]] = deque(maxlen=ring_size)
+        self._loop_lag = Histogram(buckets)
+        self.loop_lag_last = 0.0
+        self._loop_task: Optional[asyncio.Task] = None
+
+    # ---- requêtes HTTP ----
+    @contextmanager
+    def inflight(self, route: str) -> Iterator[None]:
+        with self._lock:
+            self._inflight[route] += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._inflight[route] -= 1
+
+    def observe_request(self, route: str, method: str, status: int, seconds: float) -> None:
+        with self._lock:
+            key = (route, method)
+            hist = self._routes.get(key)
+            if hist is None:
+                hist = self._routes[key] = Histogram(self.buckets)
+            hist.observe(seconds)
+            self._status[(route, method, int(status))] += 1
+            self._ring.append((time.time(), route, method, int(status), seconds))
+
+    # ---- étapes internes ----
+    def observe_stage(self, stage: str, seconds: float, error: bool = False) -> None:
+        with self._lock:
+            hist = self._stages.get(stage)
+            if hist is None:
+                hist = self._stages[stage] = Histogram(self.buckets)
+            hist.observe(seconds)
+            if error:
+                self._stage_errors[stage] += 1
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.observe_stage(name, time.perf_counter() - t0, error)
+
+    def timed(self, name: str) -> Callable[[Callable], Callable]:
+        """Décorateur (sync ou async) : chaque appel alimente l'histogramme `name`."""
+
+        def deco(fn: Callable) -> Callable:
+            if inspect.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    with self.stage(name):
+                        return await fn(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.stage(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+
+        return deco
+
+    # ---- caches ----
+    def cache_hit(self, cache: str, hit: bool = True) -> None:
+        with self._lock:
+            self._cache[cache][0 if hit else 1] += 1
+
+    def cache_miss(self, cache: str) -> None:
+        self.cache_hit(cache, False)
+
+    def register_cache_source(self, cache: str, fn: Callable[[], Tuple[int, int]]) -> None:
+        """Cache qui tient ses propres compteurs : fn() -> (hits, misses), lu à l'export."""
+        self._cache_sources[cache] = fn
+
+    def cache_ratios(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            counts = {k: (v[0], v[1]) for k, v in self._cache.items()}
+        for name, fn in self._cache_sources.items():
+            try:
+                counts[name] = tuple(int(x) for x in fn())[:2]  # type: ignore[assignment]
+            except Exception:
+                continue
+        return {
+            name: {"hits": h, "misses": m, "hit_ratio": round(h / (h + m), 4) if h + m else 0.0}
+            for name, (h, m) in sorted(counts.items())
+        }
+
+    # ---- event loop ----
+    async def monitor_event_loop(self, interval: float = 0.5) -> None:
+        """Mesure le retard du réveil d'un sleep(interval) : lag = blocage de la boucle."""
+        loop = asyncio.get_running_loop()
+        while True:
+            t0 = loop.time()
+            await asyncio.sleep(interval)
+            lag = max(0.0, loop.time() - t0 - interval)
+            with self._lock:
+                self.loop_lag_last = lag
+                self._loop_lag.observe(lag)
+
+    def start_loop_monitor(self, interval: float = 0.5) -> None:
+        if self._loop_task is None or self._loop_task.done():
+            self._loop_task = asyncio.get_running_loop().create_task(self.monitor_event_loop(interval))
+
+    async def stop_loop_monitor(self) -> None:
+        task, self._loop_task = self._loop_task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    # ---- exports ----
+    def render_prometheus(self) -> str:
+        p = METRIC_PREFIX
+        lines: List[str] = []
+        caches = self.cache_ratios()
+        with self._lock:
+            lines += [
+                f"# HELP {p}_http_request_duration_seconds Latence des requêtes HTTP par route.",
+                f"# TYPE {p}_http_request_duration_seconds histogram",
+            ]
+            for (route, method), hist in sorted(self._routes.items()):
+                _hist_lines(lines, f"{p}_http_request_duration_seconds", hist, route=route, method=method)
+
+            lines += [
+                f"# HELP {p}_http_requests_total Requêtes HTTP par route et statut.",
+                f"# TYPE {p}_http_requests_total counter",
+            ]
+            for (route, method, status), n in sorted(self._status.items()):
+                lines.append(f"{p}_http_requests_total{_labels(route=route, method=method, status=str(status))} {n}")
+
+            lines += [
+                f"# HELP {p}_http_requests_in_flight Requêtes en cours par route.",
+                f"# TYPE {p}_http_requests_in_flight gauge",
+            ]
+            for route, n in sorted(self._inflight.items()):
+                lines.append(f"{p}_http_requests_in_flight{_labels(route=route)} {n}")
+
+            lines += [
+                f"# HELP {p}_stage_duration_seconds Latence des étapes internes (fetch MT5, enrichissement, ML...).",
+                f"# TYPE {p}_stage_duration_seconds histogram",
+            ]
+            for stage, hist in sorted(self._stages.items()):
+                _hist_lines(lines, f"{p}_stage_duration_seconds", hist, stage=stage)
+
+            lines += [
+                f"# HELP {p}_stage_errors_total Exceptions levées par étape.",
+                f"# TYPE {p}_stage_errors_total counter",
+            ]
+            for stage, n in sorted(self._stage_errors.items()):
+                lines.append(f"{p}_stage_errors_total{_labels(stage=stage)} {n}")
+
+            lines += [
+                f"# HELP {p}_event_loop_lag_seconds Retard de l'event loop asyncio.",
+                f"# TYPE {p}_event_loop_lag_seconds histogram",
+            ]
+            _hist_lines(lines, f"{p}_event_loop_lag_seconds", self._loop_lag)
+            lines += [
+                f"# TYPE {p}_event_loop_lag_last_seconds gauge",
+                f"{p}_event_loop_lag_last_seconds {self.loop_lag_last:.6f}",
+            ]
+
+        lines += [
+            f"# HELP {p}_cache_requests_total Lookups de cache par résultat.",
+            f"# TYPE {p}_cache_requests_total counter",
+        ]
+        for name, c in caches.items():
+            lines.append(f"{p}_cache_requests_total{_labels(cache=name, result='hit')} {c['hits']}")
+            lines.append(f"{p}_cache_requests_total{_labels(cache=name, result='miss')} {c['misses']}")
+        lines += [
+            f"# TYPE {p}_uptime_seconds gauge",
+            f"{p}_uptime_seconds {time.time() - self.started_at:.1f}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def dashboard(self, window_sec: float = 300.0, top: int = 15) -> Dict[str, Any]:
+        """Résumé compact depuis le ring : p50/p95/p99 par route sur la fenêtre récente."""
+        now = time.time()
+        with self._lock:
+            recent = [r for r in self._ring if now - r[0] <= window_sec]
+            inflight = {k: v for k, v in self._inflight.items() if v}
+            stages = {
+                name: {
+                    "count": h.count,
+                    "avg_ms": round(h.sum / h.count * 1000, 2) if h.count else 0.0,
+                    "p95_ms": round(h.quantile(0.95) * 1000, 2),
+                    "p99_ms": round(h.quantile(0.99) * 1000, 2),
+                    "max_ms": round(h.max * 1000, 2),
+                    "errors": self._stage_errors.get(name, 0),
+                }
+                for name, h in sorted(self._stages.items())
+            }
+            lag = {
+                "last_ms": round(self.loop_lag_last * 1000, 2),
+                "p99_ms": round(self._loop_lag.quantile(0.99) * 1000, 2),
+                "max_ms": round(self._loop_lag.max * 1000, 2),
+            }
+
+        by_route: Dict[str, List[float]] = defaultdict(list)
+        errors: Dict[str, int] = defaultdict(int)
+        for _, route, method, status, dur in recent:
+            key = f"{method} {route}"
+            by_route[key].append(dur)
+            if status >= 500:
+                errors[key] += 1
+        routes = []
+        for key, durs in by_route.items():
+            durs.sort()
+            routes.append({
+                "route": key,
+                "count": len(durs),
+                "rps": round(len(durs) / window_sec, 3),
+                "p50_ms": round(_percentile(durs, 0.50) * 1000, 2),
+                "p95_ms": round(_percentile(durs, 0.95) * 1000, 2),
+                "p99_ms": round(_percentile(durs, 0.99) * 1000, 2),
+                "max_ms": round(durs[-1] * 1000, 2),
+                "errors_5xx": errors.get(key, 0),
+            })
+        routes.sort(key=lambda r: r["p99_ms"], reverse=True)
+        return {
+            "window_sec": window_sec,
+            "requests": len(recent),
+            "routes": routes[:top],
+            "in_flight": inflight,
+            "stages": stages,
+            "caches": self.cache_ratios(),
+            "event_loop_lag": lag,
+            "uptime_sec": round(now - self.started_at, 1),
+        }
+
+
+def _hist_lines(lines: List[str], name: str, hist: Histogram, **labels: str) -> None:
+    for le, n in hist.cumulative():
+        lines.append(f"{name}_bucket{_labels(**labels, le=le)} {n}")
+    suffix = _labels(**labels) if labels else ""
+    lines.append(f"{name}_sum{suffix} {hist.sum:.6f}")
+    lines.append(f"{name}_count{suffix} {hist.count}")
+
+
+class RouteResolver:
+    """
+    Chemin → template de route (ex: /stats/EURUSD → /stats/{symbol}) pour borner la
+    cardinalité des labels. Résolu avant le dispatch (gauge en vol) et mémoïsé.
+    """
+
+    def __init__(self, app: Any, max_entries: int = 4096):
+        self.app = app
+        self.max_entries = max_entries
+        self._cache: Dict[Tuple[str, str], str] = {}
+
+    def resolve(self, scope: Dict[str, Any]) -> str:
+        key = (scope.get("method", ""), scope.get("path", ""))
+        route = self._cache.get(key)
+        if route is not None:
+            return route
+        route = "<unmatched>"
+        try:
+            from starlette.routing import Match
+
+            for r in self.app.router.routes:
+                match, _ = r.matches(scope)
+                if match == Match.FULL:
+                    route = getattr(r, "path", None) or getattr(r, "path_format", None) or route
+                    break
+        except Exception:
+            pass
+        if len(self._cache) >= self.max_entries:
+            self._cache.clear()
+        self._cache[key] = route
+        return route
+
+
+_metrics: Optional[ServerMetrics] = None
+
+
+def get_metrics() -> ServerMetrics:
+    global _metrics
+    if _metrics is None:
+        _metrics = ServerMetrics()
+    return _metrics
+
+
+def timed_stage(name: str) -> Callable[[Callable], Callable]:
+    """Raccourci `@timed_stage("ml")` sur le registre global."""
+    return get_metrics().timed(name)
@@ -0,0 +1,304 @@
+"""
+Cycle client pipeliné (mt5_ai_client.MT5AIClient.run) : tous les symboles traités par étage, pas un par un.
+
+1. BarStore : tampon de bougies par symbole, rafraîchi en relisant seulement les dernières bougies ;
+2. batch_features : indicateurs calculés sur des matrices (symboles × bougies) — EMA, RSI, ATR, momentum,
+   régime, ratio de volatilité — le coût d'un cycle ne croît quasiment pas avec le nombre de symboles ;
+3. HttpFanout : requêtes /decision concurrentes sur une session partagée (aiohttp si installé,
+   sinon pool de threads + requests.Session) avec repli URL locale → distante ;
+4. CycleTelemetry : durée par étage et par cycle (moyenne, p95, ms/symbole).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Hashable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+EMA_PERIODS = (9, 21, 50, 200)
+RSI_PERIOD = 14
+ATR_PERIOD = 14
+TAIL_BARS = 3  # bougies relues par cycle quand le tampon est chaud
+
+FetchFn = Callable[[str, int, int], Any]
+
+
+class BarStore:
+    """Dernières `count` bougies par symbole ; un cycle chaud ne relit que TAIL_BARS bougies."""
+
+    def __init__(self, count: int = 200):
+        self.count = int(count)
+        self._bars: Dict[str, np.ndarray] = {}
+        self.full_fetches = 0
+        self.tail_fetches = 0
+
+    def get(self, symbol: str) -> Optional[np.ndarray]:
+        return self._bars.get(symbol)
+
+    def _refresh_one(self, symbol: str, fetch: FetchFn) -> None:
+        buf = self._bars.get(symbol)
+        if buf is not None and len(buf):
+            tail = fetch(symbol, 0, TAIL_BARS)
+            self.tail_fetches += 1
+            if tail is None or len(tail) == 0:
+                return
+            first = tail["time"][0]
+            if first <= buf["time"][-1]:
+                # chevauchement : remplace la bougie en formation et ajoute les nouvelles
+                keep = buf[buf["time"] < first]
+                self._bars[symbol] = np.concatenate([keep, tail.astype(buf.dtype)])[-self.count:]
+                return
+        rates = fetch(symbol, 0, self.count)
+        self.full_fetches += 1
+        if rates is not None and len(rates):
+            self._bars[symbol] = np.asarray(rates)
+
+    def refresh(self, symbols: Sequence[str], fetch: FetchFn) -> None:
+        # L'API MetaTrader5 n'est pas thread-safe : un seul passage séquentiel, mais court
+        for symbol in symbols:
+            try:
+                self._refresh_one(symbol, fetch)
+            except Exception:
+                self._bars.pop(symbol, None)
+
+    def stack(self, symbols: Sequence[str], min_bars: int = 50) -> Tuple[List[str], Dict[str, np.ndarray]]:
+        """Matrices (symboles × n) alignées à droite sur les n dernières bougies communes."""
+        bufs = [(s, self._bars.get(s)) for s in symbols]
+        bufs = [(s, b) for s, b in bufs if b is not None and len(b) >= min_bars]
+        if not bufs:
+            return [], {}
+        n = min(len(b) for _, b in bufs)
+        out = {}
+        for field in ("open", "high", "low", "close", "tick_volume"):
+            out[field] = np.stack([np.asarray(b[field][-n:], dtype=float) for _, b in bufs])
+        return [s for s, _ in bufs], out
+
+
+def _ema_stack(close: np.ndarray, periods: Sequence[int]) -> np.ndarray:
+    """EMA (amorce SMA) pour plusieurs périodes à la fois : (len(periods), S). NaN si historique trop court."""
+    s, n = close.shape
+    out = np.full((len(periods), s), np.nan)
+    for j, p in enumerate(periods):
+        if n < p:
+            continue
+        a = 2.0 / (p + 1)
+        ema = close[:, :p].mean(axis=1)
+        for i in range(p, n):
+            ema = a * close[:, i] + (1.0 - a) * ema
+        out[j] = ema
+    return out
+
+
+def _wilder(x: np.ndarray, period: int) -> np.ndarray:
+    """Moyenne de Wilder de la dernière bougie, par ligne."""
+    avg = x[:, :period].mean(axis=1)
+    for i in range(period, x.shape[1]):
+        avg = (avg * (period - 1) + x[:, i]) / period
+    return avg
+
+
+def batch_features(bars: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Indicateurs de la dernière bougie pour tous les symboles ; chaque sortie est un vecteur (S,)."""
+    close, high, low, vol = bars["close"], bars["high"], bars["low"], bars["tick_volume"]
+    s, n = close.shape
+    last = close[:, -1]
+
+    ema = _ema_stack(close, EMA_PERIODS)
+    e9, e21, e50, e200 = ema
+
+    diff = np.diff(close, axis=1)
+    gain = _wilder(np.maximum(diff, 0.0), RSI_PERIOD)
+    loss = _wilder(np.maximum(-diff, 0.0), RSI_PERIOD)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = np.where(loss > 0, 100.0 - 100.0 / (1.0 + gain / loss), 100.0)
+
+    prev = close[:, :-1]
+    tr = np.maximum(high[:, 1:] - low[:, 1:], np.maximum(abs(high[:, 1:] - prev), abs(low[:, 1:] - prev)))
+    atr = _wilder(tr, ATR_PERIOD)
+
+    mom = {k: (last - close[:, -k]) / close[:, -k] for k in (5, 10, 20)}
+    mom_trend = mom[5] + mom[10] + mom[20]
+
+    # Régime : R² de la régression linéaire du prix sur tout l'historique (forme fermée, toutes lignes)
+    x = np.arange(n, dtype=float)
+    xc = x - x.mean()
+    yc = close - close.mean(axis=1, keepdims=True)
+    slope = (yc @ xc) / (xc @ xc)
+    ss_tot = (yc * yc).sum(axis=1)
+    ss_res = ((yc - slope[:, None] * xc) ** 2).sum(axis=1)
+    r2 = np.where(ss_tot > 0, 1.0 - ss_res / np.where(ss_tot > 0, ss_tot, 1.0), 0.0)
+    price_vol_ratio = close[:, -20:].std(axis=1) / close.mean(axis=1)
+    regime = np.where(np.abs(r2) > 0.7, "trending", np.where(price_vol_ratio > 0.02, "volatile", "ranging"))
+
+    rets = np.diff(np.log(close), axis=1)
+    vol_ratio = rets[:, -20:].std(axis=1) / np.where(rets.std(axis=1) > 0, rets.std(axis=1), 1.0)
+    volume_ratio = vol[:, -1] / np.where(vol.mean(axis=1) > 0, vol.mean(axis=1), 1.0)
+
+    # Signal EMA (mêmes règles que AdvancedTechnicalAnalyzer.get_ema_signals)
+    buy = (last > e9) & (e9 > e21)
+    sell = (last < e9) & (e9 < e21)
+    ema_signal = np.where(buy, "BUY", np.where(sell, "SELL", "HOLD"))
+    long_up = e50 > e200
+    conf = np.where(buy | sell, 0.7, 0.0)
+    conf = conf + np.where((buy & long_up) | (sell & ~long_up & np.isfinite(e200)), 0.2, 0.0)
+
+    return {
+        "close": last,
+        "ema_9": e9, "ema_21": e21, "ema_50": e50, "ema_200": e200,
+        "rsi": rsi,
+        "atr": atr,
+        "momentum_5": mom[5], "momentum_10": mom[10], "momentum_20": mom[20],
+        "momentum_trend": mom_trend,
+        "trend_strength": np.abs(r2),
+        "slope": slope,
+        "regime": regime,
+        "volatility_ratio": vol_ratio,
+        "volume_ratio": volume_ratio,
+        "ema_signal": ema_signal,
+        "ema_confidence": np.minimum(conf, 1.0),
+    }
+
+
+def feature_row(features: Dict[str, np.ndarray], i: int) -> Dict[str, Any]:
+    """Ligne i des features en types Python (JSON)."""
+    row = {}
+    for k, v in features.items():
+        x = v[i]
+        row[k] = x.item() if hasattr(x, "item") else x
+    return row
+
+
+class HttpFanout:
+    """POST JSON concurrents sur une session partagée ; chaque appel essaie ses URLs dans l'ordre."""
+
+    def __init__(self, max_concurrency: int = 16, timeout: float = 5.0):
+        self.max_concurrency = int(max_concurrency)
+        self.timeout = float(timeout)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._session: Any = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._http: Optional[requests.Session] = None
+        self._lock = threading.Lock()
+
+    # -- aiohttp : boucle dédiée dans un thread, session réutilisée entre cycles
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="http-fanout", daemon=True).start()
+            return self._loop
+
+    async def _post_async(self, urls: Sequence[str], payload: Any) -> Optional[Dict[str, Any]]:
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                connector=aiohttp.TCPConnector(limit=self.max_concurrency),
+            )
+        for url in urls:
+            try:
+                async with self._session.post(url, json=payload) as resp:
+                    if resp.status == 200:
+                        data = await resp.json(content_type=None)
+                        if isinstance(data, dict):
+                            return data
+            except Exception:
+                continue
+        return None
+
+    async def _post_all(self, calls: Dict[Hashable, Tuple[Sequence[str], Any]]) -> Dict[Hashable, Any]:
+        keys = list(calls)
+        res = await asyncio.gather(*(self._post_async(*calls[k]) for k in keys))
+        return dict(zip(keys, res))
+
+    # -- repli : pool de threads + requests.Session (pool de connexions keep-alive)
+    def _post_sync(self, urls: Sequence[str], payload: Any) -> Optional[Dict[str, Any]]:
+        for url in urls:
+            try:
+                resp = self._http.post(url, json=payload, timeout=self.timeout)
+                if resp.status_code == 200:
+                    data = resp.json()
+                    if isinstance(data, dict):
+                        return data
+            except Exception:
+                continue
+        return None
+
+    def post_many(self, calls: Dict[Hashable, Tuple[Sequence[str], Any]]) -> Dict[Hashable, Any]:
+        """{clé: ([url1, url2…], payload)} → {clé: JSON de la première URL qui répond 200, ou None}."""
+        if not calls:
+            return {}
+        if AIOHTTP_AVAILABLE:
+            fut = asyncio.run_coroutine_threadsafe(self._post_all(calls), self._ensure_loop())
+            return fut.result(timeout=self.timeout * 2 + 5)
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="http-fanout")
+                self._http = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.max_concurrency)
+                self._http.mount("http://", adapter)
+                self._http.mount("https://", adapter)
+        keys = list(calls)
+        futs = [self._pool.submit(self._post_sync, *calls[k]) for k in keys]
+        return {k: f.result() for k, f in zip(keys, futs)}
+
+
+class CycleTelemetry:
+    """Durées par étage sur les `window` derniers cycles."""
+
+    def __init__(self, window: int = 200):
+        self._stages: Dict[str, Deque[float]] = {}
+        self._cycles: Deque[Tuple[float, int]] = deque(maxlen=window)
+        self._window = window
+        self._t0: Optional[float] = None
+        self.count = 0
+
+    def start_cycle(self) -> None:
+        self._t0 = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._stages.setdefault(name, deque(maxlen=self._window)).append(time.perf_counter() - t)
+
+    def end_cycle(self, symbols: int) -> float:
+        dt = time.perf_counter() - (self._t0 or time.perf_counter())
+        self._cycles.append((dt, int(symbols)))
+        self.count += 1
+        self._t0 = None
+        return dt
+
+    @staticmethod
+    def _ms(values: Sequence[float]) -> Dict[str, float]:
+        a = np.asarray(values) * 1000.0
+        return {"mean_ms": round(float(a.mean()), 2), "p95_ms": round(float(np.percentile(a, 95)), 2)}
+
+    def summary(self) -> Dict[str, Any]:
+        if not self._cycles:
+            return {"cycles": 0}
+        durations = [d for d, _ in self._cycles]
+        symbols = [n for _, n in self._cycles]
+        per_sym = [d / n for d, n in self._cycles if n]
+        return {
+            "cycles": self.count,
+            "cycle": self._ms(durations),
+            "symbols_mean": round(float(np.mean(symbols)), 1),
+            "per_symbol_ms": round(float(np.mean(per_sym)) * 1000.0, 2) if per_sym else None,
+            "stages": {k: self._ms(v) for k, v in self._stages.items() if v},
+        }
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Spike Stream Engine — détection de spikes Boom/Crash au tick, en flux continu.
+
+Chaque symbole garde un état compact (fenêtres circulaires de taille fixe) mis à jour
+en O(1) à chaque tick : intervalles inter-spikes, probabilité d'imminence et
+compression de volatilité pré-spike. Les métriques sont recalculées au fil de l'eau,
+`/spike/realtime` ne fait que lire le dernier instantané.
+
+Sources de ticks :
+- abonnement WebSocket Deriv (`ticks` + `subscribe`), prioritaire ;
+- bid/ask des requêtes EA (/decision), utilisés seulement si le flux Deriv est muet.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Codes Deriv Boom/Crash suivis par défaut
+DEFAULT_DERIV_SYMBOLS = (
+    "BOOM1000", "BOOM900", "BOOM600", "BOOM500", "BOOM300N",
+    "CRASH1000", "CRASH900", "CRASH600", "CRASH500", "CRASH300N",
+)
+
+# Au-delà de ce délai sans tick Deriv, les ticks EA reprennent la main
+STREAM_STALE_SECONDS = 10.0
+
+_DERIV_CODE_RE = re.compile(r"^(BOOM|CRASH)(\d+)N?$", re.IGNORECASE)
+_INTERVAL_RE = re.compile(r"(\d{2,4})")
+
+
+def mt5_name_from_deriv(code: str) -> str:
+    """BOOM1000 / CRASH300N → 'Boom 1000 Index' / 'Crash 300 Index' (nom MT5)."""
+    m = _DERIV_CODE_RE.match((code or "").strip())
+    if not m:
+        return (code or "").strip()
+    return f"{m.group(1).capitalize()} {int(m.group(2))} Index"
+
+
+def _spike_side(symbol: str) -> Optional[str]:
+    s = symbol.lower()
+    if "boom" in s:
+        return "BOOM"
+    if "crash" in s:
+        return "CRASH"
+    return None
+
+
+def _prior_interval_ticks(symbol: str) -> float:
+    """Fréquence nominale : Boom 1000 ≈ 1 spike / 1000 ticks."""
+    m = _INTERVAL_RE.search(symbol)
+    return float(m.group(1)) if m else 1000.0
+
+
+class RollingWindow:
+    """Fenêtre circulaire de taille fixe ; moyenne / écart-type en O(1)."""
+
+    __slots__ = ("size", "_buf", "_idx", "_count", "_sum", "_sumsq", "_pushes")
+
+    def __init__(self, size: int):
+        self.size = max(1, int(size))
+        self._buf = [0.0] * self.size
+        self._idx = 0
+        self._count = 0
+        self._sum = 0.0
+        self._sumsq = 0.0
+        self._pushes = 0
+
+    def push(self, x: float) -> None:
+        if self._count == self.size:
+            old = self._buf[self._idx]
+            self._sum -= old
+            self._sumsq -= old * old
+        else:
+            self._count += 1
+        self._buf[self._idx] = x
+        self._sum += x
+        self._sumsq += x * x
+        self._idx = (self._idx + 1) % self.size
+        self._pushes += 1
+        # Resynchroniser les sommes de temps en temps (dérive flottante)
+        if self._pushes % (self.size * 64) == 0:
+            vals = self._buf[: self._count] if self._count < self.size else self._buf
+            self._sum = math.fsum(vals)
+            self._sumsq = math.fsum(v * v for v in vals)
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def mean(self) -> float:
+        return self._sum / self._count if self._count else 0.0
+
+    @property
+    def std(self) -> float:
+        if self._count < 2:
+            return 0.0
+        m = self._sum / self._count
+        return math.sqrt(max(0.0, self._sumsq / self._count - m * m))
+
+    def last(self) -> Optional[float]:
+        if not self._count:
+            return None
+        return self._buf[(self._idx - 1) % self.size]
+
+
+class SymbolSpikeState:
+    """État streaming d'un symbole Boom/Crash."""
+
+    def __init__(
+        self,
+        symbol: str,
+        threshold_points: float = 1.0,
+        z_mult: float = 6.0,
+        short_window: int = 20,
+        long_window: int = 300,
+        interval_window: int = 32,
+        horizon_ticks: int = 10,
+        warmup_ticks: int = 30,
+    ):
+        self.symbol = symbol
+        self.side = _spike_side(symbol)
+        self.threshold_points = float(threshold_points)
+        self.z_mult = float(z_mult)
+        self.horizon_ticks = max(1, int(horizon_ticks))
+        self.warmup_ticks = int(warmup_ticks)
+        self.prior_interval = _prior_interval_ticks(symbol)
+
+        self.short = RollingWindow(short_window)
+        self.long = RollingWindow(long_window)
+        self.intervals = RollingWindow(interval_window)
+        self.interval_secs = RollingWindow(interval_window)
+
+        self.last_price: Optional[float] = None
+        self.last_epoch: Optional[float] = None
+        self.tick_count = 0
+        self.spike_count = 0
+        self.last_spike_tick: Optional[int] = None
+        self.last_spike_epoch: Optional[float] = None
+        self.last_spike_diff = 0.0
+        self.last_source = ""
+        self.last_stream_at = 0.0
+        self.snapshot: Dict[str, Any] = {}
+
+    def update(self, price: float, epoch: float, source: str = "deriv") -> Optional[Dict[str, Any]]:
+        """Intègre un tick ; retourne l'événement spike s'il y en a un."""
+        prev = self.last_price
+        self.last_price = price
+        self.last_epoch = epoch
+        self.last_source = source
+        if source == "deriv":
+            self.last_stream_at = time.time()
+        self.tick_count += 1
+        if prev is None or prev <= 0:
+            self._refresh()
+            return None
+
+        diff = price - prev
+        move = abs(diff)
+        event = None
+        if self.side is not None:
+            signed = diff if self.side == "BOOM" else -diff
+            threshold = self.threshold_points
+            # Seuil adaptatif (μ + z·σ des mouvements) réservé au flux Deriv tick par tick : les ticks
+            # EA sont des bid échantillonnés aux requêtes /decision, le seuil fixe s'applique
+            if source == "deriv" and len(self.long) >= self.warmup_ticks:
+                threshold = max(threshold, self.long.mean + self.z_mult * self.long.std)
+            if signed >= threshold:
+                event = self._register_spike(diff, epoch)
+
+        # Les ticks de spike ne polluent pas la volatilité de base
+        if event is None:
+            self.short.push(move)
+            self.long.push(move)
+        self._refresh()
+        return event
+
+    def _register_spike(self, diff: float, epoch: float) -> Dict[str, Any]:
+        if self.last_spike_tick is not None:
+            self.intervals.push(float(self.tick_count - self.last_spike_tick))
+            if self.last_spike_epoch is not None:
+                self.interval_secs.push(max(0.0, float(epoch - self.last_spike_epoch)))
+        self.last_spike_tick = self.tick_count
+        self.last_spike_epoch = epoch
+        self.last_spike_diff = float(diff)
+        self.spike_count += 1
+        return {
+            "symbol": self.symbol,
+            "direction": self.side,
+            "diff_points": float(diff),
+            "epoch": epoch,
+            "tick": self.tick_count,
+        }
+
+    def _refresh(self) -> None:
+        """Recalcule l'instantané exposé (arithmétique constante, pas de boucle)."""
+        mean_interval = self.intervals.mean if len(self.intervals) >= 3 else self.prior_interval
+        mean_interval = max(1.0, mean_interval)
+        if self.last_spike_tick is None:
+            ticks_since = self.tick_count
+        else:
+            ticks_since = self.tick_count - self.last_spike_tick
+
+        long_std = self.long.std
+        compression = self.short.std / long_std if long_std > 0 and len(self.short) >= 2 else 1.0
+
+        # Probabilité heuristique de spike sur les `horizon_ticks` prochains ticks :
+        # base géométrique, renforcée quand l'intervalle moyen est dépassé et
+        # quand la volatilité courte se comprime.
+        base = 1.0 - math.exp(-self.horizon_ticks / mean_interval)
+        overdue = min(2.0, ticks_since / mean_interval)
+        squeeze = max(0.0, 1.0 - compression)
+        imminence = min(0.99, base * (1.0 + overdue) * (1.0 + squeeze))
+
+        self.snapshot = {
+            "symbol": self.symbol,
+            "direction": self.side,
+            "price": self.last_price,
+            "epoch": self.last_epoch,
+            "source": self.last_source,
+            "tick_count": self.tick_count,
+            "spike_count": self.spike_count,
+            "ticks_since_spike": int(ticks_since),
+            "mean_interval_ticks": round(mean_interval, 2),
+            "mean_interval_seconds": round(self.interval_secs.mean, 2) if len(self.interval_secs) else None,
+            "compression_ratio": round(compression, 4),
+            "imminence_probability": round(imminence, 4),
+            "last_spike_epoch": self.last_spike_epoch,
+            "last_spike_diff": self.last_spike_diff,
+        }
+
+
+class SpikeStreamEngine:
+    """Registre des états par symbole + boucle d'abonnement Deriv."""
+
+    def __init__(self, threshold_points: float = 1.0, **state_kwargs: Any):
+        self.threshold_points = float(threshold_points)
+        self._state_kwargs = state_kwargs
+        self._states: Dict[str, SymbolSpikeState] = {}
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._stop: Optional[asyncio.Event] = None  # créé dans la boucle asyncio
+        self.connected = False
+        self.reconnects = 0
+
+    def add_listener(self, fn: Callable[[Dict[str, Any]], None]) -> None:
+        self._listeners.append(fn)
+
+    def _state(self, symbol: str) -> SymbolSpikeState:
+        st = self._states.get(symbol)
+        if st is None:
+            st = SymbolSpikeState(symbol, threshold_points=self.threshold_points, **self._state_kwargs)
+            self._states[symbol] = st
+        return st
+
+    def on_tick(
+        self,
+        symbol: str,
+        price: float,
+        epoch: Optional[float] = None,
+        source: str = "deriv",
+    ) -> Optional[Dict[str, Any]]:
+        """Ajoute un tick. Les ticks EA sont ignorés tant que le flux Deriv est frais."""
+        sym = (symbol or "").strip()
+        if not sym or price is None or price <= 0:
+            return None
+        if epoch is None:
+            epoch = time.time()
+        with self._lock:
+            st = self._state(sym)
+            if source != "deriv" and time.time() - st.last_stream_at < STREAM_STALE_SECONDS:
+                return None
+            event = st.update(float(price), float(epoch), source=source)
+        if event is not None:
+            event["source"] = source
+            for fn in self._listeners:
+                try:
+                    fn(event)
+                except Exception as e:
+                    logger.debug("spike listener error: %s", e)
+        return event
+
+    def snapshot(self, symbol: str) -> Optional[Dict[str, Any]]:
+        st = self._states.get((symbol or "").strip())
+        return dict(st.snapshot) if st is not None and st.snapshot else None
+
+    def symbols(self) -> List[str]:
+        return sorted(self._states)
+
+    # ------------------------------------------------------------------
+    # Flux Deriv
+    # ------------------------------------------------------------------
+    async def run_deriv_stream(self, ws_url: str, deriv_symbols: Iterable[str]) -> None:
+        """Souscrit aux ticks Deriv et alimente l'état ; reconnexion avec backoff."""
+        import websockets
+
+        codes = [c.strip() for c in deriv_symbols if c and c.strip()]
+        names = {c: mt5_name_from_deriv(c) for c in codes}
+        if self._stop is None:
+            self._stop = asyncio.Event()
+        backoff = 1.0
+        while not self._stop.is_set():
+            try:
+                async with websockets.connect(ws_url, ping_interval=20, ping_timeout=10) as ws:
+                    for code in codes:
+                        await ws.send(json.dumps({"ticks": code, "subscribe": 1}))
+                    self.connected = True
+                    backoff = 1.0
+                    logger.info("📡 Flux ticks Deriv actif (%d symboles)", len(codes))
+                    while not self._stop.is_set():
+                        try:
+                            raw = await asyncio.wait_for(ws.recv(), timeout=5.0)
+                        except asyncio.TimeoutError:
+                            continue
+                        msg = json.loads(raw)
+                        if msg.get("msg_type") != "tick":
+                            if msg.get("error"):
+                                logger.warning("Deriv tick stream: %s", msg["error"].get("message"))
+                            continue
+                        tick = msg.get("tick") or {}
+                        code = tick.get("symbol", "")
+                        self.on_tick(
+                            names.get(code) or mt5_name_from_deriv(code),
+                            float(tick.get("quote") or 0.0),
+                            float(tick.get("epoch") or time.time()),
+                            source="deriv",
+                        )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.connected = False
+                self.reconnects += 1
+                logger.warning("Flux ticks Deriv interrompu (%s) — reconnexion dans %.0fs", e, backoff)
+                try:
+                    await asyncio.wait_for(self._stop.wait(), timeout=backoff)
+                except asyncio.TimeoutError:
+                    pass
+                backoff = min(60.0, backoff * 2)
+        self.connected = False
+
+    def start(self, ws_url: str, deriv_symbols: Iterable[str]) -> asyncio.Task:
+        """Lance la boucle d'abonnement dans la boucle asyncio courante."""
+        if self._task is not None and not self._task.done():
+            return self._task
+        self._stop = asyncio.Event()
+        self._task = asyncio.create_task(self.run_deriv_stream(ws_url, list(deriv_symbols)))
+        return self._task
+
+    async def stop(self) -> None:
+        if self._stop is not None:
+            self._stop.set()
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._task = None
+        self.connected = False
+
+
+_engine: Optional[SpikeStreamEngine] = None
+
+
+def get_spike_engine(threshold_points: float = 1.0) -> SpikeStreamEngine:
+    """Instance partagée du moteur (créée au premier appel)."""
+    global _engine
+    if _engine is None:
+        _engine = SpikeStreamEngine(threshold_points=threshold_points)
+    return _engine
@@ -0,0 +1,616 @@
+"""
+Backend d'état partagé du serveur IA (verdicts GOM, pending orders, spikes, calibration, bougies).
+
+- InProcessBackend : dictionnaires du process (mode 1 worker, défaut, zéro overhead I/O).
+- SQLiteBackend : fichier SQLite en WAL partagé par tous les workers uvicorn d'une
+  machine. Chaque ligne porte un numéro de version (compare-and-set), tiré d'une séquence
+  par namespace : une clé supprimée puis recréée ne reprend jamais une ancienne version. Lecture servie
+  depuis un cache local invalidé par `PRAGMA data_version` (change dès qu'un autre
+  process/connexion commit) : une lecture sans écriture concurrente ne touche pas le disque.
+- SharedMap : vue MutableMapping typée d'un namespace. Les modifications en place
+  d'une valeur doivent être réécrites (`store[k] = v` ou `with store.mutate(k) as v:`).
+- LeaderLease : bail renouvelé dans le backend ; un seul worker (le leader) fait
+  tourner les boucles de fond, un autre reprend le bail s'il expire.
+
+Sélection : AI_STATE_BACKEND=memory|sqlite, AI_STATE_DB=data/state/ai_state.sqlite.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_DB_PATH = ROOT / "data" / "state" / "ai_state.sqlite"
+DEFAULT_LEASE_TTL_SEC = 15.0
+
+_MISSING = object()
+
+
+def _json_default(obj: Any) -> Any:
+    if isinstance(obj, datetime):
+        return {"$dt": obj.isoformat()}
+    if isinstance(obj, date):
+        return {"$date": obj.isoformat()}
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if hasattr(obj, "item"):  # scalaires numpy
+        return obj.item()
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    raise TypeError(f"valeur non sérialisable: {type(obj).__name__}")
+
+
+def _json_hook(obj: Dict[str, Any]) -> Any:
+    if len(obj) == 1:
+        if "$dt" in obj:
+            return datetime.fromisoformat(obj["$dt"])
+        if "$date" in obj:
+            return date.fromisoformat(obj["$date"])
+    return obj
+
+
+def encode_value(value: Any) -> str:
+    return json.dumps(value, default=_json_default, ensure_ascii=False, separators=(",", ":"))
+
+
+def decode_value(raw: str) -> Any:
+    return json.loads(raw, object_hook=_json_hook)
+
+
+class StateBackend:
+    """Interface commune : valeurs JSON versionnées par (namespace, clé)."""
+
+    kind = "abstract"
+    shared = False
+
+    def get_versioned(self, ns: str, key: str) -> Tuple[int, Any]:
+        """(version, valeur) ; (0, _MISSING) si absente."""
+        raise NotImplementedError
+
+    def get_version(self, ns: str, key: str) -> int:
+        """Version courante sans décoder la valeur (0 si absente)."""
+        return self.get_versioned(ns, key)[0]
+
+    def put(self, ns: str, key: str, value: Any) -> int:
+        raise NotImplementedError
+
+    def compare_and_set(self, ns: str, key: str, expected_version: int, value: Any) -> Tuple[bool, int]:
+        """
+        Écrit si la version courante == expected_version (0 = absente). Retourne (ok, version).
+
+        Les versions croissent par namespace et survivent aux suppressions : une version lue
+        avant un delete ne correspond jamais à la clé recréée (pas d'ABA).
+        """
+        raise NotImplementedError
+
+    def delete(self, ns: str, key: str) -> bool:
+        raise NotImplementedError
+
+    def items(self, ns: str) -> List[Tuple[str, Any]]:
+        raise NotImplementedError
+
+    def count(self, ns: str) -> int:
+        return len(self.items(ns))
+
+    def clear(self, ns: str) -> None:
+        for key, _ in self.items(ns):
+            self.delete(ns, key)
+
+    def acquire_lease(self, name: str, owner: str, ttl_sec: float) -> bool:
+        raise NotImplementedError
+
+    def release_lease(self, name: str, owner: str) -> None:
+        pass
+
+    def store(self, ns: str) -> "SharedMap":
+        return SharedMap(self, ns)
+
+    def close(self) -> None:
+        pass
+
+
+class InProcessBackend(StateBackend):
+    kind = "memory"
+    shared = False
+
+    def __init__(self):
+        self._data: Dict[str, Dict[str, Tuple[int, Any]]] = {}
+        self._seq: Dict[str, int] = {}  # dernière version attribuée par namespace
+        self._lock = threading.Lock()
+
+    def _ns(self, ns: str) -> Dict[str, Tuple[int, Any]]:
+        d = self._data.get(ns)
+        if d is None:
+            d = self._data.setdefault(ns, {})
+        return d
+
+    def get_versioned(self, ns: str, key: str) -> Tuple[int, Any]:
+        return self._ns(ns).get(key, (0, _MISSING))
+
+    def _next_version(self, ns: str) -> int:
+        version = self._seq[ns] = self._seq.get(ns, 0) + 1
+        return version
+
+    def put(self, ns: str, key: str, value: Any) -> int:
+        with self._lock:
+            version = self._next_version(ns)
+            self._ns(ns)[key] = (version, value)
+            return version
+
+    def compare_and_set(self, ns: str, key: str, expected_version: int, value: Any) -> Tuple[bool, int]:
+        with self._lock:
+            d = self._ns(ns)
+            current = d.get(key, (0, None))[0]
+            if current != int(expected_version):
+                return False, current
+            version = self._next_version(ns)
+            d[key] = (version, value)
+            return True, version
+
+    def delete(self, ns: str, key: str) -> bool:
+        with self._lock:
+            return self._ns(ns).pop(key, None) is not None
+
+    def items(self, ns: str) -> List[Tuple[str, Any]]:
+        return [(k, v[1]) for k, v in list(self._ns(ns).items())]
+
+    def count(self, ns: str) -> int:
+        return len(self._ns(ns))
+
+    def clear(self, ns: str) -> None:
+        with self._lock:
+            self._ns(ns).clear()
+
+    def acquire_lease(self, name: str, owner: str, ttl_sec: float) -> bool:
+        return True
+
+
+class SQLiteBackend(StateBackend):
+    kind = "sqlite"
+    shared = True
+
+    def __init__(self, path: Path = DEFAULT_DB_PATH, busy_timeout_ms: int = 5000):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.busy_timeout_ms = int(busy_timeout_ms)
+        self._local = threading.local()
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS kv (ns TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+                "version INTEGER NOT NULL, updated_at REAL NOT NULL, PRIMARY KEY (ns, key))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS seq (ns TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+
+    # Une connexion (et un cache) par thread : sqlite3 n'autorise pas le partage.
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=self.busy_timeout_ms / 1000.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={self.busy_timeout_ms}")
+            self._local.conn = conn
+            self._local.data_version = None
+            self._local.cache = {}
+            self._local.full = set()
+        return conn
+
+    def _cache(self) -> Dict[Tuple[str, str], Tuple[int, Any]]:
+        """Cache local de la connexion, vidé si un autre process/connexion a commit."""
+        conn = self._conn()
+        dv = conn.execute("PRAGMA data_version").fetchone()[0]
+        if dv != self._local.data_version:
+            self._local.data_version = dv
+            self._local.cache = {}
+            self._local.full = set()
+        return self._local.cache
+
+    def get_versioned(self, ns: str, key: str) -> Tuple[int, Any]:
+        cache = self._cache()
+        hit = cache.get((ns, key))
+        if hit is not None:
+            return hit
+        if ns in self._local.full:
+            return 0, _MISSING
+        row = self._conn().execute("SELECT version, value FROM kv WHERE ns=? AND key=?", (ns, key)).fetchone()
+        if row is None:
+            return 0, _MISSING
+        entry = (int(row[0]), decode_value(row[1]))
+        cache[(ns, key)] = entry
+        return entry
+
+    def get_version(self, ns: str, key: str) -> int:
+        hit = self._cache().get((ns, key))
+        if hit is not None:
+            return hit[0]
+        row = self._conn().execute("SELECT version FROM kv WHERE ns=? AND key=?", (ns, key)).fetchone()
+        return int(row[0]) if row else 0
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        conn = self._conn()
+        self._cache()  # resynchronise data_version avant d'écrire
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @staticmethod
+    def _next_version(conn: sqlite3.Connection, ns: str) -> int:
+        """Version suivante du namespace (dans la transaction d'écriture) ; amorcée sur MAX(kv.version)."""
+        conn.execute(
+            "INSERT INTO seq (ns, version) VALUES (?, COALESCE((SELECT MAX(version) FROM kv WHERE ns=?), 0) + 1) "
+            "ON CONFLICT(ns) DO UPDATE SET version = version + 1",
+            (ns, ns),
+        )
+        return int(conn.execute("SELECT version FROM seq WHERE ns=?", (ns,)).fetchone()[0])
+
+    def put(self, ns: str, key: str, value: Any) -> int:
+        raw = encode_value(value)
+        with self._write() as conn:
+            version = self._next_version(conn, ns)
+            conn.execute(
+                "INSERT OR REPLACE INTO kv (ns, key, value, version, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (ns, key, raw, version, time.time()),
+            )
+        self._local.cache[(ns, key)] = (version, value)
+        return version
+
+    def compare_and_set(self, ns: str, key: str, expected_version: int, value: Any) -> Tuple[bool, int]:
+        raw = encode_value(value)
+        with self._write() as conn:
+            row = conn.execute("SELECT version FROM kv WHERE ns=? AND key=?", (ns, key)).fetchone()
+            current = int(row[0]) if row else 0
+            if current != int(expected_version):
+                return False, current
+            version = self._next_version(conn, ns)
+            conn.execute(
+                "INSERT OR REPLACE INTO kv (ns, key, value, version, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (ns, key, raw, version, time.time()),
+            )
+        self._local.cache[(ns, key)] = (version, value)
+        return True, version
+
+    def delete(self, ns: str, key: str) -> bool:
+        with self._write() as conn:
+            deleted = conn.execute("DELETE FROM kv WHERE ns=? AND key=?", (ns, key)).rowcount > 0
+        self._local.cache.pop((ns, key), None)
+        return deleted
+
+    def items(self, ns: str) -> List[Tuple[str, Any]]:
+        cache = self._cache()
+        if ns not in self._local.full:
+            for key, version, raw in self._conn().execute("SELECT key, version, value FROM kv WHERE ns=?", (ns,)):
+                if (ns, key) not in cache or cache[(ns, key)][0] != version:
+                    cache[(ns, key)] = (int(version), decode_value(raw))
+            self._local.full.add(ns)
+        return [(k, v[1]) for (n, k), v in list(cache.items()) if n == ns]
+
+    def count(self, ns: str) -> int:
+        return int(self._conn().execute("SELECT COUNT(*) FROM kv WHERE ns=?", (ns,)).fetchone()[0])
+
+    def clear(self, ns: str) -> None:
+        with self._write() as conn:
+            conn.execute("DELETE FROM kv WHERE ns=?", (ns,))
+        for k in [k for k in self._local.cache if k[0] == ns]:
+            del self._local.cache[k]
+
+    def acquire_lease(self, name: str, owner: str, ttl_sec: float) -> bool:
+        now = time.time()
+        with self._write() as conn:
+            row = conn.execute("SELECT owner, expires_at FROM leases WHERE name=?", (name,)).fetchone()
+            if row is None or row[0] == owner or float(row[1]) < now:
+                conn.execute(
+                    "INSERT OR REPLACE INTO leases (name, owner, expires_at) VALUES (?, ?, ?)",
+                    (name, owner, now + float(ttl_sec)),
+                )
+                return True
+        return False
+
+    def release_lease(self, name: str, owner: str) -> None:
+        with self._write() as conn:
+            conn.execute("DELETE FROM leases WHERE name=? AND owner=?", (name, owner))
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class SharedMap(MutableMapping):
+    """Vue dict d'un namespace du backend (clés str, valeurs JSON)."""
+
+    def __init__(self, backend: StateBackend, ns: str):
+        self.backend = backend
+        self.ns = ns
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.backend.get_versioned(self.ns, key)[1]
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self.backend.get_versioned(self.ns, key)[1]
+        return default if value is _MISSING else value
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self.backend.get_versioned(self.ns, key)[1] is not _MISSING
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.backend.put(self.ns, key, value)
+
+    def __delitem__(self, key: str) -> None:
+        if not self.backend.delete(self.ns, key):
+            raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter([k for k, _ in self.backend.items(self.ns)])
+
+    def __len__(self) -> int:
+        return self.backend.count(self.ns)
+
+    def items(self):  # type: ignore[override]
+        return self.backend.items(self.ns)
+
+    def values(self):  # type: ignore[override]
+        return [v for _, v in self.backend.items(self.ns)]
+
+    def clear(self) -> None:
+        self.backend.clear(self.ns)
+
+    def get_versioned(self, key: str) -> Tuple[int, Any]:
+        version, value = self.backend.get_versioned(self.ns, key)
+        return version, (None if value is _MISSING else value)
+
+    def compare_and_set(self, key: str, expected_version: int, value: Any) -> Tuple[bool, int]:
+        return self.backend.compare_and_set(self.ns, key, expected_version, value)
+
+    @contextmanager
+    def mutate(self, key: str, default: Any = _MISSING) -> Iterator[Any]:
+        """Lecture-modification-écriture : la valeur est réécrite à la sortie du bloc."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            if default is _MISSING:
+                raise KeyError(key)
+            value = default
+        yield value
+        self[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.items())
+
+
+class SharedDeque:
+    """deque(maxlen) partagée (buffers de feedback) : liste JSON réécrite par compare-and-set."""
+
+    def __init__(self, backend: StateBackend, ns: str, key: str, maxlen: int = 5000):
+        self.backend = backend
+        self.ns = ns
+        self.key = key
+        self.maxlen = int(maxlen)
+
+    def _items(self) -> List[Any]:
+        value = self.backend.get_versioned(self.ns, self.key)[1]
+        return [] if value is _MISSING else value
+
+    def append(self, item: Any) -> None:
+        self.extend([item])
+
+    def extend(self, items: List[Any]) -> None:
+        for _ in range(20):
+            version, value = self.backend.get_versioned(self.ns, self.key)
+            current = [] if value is _MISSING else list(value)
+            current.extend(items)
+            if self.backend.compare_and_set(self.ns, self.key, version, current[-self.maxlen:])[0]:
+                return
+        raise RuntimeError(f"SharedDeque {self.ns}/{self.key}: trop de conflits d'écriture")
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._items())
+
+    def __len__(self) -> int:
+        return len(self._items())
+
+    def __getitem__(self, idx):
+        return self._items()[idx]
+
+
+def _frame_to_columns(df: Any) -> Dict[str, Any]:
+    import pandas as pd
+
+    cols = {str(c): df[c].tolist() for c in df.columns}
+    cols["$index"] = ((df.index - pd.Timestamp(0)) // pd.Timedelta(seconds=1)).tolist()
+    cols["$index_name"] = df.index.name
+    return cols
+
+
+def _frame_from_columns(cols: Dict[str, Any]) -> Any:
+    import pandas as pd
+
+    data = {k: v for k, v in cols.items() if not k.startswith("$")}
+    index = pd.to_datetime(cols.get("$index") or [], unit="s")
+    index.name = cols.get("$index_name")
+    return pd.DataFrame(data, index=index)
+
+
+class SharedFrameCache:
+    """Cache {symbole: {timeframe: DataFrame}} partagé (bougies MT5 uploadées).
+
+    Une ligne par symbole (colonnes JSON + alias de timeframe) ; chaque worker garde
+    les DataFrames reconstruits tant que la version de la ligne ne change pas.
+    """
+
+    def __init__(self, backend: StateBackend, ns: str = "mt5_candles"):
+        self.backend = backend
+        self.ns = ns
+        self._frames: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+
+    def get(self, symbol: str, default: Any = None) -> Any:
+        version = self.backend.get_version(self.ns, symbol)
+        if version == 0:
+            return default
+        hit = self._frames.get(symbol)
+        if hit is not None and hit[0] == version:
+            return hit[1]
+        version, raw = self.backend.get_versioned(self.ns, symbol)
+        if raw is _MISSING:
+            return default
+        built = {tf: _frame_from_columns(cols) for tf, cols in raw.get("frames", {}).items()}
+        for alias, tf in raw.get("aliases", {}).items():
+            if tf in built:
+                built[alias] = built[tf]
+        self._frames[symbol] = (version, built)
+        return built
+
+    def __contains__(self, symbol: object) -> bool:
+        return isinstance(symbol, str) and self.backend.get_version(self.ns, symbol) > 0
+
+    def __getitem__(self, symbol: str) -> Dict[str, Any]:
+        frames = self.get(symbol)
+        if frames is None:
+            raise KeyError(symbol)
+        return frames
+
+    def keys(self) -> List[str]:
+        return [k for k, _ in self.backend.items(self.ns)]
+
+    def __len__(self) -> int:
+        return self.backend.count(self.ns)
+
+    def put_frame(self, symbol: str, timeframe: str, df: Any, aliases: Tuple[str, ...] = ()) -> None:
+        cols = _frame_to_columns(df)
+        for _ in range(20):
+            version, raw = self.backend.get_versioned(self.ns, symbol)
+            row = {"frames": {}, "aliases": {}} if raw is _MISSING else {
+                "frames": dict(raw.get("frames", {})), "aliases": dict(raw.get("aliases", {})),
+            }
+            row["frames"][timeframe] = cols
+            row["aliases"].pop(timeframe, None)
+            for alias in aliases:
+                if alias != timeframe:
+                    row["frames"].pop(alias, None)
+                    row["aliases"][alias] = timeframe
+            ok, new_version = self.backend.compare_and_set(self.ns, symbol, version, row)
+            if ok:
+                return
+        raise RuntimeError(f"SharedFrameCache {symbol}: trop de conflits d'écriture")
+
+
+class LeaderLease:
+    """Élection du worker qui exécute les boucles de fond (bail renouvelé toutes les ttl/3 s)."""
+
+    def __init__(self, backend: StateBackend, name: str = "background_loops", ttl_sec: float = DEFAULT_LEASE_TTL_SEC):
+        self.backend = backend
+        self.name = name
+        self.ttl_sec = float(ttl_sec)
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.is_leader = False
+        self._task: Optional[asyncio.Task] = None
+        self._elected_task: Optional[asyncio.Task] = None
+
+    def try_acquire(self) -> bool:
+        try:
+            self.is_leader = self.backend.acquire_lease(self.name, self.owner, self.ttl_sec)
+        except sqlite3.Error as e:
+            logger.warning("[StateBackend] bail %s: %s", self.name, e)
+            self.is_leader = False
+        return self.is_leader
+
+    async def run(
+        self,
+        on_elected: Callable[[], Awaitable[None]],
+        on_lost: Optional[Callable[[], Awaitable[None]]] = None,
+    ) -> None:
+        # on_elected tourne dans sa propre tâche : un démarrage long (entraînement)
+        # ne doit pas retarder le renouvellement du bail. Bail perdu (boucle bloquée,
+        # écriture SQLite lente au-delà du TTL) : démarrage annulé et boucles arrêtées
+        # via on_lost, pour ne jamais les exécuter sur deux workers ; relancées si le bail revient.
+        while True:
+            was_leader = self.is_leader
+            if await asyncio.to_thread(self.try_acquire) and not was_leader:
+                logger.info("[StateBackend] worker %s élu leader (%s)", self.owner, self.name)
+                if self._elected_task is None:
+                    self._elected_task = asyncio.get_running_loop().create_task(self._run_elected(on_elected))
+            elif was_leader and not self.is_leader:
+                logger.warning("[StateBackend] bail %s perdu par %s — arrêt des boucles", self.name, self.owner)
+                await self._step_down(on_lost)
+            await asyncio.sleep(self.ttl_sec / 3.0)
+
+    async def _run_elected(self, on_elected: Callable[[], Awaitable[None]]) -> None:
+        try:
+            await on_elected()
+        except Exception as e:
+            logger.error("[StateBackend] démarrage des boucles leader: %s", e, exc_info=True)
+
+    async def _step_down(self, on_lost: Optional[Callable[[], Awaitable[None]]]) -> None:
+        task, self._elected_task = self._elected_task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        if on_lost is not None:
+            try:
+                await on_lost()
+            except Exception as e:
+                logger.error("[StateBackend] arrêt des boucles leader: %s", e, exc_info=True)
+
+    def start(
+        self,
+        on_elected: Callable[[], Awaitable[None]],
+        on_lost: Optional[Callable[[], Awaitable[None]]] = None,
+    ) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run(on_elected, on_lost))
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self._step_down(None)
+        if self.is_leader:
+            await asyncio.to_thread(self.backend.release_lease, self.name, self.owner)
+            self.is_leader = False
+
+
+_backend: Optional[StateBackend] = None
+
+
+def get_state_backend() -> StateBackend:
+    """Backend du process, choisi par AI_STATE_BACKEND (memory par défaut)."""
+    global _backend
+    if _backend is None:
+        kind = (os.getenv("AI_STATE_BACKEND") or "memory").strip().lower()
+        if kind == "sqlite":
+            _backend = SQLiteBackend(Path(os.getenv("AI_STATE_DB") or DEFAULT_DB_PATH))
+        else:
+            _backend = InProcessBackend()
+    return _backend
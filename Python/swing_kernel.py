@@ -0,0 +1,223 @@
+"""
+Noyau swing/pivots vectorisé — partagé par les détecteurs de figures (ai_server, mt5_ai_client).
+
+Une fenêtre de bougies → en un seul passage NumPy (sliding_window_view, pas de boucle Python) :
+- pivots hauts/bas d'ordre k (large : égalités admises, ou strict : fractals de Bill Williams) ;
+- niveaux de swing confirmés (un pivot n'est connu que `order` bougies après son extremum) ;
+- cassures de structure (BOS) : clôture qui franchit le dernier swing confirmé.
+SwingTracker fournit la mise à jour incrémentale bougie par bougie (un seul centre évalué par bougie).
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def _as_float(x: Any) -> np.ndarray:
+    return np.ascontiguousarray(np.asarray(x, dtype=float))
+
+
+def pivot_mask(x: Any, order: int, kind: str = "high", strict: bool = False) -> np.ndarray:
+    """
+    Masque booléen (len(x)) des pivots d'ordre `order` : centre ≥ (ou >, si strict) les `order`
+    valeurs de chaque côté. Les `order` premières/dernières bougies ne sont jamais des pivots.
+    """
+    x = _as_float(x)
+    n, k = len(x), int(order)
+    mask = np.zeros(n, dtype=bool)
+    if k < 1 or n < 2 * k + 1:
+        return mask
+    center = x[k:n - k]
+    if strict:
+        left = sliding_window_view(x[:n - k - 1], k)        # x[i-k:i]
+        right = sliding_window_view(x[k + 1:], k)           # x[i+1:i+k+1]
+        if kind == "high":
+            ok = (center > left.max(axis=1)) & (center > right.max(axis=1))
+        else:
+            ok = (center < left.min(axis=1)) & (center < right.min(axis=1))
+    else:
+        win = sliding_window_view(x, 2 * k + 1)
+        ok = center >= win.max(axis=1) if kind == "high" else center <= win.min(axis=1)
+    mask[k:n - k] = ok
+    return mask
+
+
+def pivot_points(x: Any, order: int, kind: str = "high", strict: bool = False) -> np.ndarray:
+    """Indices des pivots (ordre croissant)."""
+    return np.flatnonzero(pivot_mask(x, order, kind, strict))
+
+
+def fractals(high: Any, low: Any, period: int = 2) -> Tuple[np.ndarray, np.ndarray]:
+    """Fractals stricts : (indices fractals hauts, indices fractals bas)."""
+    return pivot_points(high, period, "high", strict=True), pivot_points(low, period, "low", strict=True)
+
+
+def trailing_max(x: Any, k: int) -> np.ndarray:
+    """out[i] = max(x[i-k:i]) (les k valeurs précédentes) ; NaN pour i < k."""
+    x = _as_float(x)
+    out = np.full(len(x), np.nan)
+    if k >= 1 and len(x) > k:
+        out[k:] = sliding_window_view(x[:-1], k).max(axis=1)
+    return out
+
+
+def _confirmed_levels(values: np.ndarray, idx: np.ndarray, order: int, n: int) -> np.ndarray:
+    """Niveau du dernier swing connu à chaque bougie (pivot i visible à partir de i + order)."""
+    level = np.full(n, np.nan)
+    seen = idx + order
+    keep = seen < n
+    level[seen[keep]] = values[idx[keep]]
+    # forward-fill sans pandas
+    pos = np.where(np.isfinite(level), np.arange(n), -1)
+    np.maximum.accumulate(pos, out=pos)
+    filled = np.where(pos >= 0, level[np.maximum(pos, 0)], np.nan)
+    return filled
+
+
+@dataclass
+class SwingStructure:
+    """Résultat du noyau pour une fenêtre : pivots, niveaux confirmés, BOS, tendance HH/HL."""
+
+    order: int
+    strict: bool
+    swing_highs: np.ndarray  # indices
+    swing_lows: np.ndarray
+    high_level: np.ndarray  # dernier swing haut confirmé à chaque bougie (NaN avant le premier)
+    low_level: np.ndarray
+    bos: np.ndarray  # int8 : +1 cassure haussière, -1 baissière, 0 sinon
+    trend: str
+
+    @property
+    def last_bos(self) -> int:
+        nz = np.flatnonzero(self.bos)
+        return int(self.bos[nz[-1]]) if len(nz) else 0
+
+    def to_dict(self, high: Any, low: Any) -> Dict[str, Any]:
+        high, low = _as_float(high), _as_float(low)
+        sh, sl = self.swing_highs, self.swing_lows
+        return {
+            "trend": self.trend,
+            "last_swing_high": float(high[sh[-1]]) if len(sh) else None,
+            "last_swing_low": float(low[sl[-1]]) if len(sl) else None,
+            "bos_last_bar": int(self.bos[-1]) if len(self.bos) else 0,
+            "last_bos": self.last_bos,
+        }
+
+
+def _trend_from_swings(high: np.ndarray, low: np.ndarray, sh: np.ndarray, sl: np.ndarray) -> str:
+    if len(sh) >= 2 and len(sl) >= 2:
+        if high[sh[-1]] > high[sh[-2]] and low[sl[-1]] > low[sl[-2]]:
+            return "uptrend"
+        if high[sh[-1]] < high[sh[-2]] and low[sl[-1]] < low[sl[-2]]:
+            return "downtrend"
+    return "neutral"
+
+
+def swing_structure(high: Any, low: Any, close: Any, order: int = 2, strict: bool = True) -> SwingStructure:
+    """Pivots + niveaux confirmés + BOS sur toute la fenêtre, en un appel."""
+    high, low, close = _as_float(high), _as_float(low), _as_float(close)
+    n = len(close)
+    sh = pivot_points(high, order, "high", strict)
+    sl = pivot_points(low, order, "low", strict)
+    hl = _confirmed_levels(high, sh, order, n)
+    ll = _confirmed_levels(low, sl, order, n)
+    bos = np.zeros(n, dtype=np.int8)
+    if n >= 2:
+        prev = close[:-1]
+        with np.errstate(invalid="ignore"):
+            up = (close[1:] > hl[1:]) & (prev <= hl[1:])
+            dn = (close[1:] < ll[1:]) & (prev >= ll[1:])
+        bos[1:][up] = 1
+        bos[1:][dn] = -1
+    return SwingStructure(order, strict, sh, sl, hl, ll, bos, _trend_from_swings(high, low, sh, sl))
+
+
+class SwingTracker:
+    """
+    Version incrémentale de swing_structure : update() à chaque bougie clôturée.
+    Seul le centre devenu confirmable (bougie n-1-order) est évalué — O(order) par bougie.
+    """
+
+    def __init__(self, order: int = 2, strict: bool = True, maxlen: int = 2000):
+        self.order = int(order)
+        self.strict = bool(strict)
+        self._high: Deque[float] = deque(maxlen=maxlen)
+        self._low: Deque[float] = deque(maxlen=maxlen)
+        self._close: Optional[float] = None
+        self.count = 0  # bougies vues depuis le début (index absolu)
+        self.swing_highs: List[Tuple[int, float]] = []
+        self.swing_lows: List[Tuple[int, float]] = []
+        self.high_level: Optional[float] = None
+        self.low_level: Optional[float] = None
+        self.last_bos = 0
+
+    def seed(self, high: Any, low: Any, close: Any) -> "SwingTracker":
+        """Initialise depuis un historique (calcul vectorisé), puis update() bougie par bougie."""
+        high, low, close = _as_float(high), _as_float(low), _as_float(close)
+        st = swing_structure(high, low, close, self.order, self.strict)
+        base = self.count
+        self._high.extend(high.tolist())
+        self._low.extend(low.tolist())
+        self._close = float(close[-1]) if len(close) else self._close
+        self.count += len(close)
+        self.swing_highs += [(base + int(i), float(high[i])) for i in st.swing_highs]
+        self.swing_lows += [(base + int(i), float(low[i])) for i in st.swing_lows]
+        if len(close):
+            self.high_level = None if np.isnan(st.high_level[-1]) else float(st.high_level[-1])
+            self.low_level = None if np.isnan(st.low_level[-1]) else float(st.low_level[-1])
+            self.last_bos = st.last_bos or self.last_bos
+        return self
+
+    def _is_pivot(self, buf: Deque[float], kind: str) -> bool:
+        k = self.order
+        w = list(buf)[-(2 * k + 1):]
+        c = w[k]
+        others = w[:k] + w[k + 1:]
+        if kind == "high":
+            return c > max(others) if self.strict else c >= max(w)
+        return c < min(others) if self.strict else c <= min(w)
+
+    def update(self, high: float, low: float, close: float) -> Dict[str, Any]:
+        """Ajoute une bougie ; renvoie les swings confirmés à cette bougie et la cassure éventuelle."""
+        self._high.append(float(high))
+        self._low.append(float(low))
+        self.count += 1
+        event: Dict[str, Any] = {"index": self.count - 1, "swing_high": None, "swing_low": None, "bos": 0}
+        k = self.order
+        if len(self._high) >= 2 * k + 1:
+            center = self.count - 1 - k
+            if self._is_pivot(self._high, "high"):
+                sw = (center, self._high[-1 - k])
+                self.swing_highs.append(sw)
+                self.high_level = sw[1]
+                event["swing_high"] = sw
+            if self._is_pivot(self._low, "low"):
+                sw = (center, self._low[-1 - k])
+                self.swing_lows.append(sw)
+                self.low_level = sw[1]
+                event["swing_low"] = sw
+        prev, close = self._close, float(close)
+        if prev is not None:
+            if self.high_level is not None and close > self.high_level >= prev:
+                event["bos"] = 1
+            elif self.low_level is not None and close < self.low_level <= prev:
+                event["bos"] = -1
+        if event["bos"]:
+            self.last_bos = event["bos"]
+        self._close = close
+        return event
+
+    @property
+    def trend(self) -> str:
+        sh, sl = self.swing_highs, self.swing_lows
+        if len(sh) >= 2 and len(sl) >= 2:
+            if sh[-1][1] > sh[-2][1] and sl[-1][1] > sl[-2][1]:
+                return "uptrend"
+            if sh[-1][1] < sh[-2][1] and sl[-1][1] < sl[-2][1]:
+                return "downtrend"
+        return "neutral"
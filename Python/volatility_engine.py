@@ -0,0 +1,330 @@
+"""
+Volatilité récursive par (symbole, timeframe) : GARCH(1,1) + EWMA mis à jour en O(1) à chaque bougie.
+
+- update() : un rendement log → σ²(t+1) = ω + α·r² + β·σ², EWMA λ, fenêtres glissantes 20/200 ;
+- refit() : ré-estimation (quasi-MLE, ciblage de variance, grille vectorisée) sur le tampon de rendements,
+  appelée en tâche de fond selon un planning — jamais sur le chemin de lecture ;
+- forecast() : lecture O(1) (vol 1 pas, vol cumulée sur h pas, vol long terme, régime HIGH/LOW/NORMAL) ;
+- save()/load() : état JSON (paramètres, variances, tampon) pour reprendre après redémarrage.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+BUFFER = 2000  # rendements conservés pour la ré-estimation
+MIN_FIT = 100
+SHORT_WIN = 20
+LONG_WIN = 200
+DEFAULT_PARAMS = {"alpha": 0.1, "beta": 0.85, "lam": 0.94}
+ALPHA_GRID = np.linspace(0.01, 0.30, 30)
+PERSIST_GRID = np.linspace(0.80, 0.995, 40)
+LAMBDA_GRID = np.linspace(0.80, 0.995, 40)
+
+
+class _Rolling:
+    """Variance glissante O(1) (sommes de r et r² sur les n derniers rendements)."""
+
+    def __init__(self, n: int):
+        self.buf: Deque[float] = deque(maxlen=n)
+        self.s = 0.0
+        self.s2 = 0.0
+
+    def push(self, x: float) -> None:
+        if len(self.buf) == self.buf.maxlen:
+            old = self.buf[0]
+            self.s -= old
+            self.s2 -= old * old
+        self.buf.append(x)
+        self.s += x
+        self.s2 += x * x
+
+    def std(self) -> Optional[float]:
+        n = len(self.buf)
+        if n < 2:
+            return None
+        var = (self.s2 - self.s * self.s / n) / (n - 1)
+        return math.sqrt(max(var, 0.0))
+
+
+def _garch_filter(r: np.ndarray, alpha: np.ndarray, beta: np.ndarray, omega: np.ndarray, v0: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Filtre GARCH vectorisé sur une grille de paramètres : (−log-vraisemblance, σ² après le dernier rendement)."""
+    var = np.full(alpha.shape, v0)
+    nll = np.zeros(alpha.shape)
+    for x in r * r:
+        nll += np.log(var) + x / var
+        var = omega + alpha * x + beta * var
+    return nll, var
+
+
+def fit_garch(returns: np.ndarray) -> Dict[str, float]:
+    """
+    GARCH(1,1) par quasi-MLE avec ciblage de variance (ω = V·(1−α−β)) : grille α × persistance
+    évaluée d'un seul passage, puis EWMA λ par la même méthode.
+    """
+    r = np.asarray(returns, dtype=float)
+    r = r[np.isfinite(r)]
+    v = float(np.var(r)) or 1e-12
+    v0 = float(np.var(r[:SHORT_WIN])) or v
+    a, p = np.meshgrid(ALPHA_GRID, PERSIST_GRID)
+    ok = a < p
+    a, p = a[ok], p[ok]
+    b = p - a
+    nll, _ = _garch_filter(r, a, b, v * (1.0 - p), v0)
+    best = int(np.argmin(nll))
+    lam = LAMBDA_GRID
+    ew_nll, _ = _garch_filter(r, 1.0 - lam, lam, np.zeros_like(lam), v0)
+    return {
+        "alpha": float(a[best]),
+        "beta": float(b[best]),
+        "omega": float(v * (1.0 - p[best])),
+        "lam": float(lam[int(np.argmin(ew_nll))]),
+        "nll": float(nll[best]),
+    }
+
+
+class VolState:
+    """État récursif d'un (symbole, timeframe)."""
+
+    def __init__(self, params: Optional[Dict[str, float]] = None):
+        p = {**DEFAULT_PARAMS, **(params or {})}
+        self.alpha, self.beta, self.lam = p["alpha"], p["beta"], p["lam"]
+        self.omega: Optional[float] = p.get("omega")
+        self.var: Optional[float] = None  # σ² GARCH prévue pour la prochaine bougie
+        self.ewma: Optional[float] = None
+        self.last_close: Optional[float] = None
+        self.last_ns: Optional[int] = None
+        self.returns: Deque[float] = deque(maxlen=BUFFER)
+        self.short = _Rolling(SHORT_WIN)
+        self.long = _Rolling(LONG_WIN)
+        self.bars = 0
+        self.fitted_at: Optional[float] = None
+        self.bars_at_fit = 0
+        self.nll: Optional[float] = None
+
+    def update(self, close: float, ts_ns: Optional[int] = None) -> None:
+        close = float(close)
+        if ts_ns is not None:
+            self.last_ns = int(ts_ns)
+        prev, self.last_close = self.last_close, close
+        if prev is None or prev <= 0 or close <= 0:
+            return
+        r = math.log(close / prev)
+        self.returns.append(r)
+        self.short.push(r)
+        self.long.push(r)
+        self.bars += 1
+        x = r * r
+        if self.var is None:
+            # amorçage : variance des premiers rendements, ω par défaut ciblé dessus
+            if len(self.returns) < SHORT_WIN:
+                return
+            v0 = float(np.var(self.returns))
+            if self.omega is None:
+                self.omega = v0 * (1.0 - self.alpha - self.beta)
+            self.var = self.ewma = v0
+        self.var = self.omega + self.alpha * x + self.beta * self.var
+        self.ewma = self.lam * self.ewma + (1.0 - self.lam) * x
+
+    def apply_fit(self, fit: Dict[str, float]) -> None:
+        """Nouveaux paramètres puis re-filtrage du tampon pour des σ² cohérentes avec eux."""
+        self.alpha, self.beta, self.omega, self.lam = fit["alpha"], fit["beta"], fit["omega"], fit["lam"]
+        self.nll = fit.get("nll")
+        r = np.fromiter(self.returns, dtype=float)
+        v0 = float(np.var(r[:SHORT_WIN])) or float(np.var(r))
+        _, var = _garch_filter(r, np.array([self.alpha, 1.0 - self.lam]), np.array([self.beta, self.lam]),
+                               np.array([self.omega, 0.0]), v0)
+        self.var, self.ewma = float(var[0]), float(var[1])
+        self.fitted_at = time.time()
+        self.bars_at_fit = self.bars
+
+    @property
+    def long_run_var(self) -> Optional[float]:
+        persist = self.alpha + self.beta
+        if self.omega is None or persist >= 1.0:
+            return None
+        return self.omega / (1.0 - persist)
+
+    def forecast(self, horizon: int = 1) -> Optional[Dict[str, Any]]:
+        if self.var is None:
+            return None
+        h = max(1, int(horizon))
+        persist = self.alpha + self.beta
+        lr = self.long_run_var
+        if lr is None:
+            cum = self.var * h
+        else:
+            # Σ_{k=1..h} E[σ²_{t+k}] = h·V + (σ²−V)·(1−φ^h)/(1−φ)
+            cum = h * lr + (self.var - lr) * (1.0 - persist ** h) / (1.0 - persist)
+        vol = math.sqrt(self.var)
+        avg = self.long.std() or vol
+        ratio = vol / avg if avg > 0 else 1.0
+        if ratio > 1.5:
+            signal, confidence = "HIGH_VOL", 0.7
+        elif ratio < 0.5:
+            signal, confidence = "LOW_VOL", 0.6
+        else:
+            signal, confidence = "NORMAL_VOL", 0.5
+        return {
+            "signal": signal,
+            "confidence": confidence,
+            "volatility": vol,
+            "ewma_volatility": math.sqrt(self.ewma) if self.ewma is not None else None,
+            "horizon": h,
+            "horizon_volatility": math.sqrt(max(cum, 0.0)),
+            "long_run_volatility": math.sqrt(lr) if lr is not None else None,
+            "current_volatility": self.short.std(),
+            "avg_volatility": avg,
+            "volatility_ratio": ratio,
+            "model_params": {"omega": self.omega, "alpha": self.alpha, "beta": self.beta, "lambda": self.lam},
+            "bars": self.bars,
+            "fitted_at": self.fitted_at,
+            "last_bar_ns": self.last_ns,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "alpha": self.alpha, "beta": self.beta, "omega": self.omega, "lam": self.lam,
+            "var": self.var, "ewma": self.ewma, "last_close": self.last_close, "last_ns": self.last_ns,
+            "returns": list(self.returns), "bars": self.bars, "fitted_at": self.fitted_at,
+            "bars_at_fit": self.bars_at_fit, "nll": self.nll,
+        }
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "VolState":
+        st = cls({"alpha": d["alpha"], "beta": d["beta"], "lam": d["lam"], "omega": d.get("omega")})
+        for r in d.get("returns") or []:
+            st.returns.append(float(r))
+            st.short.push(float(r))
+            st.long.push(float(r))
+        st.var, st.ewma = d.get("var"), d.get("ewma")
+        st.last_close, st.last_ns = d.get("last_close"), d.get("last_ns")
+        st.bars = int(d.get("bars") or len(st.returns))
+        st.fitted_at, st.bars_at_fit, st.nll = d.get("fitted_at"), int(d.get("bars_at_fit") or 0), d.get("nll")
+        return st
+
+
+def _bar_ns(df: Any) -> np.ndarray:
+    col = df["time"] if "time" in df.columns else df.index
+    if pd.api.types.is_datetime64_any_dtype(col):
+        return np.asarray(pd.DatetimeIndex(col).as_unit("ns").asi8, dtype="int64")
+    return (np.asarray(col, dtype="float64") * 1e9).astype("int64")
+
+
+class VolatilityEngine:
+    """États par (symbole, timeframe), partagés par ai_server (/volatility, /decision) et les clients."""
+
+    def __init__(self):
+        self._states: Dict[Tuple[str, str], VolState] = {}
+        self._lock = threading.Lock()
+        self.refits = 0
+
+    @staticmethod
+    def _key(symbol: str, timeframe: str) -> Tuple[str, str]:
+        return str(symbol), str(timeframe).upper()
+
+    def has(self, symbol: str, timeframe: str) -> bool:
+        return self._key(symbol, timeframe) in self._states
+
+    def sync_arrays(self, symbol: str, timeframe: str, ts_ns: Any, closes: Any, closed_only: bool = True) -> int:
+        """Ajoute les clôtures plus récentes que la dernière vue ; un premier sync déclenche un fit initial."""
+        ts = np.asarray(ts_ns, dtype="int64")
+        c = np.asarray(closes, dtype=float)
+        stop = len(ts) - 1 if closed_only else len(ts)
+        key = self._key(symbol, timeframe)
+        with self._lock:
+            st = self._states.get(key)
+            if st is None:
+                st = self._states[key] = VolState()
+            start = 0 if st.last_ns is None else int(np.searchsorted(ts[:max(stop, 0)], st.last_ns, side="right"))
+            for i in range(start, stop):
+                st.update(c[i], int(ts[i]))
+            fresh = st.fitted_at is None and len(st.returns) >= MIN_FIT
+        if fresh:
+            self.refit(symbol, timeframe)
+        return max(0, stop - start)
+
+    def sync_frame(self, symbol: str, timeframe: str, df: Any, closed_only: bool = True) -> int:
+        if df is None or len(df) == 0:
+            return 0
+        return self.sync_arrays(symbol, timeframe, _bar_ns(df), df["close"].to_numpy(dtype=float), closed_only)
+
+    def forecast(self, symbol: str, timeframe: str, horizon: int = 1) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            st = self._states.get(self._key(symbol, timeframe))
+            return st.forecast(horizon) if st is not None else None
+
+    def refit(self, symbol: str, timeframe: str) -> Optional[Dict[str, float]]:
+        """Fit hors verrou sur une copie du tampon ; les bougies arrivées entre-temps sont re-filtrées."""
+        key = self._key(symbol, timeframe)
+        with self._lock:
+            st = self._states.get(key)
+            if st is None or len(st.returns) < MIN_FIT:
+                return None
+            r = np.fromiter(st.returns, dtype=float)
+        fit = fit_garch(r)
+        with self._lock:
+            st.apply_fit(fit)
+            self.refits += 1
+        return fit
+
+    def refit_stale(self, max_age_sec: float = 3600.0, min_new_bars: int = 50) -> List[str]:
+        """Ré-estime les états dont le fit est plus vieux que max_age_sec ou qui ont reçu min_new_bars bougies."""
+        now = time.time()
+        with self._lock:
+            due = [
+                k for k, st in self._states.items()
+                if len(st.returns) >= MIN_FIT and (
+                    st.fitted_at is None
+                    or now - st.fitted_at >= max_age_sec
+                    or st.bars - st.bars_at_fit >= min_new_bars
+                )
+            ]
+        for sym, tf in due:
+            self.refit(sym, tf)
+        return [f"{s}:{tf}" for s, tf in due]
+
+    def save(self, path: Any) -> None:
+        path = Path(path)
+        with self._lock:
+            data = {f"{s}|{tf}": st.to_dict() for (s, tf), st in self._states.items()}
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+
+    def load(self, path: Any) -> int:
+        path = Path(path)
+        if not path.exists():
+            return 0
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        with self._lock:
+            for key, d in data.items():
+                sym, _, tf = key.rpartition("|")
+                self._states[(sym, tf)] = VolState.from_dict(d)
+        return len(data)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "refits": self.refits,
+                "states": {
+                    f"{s}:{tf}": {"bars": st.bars, "fitted_at": st.fitted_at, "alpha": st.alpha, "beta": st.beta}
+                    for (s, tf), st in self._states.items()
+                },
+            }
+
+
+volatility_engine = VolatilityEngine()
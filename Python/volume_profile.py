@@ -0,0 +1,344 @@
+"""
+Profils de volume / market profile incrémentaux, par (symbole, timeframe).
+
+- grille de prix fixe (multiples de `step`) commune à toutes les sessions d'un symbole ;
+- un histogramme volume + un histogramme TPO (temps passé au prix) par session UTC journalière,
+  tableaux NumPy étendus à la demande ; chaque bougie ajoute son volume en O(bins touchés) ;
+- POC, value area (algorithme CBOT : extension depuis le POC), HVN/LVN, rebinning en N classes ;
+- composites multi-jours (semaine, mois, N derniers jours) sommés depuis les sessions ;
+- résultats mis en cache par (session(s), version) : une lecture répétée ne recalcule rien.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+DAY_NS = 86_400 * 10**9
+MAX_SESSIONS = 120
+VALUE_AREA = 0.70
+
+
+@dataclass
+class Session:
+    day: int  # jours depuis epoch (UTC)
+    lo: int  # index de grille du premier bin
+    volume: np.ndarray
+    tpo: np.ndarray
+    bars: int = 0
+    version: int = 0
+    open: Optional[float] = None
+    close: Optional[float] = None
+    high: float = -math.inf
+    low: float = math.inf
+
+    def ensure(self, lo: int, hi: int) -> None:
+        """Étend les tableaux pour couvrir les index de grille [lo, hi]."""
+        cur_hi = self.lo + len(self.volume) - 1
+        if lo >= self.lo and hi <= cur_hi:
+            return
+        new_lo, new_hi = min(lo, self.lo), max(hi, cur_hi)
+        size = new_hi - new_lo + 1
+        vol, tpo = np.zeros(size), np.zeros(size)
+        off = self.lo - new_lo
+        vol[off:off + len(self.volume)] = self.volume
+        tpo[off:off + len(self.tpo)] = self.tpo
+        self.lo, self.volume, self.tpo = new_lo, vol, tpo
+
+
+@dataclass
+class ProfileStats:
+    step: float
+    lo_price: float
+    volume: np.ndarray
+    tpo: np.ndarray
+    days: List[int] = field(default_factory=list)
+
+    @property
+    def prices(self) -> np.ndarray:
+        return self.lo_price + self.step * (np.arange(len(self.volume)) + 0.5)
+
+
+def _volume_column(df: Any) -> Optional[np.ndarray]:
+    for col in ("volume", "tick_volume", "real_volume"):
+        if col in df.columns:
+            return df[col].to_numpy(dtype=float)
+    return None
+
+
+def _bar_ns(df: Any) -> np.ndarray:
+    col = df["time"] if "time" in df.columns else df.index
+    if pd.api.types.is_datetime64_any_dtype(col):
+        return np.asarray(pd.DatetimeIndex(col).as_unit("ns").asi8, dtype="int64")
+    # secondes epoch (MT5 copy_rates)
+    return (np.asarray(col, dtype="float64") * 1e9).astype("int64")
+
+
+def _utc_date(day: int):
+    return datetime.fromtimestamp(day * 86_400, tz=timezone.utc).date()
+
+
+def value_area(volume: np.ndarray, poc: int, pct: float = VALUE_AREA) -> Tuple[int, int]:
+    """Bornes (index) de la value area : extension depuis le POC vers le côté le plus chargé (2 bins à la fois)."""
+    total = float(volume.sum())
+    if total <= 0:
+        return poc, poc
+    lo = hi = poc
+    acc = float(volume[poc])
+    n = len(volume)
+    target = total * pct
+    while acc < target and (lo > 0 or hi < n - 1):
+        up = float(volume[hi + 1:hi + 3].sum()) if hi < n - 1 else -1.0
+        dn = float(volume[max(0, lo - 2):lo].sum()) if lo > 0 else -1.0
+        if up >= dn:
+            step_hi = min(n - 1, hi + 2)
+            acc += float(volume[hi + 1:step_hi + 1].sum())
+            hi = step_hi
+        else:
+            step_lo = max(0, lo - 2)
+            acc += float(volume[step_lo:lo].sum())
+            lo = step_lo
+    return lo, hi
+
+
+def volume_nodes(volume: np.ndarray, smooth: int = 3, top: int = 5) -> Tuple[List[int], List[int]]:
+    """HVN/LVN : extrema locaux de l'histogramme lissé (HVN triés par volume, LVN par creux)."""
+    if len(volume) < 3:
+        return ([int(np.argmax(volume))] if len(volume) else []), []
+    kernel = np.ones(smooth) / smooth
+    sm = np.convolve(volume, kernel, mode="same")
+    inner = sm[1:-1]
+    peaks = np.flatnonzero((inner >= sm[:-2]) & (inner > sm[2:])) + 1
+    troughs = np.flatnonzero((inner <= sm[:-2]) & (inner < sm[2:])) + 1
+    hvn = sorted(peaks.tolist(), key=lambda i: -sm[i])[:top]
+    lvn = sorted(troughs.tolist(), key=lambda i: sm[i])[:top]
+    return hvn, lvn
+
+
+class VolumeProfileEngine:
+    """Histogrammes par session d'un (symbole, timeframe). ProfileRegistry sérialise les accès."""
+
+    def __init__(self, step: Optional[float] = None, max_sessions: int = MAX_SESSIONS):
+        self.step = step
+        self.origin: Optional[float] = None
+        self.sessions: "OrderedDict[int, Session]" = OrderedDict()
+        self.max_sessions = int(max_sessions)
+        self.last_ns: Optional[int] = None
+        self.bars = 0
+        self._cache: Dict[Any, Dict[str, Any]] = {}
+        self.cache_hits = 0
+
+    # -- grille ------------------------------------------------------------
+    def _init_grid(self, highs: np.ndarray, lows: np.ndarray, closes: np.ndarray) -> None:
+        if self.step is None:
+            ranges = highs - lows
+            med = float(np.median(ranges[ranges > 0])) if np.any(ranges > 0) else 0.0
+            ref = float(np.median(closes))
+            raw = max(med / 4.0, abs(ref) * 1e-5, 1e-9)
+            mag = 10 ** math.floor(math.log10(raw))
+            self.step = min((m * mag for m in (1, 2, 2.5, 5, 10) if m * mag >= raw), default=raw)
+        # grille absolue (multiples de step) : mêmes bins quel que soit le premier lot synchronisé
+        self.origin = 0.0
+
+    def _index(self, price: float) -> int:
+        return int(math.floor((price - self.origin) / self.step))
+
+    # -- mise à jour -------------------------------------------------------
+    def add_bar(self, ts_ns: int, high: float, low: float, close: float, volume: float = 1.0,
+                open_: Optional[float] = None) -> None:
+        """Répartit le volume de la bougie uniformément sur les bins [low, high] : O(bins touchés)."""
+        if self.origin is None:
+            self._init_grid(np.array([high]), np.array([low]), np.array([close]))
+        day = int(ts_ns // DAY_NS)
+        sess = self.sessions.get(day)
+        lo_i, hi_i = self._index(low), self._index(high)
+        if sess is None:
+            sess = Session(day, lo_i, np.zeros(hi_i - lo_i + 1), np.zeros(hi_i - lo_i + 1))
+            self.sessions[day] = sess
+            while len(self.sessions) > self.max_sessions:
+                self.sessions.popitem(last=False)
+        sess.ensure(lo_i, hi_i)
+        a, b = lo_i - sess.lo, hi_i - sess.lo + 1
+        sess.volume[a:b] += float(volume) / (b - a)
+        sess.tpo[a:b] += 1.0
+        sess.bars += 1
+        sess.version += 1
+        sess.open = sess.open if sess.open is not None else (open_ if open_ is not None else close)
+        sess.close = close
+        sess.high, sess.low = max(sess.high, high), min(sess.low, low)
+        self.bars += 1
+
+    def sync_arrays(
+        self,
+        ts_ns: np.ndarray,
+        high: np.ndarray,
+        low: np.ndarray,
+        close: np.ndarray,
+        volume: Optional[np.ndarray] = None,
+        open_: Optional[np.ndarray] = None,
+        closed_only: bool = True,
+    ) -> int:
+        """Ajoute les bougies plus récentes que la dernière vue (dernière exclue si closed_only) ; renvoie leur nombre."""
+        ts = np.asarray(ts_ns, dtype="int64")
+        stop = len(ts) - 1 if closed_only else len(ts)
+        start = 0 if self.last_ns is None else int(np.searchsorted(ts[:max(stop, 0)], self.last_ns, side="right"))
+        if start >= stop:
+            return 0
+        h, l, c = (np.asarray(a, dtype=float) for a in (high, low, close))
+        o = c if open_ is None else np.asarray(open_, dtype=float)
+        if self.origin is None:
+            self._init_grid(h[start:stop], l[start:stop], c[start:stop])
+        for i in range(start, stop):
+            self.add_bar(int(ts[i]), h[i], l[i], c[i], 1.0 if volume is None else float(volume[i]), o[i])
+        self.last_ns = int(ts[stop - 1])
+        return stop - start
+
+    def sync_frame(self, df: Any, closed_only: bool = True) -> int:
+        """sync_arrays depuis un DataFrame (index/colonne time, volume/tick_volume/real_volume)."""
+        if df is None or len(df) == 0:
+            return 0
+        return self.sync_arrays(
+            _bar_ns(df),
+            df["high"].to_numpy(dtype=float),
+            df["low"].to_numpy(dtype=float),
+            df["close"].to_numpy(dtype=float),
+            _volume_column(df),
+            df["open"].to_numpy(dtype=float) if "open" in df.columns else None,
+            closed_only=closed_only,
+        )
+
+    # -- lecture -----------------------------------------------------------
+    def _days_for(self, period: str = "D", days: Optional[int] = None) -> List[int]:
+        if not self.sessions:
+            return []
+        keys = list(self.sessions)
+        if days:
+            return keys[-int(days):]
+        if period == "W":
+            bucket = lambda d: _utc_date(d).isocalendar()[:2]
+        elif period == "M":
+            bucket = lambda d: (_utc_date(d).year, _utc_date(d).month)
+        else:
+            return keys[-1:]
+        ref = bucket(keys[-1])
+        return [d for d in keys if bucket(d) == ref]
+
+    def _combine(self, days: Sequence[int]) -> Optional[ProfileStats]:
+        sess = [self.sessions[d] for d in days if d in self.sessions]
+        if not sess:
+            return None
+        lo = min(s.lo for s in sess)
+        hi = max(s.lo + len(s.volume) - 1 for s in sess)
+        vol, tpo = np.zeros(hi - lo + 1), np.zeros(hi - lo + 1)
+        for s in sess:
+            off = s.lo - lo
+            vol[off:off + len(s.volume)] += s.volume
+            tpo[off:off + len(s.tpo)] += s.tpo
+        return ProfileStats(self.step, self.origin + lo * self.step, vol, tpo, [s.day for s in sess])
+
+    def profile(
+        self,
+        period: str = "D",
+        days: Optional[int] = None,
+        value_area_pct: float = VALUE_AREA,
+        num_bins: Optional[int] = None,
+        use_tpo: bool = False,
+    ) -> Optional[Dict[str, Any]]:
+        """POC / VAH / VAL / HVN / LVN d'une session (D) ou d'un composite (W, M, N derniers jours)."""
+        keys = self._days_for(period, days)
+        if not keys:
+            return None
+        key = (tuple((d, self.sessions[d].version) for d in keys), round(value_area_pct, 4), num_bins, use_tpo)
+        hit = self._cache.get(key)
+        if hit is not None:
+            self.cache_hits += 1
+            return hit
+        stats = self._combine(keys)
+        hist = stats.tpo if use_tpo else stats.volume
+        prices = stats.prices
+        poc = int(np.argmax(hist))
+        va_lo, va_hi = value_area(hist, poc, value_area_pct)
+        hvn, lvn = volume_nodes(hist)
+        sessions = [self.sessions[d] for d in keys]
+        out: Dict[str, Any] = {
+            "period": period if not days else f"{len(keys)}D",
+            "sessions": [_utc_date(d).isoformat() for d in keys],
+            "bars": int(sum(s.bars for s in sessions)),
+            "step": stats.step,
+            "total_volume": float(stats.volume.sum()),
+            "poc": float(prices[poc]),
+            "vah": float(stats.lo_price + (va_hi + 1) * stats.step),
+            "val": float(stats.lo_price + va_lo * stats.step),
+            "value_area_percent": value_area_pct,
+            "hvn": [{"price": float(prices[i]), "volume": float(hist[i])} for i in hvn],
+            "lvn": [{"price": float(prices[i]), "volume": float(hist[i])} for i in lvn],
+            "high": float(max(s.high for s in sessions)),
+            "low": float(min(s.low for s in sessions)),
+            "open": sessions[0].open,
+            "close": sessions[-1].close,
+            "basis": "tpo" if use_tpo else "volume",
+        }
+        if num_bins:
+            out["histogram"] = self._rebin(stats, hist, int(num_bins))
+        if len(self._cache) > 256:
+            self._cache.clear()
+        self._cache[key] = out
+        return out
+
+    @staticmethod
+    def _rebin(stats: ProfileStats, hist: np.ndarray, num_bins: int) -> List[Dict[str, float]]:
+        """Histogramme fin → num_bins classes égales (np.add.reduceat)."""
+        n = len(hist)
+        num_bins = max(1, min(num_bins, n))
+        edges = np.linspace(0, n, num_bins + 1).round().astype(int)
+        starts = np.unique(edges[:-1])
+        sums = np.add.reduceat(hist, starts)
+        ends = np.r_[starts[1:], n]
+        total = float(hist.sum()) or 1.0
+        return [
+            {
+                "price_low": float(stats.lo_price + a * stats.step),
+                "price_high": float(stats.lo_price + b * stats.step),
+                "volume": float(v),
+                "pct": round(float(v) / total * 100.0, 3),
+            }
+            for a, b, v in zip(starts, ends, sums)
+        ]
+
+
+class ProfileRegistry:
+    """Un moteur par (symbole, timeframe), partagé par les endpoints, le dashboard et les EAs."""
+
+    def __init__(self):
+        self._engines: Dict[Tuple[str, str], VolumeProfileEngine] = {}
+        self._lock = threading.Lock()
+
+    def sync_frame(self, symbol: str, timeframe: str, df: Any, closed_only: bool = True) -> VolumeProfileEngine:
+        key = (str(symbol), str(timeframe).upper())
+        with self._lock:
+            eng = self._engines.get(key)
+            if eng is None:
+                eng = self._engines[key] = VolumeProfileEngine()
+            eng.sync_frame(df, closed_only=closed_only)
+            return eng
+
+    def profile(self, symbol: str, timeframe: str, **kwargs: Any) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            eng = self._engines.get((str(symbol), str(timeframe).upper()))
+            return eng.profile(**kwargs) if eng is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            f"{s}:{tf}": {"bars": e.bars, "sessions": len(e.sessions), "step": e.step, "cache_hits": e.cache_hits}
+            for (s, tf), e in list(self._engines.items())
+        }
+
+
+profile_registry = ProfileRegistry()
@@ -0,0 +1,347 @@
+"""
+Index persistant des order blocks et zones de liquidité, par (symbole, timeframe).
+
+- mis à jour bougie par bougie (seules les bougies clôturées et nouvelles sont consommées) ;
+- pivots d'ordre `lookback` (mêmes règles que GOMSignalsLiveCalculator.compute_order_blocks) :
+  pivot haut → OB baissier sur la bougie i-lookback-1 + liquidité buy-side au niveau du pivot,
+  pivot bas  → OB haussier + liquidité sell-side ;
+- cycle de vie : active → mitigated (prix revenu dans la zone) → invalidated (clôture au-delà),
+  liquidité : active → swept (mèche au-delà du niveau) ;
+- zones vivantes rangées dans des tableaux triés par borne basse : requête « zones à moins de X ATR
+  du prix » en O(log n + k) (bisect + hauteur max des zones).
+"""
+
+from __future__ import annotations
+
+import bisect
+import itertools
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+OB_KINDS = ("ob_bull", "ob_bear")
+LIQ_KINDS = ("liq_high", "liq_low")
+ATR_PERIOD = 14
+LIQ_WIDTH_ATR = 0.1  # demi-largeur d'une zone de liquidité autour du pivot
+
+
+@dataclass
+class Zone:
+    id: int
+    kind: str
+    bottom: float
+    top: float
+    origin_time: Any  # bougie d'origine (OB) ou du pivot (liquidité)
+    pivot_price: float
+    strength: float
+    created_bar: int
+    status: str = "active"  # active | mitigated | invalidated | swept
+    touches: int = 0
+    mitigated_bar: Optional[int] = None
+    closed_bar: Optional[int] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self.status in ("active", "mitigated")
+
+    def distance(self, price: float) -> float:
+        if price < self.bottom:
+            return self.bottom - price
+        if price > self.top:
+            return price - self.top
+        return 0.0
+
+    def to_dict(self, price: Optional[float] = None, atr: Optional[float] = None) -> Dict[str, Any]:
+        out = {
+            "id": self.id,
+            "type": self.kind,
+            "bottom": self.bottom,
+            "top": self.top,
+            "mid": (self.bottom + self.top) / 2.0,
+            "pivot_price": self.pivot_price,
+            "strength": round(self.strength, 4),
+            "status": self.status,
+            "touches": self.touches,
+            "origin_time": str(self.origin_time),
+        }
+        if price is not None:
+            d = self.distance(price)
+            out["distance"] = d
+            if atr:
+                out["distance_atr"] = round(d / atr, 4)
+        return out
+
+
+def _bar_column(df: Any) -> Any:
+    return df["time"] if "time" in getattr(df, "columns", ()) else df.index
+
+
+def _bar_times(df: Any) -> np.ndarray:
+    """Horodatages comparables (ns epoch pour les dates, valeur brute sinon)."""
+    col = _bar_column(df)
+    if pd.api.types.is_datetime64_any_dtype(col):
+        return np.asarray(pd.DatetimeIndex(col).asi8, dtype="float64")
+    try:
+        return np.asarray(col, dtype="float64")
+    except (TypeError, ValueError):
+        return np.arange(len(col), dtype="float64")
+
+
+class ZoneIndex:
+    """Zones d'un (symbole, timeframe). Pas thread-safe seul : ZoneRegistry sérialise les accès."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, lookback: int = 10, maxlen: int = 5000, history: int = 500):
+        self.lookback = int(lookback)
+        self._open: Deque[float] = deque(maxlen=2 * self.lookback + 2)
+        self._high: Deque[float] = deque(maxlen=2 * self.lookback + 2)
+        self._low: Deque[float] = deque(maxlen=2 * self.lookback + 2)
+        self._close: Deque[float] = deque(maxlen=2 * self.lookback + 2)
+        self._times: Deque[Any] = deque(maxlen=2 * self.lookback + 2)
+        self.maxlen = int(maxlen)
+        self.bars = 0
+        self.last_time: Optional[float] = None
+        self.last_close: Optional[float] = None
+        self.atr: Optional[float] = None
+        # zones ouvertes, triées par borne basse (tableaux parallèles)
+        self._bottoms: List[float] = []
+        self._zones: List[Zone] = []
+        self._max_height = 0.0
+        self.closed: Deque[Zone] = deque(maxlen=history)
+        self.updated_at: Optional[float] = None
+
+    # -- tableaux triés ----------------------------------------------------
+    def _insert(self, zone: Zone) -> None:
+        pos = bisect.bisect_right(self._bottoms, zone.bottom)
+        self._bottoms.insert(pos, zone.bottom)
+        self._zones.insert(pos, zone)
+        self._max_height = max(self._max_height, zone.top - zone.bottom)
+        if len(self._zones) > self.maxlen:
+            # la plus ancienne zone sort de l'index
+            oldest = min(range(len(self._zones)), key=lambda i: self._zones[i].created_bar)
+            self._remove_at(oldest)
+
+    def _remove_at(self, pos: int) -> Zone:
+        del self._bottoms[pos]
+        zone = self._zones.pop(pos)
+        if zone.top - zone.bottom >= self._max_height:
+            self._max_height = max((z.top - z.bottom for z in self._zones), default=0.0)
+        return zone
+
+    def _overlapping(self, lo: float, hi: float) -> List[int]:
+        """Positions des zones ouvertes qui intersectent [lo, hi]."""
+        start = bisect.bisect_left(self._bottoms, lo - self._max_height)
+        end = bisect.bisect_right(self._bottoms, hi)
+        return [i for i in range(start, end) if self._zones[i].top >= lo]
+
+    # -- mise à jour -------------------------------------------------------
+    def _update_atr(self, high: float, low: float) -> None:
+        prev = self.last_close
+        tr = high - low if prev is None else max(high - low, abs(high - prev), abs(low - prev))
+        self.atr = tr if self.atr is None else self.atr + (tr - self.atr) / ATR_PERIOD
+
+    def _mitigate(self, high: float, low: float, close: float) -> None:
+        prev = self.last_close if self.last_close is not None else close
+        lo, hi = min(low, prev), max(high, prev)
+        closed: List[int] = []
+        for pos in self._overlapping(lo, hi):
+            z = self._zones[pos]
+            if z.kind == "ob_bull":
+                if close < z.bottom:
+                    z.status = "invalidated"
+                elif low <= z.top:
+                    z.touches += 1
+                    if z.status == "active":
+                        z.status, z.mitigated_bar = "mitigated", self.bars
+            elif z.kind == "ob_bear":
+                if close > z.top:
+                    z.status = "invalidated"
+                elif high >= z.bottom:
+                    z.touches += 1
+                    if z.status == "active":
+                        z.status, z.mitigated_bar = "mitigated", self.bars
+            elif z.kind == "liq_high" and high > z.pivot_price:
+                z.status = "swept"
+            elif z.kind == "liq_low" and low < z.pivot_price:
+                z.status = "swept"
+            if not z.is_open:
+                z.closed_bar = self.bars
+                closed.append(pos)
+        for pos in reversed(closed):
+            self.closed.append(self._remove_at(pos))
+
+    def _detect(self) -> None:
+        """Pivot d'ordre k au centre de la fenêtre (2k+1 dernières bougies) → nouvelles zones."""
+        k = self.lookback
+        if len(self._high) < 2 * k + 2:
+            return  # il faut aussi la bougie i-k-1 (origine de l'OB)
+        highs, lows = list(self._high), list(self._low)
+        c = len(highs) - 1 - k
+        win_h, win_l = highs[c - k:c + k + 1], lows[c - k:c + k + 1]
+        atr = self.atr or (max(win_h) - min(win_l)) or 1e-9
+        strength = min(1.0, (max(win_h) - min(win_l)) / (3.0 * atr))
+        j = c - k - 1
+        created = self.bars - 1 - k
+        # bougies entre le pivot et sa confirmation : la zone peut naître déjà mitigée ou cassée
+        after_c = list(self._close)[c + 1:]
+        after_h, after_l = highs[c + 1:], lows[c + 1:]
+        w = LIQ_WIDTH_ATR * atr
+        if highs[c] >= max(win_h):
+            o, cl = self._open[j], self._close[j]
+            ob = Zone(next(self._ids), "ob_bear", float(min(o, cl)), float(highs[j]),
+                      self._times[j], float(highs[c]), strength, created)
+            if max(after_c) > ob.top:
+                ob.status = "invalidated"
+            elif max(after_h) >= ob.bottom:
+                ob.status, ob.mitigated_bar = "mitigated", self.bars - 1
+            self._add(ob)
+            self._add(Zone(next(self._ids), "liq_high", highs[c] - w, highs[c] + w,
+                           self._times[c], float(highs[c]), strength, created))
+        if lows[c] <= min(win_l):
+            o, cl = self._open[j], self._close[j]
+            ob = Zone(next(self._ids), "ob_bull", float(lows[j]), float(max(o, cl)),
+                      self._times[j], float(lows[c]), strength, created)
+            if min(after_c) < ob.bottom:
+                ob.status = "invalidated"
+            elif min(after_l) <= ob.top:
+                ob.status, ob.mitigated_bar = "mitigated", self.bars - 1
+            self._add(ob)
+            self._add(Zone(next(self._ids), "liq_low", lows[c] - w, lows[c] + w,
+                           self._times[c], float(lows[c]), strength, created))
+
+    def _add(self, zone: Zone) -> None:
+        if zone.is_open:
+            self._insert(zone)
+        else:
+            zone.closed_bar = self.bars - 1
+            self.closed.append(zone)
+
+    def update(self, open_: float, high: float, low: float, close: float, bar_time: Any = None) -> None:
+        """Consomme une bougie clôturée : mitigation des zones existantes puis détection de pivot."""
+        open_, high, low, close = float(open_), float(high), float(low), float(close)
+        self._update_atr(high, low)
+        self._mitigate(high, low, close)
+        self._open.append(open_)
+        self._high.append(high)
+        self._low.append(low)
+        self._close.append(close)
+        self._times.append(bar_time)
+        self.bars += 1
+        self._detect()
+        self.last_close = close
+        self.updated_at = time.time()
+
+    def sync_frame(self, df: Any, closed_only: bool = True) -> int:
+        """Consomme les bougies de `df` plus récentes que la dernière vue ; renvoie leur nombre."""
+        if df is None or len(df) == 0:
+            return 0
+        times = _bar_times(df)
+        stop = len(times) - 1 if closed_only else len(times)
+        start = 0 if self.last_time is None else int(np.searchsorted(times[:stop], self.last_time, side="right"))
+        if start >= stop:
+            return 0
+        o = df["open"].to_numpy(dtype=float)
+        h = df["high"].to_numpy(dtype=float)
+        l = df["low"].to_numpy(dtype=float)
+        c = df["close"].to_numpy(dtype=float)
+        labels = list(_bar_column(df))
+        for i in range(start, stop):
+            self.update(o[i], h[i], l[i], c[i], labels[i])
+        self.last_time = float(times[stop - 1])
+        return stop - start
+
+    # -- requêtes ----------------------------------------------------------
+    def zones(self, kinds: Optional[Iterable[str]] = None, include_mitigated: bool = True) -> List[Zone]:
+        kinds = set(kinds) if kinds else None
+        return [
+            z for z in self._zones
+            if (kinds is None or z.kind in kinds) and (include_mitigated or z.status == "active")
+        ]
+
+    def near(
+        self,
+        price: float,
+        atr_mult: float = 1.0,
+        atr: Optional[float] = None,
+        kinds: Optional[Iterable[str]] = None,
+        include_mitigated: bool = True,
+    ) -> List[Zone]:
+        """Zones ouvertes à moins de atr_mult × ATR du prix, triées par distance."""
+        dist = float(atr_mult) * float(atr or self.atr or 0.0)
+        kinds = set(kinds) if kinds else None
+        hits = [
+            self._zones[i] for i in self._overlapping(price - dist, price + dist)
+            if (kinds is None or self._zones[i].kind in kinds)
+            and (include_mitigated or self._zones[i].status == "active")
+        ]
+        hits.sort(key=lambda z: z.distance(price))
+        return hits
+
+    def latest(self, kind: str) -> Optional[Zone]:
+        """Zone ouverte la plus récente d'un type."""
+        best = None
+        for z in self._zones:
+            if z.kind == kind and (best is None or z.created_bar > best.created_bar):
+                best = z
+        return best
+
+    def stats(self) -> Dict[str, Any]:
+        by_kind: Dict[str, int] = {}
+        for z in self._zones:
+            by_kind[z.kind] = by_kind.get(z.kind, 0) + 1
+        return {
+            "bars": self.bars,
+            "open_zones": len(self._zones),
+            "by_kind": by_kind,
+            "closed_zones": len(self.closed),
+            "atr": self.atr,
+            "updated_at": self.updated_at,
+        }
+
+
+class ZoneRegistry:
+    """Un ZoneIndex par (symbole, timeframe), partagé par les endpoints et le moteur de re-entry."""
+
+    def __init__(self, lookback: int = 10):
+        self.lookback = int(lookback)
+        self._indexes: Dict[Tuple[str, str], ZoneIndex] = {}
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, symbol: str, timeframe: str) -> Tuple[ZoneIndex, threading.Lock]:
+        key = (str(symbol), str(timeframe).upper())
+        with self._lock:
+            idx = self._indexes.get(key)
+            if idx is None:
+                idx = self._indexes[key] = ZoneIndex(self.lookback)
+                self._locks[key] = threading.Lock()
+            return idx, self._locks[key]
+
+    def get(self, symbol: str, timeframe: str) -> Optional[ZoneIndex]:
+        return self._indexes.get((str(symbol), str(timeframe).upper()))
+
+    def sync_frame(self, symbol: str, timeframe: str, df: Any, closed_only: bool = True) -> ZoneIndex:
+        idx, lock = self._entry(symbol, timeframe)
+        with lock:
+            idx.sync_frame(df, closed_only=closed_only)
+        return idx
+
+    def near(self, symbol: str, timeframe: str, price: float, atr_mult: float = 1.0, **kwargs: Any) -> List[Zone]:
+        idx = self.get(symbol, timeframe)
+        if idx is None:
+            return []
+        _, lock = self._entry(symbol, timeframe)
+        with lock:
+            return idx.near(price, atr_mult, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        return {f"{s}:{tf}": idx.stats() for (s, tf), idx in list(self._indexes.items())}
+
+
+zone_registry = ZoneRegistry()
@@ -23,9 +23,11 @@ import sys
 import argparse
 import traceback
 import contextlib
+import copy
+import threading
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Optional, List, Dict, Any, Tuple, Set, Union
+from typing import Optional, List, Dict, Any, Tuple, Set, Union, Callable
 from dotenv import load_dotenv
 
 from uuid import uuid4
@@ -40,6 +42,7 @@ from symbol_mapper import (
     is_boom,
     is_crash,
     normalize_report_symbol,
+    symbol_registry,
 )
 from fastapi.exceptions import RequestValidationError
 from starlette.requests import Request as StarletteRequest
@@ -258,6 +261,173 @@ except ImportError:
     apply_path_to_gom_record = None  # type: ignore
     infer_tv_setup_from_gom = None  # type: ignore
 
+# Pipeline de features colonnaire (schéma versionné, partagé entraînement / inférence)
+try:
+    from ml_feature_engineering import (
+        compute_ohlcv_features,
+        OHLCV_FEATURE_SCHEMA_VERSION,
+    )
+    FEATURE_PIPELINE_AVAILABLE = True
+except ImportError:
+    FEATURE_PIPELINE_AVAILABLE = False
+    compute_ohlcv_features = None  # type: ignore
+    OHLCV_FEATURE_SCHEMA_VERSION = ""
+
+# Registre de modèles versionnés mappés en mémoire (partagés entre workers uvicorn)
+try:
+    from ml.model_registry import LazyModelStore, ModelRegistry
+    MODEL_REGISTRY_AVAILABLE = True
+except ImportError:
+    MODEL_REGISTRY_AVAILABLE = False
+    LazyModelStore = ModelRegistry = None  # type: ignore
+
+# Moteur de spikes streaming (ticks Deriv + EA, état O(1) par symbole)
+try:
+    from spike_stream_engine import DEFAULT_DERIV_SYMBOLS, get_spike_engine
+    SPIKE_STREAM_AVAILABLE = True
+except ImportError:
+    SPIKE_STREAM_AVAILABLE = False
+    DEFAULT_DERIV_SYMBOLS = ()  # type: ignore
+    get_spike_engine = None  # type: ignore
+
+# Contexte de features partagé par (symbole, clôture de bougie) pour la chaîne GOM
+try:
+    from ml.feature_context import get_feature_context, get_feature_registry
+    FEATURE_CONTEXT_AVAILABLE = True
+except ImportError:
+    FEATURE_CONTEXT_AVAILABLE = False
+    get_feature_context = get_feature_registry = None  # type: ignore
+
+# Forecast cognition 200 bougies (chemins NumPy, mémoire de patterns en cache mtime)
+try:
+    from ml.cognition_forecast import forecast_200, forecast_200_batch, to_mt5_payload
+    COGNITION_FORECAST_AVAILABLE = True
+except ImportError:
+    COGNITION_FORECAST_AVAILABLE = False
+    forecast_200 = forecast_200_batch = to_mt5_payload = None  # type: ignore
+
+# Ensemble Monte Carlo pour /robot/predict_ohlc (bandes q10/q50/q90, cache par dernière bougie)
+try:
+    from ml.ensemble_forecast import ensemble_forecaster
+    ENSEMBLE_FORECAST_AVAILABLE = True
+except ImportError:
+    ENSEMBLE_FORECAST_AVAILABLE = False
+    ensemble_forecaster = None  # type: ignore
+
+# Noyau swing/pivots vectorisé (figures chartistes, fractals, structure, escalier)
+try:
+    from swing_kernel import fractals as kernel_fractals, pivot_points, swing_structure, trailing_max
+    SWING_KERNEL_AVAILABLE = True
+except ImportError:
+    SWING_KERNEL_AVAILABLE = False
+
+# Index persistant order blocks / zones de liquidité (maj à la clôture des bougies)
+try:
+    from zone_index import LIQ_KINDS, OB_KINDS, zone_registry
+    ZONE_INDEX_AVAILABLE = True
+except ImportError:
+    ZONE_INDEX_AVAILABLE = False
+    zone_registry = None  # type: ignore
+
+# Profils de volume / market profile incrémentaux (histogrammes par session en cache)
+try:
+    from volume_profile import profile_registry
+    VOLUME_PROFILE_AVAILABLE = True
+except ImportError:
+    VOLUME_PROFILE_AVAILABLE = False
+    profile_registry = None  # type: ignore
+
+# Volatilité GARCH(1,1)/EWMA récursive (maj à chaque bougie, ré-estimation en tâche de fond)
+try:
+    from volatility_engine import volatility_engine
+    VOLATILITY_ENGINE_AVAILABLE = True
+except ImportError:
+    VOLATILITY_ENGINE_AVAILABLE = False
+    volatility_engine = None  # type: ignore
+
+# Journal structuré JSON-lines indexé (tail / requêtes par seek)
+try:
+    from log_index import LogIndexReader, attach_structured_log, tail_lines
+    LOG_INDEX_AVAILABLE = True
+except ImportError:
+    LOG_INDEX_AVAILABLE = False
+    LogIndexReader = attach_structured_log = tail_lines = None  # type: ignore
+
+# Ingestion batch idempotente des deals MT5 (dédup mt5_deal_id + horaires vectorisés)
+try:
+    from deal_ingestion import build_feedback_rows, chunked, get_deal_index, public_row
+    DEAL_INGESTION_AVAILABLE = True
+except ImportError:
+    DEAL_INGESTION_AVAILABLE = False
+    build_feedback_rows = chunked = get_deal_index = public_row = None  # type: ignore
+
+# Métriques in-process (latences par route/étape, caches, lag event loop → /metrics)
+try:
+    from server_metrics import RouteResolver, get_metrics, timed_stage
+    SERVER_METRICS_AVAILABLE = True
+except ImportError:
+    SERVER_METRICS_AVAILABLE = False
+    RouteResolver = get_metrics = None  # type: ignore
+
+    def timed_stage(name: str):  # type: ignore
+        return lambda fn: fn
+
+# Profiler échantillonneur + traçage par symbole (admin, inactif par défaut)
+try:
+    from live_profiler import get_profiler, get_tracer, start_profiler, traced
+    LIVE_PROFILER_AVAILABLE = True
+except ImportError:
+    LIVE_PROFILER_AVAILABLE = False
+    get_profiler = get_tracer = start_profiler = None  # type: ignore
+
+    def traced(name: Optional[str] = None, tracer: Any = None):  # type: ignore
+        return lambda fn: fn
+
+# État partagé entre workers uvicorn (AI_STATE_BACKEND=memory|sqlite) + élection du leader
+try:
+    from state_backend import LeaderLease, SharedDeque, SharedFrameCache, get_state_backend
+    STATE_BACKEND_AVAILABLE = True
+except ImportError:
+    STATE_BACKEND_AVAILABLE = False
+    LeaderLease = SharedDeque = SharedFrameCache = get_state_backend = None  # type: ignore
+
+# Vue matérialisée du tableau GOM MTF (cellules recalculées à la clôture de bougie)
+try:
+    from gom_tableau_view import GomTableauView
+    GOM_TABLEAU_VIEW_AVAILABLE = True
+except ImportError:
+    GOM_TABLEAU_VIEW_AVAILABLE = False
+    GomTableauView = None  # type: ignore
+
+# Boucles autonomes (poller GOM, sync, pipeline, recycler) — jobs in-process du scheduler
+try:
+    from autonomous_loops import loops_manager
+    from autonomous_routes import create_autonomous_router
+    AUTONOMOUS_LOOPS_AVAILABLE = True
+except ImportError:
+    AUTONOMOUS_LOOPS_AVAILABLE = False
+    loops_manager = create_autonomous_router = None  # type: ignore
+
+_state_backend = get_state_backend() if STATE_BACKEND_AVAILABLE else None
+_SHARED_STATE = _state_backend is not None and _state_backend.shared
+
+
+def _shared_store(ns: str):
+    """Store dict-like d'un namespace (partagé entre workers en mode sqlite, dict local sinon)."""
+    return _state_backend.store(ns) if _state_backend is not None else {}
+
+
+async def _state_write(fn: Callable[..., Any], *args: Any) -> Any:
+    """Écriture dans un store partagé depuis un handler async.
+
+    En mode sqlite l'écriture prend BEGIN IMMEDIATE et peut attendre busy_timeout qu'un autre
+    worker libère la base : elle part dans un thread pour ne pas geler la boucle. Les lectures
+    (WAL, jamais bloquées par un écrivain) et les stores en mémoire restent inline.
+    """
+    if _SHARED_STATE:
+        return await asyncio.to_thread(fn, *args)
+    return fn(*args)
+
 # Sur Render / Supabase, utiliser /tmp pour les modèles (accessible en écriture)
 if os.getenv("RENDER") or os.getenv("RENDER_SERVICE_ID") or os.getenv("SUPABASE_URL"):
     os.environ.setdefault("MODELS_DIR", "/tmp/models")
@@ -383,7 +553,16 @@ except ImportError as e:
     ML_AVAILABLE = False
     logger.warning(f"⚠️ Système ML non disponible: {e}")
 
+# Service d'entraînement incrémental (cache local trade_feedback + artefacts versionnés)
+try:
+    from ml.incremental_training import get_training_service
+    INCREMENTAL_TRAINING_AVAILABLE = True
+except ImportError:
+    INCREMENTAL_TRAINING_AVAILABLE = False
+    get_training_service = None  # type: ignore
+
 # Fonction pour améliorer les décisions avec ML (Random Forest, ml_enhancer, etc.)
+@traced()
 def enhance_decision_with_ml(symbol: str, decision: str, confidence: float, market_data: dict = None) -> dict:
     """Améliorer une décision avec les modèles ML (Random Forest d'abord, puis ml_enhancer)"""
     base = {
@@ -488,6 +667,8 @@ def decision_simplified_cache_key(request: "DecisionRequest") -> str:
     return f"{sym}|{tf}"
 
 
+@traced()
+@timed_stage("cache_lookup")
 def get_simplified_tf_cached_decision(request: "DecisionRequest") -> Optional["DecisionResponse"]:
     if not _env_bool("ENABLE_SIMPLIFIED_DECISION_CACHE", True):
         return None
@@ -496,8 +677,10 @@ def get_simplified_tf_cached_decision(request: "DecisionRequest") -> Optional["D
     if ts <= 0 or (time.time() - ts) >= float(CACHE_DURATION):
         simplified_tf_cache.pop(ck, None)
         simplified_tf_cache_ts.pop(ck, None)
+        _metric_cache("decision_simplified", False)
         return None
     payload = simplified_tf_cache.get(ck)
+    _metric_cache("decision_simplified", bool(payload))
     if not payload:
         return None
     try:
@@ -797,6 +980,7 @@ def apply_confidence_thresholds(action: str, confidence: float, reason: str) ->
 
     return action, confidence, reason
 
+@timed_stage("cache_lookup")
 def get_cached_decision(symbol: str) -> Optional[Dict]:
     """Vérifie le cache pour une décision récente."""
     current_time = time.time()
@@ -804,11 +988,13 @@ def get_cached_decision(symbol: str) -> Optional[Dict]:
         cache_age = current_time - cache_timestamps.get(symbol, 0)
         if cache_age < CACHE_DURATION:
             logger.debug(f"✅ Cache trouvé pour {symbol} (âge: {cache_age:.1f}s)")
+            _metric_cache("decision", True)
             return decision_cache[symbol]
         else:
             # Cache expiré, supprimer
             del decision_cache[symbol]
             del cache_timestamps[symbol]
+    _metric_cache("decision", False)
     return None
 
 def cache_decision(symbol: str, decision_data: Dict):
@@ -817,6 +1003,7 @@ def cache_decision(symbol: str, decision_data: Dict):
     cache_timestamps[symbol] = time.time()
     logger.debug(f"💾 Décision mise en cache pour {symbol}")
 
+@traced()
 def calculate_boom_crash_metadata(df: pd.DataFrame, symbol: str, request) -> Dict:
     """
     Calcule les métadonnées spécifiques pour Boom/Crash.
@@ -975,21 +1162,7 @@ _history_cache: Dict[str, pd.DataFrame] = {}
 # =========================
 def is_boom_crash_symbol(symbol: str) -> bool:
     """Vérifie si le symbole est un indice Boom ou Crash (Deriv + Weltrade PainX/GainX)."""
-    s_raw = str(symbol).lower()
-    s = s_raw.replace(" ", "").replace("_", "")
-    if "painx" in s_raw or "gainx" in s_raw:
-        return True
-    boom = "boom" in s_raw
-    crash = "crash" in s_raw
-    if not boom and not crash:
-        return False
-    if "index" in s_raw:
-        return True
-    if boom and re.search(r"boom\d", s):
-        return True
-    if crash and re.search(r"crash\d", s):
-        return True
-    return False
+    return symbol_registry.resolve(symbol).is_boom_crash
 
 
 # ── Boom/Crash heures UTC (bc_heure) ─────────────────────────────────────
@@ -1046,10 +1219,10 @@ _WELTRADE_TRADING_WINDOWS: Dict[str, List[Tuple[int, int]]] = {
 
 def is_weltrade_synthetic_symbol(symbol: str) -> bool:
     """Retourne True si le symbole est un synthétique Weltrade (PainX, GainX, FX Vol)."""
-    s = str(symbol).upper().replace(" ", "").replace("_", "")
-    return s.startswith("PAINX") or s.startswith("GAINX") or s.startswith("FXVOL")
+    return symbol_registry.resolve(symbol).is_weltrade
 
 
+@traced()
 def _check_weltrade_hour_gate(symbol: str) -> Tuple[bool, Optional[str]]:
     """Gate horaire Weltrade — bloque les trades hors fenêtre active (00h-16h UTC).
 
@@ -1072,6 +1245,7 @@ def _check_weltrade_hour_gate(symbol: str) -> Tuple[bool, Optional[str]]:
     return True, None
 
 
+@traced()
 def _check_bc_hour_gate(symbol: str, min_conf: float = 60.0) -> Tuple[bool, Optional[str], Dict[str, Any]]:
     """Gate Boom/Crash — plage horaire UTC propice (bc_heure + learnings)."""
     if not is_boom_crash_symbol(str(symbol)):
@@ -1102,7 +1276,7 @@ def _bc_learn_from_deals(rows: List[Dict[str, Any]]) -> int:
     if not rows:
         return 0
     try:
-        from bc_heure.bc_volatility_service import load_learnings, record_trade_outcome
+        from bc_heure.bc_volatility_service import load_learnings, record_trade_outcome, save_learnings
 
         learnings = load_learnings()
         n = 0
@@ -1113,13 +1287,17 @@ def _bc_learn_from_deals(rows: List[Dict[str, Any]]) -> int:
             if record_trade_outcome(
                 sym,
                 float(row.get("profit") or 0.0),
+                hour_utc=row.get("_hour_utc"),
                 is_win=row.get("is_win"),
                 open_time=row.get("open_time"),
                 close_time=row.get("close_time"),
                 learnings=learnings,
+                duration_sec=row.get("_duration_sec"),
+                save=False,
             ):
                 n += 1
         if n:
+            save_learnings(learnings)
             _invalidate_bc_volatility_cache()
         return n
     except Exception as exc:
@@ -1137,6 +1315,25 @@ def _dir_str_to_int(s: str) -> int:
     return 0
 
 
+@timed_stage("mt5_fetch")
+def _fetch_candles_for_feature_ctx(symbol: str, tf: str, count: int):
+    from mt5_candles_fetcher import fetch_mt5_candles
+
+    return fetch_mt5_candles(symbol, tf, count)
+
+
+def _gom_feature_context(symbol: str):
+    """Contexte de features partagé (RSI/ATR/patterns/forecast) pour les bougies courantes du symbole."""
+    if not FEATURE_CONTEXT_AVAILABLE:
+        return None
+    try:
+        sym = _resolve_symbol(str(symbol))
+        return get_feature_context(sym, _mt5_candles_cache.get(sym) or {}, fetcher=_fetch_candles_for_feature_ctx)
+    except Exception as exc:
+        logger.debug(f"[FEATURE-CTX] indisponible pour {symbol}: {exc}")
+        return None
+
+
 def _enrich_ia_status(out: dict) -> None:
     """
     Calcule ia_status_action (BUY/SELL/HOLD) et ia_status_confidence_pct depuis
@@ -1162,6 +1359,8 @@ def _enrich_ia_status(out: dict) -> None:
         out["ia_status_confidence_pct"] = 0.0
 
 
+@traced()
+@timed_stage("enrichment")
 def _enrich_bc_volatility(out: dict, symbol: str) -> None:
     """Ajoute bc_* au payload GOM pour l'EA (filtre horaire Boom/Crash)."""
     if not is_boom_crash_symbol(str(symbol)):
@@ -1179,7 +1378,9 @@ def _enrich_bc_volatility(out: dict, symbol: str) -> None:
         out["bc_tradeable"] = True
 
 
-def _enrich_correction_cycle(out: dict, symbol: str) -> None:
+@traced()
+@timed_stage("enrichment")
+def _enrich_correction_cycle(out: dict, symbol: str, ctx: Any = None) -> None:
     """Correction cycle orienté SCALP : confiance dominée M1/M5, contexte multi-TF."""
     sym_u = str(symbol).upper()
     is_bc = is_boom_crash_symbol(str(symbol))
@@ -1195,7 +1396,9 @@ def _enrich_correction_cycle(out: dict, symbol: str) -> None:
         from correction_cycle_detector import compute_correction_exhaustion
 
         sym = _resolve_symbol(str(symbol))
-        sym_cache = _mt5_candles_cache.get(sym) or {}
+        if ctx is None:
+            ctx = _gom_feature_context(sym)
+        sym_cache = ctx.frames if ctx is not None else (_mt5_candles_cache.get(sym) or {})
 
         df_m1 = sym_cache.get("M1")
         df_m5 = sym_cache.get("M5")
@@ -1231,6 +1434,7 @@ def _enrich_correction_cycle(out: dict, symbol: str) -> None:
             rsi_m15=rsi_m15,
             rsi_m30=rsi_m30,
             direction_hint=direction_hint,
+            feature_ctx=ctx,
         )
 
         pct = float(result["correction_exhaustion_pct"])
@@ -1277,22 +1481,28 @@ def _enrich_correction_cycle(out: dict, symbol: str) -> None:
         out["correction_entry_safe"] = not is_bc
 
 
-def _enrich_cognition_forecast(out: dict, symbol: str, chart_tf: str = "M1") -> None:
+@traced()
+@timed_stage("enrichment")
+def _enrich_cognition_forecast(out: dict, symbol: str, chart_tf: str = "M1", ctx: Any = None) -> None:
     """Direction, force, 200 bougies fantômes pour l'EA."""
+    if not COGNITION_FORECAST_AVAILABLE:
+        return
     try:
-        sys.path.insert(0, str(Path(__file__).resolve().parent / "python"))
-        from ml.cognition_forecast import forecast_200, to_mt5_payload
-
         sym = _resolve_symbol(str(symbol))
         tf = (chart_tf or "M1").upper()
-        df = None
-        sym_cache = _mt5_candles_cache.get(sym) or {}
-        if tf in sym_cache and sym_cache[tf] is not None and len(sym_cache[tf]) >= 50:
-            df = sym_cache[tf]
-        if df is None or len(df) < 50:
-            from mt5_candles_fetcher import fetch_mt5_candles
-
-            df = fetch_mt5_candles(sym, tf, 250)
+        if ctx is None:
+            ctx = _gom_feature_context(sym)
+        if ctx is not None:
+            df = ctx.frame(tf, min_len=50, fetch_count=250)
+        else:
+            df = None
+            sym_cache = _mt5_candles_cache.get(sym) or {}
+            if tf in sym_cache and sym_cache[tf] is not None and len(sym_cache[tf]) >= 50:
+                df = sym_cache[tf]
+            if df is None or len(df) < 50:
+                from mt5_candles_fetcher import fetch_mt5_candles
+
+                df = fetch_mt5_candles(sym, tf, 250)
         if df is None or len(df) < 10:
             return
 
@@ -1301,8 +1511,16 @@ def _enrich_cognition_forecast(out: dict, symbol: str, chart_tf: str = "M1") ->
             "coherence_pct": out.get("coherence_pct", 0),
         }
         bc_conf = float(out.get("bc_confidence", 0) or 0)
-        fc = forecast_200(df, sym, tf, horizon=200, gom=gom, bc_confidence=bc_conf)
-        payload = to_mt5_payload(fc)
+
+        def _forecast_payload() -> Dict[str, Any]:
+            fc = forecast_200(df, sym, tf, horizon=200, gom=gom, bc_confidence=bc_conf, feature_ctx=ctx)
+            return to_mt5_payload(fc)
+
+        if ctx is not None:
+            key = ("cognition", tf, int(gom["verdict_num"] or 0), float(gom["coherence_pct"] or 0), bc_conf)
+            payload = ctx.memo(key, _forecast_payload)
+        else:
+            payload = _forecast_payload()
         for key in (
             "cog_direction", "cog_strength", "cog_confidence", "cog_regime",
             "cog_atr", "horizon", "pred_path_mid", "pred_path_up", "pred_path_dn",
@@ -1318,24 +1536,9 @@ def _enrich_cognition_forecast(out: dict, symbol: str, chart_tf: str = "M1") ->
 def _cognition_learn_from_deals(rows: List[Dict[str, Any]]) -> int:
     try:
         sys.path.insert(0, str(Path(__file__).resolve().parent / "python"))
-        from ml.pattern_memory import update_pattern_memory_from_deal
+        from ml.pattern_memory import update_pattern_memory_batch
 
-        n = 0
-        for row in rows:
-            sym = row.get("symbol")
-            if not sym:
-                continue
-            profit = float(row.get("profit") or 0)
-            direction = str(row.get("direction") or row.get("decision") or "UNKNOWN")
-            close_time = row.get("close_time")
-            if update_pattern_memory_from_deal(
-                str(sym),
-                profit,
-                close_time=close_time,
-                direction=direction,
-            ):
-                n += 1
-        return n
+        return update_pattern_memory_batch(rows) if rows else 0
     except Exception as exc:
         logger.warning(f"[COGNITION] learn from deals failed: {exc}")
         return 0
@@ -1390,7 +1593,8 @@ def _compute_entry_probability(out: dict, direction: str = "") -> float:
     return float(max(0.0, min(100.0, score)))
 
 
-def _check_probability_gate(symbol: str, direction: str, chart_tf: str = "M1") -> Tuple[bool, str]:
+@traced()
+def _check_probability_gate(symbol: str, direction: str, chart_tf: str = "M1", ctx: Any = None) -> Tuple[bool, str]:
     """Bloque entrées hazard — GOOD/PERFECT + cognition + BC + score composite."""
     try:
         sym = _resolve_symbol(str(symbol))
@@ -1399,7 +1603,7 @@ def _check_probability_gate(symbol: str, direction: str, chart_tf: str = "M1") -
         if store:
             out.update(store)
         _enrich_bc_volatility(out, sym)
-        _enrich_cognition_forecast(out, sym, chart_tf)
+        _enrich_cognition_forecast(out, sym, chart_tf, ctx=ctx)
 
         vn = int(out.get("verdict_num", 0) or 0)
         if vn == 0:
@@ -1438,7 +1642,8 @@ def _check_probability_gate(symbol: str, direction: str, chart_tf: str = "M1") -
         return True, ""
 
 
-def _check_cognition_gate(symbol: str, direction: str, chart_tf: str = "M1") -> Tuple[bool, str]:
+@traced()
+def _check_cognition_gate(symbol: str, direction: str, chart_tf: str = "M1", ctx: Any = None) -> Tuple[bool, str]:
     """Bloque si forecast cognition faible ou opposé à la direction."""
     try:
         sym = _resolve_symbol(str(symbol))
@@ -1447,7 +1652,7 @@ def _check_cognition_gate(symbol: str, direction: str, chart_tf: str = "M1") ->
         if store:
             out.update(store)
         _enrich_bc_volatility(out, sym)
-        _enrich_cognition_forecast(out, sym, chart_tf)
+        _enrich_cognition_forecast(out, sym, chart_tf, ctx=ctx)
 
         strength = float(out.get("cog_strength", 0) or 0)
         confidence = float(out.get("cog_confidence", 0) or 0)
@@ -1491,31 +1696,7 @@ def enforce_ea_boom_crash_direction(symbol: str, action: str, confidence: float,
 
 def is_deriv_synthetic_symbol(symbol: str) -> bool:
     """Indices synthétiques Deriv (Boom/Crash, Volatility, Step, Jump, Range, 1HZ, etc.)."""
-    if not symbol:
-        return False
-    s_raw = str(symbol).lower()
-    s = s_raw.replace(" ", "").replace("_", "")
-    if is_boom_crash_symbol(symbol):
-        return True
-    markers = (
-        "volatility",
-        "step",
-        "jump",
-        "range",
-        "dex",
-        "1hz",
-        "boom",
-        "crash",
-        "gain",
-        "pain",
-        "painx",
-        "gainx",
-    )
-    if any(m in s_raw for m in markers):
-        return True
-    if s.startswith("r_") or s.startswith("1hz"):
-        return True
-    return False
+    return bool(symbol) and symbol_registry.resolve(symbol).is_synthetic
 
 
 def apply_divergence_strategy_to_decision(
@@ -1712,6 +1893,7 @@ async def _stair_fetch_quality_rows(symbol: str, direction: str) -> List[Dict[st
         return []
 
 
+@traced()
 async def _stair_empirical_win_rate(symbol: str, direction: str, pattern_kinds: Optional[str]) -> Tuple[Optional[float], int]:
     rows = await _stair_fetch_quality_rows(symbol, direction)
     row = _stair_pick_summary_row(rows, pattern_kinds)
@@ -1734,6 +1916,7 @@ def _stair_confidence_delta(win_rate: Optional[float], closed_n: int) -> float:
     return max(-0.09, min(0.09, edge * 0.35))
 
 
+@traced()
 async def apply_stair_history_to_decision(
     symbol: str,
     action: str,
@@ -2966,6 +3149,9 @@ AI_SYMBOL_STATS_INTERVAL_SEC = int(os.getenv("AI_SYMBOL_STATS_INTERVAL_SEC", "36
 AI_ENABLE_SUPABASE_CONTINUOUS_TRAINER = _env_bool("AI_ENABLE_SUPABASE_CONTINUOUS_TRAINER", default=_supabase_trainer_default)
 _continuous_learning_loop_default = (not RUNNING_ON_RENDER) and (not AI_LOW_POWER_MODE)
 AI_ENABLE_CONTINUOUS_LEARNING_LOOP = _env_bool("AI_ENABLE_CONTINUOUS_LEARNING_LOOP", default=_continuous_learning_loop_default)
+AI_ENABLE_AUTONOMOUS_LOOPS = _env_bool("AI_ENABLE_AUTONOMOUS_LOOPS", default=False)
+AI_VOLATILITY_REFIT_INTERVAL_SEC = int(os.getenv("AI_VOLATILITY_REFIT_INTERVAL_SEC", "3600" if RUNNING_ON_RENDER else "900"))
+AI_VOLATILITY_TIMEFRAME = os.getenv("AI_VOLATILITY_TIMEFRAME", "M5").upper()
 AI_CONTINUOUS_LEARNING_INTERVAL_SEC = int(os.getenv("AI_CONTINUOUS_LEARNING_INTERVAL_SEC", "21600" if RUNNING_ON_RENDER else "10800"))
 AI_CONTINUOUS_DEFAULT_INTERVAL_SEC = int(os.getenv("AI_CONTINUOUS_DEFAULT_INTERVAL_SEC", "3600" if RUNNING_ON_RENDER else "600"))
 AI_CONTINUOUS_MIN_INTERVAL_SEC = int(os.getenv("AI_CONTINUOUS_MIN_INTERVAL_SEC", "1800" if RUNNING_ON_RENDER else "300"))
@@ -3018,6 +3204,7 @@ def _normalize_tradingagents_symbol_list(symbols: List[str]) -> List[str]:
     return out
 
 
+@traced()
 async def _peek_manual_tradingagents_report(symbol: str) -> Optional[Dict[str, Any]]:
     """Rapport issu du CLI (POST /tradingagents/manual-report) encore dans la fenêtre TTL."""
     sym = (symbol or "").strip().upper()
@@ -3175,6 +3362,7 @@ def _dig_tradingagents_order_hints(row: Dict[str, Any]) -> Dict[str, Any]:
     return hints
 
 
+@traced()
 async def _collect_tradingagents_execution_hints(symbol: str) -> Dict[str, Any]:
     """
     Fusionne cache boucle RT + rapport manuel pour des consignes d'exécution MT5.
@@ -3560,6 +3748,24 @@ logging.basicConfig(
 )
 logger = logging.getLogger("tradbot_ai")
 
+# Journal structuré (JSON-lines + index offsets temps/événement) pour /logs/query et le monitoring
+# Désactivé par défaut ; écrit hors boucle d'événements (QueueListener), un fichier par worker
+STRUCTURED_LOG_FILE = Path(os.getenv("AI_STRUCTURED_LOG_FILE", "logs/ai_server.jsonl"))
+try:
+    if int(os.getenv("AI_WORKERS", "1") or 1) > 1:
+        STRUCTURED_LOG_FILE = STRUCTURED_LOG_FILE.with_name(
+            f"{STRUCTURED_LOG_FILE.stem}.{os.getpid()}{STRUCTURED_LOG_FILE.suffix}"
+        )
+except ValueError:
+    pass
+structured_log_reader = None
+if LOG_INDEX_AVAILABLE and _env_bool("AI_STRUCTURED_LOG", default=False):
+    try:
+        attach_structured_log(STRUCTURED_LOG_FILE, max_bytes=50 * 1024 * 1024, backup_count=5, queued=True)
+        structured_log_reader = LogIndexReader(STRUCTURED_LOG_FILE, backup_count=5)
+    except Exception as _slog_err:
+        logger.warning(f"⚠️ Journal structuré indisponible: {_slog_err}")
+
 # Machine Learning imports (Phase 2)
 try:
     from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
@@ -3955,6 +4161,19 @@ try:
 except Exception as _arouter_err:
     logger.warning("⚠️ Agent router non disponible: %s", _arouter_err)
 
+def _autonomous_admin(request: Request) -> None:
+    _require_admin(request)  # défini plus bas, résolu à la requête
+
+
+if AUTONOMOUS_LOOPS_AVAILABLE:
+    # Démarrage / exécution : admin uniquement, et seulement sur le worker qui détient le bail
+    app.include_router(create_autonomous_router(
+        loops_manager,
+        admin_dependency=_autonomous_admin,
+        is_leader=lambda: _leader_lease is None or _leader_lease.is_leader,
+    ))
+    logger.info("✅ Autonomous router enregistré (/autonomous/*)")
+
 
 @app.exception_handler(RequestValidationError)
 async def _log_validation_errors(request: Request, exc: RequestValidationError):
@@ -4344,6 +4563,31 @@ except Exception as e:
     logger.warning("⚠️ Dashboard web non chargé (optionnel): %s", str(e)[:80])
 
 # Middleware pour logger toutes les requêtes entrantes
+# Enregistrement du trafic EA pour le banc de replay (Python/replay_bench.py)
+AI_RECORD_REQUESTS_FILE = (os.getenv("AI_RECORD_REQUESTS_FILE") or "").strip()
+if AI_RECORD_REQUESTS_FILE:
+    try:
+        from replay_bench import RecordingMiddleware
+        app.add_middleware(RecordingMiddleware, path=AI_RECORD_REQUESTS_FILE)
+        logger.info("🎙️ Enregistrement des requêtes décision → %s", AI_RECORD_REQUESTS_FILE)
+    except ImportError as e:
+        logger.warning("⚠️ replay_bench indisponible, enregistrement désactivé: %s", e)
+
+server_metrics = get_metrics() if SERVER_METRICS_AVAILABLE else None
+_metrics_routes = RouteResolver(app) if SERVER_METRICS_AVAILABLE else None
+
+
+def _metric_cache(cache: str, hit: bool) -> None:
+    """Compte un lookup de cache (hit/miss) pour /metrics."""
+    if server_metrics is not None:
+        server_metrics.cache_hit(cache, hit)
+
+
+def _metric_stage(name: str):
+    """Chronomètre un bloc (`with _metric_stage("parse"):`) ; no-op sans métriques."""
+    return server_metrics.stage(name) if server_metrics is not None else contextlib.nullcontext()
+
+
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     """Log toutes les requêtes entrantes pour debugging"""
@@ -4352,7 +4596,18 @@ async def log_requests(request: Request, call_next):
     # Logger le path et la méthode avec INFO pour être visible dans les logs Render
     logger.info(f"📥 {request.method} {request.url.path}")
     
-    response = await call_next(request)
+    if server_metrics is None:
+        response = await call_next(request)
+    else:
+        route = _metrics_routes.resolve(request.scope)
+        status_code = 500
+        t0 = time.perf_counter()
+        try:
+            with server_metrics.inflight(route):
+                response = await call_next(request)
+            status_code = response.status_code
+        finally:
+            server_metrics.observe_request(route, request.method, status_code, time.perf_counter() - t0)
     
     process_time = time.time() - start_time
     # Logger toutes les réponses avec INFO pour être visible dans les logs Render
@@ -4796,9 +5051,11 @@ CREATE INDEX IF NOT EXISTS idx_trade_feedback_created_at ON trade_feedback(creat
 
 def _load_gom_cache_from_disk():
     """Charge gom_signal.json dans _GOM_VERDICT_STORE au démarrage."""
-    global _GOM_VERDICT_STORE
     try:
         gom_file = Path(__file__).resolve().parent / "data" / "gom_signal.json"
+        if len(_GOM_VERDICT_STORE):
+            logger.info(f"[GOM-Cache] Store partagé déjà chargé ({len(_GOM_VERDICT_STORE)} symboles)")
+            return
         logger.info(f"[GOM-Cache] Cherchant {gom_file}")
         if gom_file.is_file():
             data = json.loads(gom_file.read_text(encoding="utf-8"))
@@ -4815,13 +5072,13 @@ def _load_gom_cache_from_disk():
     except Exception as e:
         logger.error(f"[GOM-Cache] Erreur chargement: {e}", exc_info=True)
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize database on startup"""
-    global _tradingagents_task
+# Bail leader : en multi-workers, un seul worker exécute les boucles de fond
+_leader_lease = LeaderLease(_state_backend) if _SHARED_STATE else None
 
-    # Charger le cache GOM depuis le fichier
-    _load_gom_cache_from_disk()
+
+async def _start_leader_background_tasks():
+    """Boucles de fond (agents, flux spikes, entraînements, stats) — une seule instance par déploiement."""
+    global _tradingagents_task, _symbol_stats_task, _continuous_learning_bg_task, _volatility_refit_task
 
     # Démarrer les 6 agents d'intelligence (boucles de fond seulement — router déjà enregistré)
     try:
@@ -4831,26 +5088,10 @@ async def startup_event():
     except Exception as _agent_err:
         logger.warning("⚠️ Intelligence agents non disponibles: %s", _agent_err)
 
-    # Load pending orders from disk
-    await _pending_orders_load()
-
-    if AI_LOW_POWER_MODE:
-        logger.info("🔋 AI_LOW_POWER_MODE actif: réduction des tâches de fond non essentielles")
+    if spike_engine is not None and AI_ENABLE_DERIV_SPIKE_STREAM and DERIV_SPIKE_STREAM_SYMBOLS:
+        spike_engine.start(DERIV_WS_URL, DERIV_SPIKE_STREAM_SYMBOLS)
+        logger.info("✅ Flux ticks Deriv spikes démarré (%d symboles)", len(DERIV_SPIKE_STREAM_SYMBOLS))
 
-    if not DB_AVAILABLE:
-        logger.info("📊 Mode sans PostgreSQL - feedback loop désactivé")
-    
-    try:
-        pool = await get_db_pool()
-        if pool:
-            async with pool.acquire() as conn:
-                await conn.execute(CREATE_FEEDBACK_TABLE_SQL)
-                logger.info("✅ Table trade_feedback créée/vérifiée")
-                await conn.execute(CREATE_SYMBOL_TRADE_STATS_SQL)
-                logger.info("✅ Table symbol_trade_stats créée/vérifiée")
-    except Exception as e:
-        logger.error(f"❌ Erreur initialisation base de données: {e}", exc_info=True)
-    
     # Entraîner automatiquement les modèles ML au démarrage (optionnel)
     if AI_ENABLE_STARTUP_TRAINING:
         await train_models_on_startup()
@@ -4858,7 +5099,6 @@ async def startup_event():
         logger.info("ℹ️ Startup training ML désactivé (AI_ENABLE_STARTUP_TRAINING=false)")
 
     # Démarrer la boucle de stats symboles (optionnelle)
-    global _symbol_stats_task
     if AI_ENABLE_SYMBOL_STATS_LOOP:
         if _symbol_stats_task is None or _symbol_stats_task.done():
             _symbol_stats_task = asyncio.create_task(_symbol_stats_loop(interval_sec=AI_SYMBOL_STATS_INTERVAL_SEC))
@@ -4866,17 +5106,6 @@ async def startup_event():
     else:
         logger.info("ℹ️ Boucle stats symboles désactivée (AI_ENABLE_SYMBOL_STATS_LOOP=false)")
 
-    if AWS_RDS_AVAILABLE and not _env_bool("USE_SUPABASE", False):
-        try:
-            ping = aws_rds_client.execute_query("SELECT 1 AS ok", ())
-            if ping:
-                logger.info("✅ AWS RDS OK — source ML partagée (Render + local → RDS)")
-        except Exception as e:
-            logger.warning("⚠️ AWS RDS ping échoué au démarrage: %s", str(e)[:120])
-    elif _env_bool("USE_SUPABASE", False):
-        logger.info("ℹ️ USE_SUPABASE=true — métriques via Supabase (pas RDS prioritaire)")
-
-    global _continuous_learning_bg_task
     if AI_ENABLE_CONTINUOUS_LEARNING_LOOP and CONTINUOUS_LEARNING_AVAILABLE and continuous_learner:
         if _continuous_learning_bg_task is None or _continuous_learning_bg_task.done():
             _continuous_learning_bg_task = asyncio.create_task(
@@ -4921,15 +5150,30 @@ async def startup_event():
             "run-once HTTP désactivé par défaut (AI_TRADINGAGENTS_ALLOW_HTTP_RUNS=false) — CLI + POST /tradingagents/manual-report"
         )
 
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Close database pool on shutdown"""
-    global _tradingagents_task
-    if hasattr(app.state, "db_pool") and app.state.db_pool:
-        await app.state.db_pool.close()
-        logger.info("🔒 Pool PostgreSQL fermé")
+    if VOLATILITY_ENGINE_AVAILABLE and (_volatility_refit_task is None or _volatility_refit_task.done()):
+        _volatility_refit_task = asyncio.create_task(_volatility_refit_loop(AI_VOLATILITY_REFIT_INTERVAL_SEC))
+        logger.info("✅ Boucle ré-estimation GARCH démarrée (%ss)", AI_VOLATILITY_REFIT_INTERVAL_SEC)
+
+    # Boucles autonomes en jobs in-process (intervalle + événements new_bar / verdict_change)
+    if AUTONOMOUS_LOOPS_AVAILABLE and AI_ENABLE_AUTONOMOUS_LOOPS:
+        await loops_manager.start_all_loops()
+        logger.info("✅ Boucles autonomes démarrées in-process (%s)", ", ".join(loops_manager.loops))
+
+
+async def _stop_leader_background_tasks():
+    """Arrête les boucles lancées par _start_leader_background_tasks (bail perdu ou arrêt du serveur)."""
+    global _tradingagents_task, _symbol_stats_task, _continuous_learning_bg_task, _volatility_refit_task
+
+    try:
+        from agents.orchestrator import get_orchestrator
+        stop_all = getattr(get_orchestrator(), "stop_all", None)
+        if stop_all is not None:
+            res = stop_all()
+            if asyncio.iscoroutine(res):
+                await res
+    except Exception as _agent_err:
+        logger.debug("Intelligence agents: arrêt ignoré (%s)", _agent_err)
 
-    # Arrêter le système ML
     if ML_TRAINER_AVAILABLE:
         try:
             await ml_trainer.stop()
@@ -4937,11 +5181,108 @@ async def shutdown_event():
         except Exception as e:
             logger.error(f"❌ Erreur arrêt système ML: {e}")
 
-    if _tradingagents_task and not _tradingagents_task.done():
-        _tradingagents_task.cancel()
-        with contextlib.suppress(asyncio.CancelledError):
-            await _tradingagents_task
-        logger.info("🛑 Boucle TradingAgents RT arrêtée")
+    for name in ("_tradingagents_task", "_symbol_stats_task", "_continuous_learning_bg_task", "_volatility_refit_task"):
+        task = globals().get(name)
+        if task is not None and not task.done():
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        globals()[name] = None
+
+    if spike_engine is not None:
+        await spike_engine.stop()
+
+    if AUTONOMOUS_LOOPS_AVAILABLE and loops_manager.running:
+        await loops_manager.stop_all_loops()
+    logger.info("🛑 Boucles de fond leader arrêtées")
+
+
+@app.on_event("startup")
+async def startup_event():
+    """Initialize database on startup"""
+    # Charger le cache GOM depuis le fichier
+    _load_gom_cache_from_disk()
+
+    # Load pending orders from disk
+    await _pending_orders_load()
+
+    if VOLATILITY_ENGINE_AVAILABLE:
+        try:
+            n = volatility_engine.load(VOLATILITY_STATE_FILE)
+            if n:
+                logger.info(f"✅ État volatilité chargé: {n} séries")
+        except Exception as e:
+            logger.warning(f"Erreur chargement état volatilité: {e}")
+
+    if MODEL_REGISTRY_AVAILABLE and isinstance(ml_models, LazyModelStore):
+        # Conversion legacy -> registre hors chemin de requête (verrou fichier entre workers)
+        try:
+            n = await asyncio.to_thread(ml_models.import_legacy)
+            if n:
+                logger.info(f"✅ Registre modèles: {n} modèle(s) legacy importé(s)")
+        except Exception as e:
+            logger.warning(f"Erreur import modèles legacy: {e}")
+
+    if server_metrics is not None:
+        server_metrics.start_loop_monitor()
+        if FEATURE_CONTEXT_AVAILABLE:
+            def _feature_ctx_counts():
+                st = get_feature_registry().stats()
+                return st["feature_hits"], st["feature_misses"]
+            server_metrics.register_cache_source("gom_feature_context", _feature_ctx_counts)
+
+    if AI_LOW_POWER_MODE:
+        logger.info("🔋 AI_LOW_POWER_MODE actif: réduction des tâches de fond non essentielles")
+
+    if not DB_AVAILABLE:
+        logger.info("📊 Mode sans PostgreSQL - feedback loop désactivé")
+    
+    try:
+        pool = await get_db_pool()
+        if pool:
+            async with pool.acquire() as conn:
+                await conn.execute(CREATE_FEEDBACK_TABLE_SQL)
+                logger.info("✅ Table trade_feedback créée/vérifiée")
+                await conn.execute(CREATE_SYMBOL_TRADE_STATS_SQL)
+                logger.info("✅ Table symbol_trade_stats créée/vérifiée")
+    except Exception as e:
+        logger.error(f"❌ Erreur initialisation base de données: {e}", exc_info=True)
+
+    if AWS_RDS_AVAILABLE and not _env_bool("USE_SUPABASE", False):
+        try:
+            ping = aws_rds_client.execute_query("SELECT 1 AS ok", ())
+            if ping:
+                logger.info("✅ AWS RDS OK — source ML partagée (Render + local → RDS)")
+        except Exception as e:
+            logger.warning("⚠️ AWS RDS ping échoué au démarrage: %s", str(e)[:120])
+    elif _env_bool("USE_SUPABASE", False):
+        logger.info("ℹ️ USE_SUPABASE=true — métriques via Supabase (pas RDS prioritaire)")
+
+    if _leader_lease is not None:
+        logger.info("🗳️ État partagé %s — boucles de fond sur le worker leader uniquement", _state_backend.kind)
+        _leader_lease.start(_start_leader_background_tasks, _stop_leader_background_tasks)
+    else:
+        await _start_leader_background_tasks()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close database pool on shutdown"""
+    if hasattr(app.state, "db_pool") and app.state.db_pool:
+        await app.state.db_pool.close()
+        logger.info("🔒 Pool PostgreSQL fermé")
+
+    # Boucles de fond (ML, TradingAgents, spikes, boucles autonomes, GARCH)
+    await _stop_leader_background_tasks()
+
+    if server_metrics is not None:
+        await server_metrics.stop_loop_monitor()
+
+    if VOLATILITY_ENGINE_AVAILABLE:
+        with contextlib.suppress(Exception):
+            volatility_engine.save(VOLATILITY_STATE_FILE)
+
+    if _leader_lease is not None:
+        await _leader_lease.stop()
 
 
 async def train_models_on_startup():
@@ -5039,6 +5380,14 @@ async def train_models_background():
     
     logger.info(f"🎯 Entraînement en arrière-plan terminé: {completed_tasks}/{total_training_tasks} modèles entraînés")
 
+    # Modèles adaptatifs feedback : démarrage à chaud depuis les artefacts publiés, delta seulement
+    if INCREMENTAL_TRAINING_AVAILABLE:
+        try:
+            cycle = await asyncio.to_thread(get_training_service().run_cycle, priority_symbols)
+            logger.info(f"🧠 Entraînement incrémental startup: {len(cycle.get('trained', {}))} modèle(s) publiés")
+        except Exception as e:
+            logger.warning(f"⚠️ Entraînement incrémental startup: {e}")
+
 
 # Parser les arguments en ligne de commande
 parser = argparse.ArgumentParser(description='Serveur AI TradBOT')
@@ -5049,6 +5398,12 @@ parser.add_argument(
     default='0.0.0.0',
     help='Adresse IP sur laquelle écouter'
 )
+parser.add_argument(
+    '--workers',
+    type=int,
+    default=int(os.getenv('AI_WORKERS', '1') or 1),
+    help='Nombre de workers uvicorn (>1 : état partagé AI_STATE_BACKEND=sqlite)'
+)
 args = parser.parse_args()
 
 # Variables globales
@@ -5548,21 +5903,7 @@ async def _compute_propice_top_from_trade_feedback(
 
 
 def _normalize_symbol_name(sym: str) -> str:
-    s = (sym or "").strip()
-    if not s:
-        return s
-    su = s.upper().replace(" ", "")
-    aliases = {
-        "BOOM1000": "Boom 1000 Index",
-        "BOOM500": "Boom 500 Index",
-        "CRASH1000": "Crash 1000 Index",
-        "CRASH500": "Crash 500 Index",
-        "CRASH900": "Crash 900 Index",
-        "CRASH600": "Crash 600 Index",
-        "CRASH300": "Crash 300 Index",
-        "BOOM600": "Boom 600 Index",
-    }
-    return aliases.get(su, s)
+    return symbol_registry.resolve(sym).mt5
 
 
 @app.get("/dashboard/top-net-summary")
@@ -5891,7 +6232,7 @@ def get_prediction_confidence_multiplier(symbol: str) -> float:
 # ===== CALIBRATION ADAPTATIVE (réduction décalage prédiction/mouvement réel) =====
 # Stockage persistant de la calibration par symbole (drift, précision, ajustements)
 CALIBRATION_FILE = DATA_DIR / "symbol_calibration.json"
-_symbol_calibration: Dict[str, Dict[str, Any]] = {}
+_symbol_calibration: Dict[str, Dict[str, Any]] = _shared_store("symbol_calibration")
 _calibration_loaded = False
 
 def _ensure_calibration_loaded():
@@ -5899,8 +6240,10 @@ def _ensure_calibration_loaded():
     global _symbol_calibration, _calibration_loaded
     if not _calibration_loaded and CALIBRATION_FILE.exists():
         try:
-            with open(CALIBRATION_FILE, "r", encoding="utf-8") as f:
-                _symbol_calibration.update(json.load(f))
+            # Store partagé déjà alimenté par un autre worker : ne pas l'écraser avec le fichier
+            if not len(_symbol_calibration):
+                with open(CALIBRATION_FILE, "r", encoding="utf-8") as f:
+                    _symbol_calibration.update(json.load(f))
             _calibration_loaded = True
             logger.info(f"✅ Calibration chargée: {len(_symbol_calibration)} symboles")
         except Exception as e:
@@ -5912,7 +6255,7 @@ def _save_calibration():
     try:
         CALIBRATION_FILE.parent.mkdir(parents=True, exist_ok=True)
         with open(CALIBRATION_FILE, "w", encoding="utf-8") as f:
-            json.dump(_symbol_calibration, f, indent=2, ensure_ascii=False)
+            json.dump(dict(_symbol_calibration.items()), f, indent=2, ensure_ascii=False)
     except Exception as e:
         logger.warning(f"Erreur sauvegarde calibration: {e}")
 
@@ -5969,6 +6312,7 @@ def update_calibration_from_feedback(symbol: str, is_win: bool, profit: float, s
     # drift_factor: si win_rate bas, réduire la confiance future
     c["drift_factor"] = max(0.7, min(1.2, 0.8 + win_rate * 0.4))
     c["last_updated"] = datetime.now().isoformat()
+    _symbol_calibration[symbol] = c
     _save_calibration()
 
 # Stockage des dernières prédictions en temps réel
@@ -6170,9 +6514,38 @@ indicators_cache = {}
 
 # ÉTAT TEMPS RÉEL POUR LES SPIKES (Boom/Crash) - inspiré de SpikeSniperDeriv
 _last_tick_price: Dict[str, float] = defaultdict(float)
-_last_spike_info: Dict[str, Dict[str, Any]] = {}
+_last_spike_info: Dict[str, Dict[str, Any]] = _shared_store("spike_info")
 SPIKE_THRESHOLD_POINTS: float = float(os.getenv("SPIKE_THRESHOLD_POINTS", "1.0"))
 SPIKE_RECENT_WINDOW_SECONDS: int = int(os.getenv("SPIKE_RECENT_WINDOW_SECONDS", "5"))
+# Flux ticks Deriv pour le moteur de spikes (désactivé par défaut : connexion WebSocket permanente)
+AI_ENABLE_DERIV_SPIKE_STREAM = _env_bool("AI_ENABLE_DERIV_SPIKE_STREAM", default=False)
+DERIV_SPIKE_STREAM_SYMBOLS: List[str] = [
+    code.strip() for code in os.getenv("DERIV_SPIKE_STREAM_SYMBOLS", ",".join(DEFAULT_DERIV_SYMBOLS)).split(",") if code.strip()
+]
+
+
+def _on_stream_spike(event: Dict[str, Any]) -> None:
+    """Publie un spike du moteur streaming dans l'état legacy lu par /spike/realtime."""
+    sym = event.get("symbol") or ""
+    _last_spike_info[sym] = {
+        "time": datetime.now(timezone.utc),
+        "direction": event.get("direction"),
+        "diff_points": float(event.get("diff_points") or 0.0),
+        "source": event.get("source"),
+    }
+    logger.info(
+        "🚨 Spike temps réel détecté | symbol=%s direction=%s diff=%.5f source=%s",
+        sym,
+        event.get("direction"),
+        float(event.get("diff_points") or 0.0),
+        event.get("source"),
+    )
+
+
+spike_engine = None
+if SPIKE_STREAM_AVAILABLE:
+    spike_engine = get_spike_engine(threshold_points=SPIKE_THRESHOLD_POINTS)
+    spike_engine.add_listener(_on_stream_spike)
 _m5_line_tracking_state: Dict[str, Dict[str, Any]] = {}
 
 
@@ -6341,6 +6714,11 @@ def update_spike_state_from_request(req: "DecisionRequest") -> None:
         if last_price is None or last_price <= 0:
             return
 
+        # Moteur streaming : le spike éventuel est publié via _on_stream_spike
+        if spike_engine is not None:
+            spike_engine.on_tick(sym, last_price, source="ea")
+            return
+
         prev = _last_tick_price[sym]
         _last_tick_price[sym] = last_price
 
@@ -6665,6 +7043,12 @@ class SpikeStatus(BaseModel):
     direction: Optional[str] = None  # "BOOM" ou "CRASH"
     diff_points: float = 0.0
     last_spike_time: Optional[str] = None
+    # Métriques du moteur streaming (None si le symbole n'a pas encore de ticks)
+    imminence_probability: Optional[float] = None
+    ticks_since_spike: Optional[int] = None
+    mean_interval_ticks: Optional[float] = None
+    compression_ratio: Optional[float] = None
+    source: Optional[str] = None
 
 class TrendlineData(BaseModel):
     start: Dict[str, Any]  # {"time": timestamp, "price": float}
@@ -6991,6 +7375,7 @@ def compute_ia_status_v2(request: "DecisionRequest") -> Dict[str, Any]:
     return result
 
 
+@traced()
 def compute_mtf_funnel_decision(request: "DecisionRequest") -> Dict[str, Any]:
     """
     Entonnoir MTF:
@@ -7089,6 +7474,8 @@ def _extract_local_extrema(series: np.ndarray, order: int = 2) -> Tuple[List[int
     n = int(len(series))
     if n < (order * 2 + 3):
         return mins, maxs
+    if SWING_KERNEL_AVAILABLE:
+        return pivot_points(series, order, "low").tolist(), pivot_points(series, order, "high").tolist()
     for i in range(order, n - order):
         w = series[i - order:i + order + 1]
         c = series[i]
@@ -7280,6 +7667,7 @@ def resolve_chart_pattern_signal(request: "DecisionRequest") -> Dict[str, Any]:
 
 # ========== FONCTION SIMPLIFIÉE POUR ROBOCOP v2 ==========
 # Modifier la fonction decision_simplified pour utiliser le ML
+@traced()
 async def decision_simplified(request: DecisionRequest):
     """
     Fonction de décision simplifiée avec amélioration ML
@@ -8115,6 +8503,7 @@ async def decision_simplified(request: DecisionRequest):
     return response
 
 
+@timed_stage("storage")
 async def _push_prediction_to_supabase(
     request: DecisionRequest,
     response: DecisionResponse,
@@ -8208,6 +8597,7 @@ async def _push_prediction_to_supabase(
 
 async def save_decision_to_supabase(request: DecisionRequest, response: DecisionResponse, ml_result: dict):
     """Sauvegarder la décision améliorée dans la base de données (AWS RDS ou Supabase fallback)."""
+    # Pas de @timed_stage ici : _push_prediction_to_supabase alimente déjà « storage »
     await _push_prediction_to_supabase(request, response, ml_result)
 
     # (Important) Par défaut on NE doit PAS écrire un proxy dans `model_metrics` à chaque prédiction,
@@ -8254,7 +8644,8 @@ async def save_decision_to_supabase(request: DecisionRequest, response: Decision
         try:
             import json
             metrics_payload["metadata"] = json.dumps(metrics_payload["metadata"])
-            result_id = aws_rds_client.insert("model_metrics", metrics_payload)
+            with _metric_stage("storage"):
+                result_id = aws_rds_client.insert("model_metrics", metrics_payload)
             if result_id:
                 logger.info(f"✅ model_metrics proxy insérée dans AWS RDS pour {request.symbol} accuracy={accuracy_decimal:.3f}")
             return
@@ -8278,12 +8669,13 @@ async def save_decision_to_supabase(request: DecisionRequest, response: Decision
     try:
         import httpx
         async with httpx.AsyncClient() as client:
-            r_metrics = await client.post(
-                f"{supabase_url}/rest/v1/model_metrics",
-                json=metrics_payload,
-                headers=headers,
-                timeout=10.0,
-            )
+            with _metric_stage("storage"):
+                r_metrics = await client.post(
+                    f"{supabase_url}/rest/v1/model_metrics",
+                    json=metrics_payload,
+                    headers=headers,
+                    timeout=10.0,
+                )
             if r_metrics.status_code not in (200, 201):
                 logger.error(
                     "model_metrics proxy: statut %s body=%s payload=%s",
@@ -8301,6 +8693,8 @@ async def save_decision_to_supabase(request: DecisionRequest, response: Decision
         logger.debug(f"Erreur lors de la sauvegarde proxy model_metrics: {e}")
 
 
+@traced()
+@timed_stage("storage")
 async def fetch_supabase_ml_context(symbol: str, timeframe: str = "M1") -> Dict[str, Any]:
     """
     Requête Supabase: model_metrics, symbol_calibration, trade_feedback pour ce symbole.
@@ -8958,15 +9352,19 @@ def _cache_gom_data(symbol: str, data: Dict[str, Any], chart_tf: str = "M15"):
     }
 
 
+@timed_stage("cache_lookup")
 def _get_cached_gom_data(symbol: str, chart_tf: str = "M15") -> Optional[Dict[str, Any]]:
     """Retourne les données GOM depuis le cache si valides, sinon None"""
     key = f"{symbol}:{chart_tf}"
     if key not in _gom_cache:
+        _metric_cache("gom", False)
         return None
     cached = _gom_cache[key]
     age = time.time() - cached.get("cached_at", 0)
     if age > _gom_cache_ttl:
+        _metric_cache("gom", False)
         return None
+    _metric_cache("gom", True)
     return cached.get("data")
 
 
@@ -9130,7 +9528,29 @@ async def bc_volatility_learn_from_feedback():
         return {"ok": False, "error": str(e)}
 
 
-@app.get("/cognition/forecast-200")
+def _cognition_forecast_inputs(sym: str, tf: str, horizon: int) -> Tuple[Dict[str, Any], Optional[pd.DataFrame]]:
+    """Contexte verdict/bc_heure + bougies (cache upload, sinon MT5) pour un forecast cognition."""
+    out: Dict[str, Any] = {"symbol": sym, "ok": True}
+    store = _GOM_VERDICT_STORE.get(sym.upper(), {})
+    if store:
+        out.update(store)
+    _enrich_bc_volatility(out, sym)
+    df = None
+    sym_cache = _mt5_candles_cache.get(sym) or {}
+    if tf in sym_cache and sym_cache[tf] is not None and len(sym_cache[tf]) >= 50:
+        df = sym_cache[tf]
+    if df is None or len(df) < 50:
+        from mt5_candles_fetcher import fetch_mt5_candles
+
+        df = fetch_mt5_candles(sym, tf, max(250, horizon + 50))
+    return out, df
+
+
+def _cognition_gom_context(out: Dict[str, Any]) -> Dict[str, Any]:
+    return {"verdict_num": out.get("verdict_num", 0), "coherence_pct": out.get("coherence_pct", 0)}
+
+
+@app.get("/cognition/forecast-200")
 async def cognition_forecast_200(
     symbol: str = Query("Crash 500 Index"),
     chart_tf: str = Query("M1"),
@@ -9138,33 +9558,16 @@ async def cognition_forecast_200(
 ):
     """Forecast cognition 200 bougies + direction/strength pour EA ou debug."""
     sym = _resolve_symbol(symbol)
-    out: Dict[str, Any] = {"symbol": sym, "ok": True}
-    store = _GOM_VERDICT_STORE.get(sym.upper(), {})
-    if store:
-        out.update(store)
-    _enrich_bc_volatility(out, sym)
+    if not COGNITION_FORECAST_AVAILABLE:
+        return {"ok": False, "symbol": sym, "error": "cognition_forecast indisponible"}
     try:
-        sys.path.insert(0, str(Path(__file__).resolve().parent / "python"))
-        from ml.cognition_forecast import forecast_200, to_mt5_payload
-
         tf = (chart_tf or "M1").upper()
-        df = None
-        sym_cache = _mt5_candles_cache.get(sym) or {}
-        if tf in sym_cache and sym_cache[tf] is not None and len(sym_cache[tf]) >= 50:
-            df = sym_cache[tf]
-        if df is None or len(df) < 50:
-            from mt5_candles_fetcher import fetch_mt5_candles
-
-            df = fetch_mt5_candles(sym, tf, max(250, horizon + 50))
+        out, df = _cognition_forecast_inputs(sym, tf, horizon)
         if df is None or len(df) < 10:
             return {"ok": False, "error": "candles indisponibles", "symbol": sym}
 
-        gom = {
-            "verdict_num": out.get("verdict_num", 0),
-            "coherence_pct": out.get("coherence_pct", 0),
-        }
         bc_conf = float(out.get("bc_confidence", 0) or 0)
-        fc = forecast_200(df, sym, tf, horizon=horizon, gom=gom, bc_confidence=bc_conf)
+        fc = forecast_200(df, sym, tf, horizon=horizon, gom=_cognition_gom_context(out), bc_confidence=bc_conf)
         payload = to_mt5_payload(fc)
         payload["ok"] = True
         return payload
@@ -9173,6 +9576,50 @@ async def cognition_forecast_200(
         return {"ok": False, "symbol": sym, "error": str(e)}
 
 
+@app.get("/cognition/forecast-200/batch")
+async def cognition_forecast_200_batch(
+    symbols: str = Query(..., description="Symboles séparés par des virgules"),
+    chart_tf: str = Query("M1"),
+    horizon: int = Query(200, ge=10, le=500),
+):
+    """Forecast cognition de plusieurs symboles : chemins calculés en une seule matrice NumPy."""
+    if not COGNITION_FORECAST_AVAILABLE:
+        return {"ok": False, "error": "cognition_forecast indisponible"}
+    tf = (chart_tf or "M1").upper()
+    frames: Dict[str, pd.DataFrame] = {}
+    gom: Dict[str, Dict[str, Any]] = {}
+    bc_conf: Dict[str, float] = {}
+    results: Dict[str, Any] = {}
+    for raw in dict.fromkeys(s.strip() for s in symbols.split(",") if s.strip()):
+        sym = _resolve_symbol(raw)
+        try:
+            out, df = _cognition_forecast_inputs(sym, tf, horizon)
+        except Exception as e:
+            results[sym] = {"ok": False, "symbol": sym, "error": str(e)}
+            continue
+        if df is None or len(df) < 10:
+            results[sym] = {"ok": False, "symbol": sym, "error": "candles indisponibles"}
+            continue
+        frames[sym] = df
+        gom[sym] = _cognition_gom_context(out)
+        bc_conf[sym] = float(out.get("bc_confidence", 0) or 0)
+    try:
+        for sym, fc in forecast_200_batch(frames, tf, horizon, gom=gom, bc_confidence=bc_conf).items():
+            results[sym] = {**to_mt5_payload(fc), "ok": True}
+    except Exception as e:
+        logger.error(f"[COGNITION] forecast-200 batch failed: {e}", exc_info=True)
+        return {"ok": False, "error": str(e)}
+    return {"ok": True, "timeframe": tf, "horizon": horizon, "count": len(results), "results": results}
+
+
+@app.get("/gom/feature-context/stats")
+async def gom_feature_context_stats():
+    """Compteurs de réutilisation du contexte de features GOM (hits/misses par feature)."""
+    if not FEATURE_CONTEXT_AVAILABLE:
+        return {"ok": False, "error": "feature_context indisponible"}
+    return {"ok": True, **get_feature_registry().stats()}
+
+
 @app.get("/gom-kola-dashboard")
 async def gom_kola_dashboard(
     symbol: str = Query("XAUUSD"),
@@ -9228,11 +9675,12 @@ async def gom_kola_dashboard(
         if src_norm in ("local", "mt5"):
             cached_data = _get_cached_gom_data(sym, chart_tf)
             if cached_data:
+                feature_ctx = _gom_feature_context(sym)
                 _enrich_bc_volatility(cached_data, sym)
-                _enrich_cognition_forecast(cached_data, sym, chart_tf)
+                _enrich_cognition_forecast(cached_data, sym, chart_tf, ctx=feature_ctx)
                 cached_data["entry_probability"] = round(_compute_entry_probability(cached_data), 1)
                 _enrich_ia_status(cached_data)
-                _enrich_correction_cycle(cached_data, sym)
+                _enrich_correction_cycle(cached_data, sym, ctx=feature_ctx)
                 return cached_data
 
         loop = asyncio.get_running_loop()
@@ -9240,11 +9688,12 @@ async def gom_kola_dashboard(
             None, lambda: _resolve_gom_dashboard(sym, chart_tf, source)
         )
         if response.get("ok"):
+            feature_ctx = _gom_feature_context(sym)
             _enrich_bc_volatility(response, sym)
-            _enrich_cognition_forecast(response, sym, chart_tf)
+            _enrich_cognition_forecast(response, sym, chart_tf, ctx=feature_ctx)
             response["entry_probability"] = round(_compute_entry_probability(response), 1)
             _enrich_ia_status(response)
-            _enrich_correction_cycle(response, sym)
+            _enrich_correction_cycle(response, sym, ctx=feature_ctx)
             ds = response.get("data_source", "?")
             logger.info(
                 f"[GOM-DASH] {sym}: {response.get('verdict')} "
@@ -9266,7 +9715,8 @@ async def gom_kola_dashboard(
 
 
 # Cache globale pour les candles MT5 (mises à jour en temps réel)
-_mt5_candles_cache = {}  # {symbol: {timeframe: DataFrame}}
+# {symbol: {timeframe: DataFrame}} — partagé entre workers en mode sqlite (DataFrames reconstruits par version)
+_mt5_candles_cache = SharedFrameCache(_state_backend) if _SHARED_STATE else {}
 _mt5_candles_lock = {}  # {symbol: Lock}
 
 
@@ -9403,10 +9853,6 @@ async def mt5_upload_candles(request: MT5CandlesRequest):
         df = pd.DataFrame(candles_data)
         df.set_index('time', inplace=True)
 
-        # Stocker en cache
-        if symbol not in _mt5_candles_cache:
-            _mt5_candles_cache[symbol] = {}
-
         try:
             from gom_live_calculator import normalize_tf_key as _gom_norm_tf
             canon = _gom_norm_tf(timeframe)
@@ -9414,8 +9860,31 @@ async def mt5_upload_candles(request: MT5CandlesRequest):
             _alias = {"M1": "1", "M5": "5", "M15": "15", "H1": "60", "H4": "240", "D1": "D", "W1": "W"}
             canon = _alias.get(str(timeframe).upper(), timeframe)
 
-        _mt5_candles_cache[symbol][timeframe] = df
-        _mt5_candles_cache[symbol][canon] = df
+        # Stocker en cache
+        if _SHARED_STATE:
+            await _state_write(_mt5_candles_cache.put_frame, symbol, timeframe, df, (canon,))
+        else:
+            sym_frames = _mt5_candles_cache.setdefault(symbol, {})
+            sym_frames[timeframe] = df
+            sym_frames[canon] = df
+        if _gom_tableau_view is not None and await _state_write(_gom_tableau_view.on_candles, symbol, timeframe, df):
+            if AUTONOMOUS_LOOPS_AVAILABLE:
+                loops_manager.emit("new_bar", symbol=symbol, timeframe=timeframe)
+        if ZONE_INDEX_AVAILABLE:
+            try:
+                zone_registry.sync_frame(symbol, timeframe, df)
+            except Exception as e:
+                logger.debug(f"[ZONES] sync {symbol} {timeframe}: {e}")
+        if VOLUME_PROFILE_AVAILABLE:
+            try:
+                profile_registry.sync_frame(symbol, timeframe, df)
+            except Exception as e:
+                logger.debug(f"[PROFILE] sync {symbol} {timeframe}: {e}")
+        if VOLATILITY_ENGINE_AVAILABLE:
+            try:
+                volatility_engine.sync_frame(symbol, timeframe, df)
+            except Exception as e:
+                logger.debug(f"[VOL] sync {symbol} {timeframe}: {e}")
 
         if GOM_LIVE_CALCULATOR_AVAILABLE and _gom_live_calc:
             _gom_live_calc.clear_symbol_cache(symbol)
@@ -9831,6 +10300,8 @@ def get_recent_historical_data(symbol: str, num_bars: int = 200) -> pd.DataFrame
         logger.error(f"Erreur récupération données historiques: {e}")
         return pd.DataFrame()
 
+@traced()
+@timed_stage("mt5_fetch")
 def get_historical_data_mt5(symbol: str, timeframe: str = "H1", count: int = 500):
     """Récupère les données historiques depuis MT5. Retourne None si MT5 indisponible (ex: Render)."""
     global mt5_initialized
@@ -10067,9 +10538,10 @@ async def _fetch_ml_metrics_for_symbol_from_supabase(symbol: str, timeframe: str
 
 
 def _symbol_lookup_variants(symbol: str) -> List[str]:
-    """Alias symboles MT5 (espaces vs underscores) pour requêtes RDS."""
+    """Alias symboles MT5 (espaces vs underscores, nom MT5 canonique) pour requêtes RDS."""
     variants: List[str] = []
-    for s in (symbol, symbol.replace(" ", "_"), symbol.replace("_", " ")):
+    mt5_name = symbol_registry.resolve(symbol).mt5
+    for s in (symbol, symbol.replace(" ", "_"), symbol.replace("_", " "), mt5_name, mt5_name.replace(" ", "_")):
         s = (s or "").strip()
         if s and s not in variants:
             variants.append(s)
@@ -10473,9 +10945,13 @@ async def get_top_opportunities(limit: int = 5):
     try:
         # Obtenir les meilleures opportunités
         opportunities = ml_recommendation_system.get_top_opportunities(limit)
+        # Signal ML courant de toutes les opportunités en un seul lot (un appel par modèle)
+        ml_results, ml_timing = await asyncio.to_thread(
+            _ml_predict_batch, [(opp.symbol, "M1") for opp in opportunities]
+        )
 
         opportunities_data = []
-        for opp in opportunities:
+        for opp, ml in zip(opportunities, ml_results):
             opportunities_data.append({
                 "symbol": opp.symbol,
                 "total_score": opp.total_score,
@@ -10485,13 +10961,15 @@ async def get_top_opportunities(limit: int = 5):
                 "volatility_risk": opp.volatility_risk,
                 "trend_strength": opp.trend_strength,
                 "ml_confidence": opp.ml_confidence,
-                "last_updated": opp.last_updated.isoformat()
+                "last_updated": opp.last_updated.isoformat(),
+                "ml_signal": {k: ml[k] for k in ("action", "confidence", "model")} if ml["ml_available"] else None,
             })
 
         return {
             "status": "success",
             "data": opportunities_data,
             "count": len(opportunities_data),
+            "ml_timing": ml_timing,
             "message": f"Top {len(opportunities_data)} opportunités ML identifiées"
         }
 
@@ -11077,22 +11555,37 @@ def _detect_staircase_pattern(df, direction: str = "UP") -> float:
     small_threshold = avg_body * 0.5
 
     steps = 0
-    i = 3
-    while i < window:
-        # 2-3 petites bougies puis 1 grande dans la bonne direction
-        small_ok = all(b <= small_threshold for b in body[i-3:i])
-        long_ok = body[i] >= long_threshold
-        if not (small_ok and long_ok):
-            i += 1
-            continue
-
+    if SWING_KERNEL_AVAILABLE:
+        # marches candidates en un passage : max des 3 corps précédents + corps courant
+        body_arr = np.asarray(body, dtype=float)
+        cand = np.flatnonzero((trailing_max(body_arr, 3) <= small_threshold) & (body_arr >= long_threshold))
         if direction == "UP":
-            if closes[i] > closes[i-1] and highs[i] > highs[i-1]:
-                steps += 1
+            step_ok = np.r_[False, (closes[1:] > closes[:-1]) & (highs[1:] > highs[:-1])]
         else:
-            if closes[i] < closes[i-1] and lows[i] < lows[i-1]:
-                steps += 1
-        i += 3  # sauter au bloc suivant
+            step_ok = np.r_[False, (closes[1:] < closes[:-1]) & (lows[1:] < lows[:-1])]
+        next_i = 3
+        for i in cand:
+            if i < next_i:
+                continue
+            steps += int(step_ok[i])
+            next_i = i + 3  # sauter au bloc suivant
+    else:
+        i = 3
+        while i < window:
+            # 2-3 petites bougies puis 1 grande dans la bonne direction
+            small_ok = all(b <= small_threshold for b in body[i-3:i])
+            long_ok = body[i] >= long_threshold
+            if not (small_ok and long_ok):
+                i += 1
+                continue
+
+            if direction == "UP":
+                if closes[i] > closes[i-1] and highs[i] > highs[i-1]:
+                    steps += 1
+            else:
+                if closes[i] < closes[i-1] and lows[i] < lows[i-1]:
+                    steps += 1
+            i += 3  # sauter au bloc suivant
 
     if steps == 0:
         return 0.0
@@ -11673,18 +12166,20 @@ async def get_symbols_propice_top(timeframe: str = "M1", lookback_days: int = 14
 
 @app.get("/logs")
 async def get_logs(limit: int = 100):
-    """Récupère les dernières lignes du log"""
+    """Récupère les dernières lignes du log (lecture depuis la fin du fichier, sans tout charger)"""
     try:
         if not LOG_FILE.exists():
             return {"logs": [], "message": "Aucun log disponible"}
 
-        with open(LOG_FILE, "r", encoding="utf-8") as f:
-            lines = f.readlines()
-            recent_lines = lines[-limit:] if len(lines) > limit else lines
+        if tail_lines is not None:
+            recent_lines = tail_lines(LOG_FILE, limit)
+        else:
+            with open(LOG_FILE, "r", encoding="utf-8") as f:
+                recent_lines = list(deque(f, maxlen=limit))
 
         return {
             "logs": [line.strip() for line in recent_lines],
-            "total_lines": len(lines),
+            "file_size_bytes": LOG_FILE.stat().st_size,
             "returned_lines": len(recent_lines)
         }
     except Exception as e:
@@ -11692,6 +12187,36 @@ async def get_logs(limit: int = 100):
         return {"logs": [], "error": str(e)}
 
 
+@app.get("/logs/query")
+async def query_logs(
+    limit: int = Query(100, ge=1, le=5000),
+    event: Optional[str] = None,
+    symbol: Optional[str] = None,
+    level: Optional[str] = None,
+    since_minutes: Optional[float] = Query(None, ge=0),
+):
+    """Requête filtrée sur le journal structuré (événement / symbole / niveau / fenêtre), servie par l'index."""
+    if structured_log_reader is None:
+        return {"ok": False, "records": [], "error": "journal structuré désactivé"}
+    try:
+        since = time.time() - since_minutes * 60.0 if since_minutes is not None else None
+        records = await asyncio.to_thread(
+            structured_log_reader.tail, limit, event, level, symbol, since
+        )
+        return {"ok": True, "records": records, "returned": len(records)}
+    except Exception as e:
+        logger.error(f"Erreur requête logs structurés: {e}")
+        return {"ok": False, "records": [], "error": str(e)}
+
+
+@app.get("/logs/index-stats")
+async def logs_index_stats():
+    """Segments, taille et comptage par type d'événement du journal structuré (depuis l'index)."""
+    if structured_log_reader is None:
+        return {"ok": False, "error": "journal structuré désactivé"}
+    return {"ok": True, **await asyncio.to_thread(structured_log_reader.stats)}
+
+
 # ===== TRADINGVIEW WEBHOOK INTEGRATION =====
 
 class TradingViewSignal(BaseModel):
@@ -12221,12 +12746,13 @@ async def decision(req: Request):
     Règle commune: si action = HOLD → aucun trade côté MT5.
     """
     try:
-        raw = await req.body()
-        # Si c'est une analyse 360° (ou enveloppée), traiter ici pour éviter divergence.
-        try:
-            body = json.loads(raw.decode("utf-8", errors="replace")) if raw else {}
-        except Exception:
-            body = {}
+        with _metric_stage("parse"):
+            raw = await req.body()
+            # Si c'est une analyse 360° (ou enveloppée), traiter ici pour éviter divergence.
+            try:
+                body = json.loads(raw.decode("utf-8", errors="replace")) if raw else {}
+            except Exception:
+                body = {}
         candidate = body.get("payload") if isinstance(body, dict) else None
         analysis360 = None
         if isinstance(candidate, dict) and ("timeframes" in candidate or "meta" in candidate):
@@ -12297,6 +12823,10 @@ async def decision(req: Request):
             d["trade_allowed"] = (au != "HOLD")
             d["source"] = "DECISION_UNIFIED_CLASSIC_SIMPLIFIED"
             meta = d.get("metadata") if isinstance(d.get("metadata"), dict) else {}
+            vol_fc = _volatility_snapshot(_resolve_symbol(request.symbol) or request.symbol)
+            if vol_fc:
+                meta["volatility"] = vol_fc
+                d["metadata"] = meta
             if au == "HOLD":
                 hd = meta.get("hold_diagnostic") or (d.get("reason") or "")[:280]
                 if hd:
@@ -12532,6 +13062,10 @@ async def decision(req: Request):
         if metadata_scalping:
             final_metadata.update(metadata_scalping)
 
+        vol_fc = _volatility_snapshot(_resolve_symbol(request.symbol) or request.symbol)
+        if vol_fc:
+            final_metadata["volatility"] = vol_fc
+
         # Ajouter détails IA v2 aux métadonnées
         final_metadata["ia_status_v2"] = {
             "confidence_percent": ia_status_v2.get("confidence_percent", 0),
@@ -12814,6 +13348,14 @@ def calculate_fractals(df: pd.DataFrame, period: int = 5) -> Dict[str, float]:
     
     upper_fractal = 0.0
     lower_fractal = 0.0
+
+    if SWING_KERNEL_AVAILABLE:
+        ups, downs = kernel_fractals(df['high'].to_numpy(dtype=float), df['low'].to_numpy(dtype=float), period)
+        if len(ups):
+            upper_fractal = float(df['high'].iat[int(ups[0])])
+        if len(downs):
+            lower_fractal = float(df['low'].iat[int(downs[0])])
+        return {'upper_fractal': upper_fractal, 'lower_fractal': lower_fractal}
     
     # Chercher le dernier fractal supérieur (high plus élevé que les périodes adjacentes)
     for i in range(period, len(df) - period):
@@ -12904,6 +13446,7 @@ def enhance_spike_prediction_with_history(df: pd.DataFrame, symbol: str) -> Dict
     }
 
 @app.post("/decision_v2", response_model=DecisionResponse)
+@traced()
 async def decision_v2(request: DecisionRequest):
     # Normaliser les champs manquants pour éviter 422 (robot MT5 peut envoyer payload incomplet)
     symbol = (request.symbol or "").strip() or "UNKNOWN"
@@ -14979,7 +15522,15 @@ def _ml_build_ohlcv_features(cached: Dict[str, Any]) -> Optional["np.ndarray"]:
     volume_ratio, volume_trend, high_low_range, open_close_range, body_size,
     momentum_5, momentum_10, momentum_20, distance_to_high, distance_to_low
     Depuis les données disponibles dans le cache GOM dashboard.
+    Passe par le pipeline colonnaire (ml_feature_engineering.OHLCV_FEATURE_SCHEMA)
+    pour que l'inférence unitaire et l'entraînement batch partagent le même code.
     """
+    if FEATURE_PIPELINE_AVAILABLE:
+        try:
+            features, valid = compute_ohlcv_features([cached])
+            return features if bool(valid[0]) else None
+        except Exception:
+            return None
     try:
         import numpy as _np
         price = float(cached.get("bid") or cached.get("price") or cached.get("entry") or 0)
@@ -15035,68 +15586,190 @@ def _ml_build_ohlcv_features(cached: Dict[str, Any]) -> Optional["np.ndarray"]:
         return None
 
 
-def _ml_predict_direct(sym: str, snapshot: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+_ML_MODEL_INDEX: Dict[str, Any] = {"built_at": 0.0, "paths": {}}
+_ML_MODEL_INDEX_TTL_SEC = 60.0
+
+
+def _ml_model_path(sym: str, timeframe: str = "M1") -> Optional[Path]:
     """
-    Charge le modèle RF .joblib pour (sym, M1) et retourne {action, confidence, model}.
-    Construit les 22 features OHLCV+indicateurs attendues par le scaler.
-    Fallback silencieux — retourne None si modèle absent ou erreur.
+    Chemin du modèle RF .joblib pour (sym, timeframe), via un index des fichiers
+    de models/ reconstruit au plus toutes les 60 s (au lieu d'un glob par appel).
     """
-    try:
-        import joblib as _joblib
-        from pathlib import Path as _Path
-
-        models_dir = _Path(__file__).parent / "models"
-        model_path = None
-        for p in models_dir.glob("*_M1_rf.joblib"):
-            key = p.stem.replace("_M1_rf", "").replace("_", " ").upper()
-            if key == sym.upper():
-                model_path = p
-                break
+    models_dir = Path(__file__).parent / "models"
+    now = time.time()
+    if now - _ML_MODEL_INDEX["built_at"] > _ML_MODEL_INDEX_TTL_SEC:
+        paths: Dict[Tuple[str, str], Path] = {}
+        if models_dir.is_dir():
+            for p in models_dir.glob("*_rf.joblib"):
+                stem = p.stem[: -len("_rf")]
+                base, _, tf = stem.rpartition("_")
+                if base and tf:
+                    paths[(base.replace("_", " ").upper(), tf.upper())] = p
+        _ML_MODEL_INDEX.update(built_at=now, paths=paths)
+    path = _ML_MODEL_INDEX["paths"].get((sym.upper(), timeframe.upper()))
+    if path is None:
         # Fallback avec espaces directs
-        if model_path is None:
-            direct = models_dir / f"{sym}_M1_rf.joblib"
-            if direct.exists():
-                model_path = direct
-
-        if model_path is None:
-            return None
-
-        scaler_path = _Path(str(model_path).replace("_rf.joblib", "_scaler.joblib"))
+        direct = models_dir / f"{sym}_{timeframe}_rf.joblib"
+        if direct.exists():
+            path = direct
+    return path
+
+
+def _ml_load_model_pair(model_path: Path) -> Tuple[Any, Any]:
+    """(modèle, scaler) — artefacts mappés du registre si possible, sinon joblib."""
+    import joblib as _joblib
+
+    scaler_path = Path(str(model_path).replace("_rf.joblib", "_scaler.joblib"))
+    model = scaler = None
+    if MODEL_REGISTRY_AVAILABLE and isinstance(ml_models, LazyModelStore):
+        # Artefacts mappés, chargés une fois par worker au lieu de joblib.load à chaque appel
+        model = ml_models.get(model_path.stem)
+        scaler = ml_models.get(scaler_path.stem) if model is not None and scaler_path.exists() else None
+    if model is None:
         model  = _joblib.load(model_path)
         scaler = _joblib.load(scaler_path) if scaler_path.exists() else None
+    return model, scaler
 
-        cached = _get_cached_gom_data(sym, "M1") or _get_cached_gom_data(sym, "M15") or {}
-        features = _ml_build_ohlcv_features(cached)
-        if features is None:
-            return None
 
-        if scaler is not None:
-            import warnings
-            with warnings.catch_warnings():
-                warnings.simplefilter("ignore")
-                features = scaler.transform(features)
-
-        proba   = model.predict_proba(features)[0]
-        classes = list(model.classes_)
-        idx_buy  = classes.index(1)  if 1  in classes else -1
-        idx_sell = classes.index(-1) if -1 in classes else -1
-        p_buy  = float(proba[idx_buy])  if idx_buy  >= 0 else 0.0
-        p_sell = float(proba[idx_sell]) if idx_sell >= 0 else 0.0
-
-        if p_buy >= p_sell and p_buy >= 0.45:
-            action, conf = "BUY", p_buy
-        elif p_sell > p_buy and p_sell >= 0.45:
-            action, conf = "SELL", p_sell
-        else:
-            action, conf = "NEUTRAL", max(p_buy, p_sell)
+def _ml_decide_from_proba(proba_row: "np.ndarray", classes: List[Any]) -> Tuple[str, float]:
+    idx_buy  = classes.index(1)  if 1  in classes else -1
+    idx_sell = classes.index(-1) if -1 in classes else -1
+    p_buy  = float(proba_row[idx_buy])  if idx_buy  >= 0 else 0.0
+    p_sell = float(proba_row[idx_sell]) if idx_sell >= 0 else 0.0
+
+    if p_buy >= p_sell and p_buy >= 0.45:
+        return "BUY", p_buy
+    if p_sell > p_buy and p_sell >= 0.45:
+        return "SELL", p_sell
+    return "NEUTRAL", max(p_buy, p_sell)
+
+
+@timed_stage("ml")
+def _ml_predict_batch(pairs: List[Tuple[str, str]]) -> Tuple[List[Dict[str, Any]], Dict[str, float]]:
+    """
+    Score ML vectorisé d'une liste de (symbole, timeframe).
+    Une seule matrice de features (pipeline colonnaire) pour tout le lot, puis chaque
+    modèle distinct est appelé une seule fois sur ses lignes.
+    Retourne (résultats dans l'ordre des paires, timings en ms).
+    """
+    t0 = time.perf_counter()
+    results: List[Dict[str, Any]] = [
+        {"symbol": sym, "timeframe": tf, "action": "NEUTRAL", "confidence": 0.0,
+         "model": None, "ml_available": False}
+        for sym, tf in pairs
+    ]
+
+    rows: List[Dict[str, Any]] = []
+    for sym, tf in pairs:
+        cached = _get_cached_gom_data(sym, tf) or _get_cached_gom_data(_resolve_symbol(sym), tf)
+        if cached is None and tf.upper() == "M1":
+            cached = _get_cached_gom_data(sym, "M15")
+        rows.append(cached or {})
+
+    if FEATURE_PIPELINE_AVAILABLE:
+        matrix, valid = compute_ohlcv_features(rows)
+    else:
+        built = [_ml_build_ohlcv_features(r) for r in rows]
+        valid = np.array([b is not None for b in built], dtype=bool)
+        matrix = np.vstack([b if b is not None else np.zeros((1, 22), dtype=np.float32) for b in built])
+    t_features = time.perf_counter()
+
+    groups: Dict[Path, List[int]] = {}
+    for i, (sym, tf) in enumerate(pairs):
+        if not valid[i]:
+            results[i]["reason"] = "no_features"
+            continue
+        path = _ml_model_path(sym, tf)
+        if path is None:
+            results[i]["reason"] = "no_model"
+            continue
+        groups.setdefault(path, []).append(i)
+
+    for path, idx in groups.items():
+        try:
+            model, scaler = _ml_load_model_pair(path)
+            X = matrix[idx]
+            if scaler is not None:
+                import warnings
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore")
+                    X = scaler.transform(X)
+            proba = model.predict_proba(X)
+            classes = list(np.asarray(model.classes_).tolist())
+            for row, i in enumerate(idx):
+                action, conf = _ml_decide_from_proba(proba[row], classes)
+                results[i].update(action=action, confidence=round(conf, 4),
+                                  model=path.stem, ml_available=True)
+        except Exception as exc:
+            logger.debug(f"[ml-batch] predict error for {path.stem}: {exc}")
+            for i in idx:
+                results[i]["reason"] = "model_error"
+
+    t_end = time.perf_counter()
+    timing = {
+        "features_ms": round((t_features - t0) * 1000, 3),
+        "inference_ms": round((t_end - t_features) * 1000, 3),
+        "total_ms": round((t_end - t0) * 1000, 3),
+        "models_invoked": len(groups),
+    }
+    return results, timing
 
-        return {"action": action, "confidence": round(conf, 4), "model": model_path.stem}
 
+def _ml_predict_direct(sym: str, snapshot: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Charge le modèle RF .joblib pour (sym, M1) et retourne {action, confidence, model}.
+    Construit les 22 features OHLCV+indicateurs attendues par le scaler.
+    Fallback silencieux — retourne None si modèle absent ou erreur.
+    Même chemin que /ml/predict-batch (lot d'une seule paire) ; le temps « ml » est compté par
+    _ml_predict_batch, une seule fois.
+    """
+    try:
+        results, _ = _ml_predict_batch([(sym, "M1")])
+        res = results[0]
+        if not res["ml_available"]:
+            return None
+        return {"action": res["action"], "confidence": res["confidence"], "model": res["model"]}
     except Exception as exc:
         logger.debug(f"[ml-direct] predict error for {sym}: {exc}")
         return None
 
 
+class MLBatchRequest(BaseModel):
+    symbols: List[str]
+    timeframes: List[str] = ["M1"]
+
+
+@app.post("/ml/predict-batch")
+async def ml_predict_batch(req: MLBatchRequest):
+    """
+    Score ML de toute la watchlist en un seul appel : une matrice de features pour
+    tous les (symbole, TF), chaque modèle exécuté une fois sur son sous-lot.
+    Consommé par le morning scan (repli sans bridge) et perfect_opportunity_scanner.py, qui
+    n'en tire que les champs ml_* ajoutés aux opportunités (statuts GOM toujours lus symbole
+    par symbole). /autoscan/signals et /ml/opportunities appellent _ml_predict_batch en interne.
+    """
+    syms: List[str] = []
+    for raw in req.symbols:
+        sym = str(raw or "").strip()
+        if sym and sym not in syms:
+            syms.append(sym)
+    tfs = [tf.upper() for tf in (req.timeframes or ["M1"]) if tf]
+    pairs = [(sym, tf) for sym in syms for tf in tfs]
+
+    results, timing = await asyncio.to_thread(_ml_predict_batch, pairs)
+    by_symbol: Dict[str, Dict[str, Any]] = {}
+    for res in results:
+        by_symbol.setdefault(res["symbol"], {})[res["timeframe"]] = res
+    return {
+        "ok": True,
+        "count": len(results),
+        "results": results,
+        "by_symbol": by_symbol,
+        "timing": timing,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    }
+
+
 @app.get("/ml-metrics/{symbol}")
 async def ml_metrics(symbol: str):
     """
@@ -15193,43 +15866,85 @@ def _generate_future_ohlc_series(
 ) -> List[Dict[str, Any]]:
     """
     Génère une projection OHLC future avancée basée sur Supabase et les indicateurs.
-    Utilise predict_prices_advanced pour calculer la courbe principale des prix 'close', 
-    et le comportement historique pour proportionner les mèches (wicks) et les retracements.
+    Ensemble Monte Carlo (ml.ensemble_forecast) : bougies médianes + bandes q10/q50/q90,
+    avec predict_prices_advanced comme dérive quand il est disponible. Sans ensemble,
+    chemin unique de predict_prices_advanced texturé par le profil (mèches, retracements).
     """
     if df is None or df.empty or len(df) < 50:
         return []
 
-    try:
-        from ai_server_improvements import predict_prices_advanced
-        last_close = float(df['close'].iloc[-1])
-        # Utiliser l'IA avancée basée sur indicateurs et S/R
-        adv_pred = predict_prices_advanced(df, last_close, horizon, "M1", symbol)
-        
-        predicted_prices = adv_pred.get('prediction', [])
-        conf = adv_pred.get('confidence', 0.5)
-        direction = adv_pred.get('direction', 'NEUTRAL')
-        atr = adv_pred.get('atr', last_close * 0.001)
-    except Exception as e:
-        logger.warning(f"Fallback dans _generate_future_ohlc_series: {e}")
+    prof = behavior_profile or {}
+    vol_mult = float(max(0.55, min(2.20, float(prof.get("vol_multiplier", 1.0)))))
+    retrace_ratio = float(max(0.20, min(0.85, float(prof.get("retrace_ratio", 0.48)))))
+    last_time = pd.to_datetime(df['time'].iloc[-1]) if 'time' in df.columns else datetime.now(timezone.utc)
+
+    def _advanced_path() -> Tuple[List[float], float, str, float]:
         last_close = float(df['close'].iloc[-1])
-        predicted_prices = [last_close] * horizon
-        conf = 0.5
-        direction = 'NEUTRAL'
-        atr = last_close * 0.001
+        try:
+            from ai_server_improvements import predict_prices_advanced
+            # Utiliser l'IA avancée basée sur indicateurs et S/R
+            adv_pred = predict_prices_advanced(df, last_close, horizon, "M1", symbol)
+            return (
+                adv_pred.get('prediction', []),
+                adv_pred.get('confidence', 0.5),
+                adv_pred.get('direction', 'NEUTRAL'),
+                adv_pred.get('atr', last_close * 0.001),
+            )
+        except Exception as e:
+            logger.debug(f"predict_prices_advanced indisponible ({symbol}): {e}")
+            return [], 0.5, 'NEUTRAL', last_close * 0.001
 
+    if ENSEMBLE_FORECAST_AVAILABLE:
+        try:
+            ens = ensemble_forecaster.forecast(
+                df, horizon, symbol=symbol, vol_mult=vol_mult,
+                # appelé seulement si (symbole, dernière bougie) n'est pas déjà en cache
+                center=lambda: _advanced_path()[0] or None,
+            )
+        except Exception as e:
+            logger.warning(f"Ensemble Monte Carlo indisponible pour {symbol}: {e}")
+            ens = None
+        if ens is not None:
+            prob_up = ens.prob_up
+            direction = "BULLISH" if prob_up >= 0.55 else "BEARISH" if prob_up <= 0.45 else "NEUTRAL"
+            conf = float(max(prob_up, 1.0 - prob_up))
+            o_arr, h_arr, l_arr, c_arr = (a.tolist() for a in (ens.opens, ens.highs, ens.lows, ens.closes))
+            q10, q90 = ens.q10.tolist(), ens.q90.tolist()
+            candles: List[Dict[str, Any]] = []
+            for i in range(ens.horizon):
+                o, c = o_arr[i], c_arr[i]
+                phase = "impulse_up" if c > o else "impulse_down"
+                if direction == 'BULLISH' and c < o:
+                    phase = "retrace_down"
+                elif direction == 'BEARISH' and c > o:
+                    phase = "retrace_up"
+                candles.append({
+                    "time": int((last_time + timedelta(minutes=i + 1)).timestamp()),
+                    "open": o,
+                    "high": h_arr[i],
+                    "low": l_arr[i],
+                    "close": c,
+                    "q10": q10[i],
+                    "q50": c,
+                    "q90": q90[i],
+                    "confidence": conf,
+                    "phase": phase,
+                    "structure_tag": "MC_" + direction,
+                    "level_ref": c,
+                    "regime": ens.regime,
+                    "leg_id": i // 10
+                })
+            return candles
+
+    predicted_prices, conf, direction, atr = _advanced_path()
     if not predicted_prices:
-        return []
+        predicted_prices = [float(df['close'].iloc[-1])] * horizon
 
     # Injecter le profil de Supabase pour texturiser le OHLC (mèches, bruit, comportement)
-    prof = behavior_profile or {}
-    vol_mult = float(max(0.55, min(2.20, float(prof.get("vol_multiplier", 1.0)))))
-    retrace_ratio = float(max(0.20, min(0.85, float(prof.get("retrace_ratio", 0.48)))))
-    
-    last_time = pd.to_datetime(df['time'].iloc[-1]) if 'time' in df.columns else datetime.now(timezone.utc)
     seed = abs(hash(f"ohlc:{int(last_time.timestamp())//60}:{len(df)}")) % (2**32)
     rng = np.random.default_rng(seed)
 
-    candles: List[Dict[str, Any]] = []
+    candles = []
     curr_close = max(1e-8, float(df['close'].iloc[-1]))
 
     for i, p_price in enumerate(predicted_prices):
@@ -15340,6 +16055,7 @@ async def _fetch_symbol_behavior_profile(symbol: str, timeframe: str = "M1") ->
     return profile
 
 
+@timed_stage("storage")
 async def _store_prediction_run_to_supabase(
     symbol: str,
     timeframe: str,
@@ -15502,13 +16218,18 @@ def analyze_market_structure(df: pd.DataFrame, lookback: int = 20) -> Dict[str,
         lows = recent['low'].values
         
         # Détecter les swing highs et lows
-        for i in range(2, len(recent) - 2):
-            # Swing high
-            if highs[i] > highs[i-1] and highs[i] > highs[i-2] and highs[i] > highs[i+1] and highs[i] > highs[i+2]:
-                structure['swing_highs'].append((i, highs[i]))
-            # Swing low
-            if lows[i] < lows[i-1] and lows[i] < lows[i-2] and lows[i] < lows[i+1] and lows[i] < lows[i+2]:
-                structure['swing_lows'].append((i, lows[i]))
+        if SWING_KERNEL_AVAILABLE:
+            st = swing_structure(highs, lows, recent['close'].values, order=2, strict=True)
+            structure['swing_highs'] = [(int(i), highs[i]) for i in st.swing_highs]
+            structure['swing_lows'] = [(int(i), lows[i]) for i in st.swing_lows]
+        else:
+            for i in range(2, len(recent) - 2):
+                # Swing high
+                if highs[i] > highs[i-1] and highs[i] > highs[i-2] and highs[i] > highs[i+1] and highs[i] > highs[i+2]:
+                    structure['swing_highs'].append((i, highs[i]))
+                # Swing low
+                if lows[i] < lows[i-1] and lows[i] < lows[i-2] and lows[i] < lows[i+1] and lows[i] < lows[i+2]:
+                    structure['swing_lows'].append((i, lows[i]))
         
         # Déterminer la tendance basée sur les swing points
         if len(structure['swing_highs']) >= 2 and len(structure['swing_lows']) >= 2:
@@ -15707,30 +16428,8 @@ async def robot_predict_ohlc(symbol: str, timeframe: str = "M1", horizon: int =
             s = (sym or "").strip()
             if not s:
                 return []
-            out: List[str] = [s]
-            su = s.upper().replace(" ", "")
-            aliases = {
-                "BOOM1000": ["Boom 1000 Index", "Boom1000", "BOOM 1000", "BOOM 1000 INDEX"],
-                "BOOM500": ["Boom 500 Index", "Boom500", "BOOM 500", "BOOM 500 INDEX"],
-                "CRASH1000": ["Crash 1000 Index", "Crash1000", "CRASH 1000", "CRASH 1000 INDEX"],
-                "CRASH500": ["Crash 500 Index", "Crash500", "CRASH 500", "CRASH 500 INDEX"],
-            }
-            for k, vals in aliases.items():
-                if su == k:
-                    out.extend(vals)
-            # Déduire aussi une variante "X 1000 Index" si la saisie ressemble à BOOM1000/CRASH1000
-            if su.startswith("BOOM") and su[4:].isdigit():
-                out.append(f"Boom {su[4:]} Index")
-            if su.startswith("CRASH") and su[5:].isdigit():
-                out.append(f"Crash {su[5:]} Index")
-            # Uniques, ordre conservé
-            uniq: List[str] = []
-            seen = set()
-            for x in out:
-                if x and x not in seen:
-                    uniq.append(x)
-                    seen.add(x)
-            return uniq
+            # Saisie d'abord, puis les orthographes précalculées de l'instrument (uniques, ordre conservé)
+            return list(dict.fromkeys((s, *symbol_registry.resolve(s).spellings)))
 
         def _valid_ohlc_frame(x: Optional[pd.DataFrame]) -> bool:
             if x is None or x.empty or len(x) < 80:
@@ -15772,7 +16471,10 @@ async def robot_predict_ohlc(symbol: str, timeframe: str = "M1", horizon: int =
             raise HTTPException(status_code=404, detail=f"Données insuffisantes pour {symbol}")
 
         behavior_profile = await _fetch_symbol_behavior_profile(used_symbol, "M1")
-        candles = _generate_future_ohlc_series(df, h, behavior_profile=behavior_profile, symbol=used_symbol)
+        # Projection CPU (simulation bougie par bougie) hors boucle d'événements
+        candles = await asyncio.to_thread(
+            _generate_future_ohlc_series, df, h, behavior_profile=behavior_profile, symbol=used_symbol
+        )
         if not candles:
             raise HTTPException(status_code=500, detail="Impossible de générer la projection OHLC")
 
@@ -15787,17 +16489,21 @@ async def robot_predict_ohlc(symbol: str, timeframe: str = "M1", horizon: int =
                 continue
             hi = max(hi, o, cl)
             lo = min(lo, o, cl)
-            valid.append({
+            row = {
                 "time": int(cdl.get("time", 0)),
                 "open": o,
                 "high": hi,
                 "low": lo,
                 "close": cl,
                 "confidence": float(cdl.get("confidence", 0.5))
-            })
+            }
+            if "q10" in cdl:
+                row.update(q10=float(cdl["q10"]), q50=float(cdl["q50"]), q90=float(cdl["q90"]))
+            valid.append(row)
 
         if not valid:
             raise HTTPException(status_code=500, detail="Projection OHLC invalide après validation")
+        generator = "monte_carlo_ensemble" if "q10" in valid[0] else "structure_v2_profiled"
 
         run_id = await _store_prediction_run_to_supabase(
             symbol=symbol,
@@ -15805,7 +16511,7 @@ async def robot_predict_ohlc(symbol: str, timeframe: str = "M1", horizon: int =
             candles=valid,
             metadata={
                 "source": "robot_predict_ohlc",
-                "generator": "structure_v2_profiled",
+                "generator": generator,
                 "requested_symbol": symbol,
                 "used_symbol": used_symbol,
                 "behavior_profile": behavior_profile,
@@ -15819,6 +16525,7 @@ async def robot_predict_ohlc(symbol: str, timeframe: str = "M1", horizon: int =
             "horizon": len(valid),
             "source": "ai_server",
             "prediction_run_id": run_id,
+            "generator": generator,
             "candles": valid
         }
     except HTTPException:
@@ -15850,6 +16557,14 @@ async def robot_predict_ohlc_profile(symbol: str, timeframe: str = "M1"):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/robot/predict_ohlc/ensemble/stats")
+async def robot_predict_ohlc_ensemble_stats():
+    """Statistiques du cache de l'ensemble Monte Carlo (entrées, hits/misses, nombre de chemins)."""
+    if not ENSEMBLE_FORECAST_AVAILABLE:
+        return {"ok": False, "error": "ensemble_forecast indisponible"}
+    return {"ok": True, **ensemble_forecaster.stats()}
+
+
 @app.get("/symbols/prediction-score")
 async def get_symbol_prediction_score(symbol: str, timeframe: str = "M1", days: int = 30):
     """Retourne le score agrégé récent d'un symbole depuis Supabase."""
@@ -16549,6 +17264,10 @@ async def upload_mt5_deals(request: MT5DealsUploadRequest):
     Upload batch de deals clôturés depuis MT5.
     Objectif: garantir 0 incohérence (Supabase reflète MT5 même si un feedback temps réel a été raté).
 
+    Idempotent: les deals déjà ingérés (index local par mt5_deal_id) sont écartés avant
+    toute normalisation ; les nouveaux sont upsertés par chunks puis appliqués aux learners
+    (BC heure, mémoire patterns, série de gains) en une passe, une écriture par learner.
+
     Payload: {"deals":[{mt5_deal_id, position_id, symbol, profit, is_win, close_time, price, magic}, ...]}
     """
     try:
@@ -16566,167 +17285,131 @@ async def upload_mt5_deals(request: MT5DealsUploadRequest):
 
         if not deals:
             return {"ok": True, "received": 0, "upserted": 0}
+        if not DEAL_INGESTION_AVAILABLE:
+            raise HTTPException(status_code=503, detail="deal_ingestion indisponible")
+
+        deal_index = get_deal_index()
+        fresh, duplicates = await asyncio.to_thread(deal_index.split_new, deals[:2000])
+        # ids réservés : un upload concurrent des mêmes deals les voit comme doublons ;
+        # libérés en sortie s'ils n'ont pas été confirmés (mark_seen) par une persistance réussie
+        claimed = [d.get("mt5_deal_id") for d in fresh]
+        try:
+            rows, skipped = build_feedback_rows(fresh)
 
-        from datetime import timezone
-
-        def _normalize_close_time(v: Any) -> Optional[str]:
-            if v is None:
-                return None
-            # MT5 peut envoyer un timestamp Unix (int) ou une string "YYYY.MM.DD HH:MM:SS"
-            try:
-                if isinstance(v, (int, float)):
-                    dt = datetime.fromtimestamp(float(v), tz=timezone.utc)
-                    return dt.isoformat().replace("+00:00", "Z")
-                if isinstance(v, str):
-                    s = v.strip()
-                    if not s:
-                        return None
-                    s = s.replace(".", "-")
-                    # "YYYY-MM-DD HH:MM:SS" -> "YYYY-MM-DDTHH:MM:SS"
-                    if "T" not in s and " " in s:
-                        s = s.replace(" ", "T", 1)
-                    # si pas de timezone, on force UTC (Z)
-                    if "Z" not in s and "+" not in s:
-                        s = s + "Z"
-                    return s
-            except Exception:
-                return None
-            return None
-
-        def _normalize_open_time(v: Any, fallback_close_time: Optional[str]) -> Optional[str]:
-            normalized = _normalize_close_time(v)
-            if normalized:
-                return normalized
-            # Certains payloads MT5 n'envoient pas open_time; on évite l'échec NOT NULL.
-            return fallback_close_time
-
-        def _normalize_is_win(v: Any, profit: float) -> bool:
-            if isinstance(v, bool):
-                return v
-            if isinstance(v, (int, float)):
-                return float(v) > 0.5
-            if isinstance(v, str):
-                s = v.strip().lower()
-                if s in ("true", "1", "yes", "y"):
-                    return True
-                if s in ("false", "0", "no", "n"):
-                    return False
-            return profit > 0.0
+            logger.info(
+                f"📥 /mt5/deals-upload received={len(deals)} kept={len(rows)} "
+                f"skipped={skipped} duplicates={duplicates}"
+            )
+            if not rows:
+                return {
+                    "ok": True,
+                    "received": len(deals),
+                    "kept": 0,
+                    "skipped": skipped,
+                    "duplicates": duplicates,
+                    "upsert_attempted": 0,
+                }
 
-        rows = []
-        skipped = 0
-        for d in deals[:2000]:
-            sym = (d.get("symbol") or "").strip()
-            if not sym:
-                skipped += 1
-                continue
-            profit = float(d.get("profit") or 0.0)
-            close_time_norm = _normalize_close_time(d.get("close_time"))
-            if not close_time_norm:
-                skipped += 1
-                continue
-            open_time_norm = _normalize_open_time(d.get("open_time"), close_time_norm)
-            entry_price = d.get("entry_price")
-            if entry_price is None:
-                entry_price = d.get("price")
-            rows.append({
-                "symbol": sym,
-                "timeframe": "M1",
-                "open_time": open_time_norm,
-                "profit": profit,
-                "is_win": _normalize_is_win(d.get("is_win"), profit),
-                "close_time": close_time_norm,
-                "entry_price": entry_price,
-                "exit_price": d.get("price"),
-                "mt5_deal_id": d.get("mt5_deal_id"),
-                "position_id": d.get("position_id"),
-                "magic": d.get("magic"),
-                "decision": "UNKNOWN",
-            })
+            def _apply_learners() -> None:
+                deal_index.mark_seen(row.get("mt5_deal_id") for row in rows)
 
-        logger.info(f"📥 /mt5/deals-upload received={len(deals)} kept={len(rows)} skipped={skipped}")
+                _bc_n = _bc_learn_from_deals(rows)
+                if _bc_n:
+                    logger.info("[BC-HEURE] %s trades BC integres aux plages horaires", _bc_n)
 
-        _bc_n = _bc_learn_from_deals(rows)
-        if _bc_n:
-            logger.info("[BC-HEURE] %s trades BC integres aux plages horaires", _bc_n)
+                _cog_n = _cognition_learn_from_deals(rows)
+                if _cog_n:
+                    logger.info("[COGNITION] %s trades integres a la memoire patterns", _cog_n)
 
-        _cog_n = _cognition_learn_from_deals(rows)
-        if _cog_n:
-            logger.info("[COGNITION] %s trades integres a la memoire patterns", _cog_n)
+                for row in rows:
+                    try:
+                        _record_win_streak_from_profit(float(row.get("profit") or 0), str(row.get("symbol") or ""))
+                    except Exception:
+                        pass
 
-        for row in rows:
-            try:
-                _record_win_streak_from_profit(float(row.get("profit") or 0), str(row.get("symbol") or ""))
-            except Exception:
-                pass
+            payload = [public_row(row) for row in rows]
 
-        # Priorité AWS RDS (Render + local → même base)
-        rds_inserted = 0
-        if AWS_RDS_AVAILABLE and not _env_bool("USE_SUPABASE", False):
-            for row in rows:
-                rds_row = {
-                    "symbol": row.get("symbol"),
-                    "open_time": row.get("open_time"),
-                    "close_time": row.get("close_time"),
-                    "entry_price": float(row.get("entry_price") or 0),
-                    "exit_price": float(row.get("exit_price") or 0),
-                    "profit": float(row.get("profit") or 0),
-                    "ai_confidence": row.get("ai_confidence"),
-                    "coherent_confidence": row.get("coherent_confidence"),
-                    "decision": row.get("decision") or "UNKNOWN",
-                    "is_win": bool(row.get("is_win")),
-                }
+            # Priorité AWS RDS (Render + local → même base)
+            rds_inserted = None
+            if AWS_RDS_AVAILABLE and not _env_bool("USE_SUPABASE", False):
+                rds_rows = [
+                    {
+                        "symbol": row.get("symbol"),
+                        "open_time": row.get("open_time"),
+                        "close_time": row.get("close_time"),
+                        "entry_price": float(row.get("entry_price") or 0),
+                        "exit_price": float(row.get("exit_price") or 0),
+                        "profit": float(row.get("profit") or 0),
+                        "ai_confidence": row.get("ai_confidence"),
+                        "coherent_confidence": row.get("coherent_confidence"),
+                        "decision": row.get("decision") or "UNKNOWN",
+                        "is_win": bool(row.get("is_win")),
+                    }
+                    for row in payload
+                ]
                 try:
-                    if aws_rds_client.insert("trade_feedback", rds_row):
-                        rds_inserted += 1
+                    rds_inserted = await asyncio.to_thread(
+                        aws_rds_client.insert_many, "trade_feedback", rds_rows, ignore_conflicts=True
+                    )
                 except Exception as e:
-                    logger.debug("RDS deals-upload row skip: %s", str(e)[:80])
-            if rds_inserted:
-                logger.info("✅ /mt5/deals-upload → AWS RDS: %s lignes trade_feedback", rds_inserted)
-                asyncio.create_task(_refresh_symbol_trade_stats("M1"))
-                return {
-                    "ok": True,
-                    "received": len(deals),
-                    "kept": len(rows),
-                    "skipped": skipped,
-                    "upsert_attempted": rds_inserted,
-                    "data_source": "aws_rds",
-                }
+                    logger.debug("RDS deals-upload batch skip: %s", str(e)[:80])
+                # 0 = lignes déjà présentes dans RDS (index local perdu) : succès idempotent
+                if rds_inserted is not None:
+                    logger.info("✅ /mt5/deals-upload → AWS RDS: %s lignes trade_feedback", rds_inserted)
+                    _apply_learners()
+                    asyncio.create_task(_refresh_symbol_trade_stats("M1"))
+                    return {
+                        "ok": True,
+                        "received": len(deals),
+                        "kept": len(rows),
+                        "skipped": skipped,
+                        "duplicates": duplicates,
+                        "upsert_attempted": rds_inserted,
+                        "data_source": "aws_rds",
+                    }
 
-        import httpx
-        headers = {
-            "apikey": supabase_key,
-            "Authorization": f"Bearer {supabase_key}",
-            "Content-Type": "application/json",
-            "Prefer": "resolution=merge-duplicates,return=minimal",
-        }
-        r = None
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            for attempt in range(3):
-                r = await client.post(f"{supabase_url}/rest/v1/trade_feedback", headers=headers, json=rows)
-                if r.status_code in (200, 201, 204):
-                    break
-                # Idempotence: si deal déjà présent (unique mt5_deal_id), considérer OK.
-                if r.status_code == 409 and ("mt5_deal_id" in (r.text or "") or "duplicate key" in (r.text or "").lower()):
-                    logger.info("ℹ️ /mt5/deals-upload duplicate mt5_deal_id détecté -> considéré comme succès idempotent")
-                    break
-                # Retry seulement sur erreurs transitoires.
-                if r.status_code in (408, 425, 429, 500, 502, 503, 504) and attempt < 2:
-                    await asyncio.sleep(0.4 * (attempt + 1))
-                    continue
-                break
-        if not r or r.status_code not in (200, 201, 204, 409):
-            raise HTTPException(status_code=500, detail=f"Supabase trade_feedback upsert HTTP {r.status_code if r else 'N/A'}: {(r.text[:200] if r else 'no response')}")
+            import httpx
+            headers = {
+                "apikey": supabase_key,
+                "Authorization": f"Bearer {supabase_key}",
+                "Content-Type": "application/json",
+                "Prefer": "resolution=merge-duplicates,return=minimal",
+            }
+            chunks = 0
+            async with httpx.AsyncClient(timeout=15.0) as client:
+                for chunk in chunked(payload):
+                    r = None
+                    for attempt in range(3):
+                        r = await client.post(f"{supabase_url}/rest/v1/trade_feedback", headers=headers, json=list(chunk))
+                        if r.status_code in (200, 201, 204):
+                            break
+                        # Idempotence: si deal déjà présent (unique mt5_deal_id), considérer OK.
+                        if r.status_code == 409 and ("mt5_deal_id" in (r.text or "") or "duplicate key" in (r.text or "").lower()):
+                            logger.info("ℹ️ /mt5/deals-upload duplicate mt5_deal_id détecté -> considéré comme succès idempotent")
+                            break
+                        # Retry seulement sur erreurs transitoires.
+                        if r.status_code in (408, 425, 429, 500, 502, 503, 504) and attempt < 2:
+                            await asyncio.sleep(0.4 * (attempt + 1))
+                            continue
+                        break
+                    if not r or r.status_code not in (200, 201, 204, 409):
+                        raise HTTPException(status_code=500, detail=f"Supabase trade_feedback upsert HTTP {r.status_code if r else 'N/A'}: {(r.text[:200] if r else 'no response')}")
+                    chunks += 1
 
-        asyncio.create_task(_refresh_symbol_trade_stats("M1"))
-        return {
-            "ok": True,
-            "received": len(deals),
-            "kept": len(rows),
-            "skipped": skipped,
-            "upsert_attempted": len(rows),
-            "supabase_url": supabase_url,
-        }
+            _apply_learners()
+            asyncio.create_task(_refresh_symbol_trade_stats("M1"))
+            return {
+                "ok": True,
+                "received": len(deals),
+                "kept": len(rows),
+                "skipped": skipped,
+                "duplicates": duplicates,
+                "upsert_attempted": len(rows),
+                "upsert_chunks": chunks,
+                "supabase_url": supabase_url,
+            }
+        finally:
+            await asyncio.to_thread(deal_index.release, claimed)
     except HTTPException:
         raise
     except Exception as e:
@@ -17414,7 +18097,8 @@ async def spike_hour_prior(symbol: str):
 @app.get("/spike/realtime", response_model=SpikeStatus)
 async def spike_realtime(symbol: str):
     """
-    Retourne le statut temps réel de spike pour un symbole (détecté à partir des requêtes /decision).
+    Retourne le statut temps réel de spike pour un symbole (flux ticks Deriv, sinon requêtes /decision).
+    Lecture seule de l'instantané maintenu tick par tick par le moteur streaming.
     """
     sym = (symbol or "").strip()
     info = _last_spike_info.get(sym)
@@ -17432,12 +18116,20 @@ async def spike_realtime(symbol: str):
                 direction = info.get("direction")
                 diff = float(info.get("diff_points", 0.0))
 
+    stream = spike_engine.snapshot(sym) if spike_engine is not None else None
+    stream = stream or {}
+
     return SpikeStatus(
         symbol=sym,
         spike=spike,
         direction=direction,
         diff_points=diff,
         last_spike_time=last_time_str,
+        imminence_probability=stream.get("imminence_probability"),
+        ticks_since_spike=stream.get("ticks_since_spike"),
+        mean_interval_ticks=stream.get("mean_interval_ticks"),
+        compression_ratio=stream.get("compression_ratio"),
+        source=stream.get("source"),
     )
 
 # Cache /spike/levels — TTL 1h, évite 12 requêtes RDS simultanées au changement d'heure
@@ -17800,7 +18492,9 @@ def _ml_clamp(v: float, lo: float, hi: float) -> float:
 def _get_feedback_buf(symbol: str, timeframe: str) -> deque:
     k = _ml_key(symbol, timeframe)
     if k not in _feedback_by_key:
-        _feedback_by_key[k] = deque(maxlen=5000)
+        _feedback_by_key[k] = (
+            SharedDeque(_state_backend, "ml_feedback", k, maxlen=5000) if _SHARED_STATE else deque(maxlen=5000)
+        )
     return _feedback_by_key[k]
 
 def _compute_ml_metrics(symbol: str, timeframe: str) -> Dict[str, Any]:
@@ -17913,8 +18607,20 @@ async def _continuous_training_loop(symbols: List[str], timeframe: str, interval
                 _compute_ml_metrics(sym, timeframe)
             except Exception as e:
                 logger.warning(f"⚠️ Continuous loop: {sym}: {e}")
+        # Delta trade_feedback depuis le watermark + partial_fit (pool de threads) + publication
+        if INCREMENTAL_TRAINING_AVAILABLE:
+            try:
+                cycle = await asyncio.to_thread(get_training_service().run_cycle, symbols)
+                if cycle.get("trained"):
+                    logger.info(
+                        f"🧠 Continuous loop: {cycle['fetched_rows']} nouveaux feedbacks, "
+                        f"{len(cycle['trained'])} modèle(s) publiés en {cycle['duration_ms']} ms"
+                    )
+            except Exception as e:
+                logger.warning(f"⚠️ Continuous loop: entraînement incrémental: {e}")
         await asyncio.sleep(max(10, interval_sec))
 
+@timed_stage("storage")
 async def _push_feedback_to_supabase(
     symbol: str, timeframe: str, side: Optional[str], profit: float,
     is_win: bool, ai_confidence: Optional[float],
@@ -18340,6 +19046,10 @@ def _detect_chart_patterns_from_df(df: pd.DataFrame) -> Dict[str, Any]:
     w = d.tail(25)
     out["zone_low"] = float(w["low"].min())
     out["zone_high"] = float(w["high"].max())
+    if SWING_KERNEL_AVAILABLE:
+        # swings confirmés + cassure de structure sur la même fenêtre (informatif, ne change pas le score)
+        hi, lo = d["high"].to_numpy(dtype=float), d["low"].to_numpy(dtype=float)
+        out["structure"] = swing_structure(hi, lo, d["close"].to_numpy(dtype=float), order=2).to_dict(hi, lo)
     return out
 
 
@@ -18484,6 +19194,7 @@ async def ml_continuous_status():
         "enabled": training_on,
         "last_tick": _continuous_last_tick,
         "feedback_keys": len(_feedback_by_key),
+        "incremental": get_training_service().last_cycle if INCREMENTAL_TRAINING_AVAILABLE else None,
     }
 
 @app.get("/calibration/{symbol}")
@@ -18686,7 +19397,17 @@ async def send_predictions_summary():
 
 # Gestion des modèles ML
 def load_ml_models():
-    """Charge les modèles ML depuis le répertoire models"""
+    """
+    Index paresseux des modèles ML de MODELS_DIR.
+    Les artefacts du registre (MODELS_DIR/registry) sont mappés en mémoire (np.load mmap)
+    et partagés entre workers ; les .joblib/.pkl legacy sont convertis dans le registre au
+    démarrage (startup_event) et, sinon, chargés au premier accès.
+    """
+    if MODEL_REGISTRY_AVAILABLE:
+        store = LazyModelStore(ModelRegistry(MODELS_DIR / "registry"), MODELS_DIR)
+        logger.info(f"Registre modèles: {len(store.names())} modèle(s) indexé(s) (chargement paresseux)")
+        return store
+
     models = {}
     if not MODELS_DIR.exists():
         logger.warning(f"MODELS_DIR n'existe pas: {MODELS_DIR}")
@@ -18714,9 +19435,11 @@ def load_ml_models():
     logger.info(f"Total modèles chargés: {len(models)}")
     return models
 
-# Charger les modèles au démarrage
+# Index des modèles au démarrage (chargement effectif au premier accès en mode registre)
 ml_models = load_ml_models()
 
+@traced()
+@timed_stage("ml")
 def predict_with_model(symbol: str, features: Dict[str, float], model_name: Optional[str] = None):
     """Prédit avec un modèle ML spécifique"""
     if not ml_models:
@@ -18724,7 +19447,7 @@ def predict_with_model(symbol: str, features: Dict[str, float], model_name: Opti
     
     # Sélectionner le modèle approprié
     if model_name and model_name in ml_models:
-        model = ml_models[model_name]
+        model = ml_models.get(model_name)
     else:
         # Sélection automatique selon le symbole
         if "Boom" in symbol or "Crash" in symbol:
@@ -18735,11 +19458,19 @@ def predict_with_model(symbol: str, features: Dict[str, float], model_name: Opti
             model_key = "universal_xgb_model"
         
         if model_key in ml_models:
-            model = ml_models[model_key]
-        elif len(ml_models) > 0:
-            model = list(ml_models.values())[0]
+            model = ml_models.get(model_key)
+        elif MODEL_REGISTRY_AVAILABLE:
+            candidates = ml_models.model_names()
+            if not candidates:
+                return None
+            model = ml_models.get(candidates[0])
         else:
-            return None
+            candidates = [k for k in ml_models if not k.endswith("_scaler")]
+            if not candidates:
+                return None
+            model = ml_models[candidates[0]]
+    if model is None:
+        return None
     
     try:
         # Préparer les features pour le modèle
@@ -18782,18 +19513,115 @@ async def cache_stats():
     return {
         "size": len(prediction_cache),
         "max_age_seconds": 3600,
-        "cache_duration": CACHE_DURATION
+        "cache_duration": CACHE_DURATION,
+        "decision_cache_size": len(decision_cache),
+        "simplified_cache_size": len(simplified_tf_cache),
+        "gom_cache_size": len(_gom_cache),
+        "gom_tableau_view": _gom_tableau_view.stats() if _gom_tableau_view is not None else None,
+        "symbol_registry": symbol_registry.stats(),
+        "hit_ratios": server_metrics.cache_ratios() if server_metrics is not None else {},
     }
 
-@app.post("/cache/clear")
-async def clear_cache():
-    """Vide le cache"""
-    prediction_cache.clear()
-    last_updated.clear()
-    logger.info("Cache vidé manuellement")
-    return {"status": "cleared", "message": "Cache vidé avec succès"}
 
-# Endpoint pour les statistiques de trading
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Exposition Prometheus (latences par route/étape, requêtes en vol, caches, lag event loop)."""
+    from fastapi.responses import PlainTextResponse
+
+    if server_metrics is None:
+        raise HTTPException(status_code=503, detail="server_metrics indisponible")
+    return PlainTextResponse(server_metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+def _require_admin(request: Request) -> None:
+    """Accès admin : en-tête X-Admin-Token == AI_ADMIN_TOKEN ; sans token configuré, loopback uniquement."""
+    import hmac
+
+    expected = (os.getenv("AI_ADMIN_TOKEN") or "").strip()
+    if expected:
+        provided = (request.headers.get("x-admin-token") or "").strip()
+        if provided and hmac.compare_digest(provided, expected):
+            return
+        raise HTTPException(status_code=403, detail="admin token requis (X-Admin-Token)")
+    client = request.client.host if request.client else ""
+    if client not in ("127.0.0.1", "::1", "localhost", "testclient"):
+        raise HTTPException(status_code=403, detail="AI_ADMIN_TOKEN non configuré — accès admin limité au loopback")
+
+
+@app.post("/admin/profile")
+async def admin_profile(request: Request, seconds: float = 10.0, interval_ms: float = 5.0, format: str = "collapsed"):
+    """
+    Échantillonne toutes les threads pendant `seconds` (max 120) puis renvoie les piles
+    au format collapsed (flamegraph.pl / speedscope) ou un résumé JSON (format=json).
+    """
+    _require_admin(request)
+    if not LIVE_PROFILER_AVAILABLE:
+        raise HTTPException(status_code=503, detail="live_profiler indisponible")
+    seconds = max(0.1, min(float(seconds), 120.0))
+    try:
+        profiler = start_profiler(seconds, interval=max(1.0, float(interval_ms)) / 1000.0)
+    except RuntimeError:
+        raise HTTPException(status_code=409, detail="profilage déjà en cours")
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        await asyncio.to_thread(profiler.stop)
+    logger.info("[PROFILE] %.1fs — %s échantillons", seconds, profiler.summary(top=0)["samples"])
+    if format == "json":
+        return profiler.summary()
+    from fastapi.responses import PlainTextResponse
+
+    return PlainTextResponse(profiler.collapsed())
+
+
+@app.get("/admin/profile")
+async def admin_profile_last(request: Request, format: str = "json"):
+    """Résultat du dernier profilage (consultable après un timeout client)."""
+    _require_admin(request)
+    profiler = get_profiler() if LIVE_PROFILER_AVAILABLE else None
+    if profiler is None:
+        raise HTTPException(status_code=404, detail="aucun profilage")
+    if format == "collapsed":
+        from fastapi.responses import PlainTextResponse
+
+        return PlainTextResponse(profiler.collapsed())
+    return {"running": profiler.running, **profiler.summary()}
+
+
+@app.post("/admin/trace/{symbol}")
+async def admin_trace_arm(request: Request, symbol: str, max_traces: int = 20, ttl_sec: float = 300.0):
+    """Arme le traçage des spans (enrichisseurs, gates, décision) pour les prochaines requêtes de `symbol`."""
+    _require_admin(request)
+    if not LIVE_PROFILER_AVAILABLE:
+        raise HTTPException(status_code=503, detail="live_profiler indisponible")
+    return get_tracer().arm(symbol, max_traces=min(int(max_traces), 200), ttl_sec=min(float(ttl_sec), 3600.0))
+
+
+@app.get("/admin/trace")
+async def admin_trace_results(request: Request, limit: int = 20):
+    _require_admin(request)
+    if not LIVE_PROFILER_AVAILABLE:
+        raise HTTPException(status_code=503, detail="live_profiler indisponible")
+    tracer = get_tracer()
+    return {**tracer.status(), "results": list(tracer.traces)[-max(1, int(limit)):]}
+
+
+@app.delete("/admin/trace")
+async def admin_trace_disarm(request: Request):
+    _require_admin(request)
+    if LIVE_PROFILER_AVAILABLE:
+        get_tracer().disarm()
+    return {"armed": False}
+
+@app.post("/cache/clear")
+async def clear_cache():
+    """Vide le cache"""
+    prediction_cache.clear()
+    last_updated.clear()
+    logger.info("Cache vidé manuellement")
+    return {"status": "cleared", "message": "Cache vidé avec succès"}
+
+# Endpoint pour les statistiques de trading
 @app.get("/stats/{symbol}")
 async def get_symbol_stats(symbol: str, days: int = 7):
     """Récupère les statistiques de trading pour un symbole"""
@@ -19359,6 +20187,7 @@ async def monitoring_dashboard(symbols: Optional[str] = None, limit: int = 100):
         - symbols: Filtre par symboles (séparés par virgules), ex: "Volatility 75 Index,Boom 300 Index"
         - limit: Nombre maximum de trades récents à analyser (défaut: 100)
     """
+    latency = server_metrics.dashboard() if server_metrics is not None else {}
     if not DB_AVAILABLE:
         return {
             "error": "Service de monitoring non disponible - DATABASE_URL non configurée",
@@ -19366,7 +20195,8 @@ async def monitoring_dashboard(symbols: Optional[str] = None, limit: int = 100):
             "pnl_total": 0,
             "pnl_par_symbole": {},
             "objectif_progress": 0,
-            "alertes": ["Base de données non disponible"]
+            "alertes": ["Base de données non disponible"],
+            "server_metrics": latency,
         }
     
     try:
@@ -19409,6 +20239,7 @@ async def monitoring_dashboard(symbols: Optional[str] = None, limit: int = 100):
                 "objectif_progress": 0.0,
                 "recent_trades": [],
                 "alertes": ["Aucune donnée de trading disponible"],
+                "server_metrics": latency,
                 "timestamp": datetime.now().isoformat()
             }
         
@@ -19487,6 +20318,7 @@ async def monitoring_dashboard(symbols: Optional[str] = None, limit: int = 100):
             "objectif_quotidien": objectif_quotidien,
             "recent_trades": recent_trades,
             "alertes": alertes,
+            "server_metrics": latency,
             "timestamp": datetime.now().isoformat()
         }
         
@@ -19696,41 +20528,27 @@ async def get_market_sentiment(symbol: str, timeframe: str = "H1"):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/indicators/volume_profile/{symbol}")
-async def get_volume_profile(symbol: str, timeframe: str = "H1", num_bins: int = 20):
-    """Récupère le profil de volume pour un symbole"""
+async def get_volume_profile(symbol: str, timeframe: str = "H1", num_bins: int = 20, days: int = 0):
+    """
+    Profil de volume pour un symbole, lu depuis l'histogramme en cache.
+    days=0 : session UTC courante ; days=N : composite des N dernières sessions.
+    """
     try:
-        if not AI_INDICATORS_AVAILABLE:
-            raise HTTPException(status_code=503, detail="Module ai_indicators non disponible")
-        
-        if not mt5_initialized:
-            raise HTTPException(status_code=503, detail="MT5 non initialisé")
-        
-        tf_map = {
-            "M1": mt5.TIMEFRAME_M1,
-            "M5": mt5.TIMEFRAME_M5,
-            "M15": mt5.TIMEFRAME_M15,
-            "H1": mt5.TIMEFRAME_H1,
-            "H4": mt5.TIMEFRAME_H4,
-            "D1": mt5.TIMEFRAME_D1
-        }
-        
-        tf = tf_map.get(timeframe, mt5.TIMEFRAME_H1)
-        rates = mt5.copy_rates_from_pos(symbol, tf, 0, 500)
-        
-        if rates is None or len(rates) == 0:
+        if not VOLUME_PROFILE_AVAILABLE:
+            raise HTTPException(status_code=503, detail="Module volume_profile non disponible")
+        timeframe = timeframe.upper()
+        # Clé résolue : celle sous laquelle l'upload des bougies MT5 alimente le registre
+        sym = _resolve_symbol(symbol) or symbol
+        df = _indicator_frame(sym, timeframe, 500)
+        if df is None:
             raise HTTPException(status_code=404, detail="Aucune donnée disponible")
-        
-        df = pd.DataFrame(rates)
-        df['time'] = pd.to_datetime(df['time'], unit='s')
-        
-        # Calculer le profil de volume
-        cache_key = f"{symbol}_{timeframe}"
-        if cache_key not in indicators_cache:
-            indicators_cache[cache_key] = AdvancedIndicators(symbol, timeframe)
-        
-        analyzer = indicators_cache[cache_key]
-        volume_profile = analyzer.calculate_volume_profile(df, num_bins)
-        
+        profile_registry.sync_frame(sym, timeframe, df)
+        volume_profile = profile_registry.profile(
+            sym, timeframe, days=max(0, days) or None, num_bins=max(1, min(num_bins, 200))
+        )
+        if not volume_profile:
+            raise HTTPException(status_code=404, detail="Aucune bougie clôturée pour le profil")
+
         return {
             "symbol": symbol,
             "timeframe": timeframe,
@@ -20263,6 +21081,29 @@ async def get_fibonacci_levels(
         logger.error(f"Erreur dans get_fibonacci_levels: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Erreur lors du calcul des niveaux de Fibonacci: {str(e)}")
 
+def _indicator_frame(symbol: str, timeframe: str, count: int) -> Optional[pd.DataFrame]:
+    """Bougies pour les index incrémentaux (zones, profils) : upload MT5 en cache, sinon get_market_data."""
+    frames = _mt5_candles_cache.get(symbol) or {}
+    df = frames.get(timeframe) if hasattr(frames, "get") else None
+    if df is not None and len(df) >= 30:
+        return df
+    try:
+        df = get_market_data(symbol, timeframe, count)
+    except Exception as e:
+        logger.debug(f"[INDICATORS] données {symbol} {timeframe}: {e}")
+        return None
+    return df if df is not None and len(df) >= 30 else None
+
+
+def _synced_zone_index(symbol: str, timeframe: str, count: int):
+    """Index (symbole, TF) à jour des dernières bougies clôturées + dernier prix."""
+    df = _indicator_frame(symbol, timeframe, count)
+    if df is None:
+        raise HTTPException(status_code=404, detail=f"Aucune donnée disponible pour {symbol}")
+    idx = zone_registry.sync_frame(symbol, timeframe, df)
+    return idx, float(df["close"].iloc[-1])
+
+
 @app.get("/indicators/order-blocks/{symbol}")
 async def get_order_blocks(
     symbol: str,
@@ -20282,23 +21123,25 @@ async def get_order_blocks(
     Returns:
         Liste des blocs d'ordre détectés
     """
+    if not ZONE_INDEX_AVAILABLE:
+        raise HTTPException(status_code=503, detail="zone_index indisponible")
     try:
         # Valider les paramètres
         lookback = min(max(20, lookback), 200)  # Limiter entre 20 et 200
         min_strength = min(max(0.1, min_strength), 1.0)  # Limiter entre 0.1 et 1.0
-        
-        # Récupérer les données historiques
-        df = get_historical_data(symbol, timeframe, lookback + 10)  # Prendre quelques bougies supplémentaires
-        if df.empty:
-            raise HTTPException(status_code=404, detail=f"Aucune donnée disponible pour {symbol}")
-        
-        # Initialiser l'analyseur d'indicateurs
-        from python.ai_indicators import AdvancedIndicators
-        analyzer = AdvancedIndicators(symbol, timeframe)
-        
-        # Détecter les blocs d'ordre
-        blocks = analyzer.detect_order_blocks(df, lookback, min_strength)
-        
+        timeframe = (timeframe or "H4").upper()
+
+        # Index persistant (clé résolue, comme l'upload des bougies) : seules les bougies
+        # clôturées depuis le dernier appel sont traitées
+        sym = _resolve_symbol(symbol) or symbol
+        idx, price = _synced_zone_index(sym, timeframe, max(300, lookback + 10))
+        recent = idx.bars - lookback
+        blocks = [
+            z.to_dict(price, idx.atr)
+            for z in sorted(idx.zones(OB_KINDS), key=lambda z: z.created_bar, reverse=True)
+            if z.strength >= min_strength and z.created_bar >= recent
+        ]
+
         return {
             "symbol": symbol,
             "timeframe": timeframe,
@@ -20322,33 +21165,30 @@ async def get_liquidity_zones(
     volume_filter: bool = True
 ):
     """
-    Identifie les zones de liquidité basées sur le volume et le profil de prix.
+    Identifie les zones de liquidité (swing highs/lows non balayés) les plus proches du prix.
     
     Args:
         symbol: Symbole du marché
         timeframe: Période temporelle (M1, M5, M15, H1, H4, D1)
         num_zones: Nombre de zones de liquidité à identifier (1-10)
-        volume_filter: Si True, utilise le volume pour pondérer les zones
+        volume_filter: Conservé pour compatibilité (l'index classe par distance puis force)
         
     Returns:
         Liste des zones de liquidité identifiées
     """
+    if not ZONE_INDEX_AVAILABLE:
+        raise HTTPException(status_code=503, detail="zone_index indisponible")
     try:
         # Valider les paramètres
         num_zones = min(max(1, num_zones), 10)  # Limiter entre 1 et 10
-        
-        # Récupérer les données historiques
-        df = get_historical_data(symbol, timeframe, 200)  # Prendre assez de données pour une analyse significative
-        if df.empty:
-            raise HTTPException(status_code=404, detail=f"Aucune donnée disponible pour {symbol}")
-        
-        # Initialiser l'analyseur d'indicateurs
-        from python.ai_indicators import AdvancedIndicators
-        analyzer = AdvancedIndicators(symbol, timeframe)
-        
-        # Identifier les zones de liquidité
-        zones = analyzer.identify_liquidity_zones(df, num_zones, volume_filter)
-        
+        timeframe = (timeframe or "H1").upper()
+
+        sym = _resolve_symbol(symbol) or symbol
+        idx, price = _synced_zone_index(sym, timeframe, 300)
+        live = idx.zones(LIQ_KINDS)
+        live.sort(key=lambda z: (z.distance(price), -z.strength))
+        zones = [z.to_dict(price, idx.atr) for z in live[:num_zones]]
+
         return {
             "symbol": symbol,
             "timeframe": timeframe,
@@ -20364,6 +21204,35 @@ async def get_liquidity_zones(
         logger.error(f"Erreur dans get_liquidity_zones: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Erreur lors de l'identification des zones de liquidité: {str(e)}")
 
+@app.get("/zones/{symbol}/near")
+async def get_zones_near_price(
+    symbol: str,
+    timeframe: str = "M15",
+    atr_mult: float = Query(1.0, ge=0.0, le=20.0),
+    price: Optional[float] = None,
+    kinds: Optional[str] = Query(None, description="ob_bull,ob_bear,liq_high,liq_low"),
+    include_mitigated: bool = True,
+):
+    """Zones ouvertes à moins de atr_mult × ATR du prix (requête bisect sur l'index, sans rescan)."""
+    if not ZONE_INDEX_AVAILABLE:
+        raise HTTPException(status_code=503, detail="zone_index indisponible")
+    sym = _resolve_symbol(symbol) or symbol
+    timeframe = (timeframe or "M15").upper()
+    idx, last = _synced_zone_index(sym, timeframe, 300)
+    px = float(price) if price else last
+    wanted = [k.strip() for k in kinds.split(",") if k.strip()] if kinds else None
+    zones = idx.near(px, atr_mult, kinds=wanted, include_mitigated=include_mitigated)
+    return {
+        "ok": True,
+        "symbol": sym,
+        "timeframe": timeframe,
+        "price": px,
+        "atr": idx.atr,
+        "atr_mult": atr_mult,
+        "zones": [z.to_dict(px, idx.atr) for z in zones],
+        "index": idx.stats(),
+    }
+
 @app.get("/indicators/market-profile/{symbol}")
 async def get_market_profile_analysis(
     symbol: str,
@@ -20387,30 +21256,35 @@ async def get_market_profile_analysis(
         # Valider les paramètres
         value_area_percent = min(max(0.5, value_area_percent), 0.9)  # Limiter entre 0.5 et 0.9
         
-        # Déterminer le nombre de bougies à récupérer en fonction de la période
-        if period == "D":
-            days = 30
-        elif period == "W":
-            days = 180
-        elif period == "M":
-            days = 365
-        else:
-            days = 30  # Par défaut, 1 mois
-        
-        # Récupérer les données historiques
-        df = get_historical_data(symbol, timeframe, days * 24)  # Estimation grossière
-        if df.empty:
+        if not VOLUME_PROFILE_AVAILABLE:
+            raise HTTPException(status_code=503, detail="Module volume_profile non disponible")
+        period = period.upper() if period.upper() in ("D", "W", "M") else "D"
+        timeframe = timeframe.upper()
+
+        # Bougies nécessaires à la première synchro ; ensuite seules les nouvelles bougies sont ajoutées
+        days = {"D": 30, "W": 180, "M": 365}[period]
+        per_day = {"M1": 1440, "M5": 288, "M15": 96, "M30": 48, "H1": 24, "H4": 6}.get(timeframe, 1)
+        sym = _resolve_symbol(symbol) or symbol  # clé du registre alimenté par l'upload MT5
+        df = _indicator_frame(sym, timeframe, min(days * per_day, 5000))
+        if df is None:
             raise HTTPException(status_code=404, detail=f"Aucune donnée disponible pour {symbol}")
-        
-        # Initialiser l'analyseur d'indicateurs
-        from python.ai_indicators import AdvancedIndicators
-        analyzer = AdvancedIndicators(symbol, timeframe)
-        
-        # Calculer le profil de marché
-        profile = analyzer.calculate_market_profile(df, period, value_area_percent)
-        
+        profile_registry.sync_frame(sym, timeframe, df)
+
+        # TPO (temps passé au prix) + volume, session/composite courant de la période
+        profile = profile_registry.profile(
+            sym, timeframe, period=period, value_area_pct=value_area_percent, use_tpo=True
+        )
         if not profile:
             raise HTTPException(status_code=400, detail="Impossible de calculer le profil de marché")
+        volume = profile_registry.profile(sym, timeframe, period=period, value_area_pct=value_area_percent)
+        profile = {
+            **profile,
+            "volume_poc": volume["poc"],
+            "volume_vah": volume["vah"],
+            "volume_val": volume["val"],
+            "hvn": volume["hvn"],
+            "lvn": volume["lvn"],
+        }
         
         return {
             "symbol": symbol,
@@ -20427,6 +21301,73 @@ async def get_market_profile_analysis(
         logger.error(f"Erreur dans get_market_profile_analysis: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Erreur lors du calcul du profil de marché: {str(e)}")
 
+# Volatilité GARCH/EWMA : état persistant, ré-estimation planifiée, lecture O(1)
+VOLATILITY_STATE_FILE = DATA_DIR / "volatility_state.json"
+_volatility_refit_task: Optional[asyncio.Task] = None
+
+
+async def _volatility_refit_loop(interval_sec: int = 900) -> None:
+    """Ré-estime les paramètres GARCH/EWMA périmés (thread) puis sauvegarde l'état."""
+    while True:
+        await asyncio.sleep(max(60, int(interval_sec)))
+        try:
+            refitted = await asyncio.to_thread(volatility_engine.refit_stale, float(interval_sec))
+            await asyncio.to_thread(volatility_engine.save, VOLATILITY_STATE_FILE)
+            if refitted:
+                logger.info(f"[VOL] ré-estimation GARCH: {', '.join(refitted)}")
+        except Exception as e:
+            logger.warning(f"⚠️ volatility refit loop: {e}")
+
+
+def _volatility_sync_cached(symbol: str, timeframe: str) -> None:
+    """Rattrape les bougies uploadées (éventuellement sur un autre worker) ; sync_frame est incrémental."""
+    frames = _mt5_candles_cache.get(symbol) or {}
+    df = frames.get(timeframe) if hasattr(frames, "get") else None
+    if df is None or len(df) == 0:
+        return
+    try:
+        volatility_engine.sync_frame(symbol, timeframe, df)
+    except Exception as e:
+        logger.debug(f"[VOL] sync {symbol} {timeframe}: {e}")
+
+
+def _volatility_snapshot(symbol: str, timeframe: str = AI_VOLATILITY_TIMEFRAME, horizon: int = 1) -> Optional[Dict[str, Any]]:
+    """Prévision de volatilité depuis le cache de bougies (pas de fetch) — None si aucune bougie n'a été uploadée."""
+    if not VOLATILITY_ENGINE_AVAILABLE:
+        return None
+    _volatility_sync_cached(symbol, timeframe)
+    return volatility_engine.forecast(symbol, timeframe, horizon)
+
+
+@app.get("/volatility/stats")
+async def get_volatility_stats():
+    """États GARCH/EWMA chargés et nombre de ré-estimations."""
+    if not VOLATILITY_ENGINE_AVAILABLE:
+        raise HTTPException(status_code=503, detail="Module volatility_engine non disponible")
+    return volatility_engine.stats()
+
+
+@app.get("/volatility/{symbol}")
+async def get_volatility_forecast(symbol: str, timeframe: str = AI_VOLATILITY_TIMEFRAME, horizon: int = 1):
+    """
+    Prévision de volatilité GARCH(1,1)/EWMA (mêmes clés que GARCHVolatilityAnalyzer.get_volatility_signal).
+    L'état est resynchronisé à chaque requête depuis les bougies en cache (uploads MT5 reçus
+    par n'importe quel worker) ou get_market_data ; sync_frame n'ajoute que les nouvelles clôtures.
+    """
+    if not VOLATILITY_ENGINE_AVAILABLE:
+        raise HTTPException(status_code=503, detail="Module volatility_engine non disponible")
+    symbol = _resolve_symbol(symbol) or symbol
+    timeframe = timeframe.upper()
+    df = await asyncio.to_thread(_indicator_frame, symbol, timeframe, 1000)
+    if df is not None:
+        await asyncio.to_thread(volatility_engine.sync_frame, symbol, timeframe, df)
+    elif not volatility_engine.has(symbol, timeframe):
+        raise HTTPException(status_code=404, detail=f"Aucune donnée disponible pour {symbol}")
+    fc = volatility_engine.forecast(symbol, timeframe, max(1, min(horizon, 500)))
+    if fc is None:
+        raise HTTPException(status_code=404, detail=f"Historique insuffisant pour {symbol} {timeframe}")
+    return {"symbol": symbol, "timeframe": timeframe, "analysis_type": "GARCH_Volatility", **fc}
+
 # ==================== FIN INDICATEURS TECHNIQUES AVANCÉS ====================
 
 # ==================== MARKET STATE ENDPOINT ====================
@@ -20509,6 +21450,10 @@ async def get_market_state(symbol: str, timeframe: str = "M1"):
 
 # ==================== AUTOSCAN ENDPOINTS ====================
 
+# Confiance ML au-delà de laquelle un signal AutoScan de sens opposé est écarté
+_AUTOSCAN_ML_VETO_CONFIDENCE = float(os.getenv("AUTOSCAN_ML_VETO_CONFIDENCE", "0.6"))
+
+
 @app.get("/autoscan/signals")
 async def get_autoscan_signals(symbol: Optional[str] = None):
     """
@@ -20526,11 +21471,15 @@ async def get_autoscan_signals(symbol: Optional[str] = None):
                     "stop_loss": float,
                     "take_profit": float,
                     "confidence": float (0.0-1.0),
-                    "reason": "..."
+                    "reason": "...",
+                    "ml_action": "BUY" | "SELL" | "NEUTRAL" | null,
+                    "ml_confidence": float | null
                 }
             ]
         }
     }
+    Le score ML est calculé pour tous les symboles en un lot (_ml_predict_batch) ; un signal
+    contredit par le modèle au-delà de AUTOSCAN_ML_VETO_CONFIDENCE est écarté.
     """
     try:
         signals = []
@@ -20555,6 +21504,10 @@ async def get_autoscan_signals(symbol: Optional[str] = None):
         if not symbols_to_scan:
             # Symboles par défaut pour Boom/Crash
             symbols_to_scan = ["Boom 1000 Index", "Crash 1000 Index"]
+
+        # Score ML de tous les symboles scannés en un seul lot (une matrice, un appel par modèle)
+        ml_results, ml_timing = await asyncio.to_thread(_ml_predict_batch, [(s, "M1") for s in symbols_to_scan])
+        ml_by_symbol = {res["symbol"]: res for res in ml_results}
         
         for sym in symbols_to_scan:
             try:
@@ -20621,6 +21574,14 @@ async def get_autoscan_signals(symbol: Optional[str] = None):
                             confidence = 0.65
                             reason = "Volatilité Baissier"
                 
+                # Signal contredit par un modèle ML confiant : écarté
+                ml = ml_by_symbol.get(sym) or {}
+                if (action and ml.get("ml_available") and ml["action"] in ("BUY", "SELL") and ml["action"] != action
+                        and ml["confidence"] >= _AUTOSCAN_ML_VETO_CONFIDENCE):
+                    logger.info(f"AutoScan: {sym} {action} ({reason}) écarté, ML {ml['action']} "
+                                f"(confiance: {ml['confidence']*100:.0f}%)")
+                    action = None
+
                 # Si un signal a été détecté, créer l'entrée
                 if action and confidence >= 0.55:  # Seuil minimum de confiance
                     # Calculer stop loss et take profit basés sur ATR
@@ -20640,7 +21601,9 @@ async def get_autoscan_signals(symbol: Optional[str] = None):
                         "stop_loss": round(stop_loss, 5),
                         "take_profit": round(take_profit, 5),
                         "confidence": round(confidence, 2),
-                        "reason": reason
+                        "reason": reason,
+                        "ml_action": ml.get("action") if ml.get("ml_available") else None,
+                        "ml_confidence": ml.get("confidence") if ml.get("ml_available") else None,
                     }
                     signals.append(signal)
                     logger.info(f"AutoScan: Signal détecté pour {sym} - {action} (confiance: {confidence*100:.0f}%)")
@@ -20656,7 +21619,8 @@ async def get_autoscan_signals(symbol: Optional[str] = None):
                 "signals": signals
             },
             "timestamp": datetime.now(timezone.utc).isoformat(),
-            "count": len(signals)
+            "count": len(signals),
+            "ml_timing": ml_timing,
         }
         
     except Exception as e:
@@ -21594,6 +22558,7 @@ async def update_prediction_with_feedback(feedback: dict) -> dict:
 # PONT OLLAMA LOCAL - Analyse approfondie par LLM local
 # =============================================================================
 
+@traced()
 def _call_ollama_local(prompt: str, model: str = "qwen3.5:4b", timeout: int = 30) -> Optional[str]:
     """Appelle le modèle Ollama local optimisé pour trading rapide (< 30s) avec fallback"""
     try:
@@ -22954,91 +23919,140 @@ async def get_session_bias(symbol: str = "XAUUSD"):  # noqa: F811
 # ---------------------------------------------------------------------------
 # Normalisation des symboles MT5 -> clé serveur
 # L'EA envoie _Symbol brut (BTCUSD, XAUUSD...), le bridge stocke le display name (BITCOIN, OR...)
+# Tables d'alias : symbol_mapper.symbol_registry (MT5, Deriv, TradingView, yfinance)
 # ---------------------------------------------------------------------------
-_SYMBOL_ALIASES: dict = {
-    # Crypto — conserver le symbole MT5 brut pour compatibilité TradeManager
-    "BTC-USD": "BTCUSD",  "BTC.X":   "BTCUSD",  "BITCOIN": "BTCUSD",
-    "ETH-USD": "ETHUSD",  "ETH.X":   "ETHUSD",  "ETHEREUM":"ETHUSD",
-    # Métaux & FX
-    "XAUUSD":  "XAUUSD",  "GOLD":    "XAUUSD",  "GC=F":    "XAUUSD",
-    "XAGUSD":  "ARGENT",  "SI=F":    "ARGENT",
-    "SOLUSD":  "SOLANA",  "SOL-USD": "SOLANA",
-    "BNBUSD":  "BNB",     "BNB-USD": "BNB",
-    "EURUSD":  "EURUSD",  "GBPUSD":  "GBPUSD",
-    # Boom/Crash Deriv — mapping Boom/Crash sans espaces → canonique MT5 avec espaces
-    "BOOM300INDEX": "BOOM 300 INDEX", "BOOM300": "BOOM 300 INDEX", "BOOM300N": "BOOM 300 INDEX",
-    "BOOM500INDEX": "BOOM 500 INDEX", "BOOM500": "BOOM 500 INDEX",
-    "BOOM600INDEX": "BOOM 600 INDEX", "BOOM600": "BOOM 600 INDEX",
-    "BOOM900INDEX": "BOOM 900 INDEX", "BOOM900": "BOOM 900 INDEX",
-    "BOOM1000INDEX": "BOOM 1000 INDEX", "BOOM1000": "BOOM 1000 INDEX",
-    "CRASH300INDEX": "CRASH 300 INDEX", "CRASH300": "CRASH 300 INDEX", "CRASH300N": "CRASH 300 INDEX",
-    "CRASH500INDEX": "CRASH 500 INDEX", "CRASH500": "CRASH 500 INDEX",
-    "CRASH600INDEX": "CRASH 600 INDEX", "CRASH600": "CRASH 600 INDEX",
-    "CRASH900INDEX": "CRASH 900 INDEX", "CRASH900": "CRASH 900 INDEX",
-    "CRASH1000INDEX": "CRASH 1000 INDEX", "CRASH1000": "CRASH 1000 INDEX",
-    # Noms MT5 avec espaces → clé UPPER
-    "BOOM 300 INDEX": "BOOM 300 INDEX", "BOOM 500 INDEX": "BOOM 500 INDEX",
-    "BOOM 600 INDEX": "BOOM 600 INDEX", "BOOM 900 INDEX": "BOOM 900 INDEX",
-    "BOOM 1000 INDEX": "BOOM 1000 INDEX",
-    "CRASH 300 INDEX": "CRASH 300 INDEX", "CRASH 500 INDEX": "CRASH 500 INDEX",
-    "CRASH 600 INDEX": "CRASH 600 INDEX", "CRASH 900 INDEX": "CRASH 900 INDEX",
-    "CRASH 1000 INDEX": "CRASH 1000 INDEX",
-}
 
 def _resolve_symbol(raw: str) -> str:
     """Résout un symbole MT5 brut vers la clé utilisée dans les stores serveur."""
-    if not raw:
-        return ""
+    return symbol_registry.resolve(raw).id
 
-    try:
-        from symbol_mapper import resolve_mt5_symbol, is_weltrade_symbol
-        if is_weltrade_symbol(raw):
-            return resolve_mt5_symbol(raw)
-    except ImportError:
-        pass
 
-    # Nettoyer et normaliser
-    up = raw.strip().upper().replace("=X", "").replace("=F", "").replace(" ", "")
+# ---------------------------------------------------------------------------
+# Pending order — stockage du signal TradingAgents pour l'EA MT5
+# ---------------------------------------------------------------------------
+_PENDING_ORDER_STORE: dict = _shared_store("pending_orders")
+_PENDING_ORDERS_FILE = _root_dir / "data" / "pending_orders.json"
+# Un verrou par symbole (plus de verrou global) ; entre workers, compare-and-set sur la version
+_pending_symbol_locks: Dict[str, asyncio.Lock] = {}
+_pending_save_task: Optional[asyncio.Task] = None
+_pending_save_dirty = False
+PENDING_ORDERS_SAVE_DELAY_SEC = 0.25
 
-    # Chercher dans alias
-    if up in _SYMBOL_ALIASES:
-        resolved = _SYMBOL_ALIASES[up]
-        # Normaliser la clé en UPPER pour cohérence store
-        return resolved.upper()
 
-    # Boom/Crash/Volatility → clé UPPER pour cohérence
-    up_with_spaces = raw.strip().upper()
-    for prefix in ("BOOM", "CRASH", "VOLATILITY"):
-        if up_with_spaces.startswith(prefix):
-            return up_with_spaces
+def _pending_lock(sym: str) -> asyncio.Lock:
+    lock = _pending_symbol_locks.get(sym)
+    if lock is None:
+        lock = _pending_symbol_locks.setdefault(sym, asyncio.Lock())
+    return lock
 
-    # Fallback
-    return raw.strip().upper() if any(c in raw.upper() for c in ["BOOM","CRASH","VOLAT"]) else raw.strip()
 
+def _pending_get_versioned(sym: str) -> Tuple[int, Optional[dict]]:
+    """(version, ordre) ; version 0 si absent ou sans backend d'état."""
+    if hasattr(_PENDING_ORDER_STORE, "get_versioned"):
+        return _PENDING_ORDER_STORE.get_versioned(sym)
+    return 0, _PENDING_ORDER_STORE.get(sym)
 
-# ---------------------------------------------------------------------------
-# Pending order — stockage du signal TradingAgents pour l'EA MT5
-# ---------------------------------------------------------------------------
-_PENDING_ORDER_STORE: dict = {}
-_pending_orders_lock = asyncio.Lock()
-_PENDING_ORDERS_FILE = _root_dir / "data" / "pending_orders.json"
 
-async def _pending_orders_save() -> None:
-    """Save pending orders to disk for persistence."""
+def _pending_store_cas(sym: str, expected_version: int, order: dict) -> Tuple[bool, int]:
+    if hasattr(_PENDING_ORDER_STORE, "compare_and_set"):
+        return _PENDING_ORDER_STORE.compare_and_set(sym, expected_version, order)
+    _PENDING_ORDER_STORE[sym] = order
+    return True, expected_version + 1
+
+
+def _pending_compare_and_set(sym: str, expected_version: int, order: dict) -> Tuple[bool, int]:
+    """Écrit l'ordre seulement si personne ne l'a modifié depuis expected_version."""
+    ok, version = _pending_store_cas(sym, expected_version, order)
+    if ok:
+        _schedule_pending_orders_save()
+    return ok, version
+
+
+async def _pending_compare_and_set_async(sym: str, expected_version: int, order: dict) -> Tuple[bool, int]:
+    """_pending_compare_and_set pour les handlers async : écriture hors boucle, sauvegarde planifiée sur la boucle."""
+    ok, version = await _state_write(_pending_store_cas, sym, expected_version, order)
+    if ok:
+        _schedule_pending_orders_save()
+    return ok, version
+
+
+async def _pending_order_update(sym: str, mutate: Callable[[dict], bool]) -> Tuple[Optional[dict], int, bool]:
+    """
+    Read-copy-update d'un ordre sous le verrou de son symbole.
+    mutate(copie) retourne False pour ne rien écrire. Retourne (ordre, version, écrit).
+    """
+    async with _pending_lock(sym):
+        while True:
+            version, current = _pending_get_versioned(sym)
+            if current is None:
+                return None, version, False
+            order = copy.deepcopy(current)
+            if not mutate(order):
+                return current, version, False
+            ok, new_version = await _pending_compare_and_set_async(sym, version, order)
+            if ok:
+                return order, new_version, True
+
+
+async def _pending_order_pop(sym: str) -> Optional[dict]:
+    """Retire un ordre ; un seul appelant (tous workers confondus) le récupère."""
+    async with _pending_lock(sym):
+        order = _PENDING_ORDER_STORE.get(sym)
+        if order is None:
+            return None
+        try:
+            await _state_write(_PENDING_ORDER_STORE.__delitem__, sym)
+        except KeyError:
+            return None
+    _schedule_pending_orders_save()
+    return order
+
+
+def _pending_orders_write() -> None:
+    """Écriture atomique du snapshot (fichier temporaire + os.replace)."""
     try:
         _PENDING_ORDERS_FILE.parent.mkdir(parents=True, exist_ok=True)
-        with open(_PENDING_ORDERS_FILE, "w") as f:
-            json.dump(_PENDING_ORDER_STORE, f, indent=2)
+        tmp = _PENDING_ORDERS_FILE.with_name(f"{_PENDING_ORDERS_FILE.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(dict(_PENDING_ORDER_STORE.items()), f, indent=2)
+        os.replace(tmp, _PENDING_ORDERS_FILE)
     except Exception as e:
         logger.error(f"[PendingOrders] Save error: {e}")
 
+
+async def _pending_orders_save() -> None:
+    """Save pending orders to disk for persistence."""
+    await asyncio.to_thread(_pending_orders_write)
+
+
+async def _pending_orders_flush() -> None:
+    global _pending_save_dirty
+    await asyncio.sleep(PENDING_ORDERS_SAVE_DELAY_SEC)
+    while _pending_save_dirty:
+        _pending_save_dirty = False
+        await _pending_orders_save()
+
+
+def _schedule_pending_orders_save() -> None:
+    """Persistance différée et regroupée, hors des sections critiques."""
+    global _pending_save_task, _pending_save_dirty
+    _pending_save_dirty = True
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:  # thread de fond (BackgroundTasks sync) : écriture directe
+        _pending_save_dirty = False
+        _pending_orders_write()
+        return
+    if _pending_save_task is None or _pending_save_task.done():
+        _pending_save_task = loop.create_task(_pending_orders_flush())
+
 async def _pending_orders_load() -> None:
     """Load pending orders from disk on startup."""
-    global _PENDING_ORDER_STORE
     try:
-        if _PENDING_ORDERS_FILE.exists():
+        # Store partagé : seul le premier worker démarré recharge le fichier
+        if _PENDING_ORDERS_FILE.exists() and not len(_PENDING_ORDER_STORE):
             with open(_PENDING_ORDERS_FILE, "r") as f:
-                _PENDING_ORDER_STORE = json.load(f)
+                _PENDING_ORDER_STORE.update(json.load(f))
                 logger.info(f"[PendingOrders] Loaded {len(_PENDING_ORDER_STORE)} orders from disk")
     except Exception as e:
         logger.warning(f"[PendingOrders] Load error: {e}")
@@ -23133,7 +24147,7 @@ async def gom_poll_targets(max_age_sec: int = Query(120, ge=10, le=600)):
 
 
 # Stockage du dernier verdict GOM par symbole (mis à jour par /gom-verdict ou /pending-order)
-_GOM_VERDICT_STORE: dict = {}
+_GOM_VERDICT_STORE: dict = _shared_store("gom_verdicts")
 _GOM_MTF_CACHE: dict = {}  # cache_key -> {"ts": datetime, "fields": dict}
 _GOM_MTF_CACHE_TTL_SEC = 45
 
@@ -23282,13 +24296,15 @@ async def set_pending_order(payload: PendingOrderPayload):
         logger.warning(f"[PendingOrder] {sym} bloque Weltrade heure: {wt_reason}")
         raise HTTPException(status_code=403, detail=wt_reason)
 
-    cog_ok, cog_reason = _check_cognition_gate(sym, direction)
+    # Un seul contexte de features pour les deux gates (mêmes bougies, forecast calculé une fois)
+    feature_ctx = _gom_feature_context(sym)
+    cog_ok, cog_reason = _check_cognition_gate(sym, direction, ctx=feature_ctx)
     if not cog_ok:
         from fastapi import HTTPException
         logger.warning(f"[PendingOrder] {sym} bloque cognition: {cog_reason}")
         raise HTTPException(status_code=403, detail=cog_reason)
 
-    prob_ok, prob_reason = _check_probability_gate(sym, direction)
+    prob_ok, prob_reason = _check_probability_gate(sym, direction, ctx=feature_ctx)
     if not prob_ok:
         from fastapi import HTTPException
         logger.warning(f"[PendingOrder] {sym} bloque probabilité: {prob_reason}")
@@ -23296,13 +24312,13 @@ async def set_pending_order(payload: PendingOrderPayload):
 
     # Mise à jour store verdict GOM si fourni dans ce payload
     if payload.gom_verdict:
-        _GOM_VERDICT_STORE[sym] = {
+        await _state_write(_GOM_VERDICT_STORE.__setitem__, sym, {
             "verdict":    payload.gom_verdict.upper(),
             "score_buy":  payload.gom_score_buy  or 0.0,
             "score_sell": payload.gom_score_sell or 0.0,
             "spike_pct":  payload.gom_spike_pct  or 0.0,
             "timestamp":  datetime.now(timezone.utc).isoformat(),
-        }
+        })
 
     reasoning_enriched = (payload.reasoning or "") + (
         f" | GOM={gom_check['gom_verdict']} ({gom_check['gom_action']})" +
@@ -23335,7 +24351,7 @@ async def set_pending_order(payload: PendingOrderPayload):
     # Dedup gate — rejeter si un ordre actif existe déjà pour ce symbole
     # Exception : source=pipeline a priorité et remplace toujours l'ordre GOM auto
     _incoming_source = (payload.source or "").lower()
-    _existing = _PENDING_ORDER_STORE.get(sym)
+    _existing_version, _existing = _pending_get_versioned(sym)
     if _existing and _existing.get("status") in ("ready", "executing"):
         _existing_source = (_existing.get("source") or "").lower()
         _age_s = (datetime.now(timezone.utc) - datetime.fromisoformat(_existing["timestamp"])).total_seconds() if _existing.get("timestamp") else 9999
@@ -23404,7 +24420,7 @@ async def set_pending_order(payload: PendingOrderPayload):
         except Exception as e:
             logger.warning(f"[SPIKE] Anticipation failed for {sym}: {e} (using original prices)")
 
-    _PENDING_ORDER_STORE[sym] = {
+    _new_order = {
         "symbol":         sym,
         "recommendation": direction,
         "action":         direction,
@@ -23427,6 +24443,11 @@ async def set_pending_order(payload: PendingOrderPayload):
         "spike_anticipation": _anticipation_applied,
         "anticipation_distance_pips": _anticipation_distance,
     }
+    # L'ordre a pu changer pendant la validation (autre EA / worker) : ne pas l'écraser à l'aveugle
+    _written, _order_version = await _pending_compare_and_set_async(sym, _existing_version, _new_order)
+    if not _written:
+        from fastapi import HTTPException
+        raise HTTPException(status_code=409, detail=f"{sym} pending order modified concurrently — retry")
     # Dès qu'un ordre pipeline est posté → activer cooldown GOM auto-trade immédiatement
     if _src == "pipeline":
         import time as _time
@@ -23439,6 +24460,7 @@ async def set_pending_order(payload: PendingOrderPayload):
         "ok": True,
         "symbol": sym,
         "order_id": sym,
+        "version": _order_version,
         "gom_action": gom_check["gom_action"],
         "gom_warning": gom_check["gom_warning"],
         "confidence_adjusted": final_conf,
@@ -23818,6 +24840,9 @@ def _lookup_gom_store(sym: str, store: dict) -> Optional[dict]:
         return None
     if sym in store:
         return store[sym]
+    sid = symbol_registry.resolve(sym).id
+    if sid in store:
+        return store[sid]
     sym_clean = sym.upper().replace(" ", "").replace("INDEX", "")
     for key, val in store.items():
         k_clean = str(key).upper().replace(" ", "").replace("INDEX", "")
@@ -23914,6 +24939,13 @@ def _fetch_gom_mtf_snapshot(mt5_symbol: str) -> dict:
 
 
 def _get_gom_mtf_snapshot(mt5_symbol: str, force_refresh: bool = False) -> dict:
+    # Cellules du tableau matérialisé (bougies uploadées) : pas d'aller-retour MT5 si M1..D1
+    # couverts et à jour (dernière bougie clôturée récente), sauf rafraîchissement forcé
+    if _gom_tableau_view is not None and not force_refresh:
+        fields = _gom_tableau_view.mtf_fields(mt5_symbol)
+        if all(f"tf_{lk}_dir" in fields for lk in ("m1", "m5", "m15", "h1", "h4", "d1")) and \
+                _gom_tableau_view.cells_fresh(mt5_symbol, ("M1", "M5", "M15", "H1", "H4", "D1"), _GOM_MTF_CACHE_TTL_SEC):
+            return fields
     key = _gom_mtf_cache_key(mt5_symbol)
     now = datetime.now(timezone.utc)
     cached = _GOM_MTF_CACHE.get(key)
@@ -23951,6 +24983,7 @@ def _apply_gom_mtf_snapshot(record: dict, mt5_symbol: str, fetch: bool = False)
         record["tf_global_dir"] = gd
 
 
+@traced()
 def _enrich_gom_mtf_from_mt5(record: dict, mt5_symbol: str, fetch: bool = True) -> None:
     """Complète M1..D1 depuis MT5 si Pine n'exporte que tf_global (comme TradeManager)."""
     _apply_gom_mtf_snapshot(record, mt5_symbol, fetch=fetch)
@@ -24233,6 +25266,7 @@ def _gom_verdict_record_from_payload(payload: GomVerdictPayload, enrich_mt5: boo
     return sym, record
 
 
+@traced()
 def _enrich_gom_record_reliability(sym: str, record: dict) -> None:
     """Fusionne proba setup RDS (prediction_outcomes) dans le verdict GOM."""
     if not AWS_RDS_AVAILABLE:
@@ -24264,6 +25298,9 @@ def _enrich_gom_record_reliability(sym: str, record: dict) -> None:
 
 def _sync_gom_tableau_from_verdict(sym: str, record: dict) -> None:
     """Met à jour _GOM_TABLEAU_STORE pour /gom-tableau-complete (format nested)."""
+    if _gom_tableau_view is not None:
+        _gom_tableau_view.on_verdict(sym, record)
+        return
     tf_map = {}
     for label in ("M1", "M5", "M15", "H1", "H4", "D1", "W1"):
         lk = label.lower()
@@ -24381,7 +25418,7 @@ def _maybe_promote_gom_to_pending_order(sym: str, record: dict) -> None:
             return
 
     direction = "BUY" if vnum > 0 else "SELL"
-    existing = _PENDING_ORDER_STORE.get(sym)
+    existing_version, existing = _pending_get_versioned(sym)
 
     # Ne pas écraser un ordre venant du pipeline (source != gom_tv_sync)
     # Le pipeline a la priorité : SL/TP calculés, execution_type correct
@@ -24424,7 +25461,7 @@ def _maybe_promote_gom_to_pending_order(sym: str, record: dict) -> None:
     auto_sl = round(price - sl_dist if direction == "BUY" else price + sl_dist, 5)
     auto_tp = round(price + tp_dist if direction == "BUY" else price - tp_dist, 5)
 
-    _PENDING_ORDER_STORE[sym] = {
+    auto_order = {
         "symbol": sym,
         "action": direction,
         "recommendation": direction,
@@ -24442,6 +25479,10 @@ def _maybe_promote_gom_to_pending_order(sym: str, record: dict) -> None:
         "timestamp": datetime.now(timezone.utc).isoformat(),
         "source": "gom_tv_sync",
     }
+    # Un ordre pipeline / executing arrivé entre-temps garde la priorité
+    if not _pending_compare_and_set(sym, existing_version, auto_order)[0]:
+        logger.info(f"[GomAutoTrade] {sym} — ordre modifié entre-temps → GOM skip")
+        return
     logger.info(
         f"[GomAutoTrade] pending-order {sym} {direction} vnum={vnum} "
         f"Q={quality:.0f}% C={coherence:.0f}%"
@@ -24469,12 +25510,34 @@ def _store_gom_verdict_payload_bg(payload: GomVerdictPayload) -> None:
         logger.error(f"[GomVerdict] background task error: {e}")
 
 
+def _emit_gom_verdict_change(sym: str, previous: Optional[dict], record: dict) -> None:
+    """Réveille les jobs autonomes abonnés (gom_sync) quand le verdict d'un symbole change."""
+    if not AUTONOMOUS_LOOPS_AVAILABLE:
+        return
+    prev_verdict = (previous or {}).get("verdict")
+    if prev_verdict != record.get("verdict"):
+        loops_manager.emit("verdict_change", symbol=sym, verdict=record.get("verdict"), previous=prev_verdict)
+
+
+def _gom_weltrade_wait_record() -> dict:
+    """Verdict WAIT forcé hors fenêtre Weltrade (04h-16h UTC)."""
+    return {
+        "verdict": "WAIT",
+        "verdict_num": 0,
+        "action": "WAIT",
+        "gate": "weltrade_hour",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    }
+
+
 def _store_gom_verdict_payload(payload: GomVerdictPayload) -> dict:
     sym, record = _gom_verdict_record_from_payload(payload)
     run_id = _persist_gom_path_prediction_rds(sym, record)
     if run_id:
         record["prediction_run_id"] = run_id
+    previous = _GOM_VERDICT_STORE.get(sym)
     _GOM_VERDICT_STORE[sym] = record
+    _emit_gom_verdict_change(sym, previous, record)
     _sync_gom_tableau_from_verdict(sym, record)
     _maybe_promote_gom_to_pending_order(sym, record)
     logger.info(
@@ -24505,13 +25568,7 @@ async def set_gom_verdict(payload: GomVerdictPayload, background_tasks: Backgrou
     if not wt_ok:
         utc_hour = datetime.now(timezone.utc).hour
         logger.info(f"[GOM-VERDICT] {sym} POST ignoré — hors fenêtre Weltrade ({utc_hour:02d}h UTC) → WAIT forcé dans store")
-        _GOM_VERDICT_STORE[sym] = {
-            "verdict": "WAIT",
-            "verdict_num": 0,
-            "action": "WAIT",
-            "gate": "weltrade_hour",
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-        }
+        await _state_write(_GOM_VERDICT_STORE.__setitem__, sym, _gom_weltrade_wait_record())
         return {
             "ok": True,
             "symbol": sym,
@@ -24523,7 +25580,9 @@ async def set_gom_verdict(payload: GomVerdictPayload, background_tasks: Backgrou
 
     # Stockage synchrone minimal — juste le strict nécessaire pour que le GET soit à jour
     sym_full, record = _gom_verdict_record_from_payload(payload, enrich_mt5=False)
-    _GOM_VERDICT_STORE[sym_full] = record
+    previous = _GOM_VERDICT_STORE.get(sym_full)
+    await _state_write(_GOM_VERDICT_STORE.__setitem__, sym_full, record)
+    _emit_gom_verdict_change(sym_full, previous, record)
 
     # Invalider le cache gom-kola-dashboard pour que SMC_Universal voie les données fraîches
     for chart_tf in ["M1", "M5", "M15", "H1", "H4", "D1"]:
@@ -24544,6 +25603,29 @@ async def set_gom_verdict(payload: GomVerdictPayload, background_tasks: Backgrou
     }
 
 
+def _autonomous_push_verdict(payload: Dict[str, Any]) -> bool:
+    """Push du poller GOM exécuté in-process (scheduler) : même traitement que POST /gom-verdict, sans HTTP."""
+    try:
+        model = GomVerdictPayload(**payload)
+        sym = _resolve_symbol(model.symbol)
+        if not _check_weltrade_hour_gate(sym)[0]:
+            _GOM_VERDICT_STORE[sym] = _gom_weltrade_wait_record()
+            return False
+        sym_full = _store_gom_verdict_payload(model)["symbol"]
+        for cache_key in [k for k in list(_gom_cache.keys()) if k.split(":")[0] == sym_full]:
+            _gom_cache.pop(cache_key, None)
+        return True
+    except Exception as e:
+        logger.error(f"[GOM-VERDICT] push in-process {payload.get('symbol')}: {e}")
+        return False
+
+
+if AUTONOMOUS_LOOPS_AVAILABLE:
+    if GOM_LIVE_CALCULATOR_AVAILABLE and _gom_live_calc:
+        _gom_live_calc.mt5_candles_cache = _mt5_candles_cache
+    loops_manager.bind(gom_calc=_gom_live_calc, push_verdict=_autonomous_push_verdict)
+
+
 @app.post("/gom-verdict/webhook")
 async def set_gom_verdict_webhook(request: Request):
     """Webhook TradingView — corps CSV Pine ou JSON."""
@@ -24552,7 +25634,7 @@ async def set_gom_verdict_webhook(request: Request):
     if not parsed:
         return {"ok": False, "error": "Invalid GOM alert body"}
     payload = GomVerdictPayload(**parsed)
-    return _store_gom_verdict_payload(payload)
+    return await _state_write(_store_gom_verdict_payload, payload)
 
 @app.post("/gom-prediction/bb-webhook")
 async def gom_prediction_bb_webhook(request: Request):
@@ -24578,14 +25660,14 @@ async def gom_prediction_bb_webhook(request: Request):
 
         # Stocker temporairement (clé: symbol + timeframe)
         cache_key = f"{symbol}_{timeframe}_pred_bb"
-        _GOM_VERDICT_STORE[cache_key] = {
+        await _state_write(_GOM_VERDICT_STORE.__setitem__, cache_key, {
             "pred_bb_mid": pred_data.get("MID", []),
             "pred_bb_up": pred_data.get("UP", []),
             "pred_bb_dn": pred_data.get("DN", []),
             "timestamp": datetime.now(timezone.utc).isoformat(),
             "symbol": symbol,
             "timeframe": timeframe,
-        }
+        })
 
         logger.info(f"[GOM-Pred] Stored BB predictions for {symbol} {timeframe}: {len(pred_data.get('MID', []))} points")
         return {"ok": True, "symbol": symbol, "points": len(pred_data.get("MID", [])), "message": "BB predictions stored"}
@@ -24906,16 +25988,19 @@ async def get_pending_order(symbol: str = "XAUUSD", peek: bool = False):
     peek=false (défaut) : verrouille en 'executing' au premier poll — anti-duplication MT5.
     """
     sym = _resolve_symbol(symbol)
-    order = _PENDING_ORDER_STORE.get(sym)
+    key = sym
+    order = _PENDING_ORDER_STORE.get(key)
     if not order:
-        order = _PENDING_ORDER_STORE.get(sym.upper())
+        key = sym.upper()
+        order = _PENDING_ORDER_STORE.get(key)
     if not order:
-        order = _PENDING_ORDER_STORE.get(sym.lower())
+        key = sym.lower()
+        order = _PENDING_ORDER_STORE.get(key)
     if not order:
         sym_clean = sym.upper().replace(" ","").replace("INDEX","")
         for k, v in _PENDING_ORDER_STORE.items():
             if k.upper().replace(" ","").replace("INDEX","") == sym_clean:
-                order = v
+                key, order = k, v
                 break
 
     if not order:
@@ -24923,17 +26008,25 @@ async def get_pending_order(symbol: str = "XAUUSD", peek: bool = False):
     if order.get("status", "ready") == "conflict_pending":
         return {"ok": False, "symbol": sym, "order": None, "message": "Ordre en attente résolution conflit TA/TV"}
 
+    version = _pending_get_versioned(key)[0]
     if peek:
-        return {"ok": True, "symbol": sym, "order": order}
+        return {"ok": True, "symbol": sym, "order": order, "version": version}
 
     # 🔒 ANTI-DUPLICATION : marquer executing au premier poll, mais continuer
     # à retourner l'ordre pour que l'EA XAUUSD puisse l'exécuter.
     # La suppression définitive se fait via /pending-order/executed (après trade MT5 réel).
     # Ne plus bloquer avec ok=false en executing — plusieurs EA pollent le même symbole.
     if order.get("status") == "ready":
-        order["status"] = "executing"
+        def _claim(o: dict) -> bool:
+            if o.get("status") != "ready":
+                return False
+            o["status"] = "executing"
+            return True
+        order, version, _ = await _pending_order_update(key, _claim)
+        if not order:
+            return {"ok": False, "symbol": sym, "order": None, "message": "Aucun ordre pending"}
 
-    return {"ok": True, "symbol": sym, "order": order}
+    return {"ok": True, "symbol": sym, "order": order, "version": version}
 
 
 @app.post("/pending-order/{symbol}/reset")
@@ -24943,23 +26036,26 @@ async def reset_pending_order_status(symbol: str):
     de nouveau proposé au TradeManager (ex : EA crashé avant d'avoir lu l'ordre).
     """
     sym = _resolve_symbol(symbol)
-    async with _pending_orders_lock:
-        order = _PENDING_ORDER_STORE.get(sym)
-        if not order:
-            # Chercher variantes
-            sym_clean = sym.upper().replace(" ","").replace("INDEX","")
-            for k, v in _PENDING_ORDER_STORE.items():
-                if k.upper().replace(" ","").replace("INDEX","") == sym_clean:
-                    order = v
-                    sym = k
-                    break
-        if not order:
-            return {"ok": False, "symbol": sym, "message": "Aucun ordre pending trouvé"}
-        prev = order.get("status")
-        order["status"] = "ready"
-        await _pending_orders_save()
-        logger.info(f"[PendingOrder] {sym} reset {prev} → ready")
-        return {"ok": True, "symbol": sym, "previous_status": prev, "new_status": "ready"}
+    if sym not in _PENDING_ORDER_STORE:
+        # Chercher variantes
+        sym_clean = sym.upper().replace(" ","").replace("INDEX","")
+        for k in list(_PENDING_ORDER_STORE.keys()):
+            if k.upper().replace(" ","").replace("INDEX","") == sym_clean:
+                sym = k
+                break
+    prev_box: Dict[str, Any] = {}
+
+    def _reset(o: dict) -> bool:
+        prev_box["status"] = o.get("status")
+        o["status"] = "ready"
+        return True
+
+    order, version, _ = await _pending_order_update(sym, _reset)
+    if not order:
+        return {"ok": False, "symbol": sym, "message": "Aucun ordre pending trouvé"}
+    prev = prev_box.get("status")
+    logger.info(f"[PendingOrder] {sym} reset {prev} → ready")
+    return {"ok": True, "symbol": sym, "previous_status": prev, "new_status": "ready", "version": version}
 
 
 @app.post("/pending-order/executed")
@@ -24970,12 +26066,12 @@ async def mark_pending_order_executed(payload: dict = Body(...)):
     """
     sym    = _resolve_symbol((payload.get("symbol") or "").strip().upper())
     ticket = payload.get("mt5_ticket")
-    order  = _PENDING_ORDER_STORE.pop(sym, None)
+    order  = await _pending_order_pop(sym)
     if not order:
         # Chercher avec variantes
         for k in list(_PENDING_ORDER_STORE.keys()):
             if k.upper().replace(" ","").replace("INDEX","") == sym.upper().replace(" ","").replace("INDEX",""):
-                order = _PENDING_ORDER_STORE.pop(k, None)
+                order = await _pending_order_pop(k)
                 break
     if order:
         logger.info(f"[PendingOrder] {sym} exécuté ticket={ticket} → supprimé du store")
@@ -25042,10 +26138,14 @@ async def get_trading_pause():
 async def resolve_pending_order(payload: dict = Body(...)):
     """Promeut un ordre CONFLICT_PENDING en ready — appelé par le bridge quand TV s'aligne."""
     sym = _resolve_symbol((payload.get("symbol") or "XAUUSD").strip().upper())
-    order = _PENDING_ORDER_STORE.get(sym)
+
+    def _resolve(o: dict) -> bool:
+        o["status"] = "ready"
+        return True
+
+    order, _, _ = await _pending_order_update(sym, _resolve)
     if not order:
         return {"ok": False, "symbol": sym, "message": "Aucun ordre pending"}
-    order["status"] = "ready"
     logger.info(f"[PendingOrder] {sym} conflit résolu → status=ready")
     return {"ok": True, "symbol": sym, "status": "ready"}
 
@@ -25090,7 +26190,7 @@ async def delete_approval(symbol: str):
 @app.delete("/pending-order")
 async def delete_pending_order(symbol: str = "XAUUSD"):
     sym = _resolve_symbol(symbol)
-    removed = _PENDING_ORDER_STORE.pop(sym, None)
+    removed = await _pending_order_pop(sym)
     return {"ok": True, "symbol": sym, "removed": removed is not None}
 
 
@@ -25108,6 +26208,10 @@ class PendingOrderUpdateBody(BaseModel):
         description="Source of update: server, ea_trailing, or tv_manual"
     )
     reason: Optional[str] = None
+    expected_version: Optional[int] = Field(
+        default=None,
+        description="Compare-and-set: rejected with version_conflict if the order changed since this version"
+    )
 
 class OrderSyncBody(BaseModel):
     """Sync SL/TP modifications from MT5 EA."""
@@ -25135,33 +26239,41 @@ async def update_pending_order_sltp(
         body: {stop_loss, take_profit, update_source, reason}
     """
     sym = _resolve_symbol(symbol)
-    async with _pending_orders_lock:
-        if sym not in _PENDING_ORDER_STORE:
-            return {"ok": False, "error": f"Order {sym} not found"}
-
-        order = _PENDING_ORDER_STORE[sym]
+    conflict: Dict[str, Any] = {}
+
+    def _apply(order: dict) -> bool:
+        conflict.clear()
+        if body.expected_version is not None:
+            current_version = _pending_get_versioned(sym)[0]
+            if current_version != body.expected_version:
+                conflict["version"] = current_version
+                return False
         updated = False
-
         if body.stop_loss is not None:
             order["stop_loss"] = body.stop_loss
             order["last_sl_update"] = time.time()
             order["sl_update_source"] = body.update_source
             updated = True
-
         if body.take_profit is not None:
             order["take_profit"] = body.take_profit
             order["last_tp_update"] = time.time()
             order["tp_update_source"] = body.update_source
             updated = True
+        return updated
 
-        if updated:
-            await _pending_orders_save()
-            logger.info(
-                f"[SLTPSync] Updated {sym}: SL={body.stop_loss} TP={body.take_profit} "
-                f"source={body.update_source}"
-            )
+    order, version, updated = await _pending_order_update(sym, _apply)
+    if order is None:
+        return {"ok": False, "error": f"Order {sym} not found"}
+    if conflict:
+        return {"ok": False, "error": "version_conflict", "version": conflict["version"], "order": order}
 
-        return {"ok": True, "updated": updated, "order": order}
+    if updated:
+        logger.info(
+            f"[SLTPSync] Updated {sym}: SL={body.stop_loss} TP={body.take_profit} "
+            f"source={body.update_source}"
+        )
+
+    return {"ok": True, "updated": updated, "version": version, "order": order}
 
 @app.post("/pending-order/{symbol}/sync")
 async def sync_order_from_ea(
@@ -25178,12 +26290,8 @@ async def sync_order_from_ea(
     Syncs MT5 ticket, current SL/TP, peak profit, and trailing state.
     """
     sym = _resolve_symbol(symbol)
-    async with _pending_orders_lock:
-        if sym not in _PENDING_ORDER_STORE:
-            return {"ok": False, "error": f"Order {sym} not found"}
-
-        order = _PENDING_ORDER_STORE[sym]
 
+    def _apply(order: dict) -> bool:
         # Update fields
         order["mt5_ticket"] = body.mt5_ticket
         order["stop_loss"] = body.current_stop_loss
@@ -25199,16 +26307,19 @@ async def sync_order_from_ea(
         if body.peak_profit is not None:
             order["metadata"]["peak_profit"] = body.peak_profit
         order["metadata"]["trailing_active"] = body.trailing_active
+        return True
 
-        await _pending_orders_save()
+    order, version, _ = await _pending_order_update(sym, _apply)
+    if order is None:
+        return {"ok": False, "error": f"Order {sym} not found"}
 
-        logger.info(
-            f"[SLTPSync-EA] Synced {sym} (ticket {body.mt5_ticket}): "
-            f"SL={body.current_stop_loss} TP={body.current_take_profit} "
-            f"peak={body.peak_profit} trailing={body.trailing_active}"
-        )
+    logger.info(
+        f"[SLTPSync-EA] Synced {sym} (ticket {body.mt5_ticket}): "
+        f"SL={body.current_stop_loss} TP={body.current_take_profit} "
+        f"peak={body.peak_profit} trailing={body.trailing_active}"
+    )
 
-        return {"ok": True, "synced": True, "order": order}
+    return {"ok": True, "synced": True, "version": version, "order": order}
 
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -25817,7 +26928,7 @@ async def get_unified_signal(symbol: str = "XAUUSD"):
 # GOM KOLA DASHBOARD — Real-time TradingView tableau sync
 # ═══════════════════════════════════════════════════════════════════
 
-_GOM_TABLEAU_STORE = {}  # {symbol: {timeframes, verdict, timestamp}}
+_GOM_TABLEAU_STORE = _shared_store("gom_tableau")  # {symbol: {timeframes, verdict, timestamp}}
 _GOM_TABLEAU_LOCK = asyncio.Lock()
 
 class GomTableauBody(BaseModel):
@@ -25861,6 +26972,68 @@ def _normalize_tableau_timeframes(tfs) -> dict:
     return {}
 
 
+def _render_gom_tableau_complete(sym: str, tableau_data: dict, verdict_data: dict) -> dict:
+    """Payload plat /gom-tableau-complete (verdict + cellules du tableau) ; capture_time posé à la lecture."""
+    # Helper pour accéder nested dict en sécurité
+    def safe_get(d, *keys, default=None):
+        for key in keys:
+            if isinstance(d, dict):
+                d = d.get(key, {})
+            else:
+                return default
+        return d if d else default
+
+    # Construire la structure complète pour dashboard MT5 (lecture cache — pas de MT5 sync)
+    base = _build_gom_mt5_payload(verdict_data) if verdict_data else {}
+    complete_data = {
+        "ok": True,
+        "symbol": sym,
+        "capture_time": None,
+        **base,
+        "force_pts": base.get("verdict_gap", 0),
+        "rsi_alert": safe_get(tableau_data, "verdict", "rsi_alert", default=""),
+        "kola_line_1": tableau_data.get("kola_lines", [0, 0])[0] if tableau_data.get("kola_lines") and len(tableau_data.get("kola_lines", [])) > 0 else 0,
+        "kola_line_2": tableau_data.get("kola_lines", [0, 0])[1] if tableau_data.get("kola_lines") and len(tableau_data.get("kola_lines", [])) > 1 else 0,
+        "zone_1_high": tableau_data.get("zones", [{}])[0].get("high", 0) if tableau_data.get("zones") and len(tableau_data.get("zones", [])) > 0 else 0,
+        "zone_1_low": tableau_data.get("zones", [{}])[0].get("low", 0) if tableau_data.get("zones") and len(tableau_data.get("zones", [])) > 0 else 0,
+        "zone_2_high": tableau_data.get("zones", [{}])[1].get("high", 0) if tableau_data.get("zones") and len(tableau_data.get("zones", [])) > 1 else 0,
+        "zone_2_low": tableau_data.get("zones", [{}])[1].get("low", 0) if tableau_data.get("zones") and len(tableau_data.get("zones", [])) > 1 else 0,
+    }
+
+    # TF depuis tableau MCP si absent du verdict store
+    for lk, label in (
+        ("m1", "M1"), ("m5", "M5"), ("m15", "M15"), ("h1", "H1"),
+        ("h4", "H4"), ("d1", "D1"), ("w1", "W1"), ("global", "GLOBAL"),
+    ):
+        dk = f"tf_{lk}_dir"
+        rk = f"tf_{lk}_rsi" if lk != "global" else None
+        # Direction absente du verdict (NEUT inféré par _build_gom_mt5_payload) → cellule du tableau
+        if not complete_data.get(dk) or _tf_dir_value_missing(verdict_data.get(dk)):
+            merged = _normalize_tf_dir_label(
+                safe_get(tableau_data, "timeframes", label, "direction", default="")
+            )
+            if merged:
+                complete_data[dk] = merged
+                if rk and safe_get(tableau_data, "timeframes", label, "rsi", default=0):
+                    complete_data[rk] = safe_get(tableau_data, "timeframes", label, "rsi", default=0)
+        else:
+            complete_data[dk] = _normalize_tf_dir_label(complete_data.get(dk))
+        if rk and not complete_data.get(rk):
+            complete_data[rk] = safe_get(tableau_data, "timeframes", label, "rsi", default=0)
+        if lk == "global" and not complete_data.get("tf_global_strength"):
+            complete_data["tf_global_strength"] = safe_get(
+                tableau_data, "timeframes", "GLOBAL", "strength", default=0
+            )
+
+    return complete_data
+
+
+_gom_tableau_view = (
+    GomTableauView(_GOM_TABLEAU_STORE, render_complete=_render_gom_tableau_complete)
+    if GOM_TABLEAU_VIEW_AVAILABLE else None
+)
+
+
 @app.post("/gom-tableau")
 async def store_gom_tableau(body: GomTableauBody):
     """
@@ -25872,12 +27045,15 @@ async def store_gom_tableau(body: GomTableauBody):
         gom_data = body.gom_data or {}
         tfs = _normalize_tableau_timeframes(gom_data.get("timeframes", {}))
 
-        async with _GOM_TABLEAU_LOCK:
-            _GOM_TABLEAU_STORE[sym] = {
-                "timeframes": tfs,
-                "verdict": gom_data.get("verdict", {}),
-                "timestamp": gom_data.get("timestamp", datetime.now(timezone.utc).isoformat()),
-            }
+        if _gom_tableau_view is not None:
+            await _state_write(_gom_tableau_view.on_tableau, sym, tfs, gom_data.get("verdict", {}), gom_data.get("timestamp"))
+        else:
+            async with _GOM_TABLEAU_LOCK:
+                await _state_write(_GOM_TABLEAU_STORE.__setitem__, sym, {
+                    "timeframes": tfs,
+                    "verdict": gom_data.get("verdict", {}),
+                    "timestamp": gom_data.get("timestamp", datetime.now(timezone.utc).isoformat()),
+                })
 
         return {"ok": True, "symbol": sym, "stored": True}
 
@@ -25895,8 +27071,11 @@ async def get_gom_tableau(symbol: str = "XAUUSD"):
     try:
         sym = symbol.upper().strip()
 
-        async with _GOM_TABLEAU_LOCK:
-            data = _GOM_TABLEAU_STORE.get(sym)
+        if _gom_tableau_view is not None:
+            data = _gom_tableau_view.get(sym)
+        else:
+            async with _GOM_TABLEAU_LOCK:
+                data = _GOM_TABLEAU_STORE.get(sym)
 
         if not data:
             return {
@@ -25928,8 +27107,10 @@ async def get_gom_tableau_complete(symbol: str = "XAUUSD"):
     try:
         sym = _resolve_symbol(symbol)
 
-        # Récupérer les données sans lock (simple dict access)
-        tableau_data = _lookup_gom_store(sym, _GOM_TABLEAU_STORE) or {}
+        # Vue matérialisée : aucune reconstruction ni accès MT5 à la lecture
+        tableau_data = (
+            _gom_tableau_view.get(sym) if _gom_tableau_view is not None else _lookup_gom_store(sym, _GOM_TABLEAU_STORE)
+        ) or {}
         verdict_data = _lookup_gom_store(sym, _GOM_VERDICT_STORE) or {}
 
         if not tableau_data and not verdict_data:
@@ -25963,54 +27144,11 @@ async def get_gom_tableau_complete(symbol: str = "XAUUSD"):
                 "error": "GOM data stale (WAIT with no scores — is gom_verdict_poller running?)"
             }
 
-        # Helper pour accéder nested dict en sécurité
-        def safe_get(d, *keys, default=None):
-            for key in keys:
-                if isinstance(d, dict):
-                    d = d.get(key, {})
-                else:
-                    return default
-            return d if d else default
-
-        # Construire la structure complète pour dashboard MT5 (lecture cache — pas de MT5 sync)
-        base = _build_gom_mt5_payload(verdict_data) if verdict_data else {}
-        complete_data = {
-            "ok": True,
-            "symbol": sym,
-            "capture_time": datetime.now(timezone.utc).isoformat(),
-            **base,
-            "force_pts": base.get("verdict_gap", 0),
-            "rsi_alert": safe_get(tableau_data, "verdict", "rsi_alert", default=""),
-            "kola_line_1": tableau_data.get("kola_lines", [0, 0])[0] if tableau_data.get("kola_lines") and len(tableau_data.get("kola_lines", [])) > 0 else 0,
-            "kola_line_2": tableau_data.get("kola_lines", [0, 0])[1] if tableau_data.get("kola_lines") and len(tableau_data.get("kola_lines", [])) > 1 else 0,
-            "zone_1_high": tableau_data.get("zones", [{}])[0].get("high", 0) if tableau_data.get("zones") and len(tableau_data.get("zones", [])) > 0 else 0,
-            "zone_1_low": tableau_data.get("zones", [{}])[0].get("low", 0) if tableau_data.get("zones") and len(tableau_data.get("zones", [])) > 0 else 0,
-            "zone_2_high": tableau_data.get("zones", [{}])[1].get("high", 0) if tableau_data.get("zones") and len(tableau_data.get("zones", [])) > 1 else 0,
-            "zone_2_low": tableau_data.get("zones", [{}])[1].get("low", 0) if tableau_data.get("zones") and len(tableau_data.get("zones", [])) > 1 else 0,
-        }
-
-        # TF depuis tableau MCP si absent du verdict store
-        for lk, label in (
-            ("m1", "M1"), ("m5", "M5"), ("m15", "M15"), ("h1", "H1"),
-            ("h4", "H4"), ("d1", "D1"), ("w1", "W1"), ("global", "GLOBAL"),
-        ):
-            dk = f"tf_{lk}_dir"
-            rk = f"tf_{lk}_rsi" if lk != "global" else None
-            if not complete_data.get(dk):
-                merged = _normalize_tf_dir_label(
-                    safe_get(tableau_data, "timeframes", label, "direction", default="")
-                )
-                if merged:
-                    complete_data[dk] = merged
-            else:
-                complete_data[dk] = _normalize_tf_dir_label(complete_data.get(dk))
-            if rk and not complete_data.get(rk):
-                complete_data[rk] = safe_get(tableau_data, "timeframes", label, "rsi", default=0)
-            if lk == "global" and not complete_data.get("tf_global_strength"):
-                complete_data["tf_global_strength"] = safe_get(
-                    tableau_data, "timeframes", "GLOBAL", "strength", default=0
-                )
-
+        if _gom_tableau_view is not None:
+            complete_data = dict(_gom_tableau_view.complete(sym, verdict_data))
+        else:
+            complete_data = _render_gom_tableau_complete(sym, tableau_data, verdict_data)
+        complete_data["capture_time"] = datetime.now(timezone.utc).isoformat()
         return complete_data
 
     except Exception as e:
@@ -26356,11 +27494,31 @@ if __name__ == "__main__":
     # Démarrer le serveur avec gestion des événements de vie
     logger.info("Lancement du serveur IA TradBOT avec systeme ML integre")
 
-    uvicorn.run(
-        app,
-        host=HOST,
-        port=API_PORT,
-        reload=False,
-        log_level="info",
-        timeout_keep_alive=5,  # libérer les connexions idle plus vite
-    )
+    workers = max(1, int(args.workers))
+    if workers > 1:
+        # Les workers réimportent le module : l'état doit vivre dans le backend partagé
+        os.environ.setdefault("AI_STATE_BACKEND", "sqlite")
+        if os.environ["AI_STATE_BACKEND"].strip().lower() != "sqlite" or not STATE_BACKEND_AVAILABLE:
+            logger.warning("⚠️ --workers=%d exige AI_STATE_BACKEND=sqlite — démarrage en 1 worker", workers)
+            workers = 1
+    if workers > 1:
+        # Les workers héritent de l'environnement : journal structuré suffixé par pid
+        os.environ["AI_WORKERS"] = str(workers)
+        logger.info("🧵 %d workers uvicorn (état partagé: %s)", workers, os.getenv("AI_STATE_DB") or "data/state/ai_state.sqlite")
+        uvicorn.run(
+            "ai_server:app",
+            host=HOST,
+            port=API_PORT,
+            workers=workers,
+            log_level="info",
+            timeout_keep_alive=5,
+        )
+    else:
+        uvicorn.run(
+            app,
+            host=HOST,
+            port=API_PORT,
+            reload=False,
+            log_level="info",
+            timeout_keep_alive=5,  # libérer les connexions idle plus vite
+        )
@@ -76,6 +76,55 @@ class AWSRDSClient:
             logger.error(f"Erreur INSERT dans {table}: {e}")
             return None
 
+    def insert_many(self, table: str, rows: List[Dict[str, Any]], page_size: int = 500,
+                    ignore_conflicts: bool = False) -> Optional[int]:
+        """Insérer un lot de lignes (mêmes colonnes) ; retourne le nombre réellement inséré
+        (0 si toutes les lignes existaient déjà), None si rien n'a pu être écrit (erreur).
+
+        ignore_conflicts : ON CONFLICT DO NOTHING (une ligne déjà présente n'annule pas le lot).
+        Si le lot échoue quand même (contrainte sur une ligne), repli ligne par ligne comme
+        l'ancien insert() unitaire : seules les lignes fautives sont écartées.
+        """
+        if not rows:
+            return 0
+        from psycopg2.extras import execute_values
+
+        keys = list(rows[0].keys())
+        columns = ", ".join(keys)
+        conflict = " ON CONFLICT DO NOTHING" if ignore_conflicts else ""
+        values = [tuple(row.get(k) for k in keys) for row in rows]
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                try:
+                    inserted = execute_values(
+                        cursor, f"INSERT INTO {table} ({columns}) VALUES %s{conflict} RETURNING 1",
+                        values, page_size=page_size, fetch=True,
+                    )
+                    conn.commit()
+                    return len(inserted)
+                except psycopg2.Error as e:
+                    conn.rollback()
+                    logger.warning(f"INSERT batch dans {table} refusé ({str(e)[:80]}) — repli ligne par ligne")
+
+                row_query = f"INSERT INTO {table} ({columns}) VALUES ({', '.join(['%s'] * len(keys))}){conflict}"
+                count = errors = 0
+                for value in values:
+                    try:
+                        cursor.execute(row_query, value)
+                        conn.commit()
+                        count += cursor.rowcount if cursor.rowcount > 0 else 0
+                    except psycopg2.Error as e:
+                        conn.rollback()
+                        errors += 1
+                        logger.debug(f"INSERT ligne ignorée dans {table}: {str(e)[:80]}")
+                cursor.close()
+                return None if errors == len(values) else count
+
+        except Exception as e:
+            logger.error(f"Erreur INSERT batch dans {table}: {e}")
+            return None
+
     def select(self, table: str, filters: Optional[Dict[str, Any]] = None,
                limit: Optional[int] = None, order_by: Optional[str] = None) -> List[Dict]:
         """Sélectionner des données depuis une table"""
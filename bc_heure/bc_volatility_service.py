@@ -6,7 +6,6 @@ Expose JSON pour ai_server + EA MT5.
 from __future__ import annotations
 
 import json
-import re
 import sys
 from datetime import datetime, timezone
 from pathlib import Path
@@ -16,6 +15,7 @@ ROOT = Path(__file__).resolve().parent.parent
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+from symbol_mapper import symbol_registry  # noqa: E402
 from bc_heure.boom_crash_analyzer import (  # noqa: E402
     BOOM_CRASH_SYMBOLS,
     COLLECTION_TIME,
@@ -55,13 +55,8 @@ MT5_TO_BC_KEY: Dict[str, str] = {
 
 
 def normalize_mt5_symbol(symbol: str) -> str:
-    s = re.sub(r"[^A-Za-z0-9]", "", (symbol or "").upper())
-    if not s:
-        return ""
-    m = re.match(r"(BOOM|CRASH)(\d+)", s)
-    if m:
-        return f"{m.group(1)}{m.group(2)}"
-    return s
+    """Clé compacte (BOOM500, CRASH1000...) précalculée par le registre de symboles."""
+    return symbol_registry.resolve(symbol).deriv
 
 
 def mt5_to_bc_key(symbol: str) -> Optional[str]:
@@ -179,10 +174,13 @@ def record_trade_outcome(
     open_time: Optional[str] = None,
     close_time: Optional[str] = None,
     learnings: Optional[Dict[str, Any]] = None,
+    duration_sec: Optional[float] = None,
+    save: bool = True,
 ) -> bool:
     """
     Enregistre un trade clôturé pour ajuster les plages horaires au fil du temps.
-    Retourne True si une entrée a été ajoutée.
+    Retourne True si une entrée a été ajoutée. En batch, passer `learnings` + save=False
+    puis appeler save_learnings() une seule fois.
     """
     bc_key = mt5_to_bc_key(symbol)
     if not bc_key:
@@ -200,8 +198,7 @@ def record_trade_outcome(
     if hour is None:
         hour = datetime.now(timezone.utc).hour
 
-    duration_sec = None
-    if open_time and close_time:
+    if duration_sec is None and open_time and close_time:
         try:
             ot = datetime.fromisoformat(str(open_time).replace("Z", "+00:00"))
             ct = datetime.fromisoformat(str(close_time).replace("Z", "+00:00"))
@@ -224,7 +221,8 @@ def record_trade_outcome(
     if _is_spike_capture(p, duration_sec):
         bucket["spike_hits"] = int(bucket.get("spike_hits", 0)) + 1
 
-    save_learnings(data)
+    if save:
+        save_learnings(data)
     return True
 
 
@@ -300,8 +298,11 @@ def ingest_feedback_jsonl(path: Path = FEEDBACK_JSONL) -> int:
             open_time=row.get("open_time"),
             close_time=row.get("close_time"),
             learnings=learnings,
+            save=False,
         ):
             count += 1
+    if count:
+        save_learnings(learnings)
     return count
 
 
@@ -10,6 +10,7 @@ from __future__ import annotations
 
 import argparse
 import csv
+import json
 import re
 import sys
 from collections import defaultdict
@@ -18,6 +19,7 @@ from pathlib import Path
 
 ROOT = Path(__file__).resolve().parent.parent
 DEFAULT_OUT = ROOT / "data" / "trade_journal.csv"
+DEFAULT_INDEX = ROOT / "data" / "journal_log_index.json"
 MAGIC = 202502
 EA_NAME = "SMC_Universal"
 
@@ -86,13 +88,52 @@ def read_log_lines(path: Path) -> list[str]:
     return []
 
 
+def _detect_codec(head: bytes) -> tuple[str, int]:
+    """Encodage + longueur du BOM (logs MT5 = UTF-16 LE avec BOM)."""
+    if head.startswith(b"\xff\xfe"):
+        return "utf-16-le", 2
+    if head.startswith(b"\xfe\xff"):
+        return "utf-16-be", 2
+    if head.startswith(b"\xef\xbb\xbf"):
+        return "utf-8", 3
+    return "", 0
+
+
+def read_new_log_lines(path: Path, offset: int = 0, codec: str = "") -> tuple[list[str], str, int]:
+    """Lignes complètes ajoutées après `offset` (octets) → (lignes, encodage, nouvel offset)."""
+    with path.open("rb") as f:
+        if not codec:
+            codec, bom = _detect_codec(f.read(3))
+            offset = max(offset, bom)
+        f.seek(offset)
+        raw = f.read()
+    if not codec:
+        try:
+            raw.decode("utf-8")
+            codec = "utf-8"
+        except UnicodeDecodeError:
+            codec = "latin-1"
+    text = raw.decode(codec, errors="replace")
+    complete = text[: text.rfind("\n") + 1]
+    return complete.splitlines(), codec, offset + len(complete.encode(codec, errors="replace"))
+
+
 def parse_log_file(path: Path) -> tuple[dict[int, dict], list[dict], list[dict]]:
-    base_date = log_file_date(path)
     entries: dict[int, dict] = {}
     deals: list[dict] = []
     close_events: list[dict] = []
+    _parse_lines(read_log_lines(path), log_file_date(path), entries, deals, close_events)
+    return entries, deals, close_events
 
-    for line in read_log_lines(path):
+
+def _parse_lines(
+    lines: list[str],
+    base_date: datetime,
+    entries: dict[int, dict],
+    deals: list[dict],
+    close_events: list[dict],
+) -> None:
+    for line in lines:
         if "Trades" not in line:
             continue
 
@@ -158,10 +199,91 @@ def parse_log_file(path: Path) -> tuple[dict[int, dict], list[dict], list[dict]]
                 "open_deal": deal_ticket,
             }
 
-    return entries, deals, close_events
+
+_DT_KEYS = ("time", "open_time", "close_request_time")
+
+
+def _dump_rec(rec: dict) -> dict:
+    return {k: (v.isoformat() if k in _DT_KEYS else v) for k, v in rec.items()}
+
+
+def _load_rec(rec: dict) -> dict:
+    return {k: (datetime.fromisoformat(v) if k in _DT_KEYS else v) for k, v in rec.items()}
+
+
+class LogParseIndex:
+    """
+    Offsets déjà parsés par fichier log MT5 : seules les lignes ajoutées depuis le
+    dernier passage sont relues (le log du jour grossit, les anciens sont figés).
+    """
+
+    def __init__(self, path: Path | None = DEFAULT_INDEX):
+        self.path = path
+        self._files: dict[str, dict] = {}
+        if path is not None and path.exists():
+            try:
+                raw = json.loads(path.read_text(encoding="utf-8"))
+                for key, st in raw.get("files", {}).items():
+                    self._files[key] = {
+                        **st,
+                        "entries": {int(k): _load_rec(v) for k, v in st["entries"].items()},
+                        "deals": [_load_rec(d) for d in st["deals"]],
+                        "closes": [_load_rec(c) for c in st["closes"]],
+                    }
+            except (ValueError, KeyError, TypeError):
+                self._files = {}
+
+    def parse(self, log_path: Path) -> tuple[dict[int, dict], list[dict], list[dict]]:
+        st = log_path.stat()
+        key = str(log_path.resolve())
+        state = self._files.get(key)
+        if state is not None and st.st_size < state["offset"]:
+            state = None  # fichier tronqué / remplacé
+        if state is None:
+            state = {"codec": "", "offset": 0, "size": 0, "entries": {}, "deals": [], "closes": []}
+            self._files[key] = state
+        if st.st_size != state["size"]:
+            lines, codec, offset = read_new_log_lines(log_path, state["offset"], state["codec"])
+            _parse_lines(lines, log_file_date(log_path), state["entries"], state["deals"], state["closes"])
+            state.update(codec=codec, offset=offset, size=st.st_size)
+        return state["entries"], state["deals"], state["closes"]
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "files": {
+                key: {
+                    "codec": st["codec"],
+                    "offset": st["offset"],
+                    "size": st["size"],
+                    "entries": {str(k): _dump_rec(v) for k, v in st["entries"].items()},
+                    "deals": [_dump_rec(d) for d in st["deals"]],
+                    "closes": [_dump_rec(c) for c in st["closes"]],
+                }
+                for key, st in self._files.items()
+            }
+        }
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data), encoding="utf-8")
+        tmp.replace(self.path)
+
+
+_default_index: LogParseIndex | None = None
+
+
+def get_default_index() -> LogParseIndex:
+    global _default_index
+    if _default_index is None:
+        _default_index = LogParseIndex(DEFAULT_INDEX)
+    return _default_index
 
 
-def match_trades_from_logs(log_paths: list[Path]) -> list[dict]:
+def match_trades_from_logs(log_paths: list[Path], index: LogParseIndex | None = None) -> list[dict]:
+    """Apparie entrées / fermetures ; `index` (défaut : index partagé) évite de reparser les logs."""
+    if index is None:
+        index = get_default_index()
     all_deals: list[dict] = []
     all_close_events: list[dict] = []
     entries_by_order: dict[int, dict] = {}
@@ -170,12 +292,13 @@ def match_trades_from_logs(log_paths: list[Path]) -> list[dict]:
         if not path.exists():
             print(f"[skip] {path} introuvable")
             continue
-        entries, deals, closes = parse_log_file(path)
+        entries, deals, closes = index.parse(path)
         all_deals.extend(deals)
         all_close_events.extend(closes)
         entries_by_order.update(entries)
         print(f"[ok] {path.name}: {len(deals)} deals, {len(closes)} fermetures")
 
+    index.save()
     all_deals.sort(key=lambda d: d["time"])
 
     trades: list[dict] = []
@@ -24,6 +24,18 @@ logger = logging.getLogger(__name__)
 SUPABASE_URL = "https://bpzqnooiisgadzicwupi.supabase.co"
 SUPABASE_ANON_KEY = os.getenv("SUPABASE_KEY", "")
 
+# Service d'entraînement incrémental (cache local + watermark + artefacts versionnés)
+try:
+    from ml.incremental_training import (
+        IncrementalTrainingService,
+        get_model_reloader,
+    )
+    INCREMENTAL_TRAINING_AVAILABLE = True
+except ImportError:
+    IncrementalTrainingService = None  # type: ignore
+    get_model_reloader = None  # type: ignore
+    INCREMENTAL_TRAINING_AVAILABLE = False
+
 class MLTradingSystem:
     """Système de trading avec apprentissage automatique"""
     
@@ -33,6 +45,10 @@ class MLTradingSystem:
         self.decision_history = []
         self.learning_rate = 0.01
         self.min_samples = 10
+        self.training_service = (
+            IncrementalTrainingService(supabase_url=SUPABASE_URL, supabase_key=SUPABASE_ANON_KEY)
+            if INCREMENTAL_TRAINING_AVAILABLE else None
+        )
         
     def collect_training_data(self, symbol: str, limit: int = 100) -> pd.DataFrame:
         """Collecter les données d'entraînement depuis Supabase"""
@@ -89,7 +105,12 @@ class MLTradingSystem:
     def train_symbol_model(self, symbol: str) -> Dict:
         """Entraîner un modèle pour un symbole spécifique"""
         logger.info(f"🧪 Entraînement du modèle pour {symbol}...")
-        
+
+        if self.training_service is not None:
+            return self.train_symbols_incremental([symbol]).get(
+                symbol, {"status": "insufficient_data", "samples": 0}
+            )
+
         df = self.collect_training_data(symbol)
         
         if df.empty or len(df) < self.min_samples:
@@ -143,6 +164,40 @@ class MLTradingSystem:
             logger.error(f"❌ Erreur entraînement modèle {symbol}: {e}")
             return {"status": "error", "message": str(e)}
     
+    def train_symbols_incremental(self, symbols: List[str]) -> Dict[str, Dict]:
+        """Entraînement incrémental : delta trade_feedback depuis le watermark,
+        partial_fit des symboles en pool de threads, publication versionnée."""
+        service = self.training_service
+        try:
+            service.cache.sync(service.supabase_url, service.supabase_key)
+        except Exception as e:
+            logger.warning(f"⚠️ Sync incrémentale trade_feedback échouée: {e}")
+
+        trained = service.train_symbols(symbols)
+        results = {}
+        for symbol in symbols:
+            published = trained.get(symbol)
+            if published is None:
+                artifact = service.publisher.load(symbol)
+                if not artifact:
+                    results[symbol] = {"status": "insufficient_data", "samples": 0}
+                    continue
+                model = artifact["model"]
+            else:
+                model = published["model"]
+            if model.get("total_trades", 0) < self.min_samples:
+                results[symbol] = {"status": "insufficient_data", "samples": model.get("total_trades", 0)}
+                continue
+            self.symbol_models[symbol] = model
+            if published is not None:
+                self._save_model(symbol, model)
+                logger.info(
+                    f"✅ Modèle {symbol} v{published['version']} (+{published['new_rows']} trades) "
+                    f"win rate {model['win_rate']:.2%}"
+                )
+            results[symbol] = {"status": "success", "model": model}
+        return results
+
     def _calculate_optimal_threshold(self, df: pd.DataFrame) -> float:
         """Calculer le seuil de confiance optimal"""
         if df.empty:
@@ -238,6 +293,12 @@ class MLTradingSystem:
                      market_data: Dict = None) -> Tuple[str, float, str]:
         """Obtenir une décision influencée par le ML"""
         
+        if INCREMENTAL_TRAINING_AVAILABLE:
+            # Rechargement à chaud si le service a publié une nouvelle version
+            artifact = get_model_reloader().get(symbol)
+            if artifact and artifact.get("model"):
+                self.symbol_models[symbol] = artifact["model"]
+
         if symbol not in self.symbol_models:
             logger.debug(f"Pas de modèle ml_trading_system pour {symbol} — fallback décision de base")
             return base_decision, confidence, "no_model"
@@ -398,7 +459,10 @@ class MLDecisionEnhancer:
             symbols = ["EURUSD", "GBPUSD", "USDJPY", "AUDUSD", "USDCAD"]
         
         logger.info(f"🧪 Entraînement des modèles pour {len(symbols)} symboles...")
-        
+
+        if self.ml_system.training_service is not None:
+            return self.ml_system.train_symbols_incremental(symbols)
+
         results = {}
         for symbol in symbols:
             result = self.ml_system.train_symbol_model(symbol)
@@ -16,12 +16,69 @@ import pandas as pd
 from datetime import datetime, timedelta
 from pathlib import Path
 
+# Journal structuré indexé (python/log_index.py)
+_PYTHON_DIR = Path(__file__).resolve().parent / "python"
+if str(_PYTHON_DIR) not in sys.path:
+    sys.path.insert(0, str(_PYTHON_DIR))
+try:
+    from log_index import LogIndexReader, StructuredLogHandler
+    LOG_INDEX_AVAILABLE = True
+except ImportError:
+    LOG_INDEX_AVAILABLE = False
+    LogIndexReader = StructuredLogHandler = None
+
+# Noyau swing/pivots vectorisé partagé avec ai_server (python/swing_kernel.py)
+try:
+    from swing_kernel import pivot_points
+    SWING_KERNEL_AVAILABLE = True
+except ImportError:
+    SWING_KERNEL_AVAILABLE = False
+
+# Profils de volume incrémentaux (python/volume_profile.py) : histogramme par session en cache
+try:
+    from volume_profile import VolumeProfileEngine
+    VOLUME_PROFILE_AVAILABLE = True
+except ImportError:
+    VOLUME_PROFILE_AVAILABLE = False
+
+# Volatilité GARCH/EWMA récursive (python/volatility_engine.py) — repli local si l'API ne répond pas
+try:
+    from volatility_engine import VolatilityEngine
+    VOLATILITY_ENGINE_AVAILABLE = True
+except ImportError:
+    VOLATILITY_ENGINE_AVAILABLE = False
+
+# Cycle pipeliné (bougies en lot, features empilées, /decision concurrents, télémétrie)
+try:
+    from signal_pipeline import BarStore, CycleTelemetry, HttpFanout, batch_features, feature_row
+    SIGNAL_PIPELINE_AVAILABLE = True
+except ImportError:
+    SIGNAL_PIPELINE_AVAILABLE = False
+
+# Moteur d'état des positions (un snapshot par cycle, événements, un order_send par position)
+try:
+    from position_engine import CloseIntent, PositionEngine, SLTPUpdate
+    POSITION_ENGINE_AVAILABLE = True
+except ImportError:
+    POSITION_ENGINE_AVAILABLE = False
+
+# Exécution des ordres : file prioritaire, filling mode / pas de volume appris et persistés
+try:
+    from order_executor import PRIORITY_HIGH, PRIORITY_NORMAL, ExecutionCache, OrderExecutor, OrderIntent
+    ORDER_EXECUTOR_AVAILABLE = True
+except ImportError:
+    ORDER_EXECUTOR_AVAILABLE = False
+
+# Journal JSON-lines (rotation + index offsets) — lu par FillingModeAnalyzer sans scan complet
+STRUCTURED_LOG_FILE = Path("logs") / "mt5_ai_client.jsonl"
+
 # Configuration des URLs de l'API
 RENDER_API_URL = "https://kolatradebot.onrender.com"
 LOCAL_API_URL = "http://localhost:8000"  # Utilisation du port 8000
 
 # Whitelist publiée par autonomous_pipeline.py après le scan du matin
 _WHITELIST_PATH = Path(__file__).resolve().parent / "data" / "pipeline_whitelist.json"
+EXECUTION_CACHE_FILE = Path(__file__).resolve().parent / "data" / "execution_cache.json"
 # Durée de validité de la whitelist : 24h (un scan par jour)
 _WHITELIST_MAX_AGE_SEC = 86400
 TIMEFRAMES = ["M5"]  # Horizon M5 comme demandé
@@ -102,6 +159,12 @@ def setup_logging():
     console_handler.setFormatter(console_formatter)
     handlers.append(console_handler)
     
+    # Journal structuré indexé (événements FILLING_MODE_*, TRADE_*, ...)
+    if LOG_INDEX_AVAILABLE:
+        structured_handler = StructuredLogHandler(STRUCTURED_LOG_FILE)
+        structured_handler.setLevel(logging.INFO)
+        handlers.append(structured_handler)
+    
     # Configuration du logger principal
     logging.basicConfig(
         level=logging.DEBUG,
@@ -226,7 +289,11 @@ class TradeLogger:
         if fallback_mode:
             log_msg += f" | Fallback: {fallback_mode}"
             
-        self.filling_logger.error(log_msg)
+        self.filling_logger.error(log_msg, extra={
+            "event": "FILLING_MODE_ERROR",
+            "symbol": symbol,
+            "fields": {"attempted": str(attempted_mode), "code": error_code, "fallback": fallback_mode},
+        })
         
         # Aussi logger dans le fichier d'erreurs principal
         logger.error(f"Erreur filling mode {symbol}: {error_msg} (Code: {error_code})")
@@ -235,7 +302,8 @@ class TradeLogger:
         """Log quand un filling mode fonctionne"""
         prefix = "FALLBACK_SUCCESS" if was_fallback else "FILLING_MODE_SUCCESS"
         self.filling_logger.info(
-            f"{prefix} | Symbol: {symbol} | Mode: {successful_mode}"
+            f"{prefix} | Symbol: {symbol} | Mode: {successful_mode}",
+            extra={"event": prefix, "symbol": symbol, "fields": {"mode": str(successful_mode)}},
         )
         
     def log_api_response(self, endpoint, status_code, response_time, data_size=0):
@@ -268,9 +336,15 @@ class FillingModeAnalyzer:
         self.success_counts = {}
         self.symbol_errors = {}
         
-    def analyze_filling_mode_logs(self, log_file_path, hours=24):
-        """Analyse les logs de filling mode des dernières N heures"""
+    def analyze_filling_mode_logs(self, log_file_path=None, hours=24):
+        """Analyse les logs de filling mode des dernières N heures.
+
+        Journal structuré (.jsonl) : lecture par l'index d'événements, sans scan complet.
+        Fichier texte : scan ligne à ligne (ancien format).
+        """
         try:
+            if log_file_path is None:
+                log_file_path = STRUCTURED_LOG_FILE
             if not os.path.exists(log_file_path):
                 logger.warning(f"Fichier de log non trouvé: {log_file_path}")
                 return None
@@ -285,16 +359,29 @@ class FillingModeAnalyzer:
                 'recommendations': []
             }
             
-            with open(log_file_path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    try:
-                        # Parser la ligne de log
-                        if 'FILLING_MODE_ERROR' in line:
-                            self._parse_error_line(line, analysis, cutoff_time)
-                        elif 'FILLING_MODE_SUCCESS' in line or 'FALLBACK_SUCCESS' in line:
-                            self._parse_success_line(line, analysis, cutoff_time)
-                    except Exception as e:
-                        logger.debug(f"Erreur parsing ligne log: {e}")
+            if LOG_INDEX_AVAILABLE and str(log_file_path).endswith(".jsonl"):
+                reader = LogIndexReader(Path(log_file_path))
+                records = reader.query(
+                    since=cutoff_time.timestamp(),
+                    events=("FILLING_MODE_ERROR", "FILLING_MODE_SUCCESS", "FALLBACK_SUCCESS"),
+                )
+                for rec in records:
+                    fields = rec.get("fields") or {}
+                    if rec.get("event") == "FILLING_MODE_ERROR":
+                        self._count_error(analysis, rec.get("symbol"), fields.get("attempted"))
+                    else:
+                        self._count_success(analysis, fields.get("mode"))
+            else:
+                with open(log_file_path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            # Parser la ligne de log
+                            if 'FILLING_MODE_ERROR' in line:
+                                self._parse_error_line(line, analysis, cutoff_time)
+                            elif 'FILLING_MODE_SUCCESS' in line or 'FALLBACK_SUCCESS' in line:
+                                self._parse_success_line(line, analysis, cutoff_time)
+                        except Exception as e:
+                            logger.debug(f"Erreur parsing ligne log: {e}")
                         
             # Générer des recommandations
             analysis['recommendations'] = self._generate_recommendations(analysis)
@@ -315,25 +402,29 @@ class FillingModeAnalyzer:
             if log_time < cutoff_time:
                 return
                 
-            analysis['total_errors'] += 1
-            
-            # Extraire le symbole
-            if 'Symbol:' in line:
-                symbol = line.split('Symbol: ')[1].split(' |')[0]
-                if symbol not in analysis['symbols_with_errors']:
-                    analysis['symbols_with_errors'][symbol] = 0
-                analysis['symbols_with_errors'][symbol] += 1
-                
-            # Extraire le mode tenté
-            if 'Attempted:' in line:
-                attempted_mode = line.split('Attempted: ')[1].split(' |')[0]
-                if attempted_mode not in analysis['filling_mode_stats']:
-                    analysis['filling_mode_stats'][attempted_mode] = {'errors': 0, 'successes': 0}
-                analysis['filling_mode_stats'][attempted_mode]['errors'] += 1
+            symbol = line.split('Symbol: ')[1].split(' |')[0] if 'Symbol:' in line else None
+            attempted_mode = line.split('Attempted: ')[1].split(' |')[0] if 'Attempted:' in line else None
+            self._count_error(analysis, symbol, attempted_mode)
                 
         except Exception as e:
             logger.debug(f"Erreur parsing ligne erreur: {e}")
             
+    def _count_error(self, analysis, symbol, attempted_mode):
+        """Comptabilise une erreur de filling mode (symbole + mode tenté)"""
+        analysis['total_errors'] += 1
+        if symbol:
+            analysis['symbols_with_errors'][symbol] = analysis['symbols_with_errors'].get(symbol, 0) + 1
+        if attempted_mode:
+            stats = analysis['filling_mode_stats'].setdefault(attempted_mode, {'errors': 0, 'successes': 0})
+            stats['errors'] += 1
+            
+    def _count_success(self, analysis, mode):
+        """Comptabilise un succès de filling mode"""
+        analysis['total_successes'] += 1
+        if mode:
+            stats = analysis['filling_mode_stats'].setdefault(mode, {'errors': 0, 'successes': 0})
+            stats['successes'] += 1
+            
     def _parse_success_line(self, line, analysis, cutoff_time):
         """Parse une ligne de succès de filling mode"""
         try:
@@ -344,14 +435,8 @@ class FillingModeAnalyzer:
             if log_time < cutoff_time:
                 return
                 
-            analysis['total_successes'] += 1
-            
-            # Extraire le mode utilisé
-            if 'Mode:' in line:
-                mode = line.split('Mode: ')[1].strip()
-                if mode not in analysis['filling_mode_stats']:
-                    analysis['filling_mode_stats'][mode] = {'errors': 0, 'successes': 0}
-                analysis['filling_mode_stats'][mode]['successes'] += 1
+            mode = line.split('Mode: ')[1].strip() if 'Mode:' in line else None
+            self._count_success(analysis, mode)
                 
         except Exception as e:
             logger.debug(f"Erreur parsing ligne succès: {e}")
@@ -601,6 +686,9 @@ class GARCHVolatilityAnalyzer:
     
     def __init__(self):
         self.volatility_cache = {}
+        # Prévision servie par /volatility/{symbol} (même état que /decision) ; moteur local en secours
+        self._http = requests.Session()
+        self._engine = VolatilityEngine() if VOLATILITY_ENGINE_AVAILABLE else None
         
     def calculate_garch_volatility(self, returns, p=1, q=1):
         """Calcule la volatilité GARCH(1,1) simplifiée"""
@@ -638,13 +726,37 @@ class GARCHVolatilityAnalyzer:
             logger.error(f"Erreur GARCH: {e}")
             return None
     
+    def _server_volatility(self, symbol):
+        """Prévision GARCH/EWMA du serveur IA (lecture O(1) de l'état maintenu à chaque bougie)."""
+        try:
+            response = self._http.get(
+                f"{RENDER_API_URL}/volatility/{symbol}", params={"timeframe": "M5"}, timeout=3
+            )
+            if response.status_code == 200:
+                return response.json()
+        except Exception as e:
+            logger.debug(f"Volatilité serveur indisponible {symbol}: {e}")
+        return None
+
     def get_volatility_signal(self, symbol):
         """Génère des signaux basés sur la volatilité"""
         try:
+            served = self._server_volatility(symbol)
+            if served:
+                return served
+            
             rates = mt5.copy_rates_from_pos(symbol, mt5.TIMEFRAME_M5, 0, 200)
             if rates is None or len(rates) < 50:
                 return None
             
+            if self._engine is not None:
+                # Moteur local : seules les nouvelles bougies clôturées sont filtrées (pas de refit par appel)
+                self._engine.sync_arrays(symbol, "M5", rates['time'].astype('int64') * 1_000_000_000, rates['close'])
+                self._engine.refit_stale()
+                local = self._engine.forecast(symbol, "M5")
+                if local:
+                    return {**local, 'analysis_type': 'GARCH_Volatility'}
+            
             closes = [rate['close'] for rate in rates]
             
             # Calculer les rendements
@@ -866,8 +978,8 @@ class AdvancedFeatureExtractor:
     """Extraction de features avancées pour le trading"""
     
     def __init__(self):
-        # Pas besoin de scaler pour l'instant
-        pass
+        # Pas besoin de scaler pour l'instant ; un moteur de profil de volume par symbole
+        self._profiles = {}
         
     def calculate_rsi_divergence(self, prices, period=14):
         """Calcule la divergence RSI"""
@@ -938,22 +1050,40 @@ class AdvancedFeatureExtractor:
             current_volume = volumes[-1]
             volume_ratio = current_volume / avg_volume
             
-            # Poids du volume par niveau de prix
-            price_volume = {}
-            for i, (price, volume) in enumerate(zip(closes, volumes)):
-                price_key = round(price, 2)
-                if price_key not in price_volume:
-                    price_volume[price_key] = 0
-                price_volume[price_key] += volume
+            profile = None
+            if VOLUME_PROFILE_AVAILABLE:
+                # Seules les bougies M5 clôturées depuis le dernier appel sont ajoutées à l'histogramme
+                engine = self._profiles.get(symbol)
+                if engine is None:
+                    engine = self._profiles[symbol] = VolumeProfileEngine(max_sessions=5)
+                engine.sync_arrays(
+                    rates['time'].astype('int64') * 1_000_000_000,
+                    rates['high'], rates['low'], rates['close'], rates['tick_volume'], rates['open'],
+                )
+                profile = engine.profile()
             
-            # Niveaux de haut volume
-            high_volume_levels = sorted(price_volume.items(), key=lambda x: x[1], reverse=True)[:5]
+            if profile:
+                # Niveaux de haut volume (HVN) de la session courante
+                high_volume_levels = [(round(n['price'], 5), n['volume']) for n in profile['hvn']]
+            else:
+                # Poids du volume par niveau de prix
+                price_volume = {}
+                for i, (price, volume) in enumerate(zip(closes, volumes)):
+                    price_key = round(price, 2)
+                    if price_key not in price_volume:
+                        price_volume[price_key] = 0
+                    price_volume[price_key] += volume
+                
+                # Niveaux de haut volume
+                high_volume_levels = sorted(price_volume.items(), key=lambda x: x[1], reverse=True)[:5]
             
             return {
                 'volume_ratio': volume_ratio,
                 'avg_volume': avg_volume,
                 'current_volume': current_volume,
                 'high_volume_levels': high_volume_levels,
+                'poc': profile['poc'] if profile else None,
+                'value_area': (profile['val'], profile['vah']) if profile else None,
                 'volume_trend': 'increasing' if volume_ratio > 1.2 else 'decreasing' if volume_ratio < 0.8 else 'normal'
             }
             
@@ -1137,17 +1267,22 @@ class AdvancedTechnicalAnalyzer:
         prices = np.array(prices)
         current_price = prices[-1]
         
-        # Trouver les minima locaux (supports)
-        supports = []
-        for i in range(window, len(prices) - window):
-            if prices[i] == min(prices[i-window:i+window+1]):
-                supports.append(prices[i])
-        
-        # Trouver les maxima locaux (résistances)
-        resistances = []
-        for i in range(window, len(prices) - window):
-            if prices[i] == max(prices[i-window:i+window+1]):
-                resistances.append(prices[i])
+        if SWING_KERNEL_AVAILABLE:
+            # Minima/maxima locaux (égalités admises) en un passage vectorisé
+            supports = prices[pivot_points(prices, window, "low")].tolist()
+            resistances = prices[pivot_points(prices, window, "high")].tolist()
+        else:
+            # Trouver les minima locaux (supports)
+            supports = []
+            for i in range(window, len(prices) - window):
+                if prices[i] == min(prices[i-window:i+window+1]):
+                    supports.append(prices[i])
+
+            # Trouver les maxima locaux (résistances)
+            resistances = []
+            for i in range(window, len(prices) - window):
+                if prices[i] == max(prices[i-window:i+window+1]):
+                    resistances.append(prices[i])
         
         # Support le plus proche en dessous du prix actuel
         nearest_support = None
@@ -2039,6 +2174,22 @@ class MT5AIClient:
         self.history_learning = HistoryLearningAdapter(last_n_trades=80, min_trades_for_adjustment=10)
         self.aggressive_strategy = AggressiveTradingStrategy()  # NOUVEAU: Stratégie agressive
         self.ema_scalping_strategy = EMAScalpingStrategy()  # NOUVEAU: Stratégie de scalping EMA
+        self.auto_close_target = 1.0
+        self._point_cache = {}
+        if POSITION_ENGINE_AVAILABLE:
+            self.position_engine = self._setup_position_engine()
+        if SIGNAL_PIPELINE_AVAILABLE:
+            self.bar_store = BarStore(count=200)
+            self.http_fanout = HttpFanout(max_concurrency=16, timeout=5)
+            self.telemetry = CycleTelemetry()
+        if ORDER_EXECUTOR_AVAILABLE:
+            self.execution_cache = ExecutionCache(EXECUTION_CACHE_FILE)
+            self.order_executor = OrderExecutor(
+                send=lambda request: mt5.order_send(request),
+                cache=self.execution_cache,
+                filling_modes=(mt5.ORDER_FILLING_FOK, mt5.ORDER_FILLING_IOC, mt5.ORDER_FILLING_RETURN),
+                max_concurrency=2,
+            )
 
     def get_position_profit(self, ticket):
         """Récupère le profit actuel d'une position"""
@@ -2696,87 +2847,65 @@ class MT5AIClient:
             logger.error(f"Erreur calcul SL/TP pour {symbol}: {e}")
             return None, None
     
+    def _trailing_sl(self, position, point):
+        """Nouveau SL du stop suiveur (0.3% derrière le prix dès 0.5% de profit) ou None"""
+        if not point:
+            return None
+        current_price = position.price_current
+        open_price = position.price_open
+        current_sl = position.sl
+        
+        # Paramètres du trailing stop (en pourcentage)
+        activation_profit = 0.005  # 0.5% de profit pour activer le trailing
+        trailing_distance = 0.003  # 0.3% de distance de suivi
+        
+        if position.type == mt5.ORDER_TYPE_BUY:
+            profit_pct = (current_price - open_price) / open_price
+            new_sl = current_price * (1 - trailing_distance)
+            # Éviter les mises à jour trop fréquentes : au moins 10 points de mieux
+            if profit_pct >= activation_profit and new_sl > current_sl + (point * 10):
+                return new_sl
+        elif position.type == mt5.ORDER_TYPE_SELL:
+            profit_pct = (open_price - current_price) / open_price
+            new_sl = current_price * (1 + trailing_distance)
+            if profit_pct >= activation_profit and (new_sl < current_sl - (point * 10) or current_sl == 0):
+                return new_sl
+        return None
+    
     def update_trailing_stop(self, position):
         """Met à jour le stop suiveur pour une position"""
         try:
             symbol = position.symbol
-            ticket = position.ticket
-            position_type = position.type
-            current_price = position.price_current
-            open_price = position.price_open
-            current_sl = position.sl
-            current_tp = position.tp
             
             # Récupérer les informations du symbole
             symbol_info = mt5.symbol_info(symbol)
             if not symbol_info:
                 logger.error(f"Impossible de récupérer les infos pour {symbol}")
                 return False
-                
-            point = symbol_info.point
-            digits = symbol_info.digits
             
-            # Paramètres du trailing stop (en pourcentage)
-            activation_profit = 0.005  # 0.5% de profit pour activer le trailing
-            trailing_distance = 0.003  # 0.3% de distance de suivi
+            new_sl = self._trailing_sl(position, symbol_info.point)
+            if new_sl is None:
+                return False
             
-            # Calculer le profit actuel
-            if position_type == mt5.ORDER_TYPE_BUY:
-                profit_pct = (current_price - open_price) / open_price
-                new_sl = current_price * (1 - trailing_distance)
-                
-                # Vérifier si le profit est suffisant pour activer le trailing
-                if profit_pct >= activation_profit:
-                    # Vérifier si le nouveau SL est plus élevé que l'ancien
-                    if new_sl > current_sl + (point * 10):  # Éviter les mises à jour trop fréquentes
-                        # Mettre à jour le SL
-                        request = {
-                            "action": mt5.TRADE_ACTION_SLTP,
-                            "symbol": symbol,
-                            "position": ticket,
-                            "sl": new_sl,
-                            "tp": current_tp,
-                            "type_time": mt5.ORDER_TIME_GTC
-                        }
-                        
-                        result = mt5.order_send(request)
-                        if result.retcode == mt5.TRADE_RETCODE_DONE:
-                            logger.info(f"Trailing stop mis à jour pour {symbol}: SL={new_sl}")
-                            return True
-                        else:
-                            logger.error(f"Erreur mise à jour trailing stop {symbol}: {result.comment}")
-                            return False
-                            
-            elif position_type == mt5.ORDER_TYPE_SELL:
-                profit_pct = (open_price - current_price) / open_price
-                new_sl = current_price * (1 + trailing_distance)
-                
-                # Vérifier si le profit est suffisant pour activer le trailing
-                if profit_pct >= activation_profit:
-                    # Vérifier si le nouveau SL est plus bas que l'ancien
-                    if new_sl < current_sl - (point * 10) or current_sl == 0:  # Éviter les mises à jour trop fréquentes
-                        # Mettre à jour le SL
-                        request = {
-                            "action": mt5.TRADE_ACTION_SLTP,
-                            "symbol": symbol,
-                            "position": ticket,
-                            "sl": new_sl,
-                            "tp": current_tp,
-                            "type_time": mt5.ORDER_TIME_GTC
-                        }
-                        
-                        result = mt5.order_send(request)
-                        if result.retcode == mt5.TRADE_RETCODE_DONE:
-                            logger.info(f"Trailing stop mis à jour pour {symbol}: SL={new_sl}")
-                            return True
-                        else:
-                            logger.error(f"Erreur mise à jour trailing stop {symbol}: {result.comment}")
-                            return False
+            request = {
+                "action": mt5.TRADE_ACTION_SLTP,
+                "symbol": symbol,
+                "position": position.ticket,
+                "sl": new_sl,
+                "tp": position.tp,
+                "type_time": mt5.ORDER_TIME_GTC
+            }
             
-            return False
+            result = mt5.order_send(request)
+            if result.retcode == mt5.TRADE_RETCODE_DONE:
+                logger.info(f"Trailing stop mis à jour pour {symbol}: SL={new_sl}")
+                return True
+            else:
+                logger.error(f"Erreur mise à jour trailing stop {symbol}: {result.comment}")
+                return False
             
         except Exception as e:
-            logger.error(f"Erreur dans update_trailing_stop pour {symbol}: {e}")
+            logger.error(f"Erreur dans update_trailing_stop pour {position.symbol}: {e}")
             return False
     
     def calculate_total_profit(self):
@@ -3032,8 +3161,14 @@ class MT5AIClient:
 
     def get_symbol_filling_mode(self, symbol):
         """Get the appropriate filling mode for a symbol.
-        On Deriv: DFX indices, crypto pairs, and synthetic symbols (Boom/Crash) require ORDER_FILLING_FOK."""
+        On Deriv: DFX indices, crypto pairs, and synthetic symbols (Boom/Crash) require ORDER_FILLING_FOK.
+        A mode learned by the execution cache (first successful fill) takes precedence."""
         try:
+            if ORDER_EXECUTOR_AVAILABLE:
+                learned = self.execution_cache.filling_mode(symbol)
+                if learned is not None:
+                    return learned
+
             symbol_info = mt5.symbol_info(symbol)
             if not symbol_info:
                 logger.error(f"Could not get symbol info for {symbol}")
@@ -3086,8 +3221,62 @@ class MT5AIClient:
             logger.error(f"Error getting filling mode for {symbol}: {e}")
             return mt5.ORDER_FILLING_FOK
 
+    def _send_order(self, symbol, side, request, priority=None, signal_ts=None, timeout=30.0):
+        """Envoie la requête via la file d'exécution (mode appris d'abord, modes rejetés écartés).
+
+        Retourne le résultat mt5.order_send (ou None) ; les journaux TradeLogger sont écrits une fois
+        par ordre, à partir du rapport d'exécution, au lieu d'une fois par tentative.
+        """
+        preferred = request.get("type_filling")
+        trade_logger_instance.log_trade_attempt(
+            symbol, request.get("type", "UNKNOWN"), request.get("volume", 0), request.get("price", 0),
+            request.get("sl", 0), request.get("tp", 0), self.get_filling_mode_name(preferred)
+        )
+        intent = OrderIntent(
+            symbol=symbol,
+            side=side,
+            request=request,
+            priority=PRIORITY_NORMAL if priority is None else priority,
+            preferred_filling=preferred,
+            signal_ts=signal_ts,
+        )
+        try:
+            report = self.order_executor.execute(intent, timeout=timeout)
+        except Exception as e:
+            logger.error(f"Erreur file d'exécution pour {symbol}: {e}")
+            return None
+        if report.deduplicated:
+            # execute_trade / execute_immediate_trade sur le même signal : la position existe déjà
+            logger.warning(f"Ordre {side} {symbol} identique déjà exécuté il y a moins de "
+                           f"{self.order_executor.dedup_window:.0f}s, non renvoyé")
+            return None
+        if report.abandoned:
+            logger.error(f"Ordre {side} {symbol} abandonné : toujours en file après {timeout:.0f}s, jamais envoyé")
+            return None
+
+        mode_name = self.get_filling_mode_name(report.filling_mode if report.ok else preferred)
+        for mode in report.rejected_modes:
+            trade_logger_instance.log_filling_mode_error(
+                symbol, 10030, "Unsupported filling mode", self.get_filling_mode_name(mode),
+                mode_name if report.ok else None
+            )
+        if report.ok:
+            if report.rejected_modes:
+                trade_logger_instance.log_filling_mode_success(symbol, mode_name, was_fallback=True)
+            trade_logger_instance.log_trade_success(symbol, request.get("type", "UNKNOWN"), report.result.order)
+            latency = f" | signal→exécution {report.signal_to_fill_ms:.0f} ms" if report.signal_to_fill_ms is not None else ""
+            logger.info(f"Ordre exécuté {symbol} [{mode_name}] en {report.attempts} tentative(s){latency}")
+        else:
+            trade_logger_instance.log_trade_error(
+                symbol, request.get("type", "UNKNOWN"),
+                report.retcode if report.retcode is not None else -1,
+                report.comment or "Unknown error", mode_name
+            )
+        return report.result
+
     def execute_trade(self, symbol, signal_data):
         """Exécute un trade basé sur le signal de l'IA avec décision finale claire requise"""
+        signal_ts = time.time()  # réception du signal : base de la latence signal → exécution
         try:
             # ===== GATE PIPELINE : symbole doit être dans le top-N du scan du matin =====
             if not _is_symbol_whitelisted(symbol):
@@ -3222,6 +3411,8 @@ class MT5AIClient:
             
             point = symbol_info.point
             tick = mt5.symbol_info_tick(symbol)
+            if ORDER_EXECUTOR_AVAILABLE:
+                position_size = self.execution_cache.normalize_volume(symbol, position_size, symbol_info)
             
             # Ajouter un délai de confirmation après signal fort (éviter les entrées précoces)
             if confidence >= 0.70:  # Signaux très forts
@@ -3323,74 +3514,78 @@ class MT5AIClient:
             logger.info(f"  Risk/Reward: 1:{rr:.1f}")
             
             # Envoyer l'ordre
-            max_retries = 2
-            retry_count = 0
-            result = None
+            if ORDER_EXECUTOR_AVAILABLE:
+                result = self._send_order(symbol, signal, request, signal_ts=signal_ts)
+            else:
+                max_retries = 2
+                retry_count = 0
+                result = None
             
-            while retry_count < max_retries:
-                try:
-                    # Logger la tentative de trade
-                    filling_mode_name = self.get_filling_mode_name(request.get("type_filling", 0))
-                    trade_logger_instance.log_trade_attempt(
-                        symbol, request.get("type", "UNKNOWN"), 
-                        request.get("volume", 0), request.get("price", 0),
-                        request.get("sl", 0), request.get("tp", 0),
-                        filling_mode_name
-                    )
-                    
-                    result = mt5.order_send(request)
-                    
-                    # Si succès, logger et sortir de la boucle
-                    if result and result.retcode == mt5.TRADE_RETCODE_DONE:
-                        trade_logger_instance.log_trade_success(
+                while retry_count < max_retries:
+                    try:
+                        # Logger la tentative de trade
+                        filling_mode_name = self.get_filling_mode_name(request.get("type_filling", 0))
+                        trade_logger_instance.log_trade_attempt(
                             symbol, request.get("type", "UNKNOWN"), 
-                            result.order if result else 0
+                            request.get("volume", 0), request.get("price", 0),
+                            request.get("sl", 0), request.get("tp", 0),
+                            filling_mode_name
                         )
-                        break
-                        
-                    # Si erreur de mode de remplissage, essayer tous les modes: FOK, IOC, RETURN
-                    if result and (result.retcode == 10030 or "filling" in (result.comment or "").lower() or "unsupported" in (result.comment or "").lower()):
-                        attempted_mode = self.get_filling_mode_name(request.get("type_filling", 0))
-                        fallback_modes = [mt5.ORDER_FILLING_FOK, mt5.ORDER_FILLING_IOC, mt5.ORDER_FILLING_RETURN]
-                        tried = request.get("type_filling")
-                        success = False
-                        for mode in fallback_modes:
-                            if mode == tried:
-                                continue
-                            fallback_mode = self.get_filling_mode_name(mode)
-                            trade_logger_instance.log_filling_mode_error(
-                                symbol, result.retcode, result.comment or "Invalid fill",
-                                attempted_mode, fallback_mode
+                    
+                        result = mt5.order_send(request)
+                    
+                        # Si succès, logger et sortir de la boucle
+                        if result and result.retcode == mt5.TRADE_RETCODE_DONE:
+                            trade_logger_instance.log_trade_success(
+                                symbol, request.get("type", "UNKNOWN"), 
+                                result.order if result else 0
                             )
-                            logger.warning(f"Unsupported filling mode - Essai avec {fallback_mode} pour {symbol}")
-                            request["type_filling"] = mode
-                            result = mt5.order_send(request)
-                            if result and result.retcode == mt5.TRADE_RETCODE_DONE:
-                                trade_logger_instance.log_filling_mode_success(symbol, fallback_mode, was_fallback=True)
-                                trade_logger_instance.log_trade_success(symbol, request.get("type", "UNKNOWN"), result.order if result else 0)
-                                logger.info(f"Ordre réussi avec {fallback_mode} pour {symbol}")
-                                success = True
-                                break
-                        if success:
                             break
-                        retry_count = max_retries  # sortir de la boucle
-                        continue
                         
-                    # Autre erreur, logger et sortir de la boucle
-                    error_msg = result.comment if result else "Unknown error"
-                    trade_logger_instance.log_trade_error(
-                        symbol, request.get("type", "UNKNOWN"),
-                        result.retcode if result else -1, error_msg,
-                        filling_mode_name
-                    )
-                    break
+                        # Si erreur de mode de remplissage, essayer tous les modes: FOK, IOC, RETURN
+                        if result and (result.retcode == 10030 or "filling" in (result.comment or "").lower() or "unsupported" in (result.comment or "").lower()):
+                            attempted_mode = self.get_filling_mode_name(request.get("type_filling", 0))
+                            fallback_modes = [mt5.ORDER_FILLING_FOK, mt5.ORDER_FILLING_IOC, mt5.ORDER_FILLING_RETURN]
+                            tried = request.get("type_filling")
+                            success = False
+                            for mode in fallback_modes:
+                                if mode == tried:
+                                    continue
+                                fallback_mode = self.get_filling_mode_name(mode)
+                                trade_logger_instance.log_filling_mode_error(
+                                    symbol, result.retcode, result.comment or "Invalid fill",
+                                    attempted_mode, fallback_mode
+                                )
+                                logger.warning(f"Unsupported filling mode - Essai avec {fallback_mode} pour {symbol}")
+                                request["type_filling"] = mode
+                                result = mt5.order_send(request)
+                                if result and result.retcode == mt5.TRADE_RETCODE_DONE:
+                                    trade_logger_instance.log_filling_mode_success(symbol, fallback_mode, was_fallback=True)
+                                    trade_logger_instance.log_trade_success(symbol, request.get("type", "UNKNOWN"), result.order if result else 0)
+                                    logger.info(f"Ordre réussi avec {fallback_mode} pour {symbol}")
+                                    success = True
+                                    break
+                            if success:
+                                break
+                            retry_count = max_retries  # sortir de la boucle
+                            continue
+                        
+                        # Autre erreur, logger et sortir de la boucle
+                        error_msg = result.comment if result else "Unknown error"
+                        trade_logger_instance.log_trade_error(
+                            symbol, request.get("type", "UNKNOWN"),
+                            result.retcode if result else -1, error_msg,
+                            filling_mode_name
+                        )
+                        break
                     
-                except Exception as e:
-                    logger.error(f"Erreur lors de l'envoi de l'ordre pour {symbol}: {e}")
-                    retry_count += 1
-                    if retry_count < max_retries:
-                        logger.info(f"Nouvelle tentative {retry_count}/{max_retries}...")
-                        time.sleep(1)  # Attendre 1 seconde avant de réessayer
+                    except Exception as e:
+                        logger.error(f"Erreur lors de l'envoi de l'ordre pour {symbol}: {e}")
+                        retry_count += 1
+                        if retry_count < max_retries:
+                            logger.info(f"Nouvelle tentative {retry_count}/{max_retries}...")
+                            time.sleep(1)  # Attendre 1 seconde avant de réessayer
+            
             
             # Vérifier si result est None
             if result is None:
@@ -3430,39 +3625,21 @@ class MT5AIClient:
             logger.error(f"Erreur execution trade {symbol}: {e}")
             return False
     
-    def check_positions(self):
-        """Vérifie les positions ouvertes et les ferme si nécessaire"""
-        try:
-            positions = mt5.positions_get()
-            if not positions:
-                self.positions.clear()
-                return
-            
-            current_symbols = {pos.symbol for pos in positions}
-            
-            # Fermer les positions qui ne sont plus dans notre tracking
-            for symbol in list(self.positions.keys()):
-                if symbol not in current_symbols:
-                    logger.info(f"Position {symbol} fermee (plus dans MT5)")
-                    del self.positions[symbol]
-            
-            # Mettre à jour le tracking des positions
-            self.positions.clear()
-            for pos in positions:
-                self.positions[pos.symbol] = {
-                    "ticket": pos.ticket,
-                    "symbol": pos.symbol,
-                    "type": "BUY" if pos.type == mt5.POSITION_TYPE_BUY else "SELL",
-                    "volume": pos.volume,
-                    "price": pos.price_open,
-                    "sl": pos.sl,
-                    "tp": pos.tp,
-                    "open_time": datetime.fromtimestamp(pos.time),
-                    "profit": pos.profit
-                }
-                
-        except Exception as e:
-            logger.error(f"Erreur verification positions: {e}")
+    def _track_positions(self, positions):
+        """Tracking self.positions (symbole → position) depuis un snapshot MT5"""
+        self.positions.clear()
+        for pos in positions:
+            self.positions[pos.symbol] = {
+                "ticket": pos.ticket,
+                "symbol": pos.symbol,
+                "type": "BUY" if pos.type == mt5.POSITION_TYPE_BUY else "SELL",
+                "volume": pos.volume,
+                "price": pos.price_open,
+                "sl": pos.sl,
+                "tp": pos.tp,
+                "open_time": datetime.fromtimestamp(pos.time),
+                "profit": pos.profit
+            }
     
     def close_position(self, pos):
         try:
@@ -3494,7 +3671,11 @@ class MT5AIClient:
                 "type_time": mt5.ORDER_TIME_GTC,
                 "type_filling": mt5.ORDER_FILLING_RETURN,
             }
-            result = mt5.order_send(request)
+            if ORDER_EXECUTOR_AVAILABLE:
+                # Clôture prioritaire ; RETURN reste le premier essai tant qu'aucun mode n'est appris
+                result = self._send_order(symbol, "CLOSE", request, priority=PRIORITY_HIGH)
+            else:
+                result = mt5.order_send(request)
             if result and result.retcode == mt5.TRADE_RETCODE_DONE:
                 logger.info(f"Position fermee {symbol} ticket={position_ticket} profit=${pos.profit:.2f}")
                 return True
@@ -3516,6 +3697,64 @@ class MT5AIClient:
         except Exception as e:
             logger.error(f"Erreur auto close: {e}")
     
+    def _symbol_point(self, symbol):
+        """Point du symbole (statique : mis en cache pour toute la session)"""
+        point = self._point_cache.get(symbol)
+        if point is None:
+            info = mt5.symbol_info(symbol)
+            if not info:
+                return None
+            point = self._point_cache[symbol] = info.point
+        return point
+    
+    def _setup_position_engine(self):
+        """Handlers du moteur de positions : chacun propose, le moteur envoie un seul ordre par position"""
+        engine = PositionEngine(
+            send_sltp=lambda pos, sl, tp, reason: self.update_position_sl(pos.ticket, pos.symbol, sl, tp, reason),
+            close=self.close_position,
+        )
+
+        def trailing(pos, point):
+            new_sl = self._trailing_sl(pos, point)
+            return SLTPUpdate(new_sl, reason="TRAILING") if new_sl is not None else None
+
+        def break_even(pos, point):
+            new_sl = self._break_even_sl(pos)
+            return SLTPUpdate(new_sl, reason="BREAK_EVEN_TP50") if new_sl is not None else None
+
+        def dynamic_sl(pos, point):
+            # Uniquement les positions du robot (magic number)
+            if pos.magic != 123456:
+                return None
+            proposal = self._dynamic_sl(pos, point)
+            return SLTPUpdate(proposal[0], reason=proposal[1]) if proposal else None
+
+        def auto_close(pos, point):
+            if pos.profit is not None and pos.profit >= self.auto_close_target:
+                return CloseIntent("AUTO_CLOSE_PROFIT")
+            return None
+
+        engine.add_handler("trailing", trailing)
+        engine.add_handler("break_even", break_even)
+        engine.add_handler("dynamic_sl", dynamic_sl, interval=60)
+        engine.add_handler("auto_close", auto_close)
+        engine.on("open", lambda pos: logger.info(f"📥 Position ouverte {pos.symbol} ticket={pos.ticket}"))
+        engine.on("close", lambda pos: logger.info(f"Position {pos.symbol} fermee (plus dans MT5)"))
+        return engine
+    
+    def monitor_positions(self):
+        """Un seul snapshot positions par cycle : tracking, trailing, SL dynamique et auto-close coalescés"""
+        try:
+            positions = mt5.positions_get()
+            if positions is None:
+                # Échec de lecture (terminal déconnecté...) ≠ aucune position : snapshot conservé, cycle sauté
+                logger.warning(f"positions_get() a échoué ({mt5.last_error()}), cycle de surveillance ignoré")
+                return
+            self.position_engine.process(positions, self._symbol_point)
+            self._track_positions(positions)
+        except Exception as e:
+            logger.error(f"Erreur surveillance positions: {e}")
+    
     def _trigger_continuous_learning(self):
         """Déclenche le ré-entraînement IA sur le serveur (historique + prédictions → modèles)."""
         try:
@@ -3739,6 +3978,28 @@ class MT5AIClient:
             import traceback
             logger.error(f"Détails de l'erreur: {traceback.format_exc()}")
 
+    def _break_even_sl(self, position):
+        """SL au point d'entrée une fois 50% du chemin vers le TP parcouru, ou None"""
+        # Si le profit est différent de 0, la position a un TP/SL
+        if position.profit != 0:
+            return None
+        current_price = position.price_current
+        entry_price = position.price_open
+        sl = position.sl
+        tp = position.tp
+        
+        if position.type == mt5.ORDER_TYPE_BUY and current_price > entry_price:
+            distance_to_tp = tp - entry_price
+            current_profit = current_price - entry_price
+            if current_profit >= (distance_to_tp * 0.5) and sl < entry_price:
+                return entry_price
+        elif position.type == mt5.ORDER_TYPE_SELL and current_price < entry_price:
+            distance_to_tp = entry_price - tp
+            current_profit = entry_price - current_price
+            if current_profit >= (distance_to_tp * 0.5) and (sl > entry_price or sl == 0):
+                return entry_price
+        return None
+    
     def check_positions(self):
         """Vérifie les positions actives et met à jour les stops suiveurs"""
         try:
@@ -3751,67 +4012,31 @@ class MT5AIClient:
                 # Mettre à jour le trailing stop pour cette position
                 self.update_trailing_stop(position)
                 
-                # Vérifier si la position a atteint son TP ou SL
-                if position.profit != 0:  # Si le profit est différent de 0, la position a un TP/SL
+                # Si le prix est à mi-chemin entre l'entrée et le TP, on peut sécuriser les gains
+                new_sl = self._break_even_sl(position)
+                if new_sl is None:
                     continue
-                    
-                # Vérifier si le prix actuel est proche du TP pour ajuster le SL
-                current_price = position.price_current
-                entry_price = position.price_open
-                sl = position.sl
-                tp = position.tp
+                request = {
+                    "action": mt5.TRADE_ACTION_SLTP,
+                    "symbol": position.symbol,
+                    "position": position.ticket,
+                    "sl": new_sl,
+                    "tp": position.tp,
+                    "type_time": mt5.ORDER_TIME_GTC
+                }
                 
-                # Si le prix est à mi-chemin entre l'entrée et le TP, on peut sécuriser les gains
-                if position.type == mt5.ORDER_TYPE_BUY and current_price > entry_price:
-                    # Calculer la distance en pourcentage entre l'entrée et le TP
-                    distance_to_tp = tp - entry_price
-                    current_profit = current_price - entry_price
-                    
-                    # Si on a atteint 50% du TP, on peut déplacer le SL au point d'entrée
-                    if current_profit >= (distance_to_tp * 0.5) and sl < entry_price:
-                        # Mettre à jour le SL au point d'entrée
-                        request = {
-                            "action": mt5.TRADE_ACTION_SLTP,
-                            "symbol": position.symbol,
-                            "position": position.ticket,
-                            "sl": entry_price,
-                            "tp": tp,
-                            "type_time": mt5.ORDER_TIME_GTC
-                        }
-                        
-                        result = mt5.order_send(request)
-                        if result.retcode == mt5.TRADE_RETCODE_DONE:
-                            logger.info(f"SL déplacé au point d'entrée pour {position.symbol} (Ticket: {position.ticket})")
-                        else:
-                            logger.error(f"Erreur déplacement SL pour {position.symbol}: {result.comment}")
-                            
-                elif position.type == mt5.ORDER_TYPE_SELL and current_price < entry_price:
-                    # Même logique pour les positions de vente
-                    distance_to_tp = entry_price - tp
-                    current_profit = entry_price - current_price
-                    
-                    if current_profit >= (distance_to_tp * 0.5) and (sl > entry_price or sl == 0):
-                        # Mettre à jour le SL au point d'entrée
-                        request = {
-                            "action": mt5.TRADE_ACTION_SLTP,
-                            "symbol": position.symbol,
-                            "position": position.ticket,
-                            "sl": entry_price,
-                            "tp": tp,
-                            "type_time": mt5.ORDER_TIME_GTC
-                        }
-                        
-                        result = mt5.order_send(request)
-                        if result.retcode == mt5.TRADE_RETCODE_DONE:
-                            logger.info(f"SL déplacé au point d'entrée pour {position.symbol} (Ticket: {position.ticket})")
-                        else:
-                            logger.error(f"Erreur déplacement SL pour {position.symbol}: {result.comment}")
+                result = mt5.order_send(request)
+                if result.retcode == mt5.TRADE_RETCODE_DONE:
+                    logger.info(f"SL déplacé au point d'entrée pour {position.symbol} (Ticket: {position.ticket})")
+                else:
+                    logger.error(f"Erreur déplacement SL pour {position.symbol}: {result.comment}")
                             
         except Exception as e:
             logger.error(f"Erreur vérification positions: {e}")
     
     def execute_immediate_trade(self, symbol, signal_data):
         """Exécute un trade immédiat pour décision 100%"""
+        signal_ts = time.time()
         try:
             signal = signal_data.get('signal')
             confidence = signal_data.get('confidence', 0)
@@ -3826,6 +4051,8 @@ class MT5AIClient:
             if not symbol_info:
                 logger.error(f"Info symbole non disponible pour {symbol}")
                 return False
+            if ORDER_EXECUTOR_AVAILABLE:
+                position_size = self.execution_cache.normalize_volume(symbol, position_size, symbol_info)
                 
             tick = mt5.symbol_info_tick(symbol)
             if not tick:
@@ -3865,12 +4092,16 @@ class MT5AIClient:
                 "type_filling": filling_mode,
             }
             
-            result = mt5.order_send(request)
-            if result.retcode == mt5.TRADE_RETCODE_DONE:
+            if ORDER_EXECUTOR_AVAILABLE:
+                # Trades 100 % servis avant les ordres normaux en file
+                result = self._send_order(symbol, signal, request, priority=PRIORITY_HIGH, signal_ts=signal_ts)
+            else:
+                result = mt5.order_send(request)
+            if result and result.retcode == mt5.TRADE_RETCODE_DONE:
                 logger.info(f"✅ Trade 100% exécuté: {symbol} {signal} | Ticket: {result.order} | Lot: {position_size}")
                 return True
             else:
-                logger.error(f"❌ Erreur trade 100%: {result.comment}")
+                logger.error(f"❌ Erreur trade 100%: {result.comment if result else 'None'}")
                 return False
                 
         except Exception as e:
@@ -4226,68 +4457,63 @@ class MT5AIClient:
             logger.error(f"❌ Erreur critique dans get_latest_signal pour {symbol}: {str(e)}")
             return None
             
+    def _dynamic_sl(self, position, point):
+        """(nouveau SL, stratégie) du SL dynamique en pips, ou None"""
+        if not point:
+            return None
+        position_type = position.type
+        entry_price = position.price_open
+        current_price = position.price_current
+        current_sl = position.sl
+        pip_value = point * 10  # 1 pip = 10 points pour la plupart des paires
+        
+        # Configuration du trailing stop dynamique
+        trail_start_pips = 15  # Commencer le trailing après 15 pips de profit
+        trail_distance_pips = 10  # Distance du trailing stop (10 pips derrière le prix)
+        secure_profit_pips = 20  # Sécuriser le profit après 20 pips
+        
+        # Calculer le profit en pips
+        if position_type == mt5.POSITION_TYPE_BUY:
+            profit_pips = (current_price - entry_price) / pip_value
+        else:  # SELL
+            profit_pips = (entry_price - current_price) / pip_value
+        
+        # ===== STRATÉGIE 1: TRAILING STOP DYNAMIQUE =====
+        if profit_pips >= trail_start_pips:
+            new_sl = self.calculate_trailing_stop(position, current_price, trail_distance_pips, point)
+            if new_sl and self.should_update_sl(current_sl, new_sl, position_type):
+                return new_sl, "DYNAMIC_TRAIL"
+        
+        # ===== STRATÉGIE 2: SÉCURISATION PROFIT PARTIEL =====
+        if profit_pips >= secure_profit_pips:
+            new_sl = self.calculate_secure_sl(position, entry_price, current_price, point)
+            if new_sl and self.should_update_sl(current_sl, new_sl, position_type):
+                return new_sl, "PROFIT_SECURE"
+        
+        # ===== STRATÉGIE 3: DÉPLACEMENT AU POINT D'ENTRÉE =====
+        if profit_pips >= 10:  # Après 10 pips de profit
+            if position_type == mt5.POSITION_TYPE_BUY and current_sl < entry_price:
+                return entry_price, "BREAK_EVEN"
+            elif position_type == mt5.POSITION_TYPE_SELL and (current_sl > entry_price or current_sl == 0):
+                return entry_price, "BREAK_EVEN"
+        
+        return None
+    
     def update_dynamic_stop_loss(self, position):
         """Déplace dynamiquement le Stop Loss pour sécuriser les gains à chaque trade"""
         try:
-            symbol = position.symbol
-            ticket = position.ticket
-            position_type = position.type
-            entry_price = position.price_open
-            current_price = position.price_current
-            current_sl = position.sl
-            current_tp = position.tp
-            current_profit = position.profit
-            
             # Obtenir les informations du symbole pour calculer les points
-            symbol_info = mt5.symbol_info(symbol)
+            symbol_info = mt5.symbol_info(position.symbol)
             if not symbol_info:
                 return False
             
-            point = symbol_info.point
-            pip_value = point * 10  # 1 pip = 10 points pour la plupart des paires
-            
-            # Configuration du trailing stop dynamique
-            trail_start_pips = 15  # Commencer le trailing après 15 pips de profit
-            trail_distance_pips = 10  # Distance du trailing stop (10 pips derrière le prix)
-            secure_profit_pips = 20  # Sécuriser le profit après 20 pips
-            
-            # Calculer le profit en pips
-            if position_type == mt5.POSITION_TYPE_BUY:
-                profit_pips = (current_price - entry_price) / pip_value
-            else:  # SELL
-                profit_pips = (entry_price - current_price) / pip_value
-            
-            # ===== STRATÉGIE 1: TRAILING STOP DYNAMIQUE =====
-            if profit_pips >= trail_start_pips:
-                new_sl = self.calculate_trailing_stop(position, current_price, trail_distance_pips, point)
-                if new_sl and self.should_update_sl(current_sl, new_sl, position_type):
-                    success = self.update_position_sl(ticket, symbol, new_sl, current_tp, "DYNAMIC_TRAIL")
-                    if success:
-                        logger.info(f"🔄 SL trailing dynamique: {symbol} | Nouveau SL: {new_sl} | Profit: {profit_pips:.1f} pips")
-                        return True
-            
-            # ===== STRATÉGIE 2: SÉCURISATION PROFIT PARTIEL =====
-            if profit_pips >= secure_profit_pips:
-                new_sl = self.calculate_secure_sl(position, entry_price, current_price, point)
-                if new_sl and self.should_update_sl(current_sl, new_sl, position_type):
-                    success = self.update_position_sl(ticket, symbol, new_sl, current_tp, "PROFIT_SECURE")
-                    if success:
-                        logger.info(f"🔒 SL sécurisé: {symbol} | Nouveau SL: {new_sl} | Profit sécurisé: {profit_pips:.1f} pips")
-                        return True
-            
-            # ===== STRATÉGIE 3: DÉPLACEMENT AU POINT D'ENTRÉE =====
-            if profit_pips >= 10:  # Après 10 pips de profit
-                if position_type == mt5.POSITION_TYPE_BUY and current_sl < entry_price:
-                    success = self.update_position_sl(ticket, symbol, entry_price, current_tp, "BREAK_EVEN")
-                    if success:
-                        logger.info(f"⚖️ SL au point d'entrée: {symbol} | SL: {entry_price} | Profit: {profit_pips:.1f} pips")
-                        return True
-                elif position_type == mt5.POSITION_TYPE_SELL and (current_sl > entry_price or current_sl == 0):
-                    success = self.update_position_sl(ticket, symbol, entry_price, current_tp, "BREAK_EVEN")
-                    if success:
-                        logger.info(f"⚖️ SL au point d'entrée: {symbol} | SL: {entry_price} | Profit: {profit_pips:.1f} pips")
-                        return True
-            
+            proposal = self._dynamic_sl(position, symbol_info.point)
+            if proposal is None:
+                return False
+            new_sl, reason = proposal
+            if self.update_position_sl(position.ticket, position.symbol, new_sl, position.tp, reason):
+                logger.info(f"🔄 SL dynamique {reason}: {position.symbol} | Nouveau SL: {new_sl}")
+                return True
             return False
             
         except Exception as e:
@@ -4416,6 +4642,82 @@ class MT5AIClient:
             logger.error(f"❌ Erreur lors de la vérification de la connexion MT5: {str(e)}")
             return False
     
+    def _decision_payload(self, symbol, symbol_info, features=None):
+        """Requête /decision ; indicateurs M5 réels quand les features du cycle sont disponibles"""
+        bid = float(symbol_info.bid)
+        ask = float(symbol_info.ask)
+        data = {
+            "symbol": symbol,
+            "bid": bid,
+            "ask": ask,
+            "rsi": 50.0,
+            "atr": 0.001,
+            "ema_fast_h1": bid,
+            "ema_slow_h1": ask,
+            "ema_fast_m1": bid,
+            "ema_slow_m1": ask,
+            "is_spike_mode": False,
+            "dir_rule": 0,
+            "supertrend_trend": 0,
+            "volatility_regime": 0,
+            "volatility_ratio": 1.0,
+            "timestamp": datetime.now().isoformat()
+        }
+        if features:
+            data["rsi"] = round(features["rsi"], 2)
+            data["atr"] = features["atr"]
+            data["volatility_ratio"] = round(features["volatility_ratio"], 4)
+            data["volatility_regime"] = 1 if features["volatility_ratio"] > 1.5 else (-1 if features["volatility_ratio"] < 0.5 else 0)
+        return data
+
+    def run_signal_cycle(self):
+        """
+        Un cycle de trading pipeliné : bougies de tous les symboles en un passage, features empilées,
+        requêtes /decision concurrentes, puis exécution. Remplace la boucle symbole par symbole.
+        """
+        tel = self.telemetry
+        tel.start_cycle()
+        candidates = []
+        for symbol in self.symbols:
+            if symbol in self.positions:
+                continue
+            info = mt5.symbol_info(symbol)
+            if (info and info.visible and info.trade_mode == mt5.SYMBOL_TRADE_MODE_FULL
+                    and info.bid > 0 and info.ask > 0):
+                candidates.append((symbol, info))
+        
+        with tel.stage("bars"):
+            self.bar_store.refresh(
+                [s for s, _ in candidates],
+                lambda sym, pos, n: mt5.copy_rates_from_pos(sym, mt5.TIMEFRAME_M5, pos, n),
+            )
+        
+        with tel.stage("features"):
+            rows = {}
+            syms, bars = self.bar_store.stack([s for s, _ in candidates])
+            if syms:
+                feats = batch_features(bars)
+                rows = {sym: feature_row(feats, i) for i, sym in enumerate(syms)}
+        
+        with tel.stage("decision"):
+            urls = [f"{LOCAL_API_URL}/decision", f"{RENDER_API_URL}/decision"]
+            calls = {s: (urls, self._decision_payload(s, info, rows.get(s))) for s, info in candidates}
+            decisions = self.http_fanout.post_many(calls)
+        
+        with tel.stage("execute"):
+            for symbol, _ in candidates:
+                signal_data = decisions.get(symbol)
+                if not signal_data:
+                    continue
+                try:
+                    logger.info(f"✅ Signal reçu pour {symbol}: {signal_data.get('action', 'unknown')}")
+                    if self.execute_trade(symbol, signal_data):
+                        logger.info(f"⚡ Trade exécuté: {symbol}")
+                except Exception as e:
+                    logger.debug(f"Erreur traitement {symbol}: {e}")
+        
+        return tel.end_cycle(len(candidates))
+
     def run(self):
         """Boucle principale ultra-optimisée pour trading réactif"""
         logger.info("🚀 Démarrage du client MT5 AI Ultra-Rapide")
@@ -4438,6 +4740,7 @@ class MT5AIClient:
         last_neutral_check = time.time()
         last_sl_check = time.time()
         last_connection_check = time.time()
+        last_telemetry_log = time.time()
         last_training_time = 0
         last_retrain_trigger_time = 0
         connection_retry_count = 0
@@ -4466,22 +4769,34 @@ class MT5AIClient:
                     current_time = time.time()
                     
                     # ===== VÉRIFICATIONS ESSENTIELLES SEULEMENT =====
-                    self.check_positions()
-                    self.auto_close_winners(1.0)
+                    if POSITION_ENGINE_AVAILABLE:
+                        self.monitor_positions()
+                    else:
+                        self.check_positions()
+                        self.auto_close_winners(self.auto_close_target)
                     
                     # ===== TRADING ULTRA-RAPIDE =====
-                    # Vérifier chaque symbole sans délai
-                    for symbol in self.symbols:
-                        try:
-                            # Vérifier rapidement si on peut trader
-                            if symbol not in self.positions:
-                                signal_data = self.get_latest_signal(symbol)
-                                if signal_data:
-                                    # Trade immédiat si signal valide
-                                    if self.execute_trade(symbol, signal_data):
-                                        logger.info(f"⚡ Trade exécuté: {symbol}")
-                        except Exception as e:
-                            logger.debug(f"Erreur traitement {symbol}: {e}")
+                    if SIGNAL_PIPELINE_AVAILABLE:
+                        # Tous les symboles en un cycle pipeliné (bougies, features, /decision concurrents)
+                        self.run_signal_cycle()
+                        if current_time - last_telemetry_log >= 60:
+                            logger.info(f"⏱️ Télémétrie cycle: {self.telemetry.summary()}")
+                            if ORDER_EXECUTOR_AVAILABLE:
+                                logger.info(f"⏱️ Exécution ordres: {self.order_executor.stats()}")
+                            last_telemetry_log = current_time
+                    else:
+                        # Vérifier chaque symbole sans délai
+                        for symbol in self.symbols:
+                            try:
+                                # Vérifier rapidement si on peut trader
+                                if symbol not in self.positions:
+                                    signal_data = self.get_latest_signal(symbol)
+                                    if signal_data:
+                                        # Trade immédiat si signal valide
+                                        if self.execute_trade(symbol, signal_data):
+                                            logger.info(f"⚡ Trade exécuté: {symbol}")
+                            except Exception as e:
+                                logger.debug(f"Erreur traitement {symbol}: {e}")
                     
                     # ===== SURVEILLANCE LÉGÈRE (toutes les 60 secondes) =====
                     if current_time - last_aggressive_check >= 60:
@@ -4492,7 +4807,8 @@ class MT5AIClient:
                         logger.info("📊 Surveillance des décisions neutres - désactivée")
                         last_neutral_check = current_time
                     
-                    if current_time - last_sl_check >= 60:
+                    # SL dynamique : handler du moteur de positions (intervalle 60 s) sinon scan dédié
+                    if not POSITION_ENGINE_AVAILABLE and current_time - last_sl_check >= 60:
                         self.monitor_dynamic_sl_all_positions()
                         last_sl_check = current_time
                     
@@ -4519,6 +4835,8 @@ class MT5AIClient:
             logger.info("🛑 Arrêt demandé par l'utilisateur")
         finally:
             # logger.info("👋 Client MT5 AI arrêté")
+            if ORDER_EXECUTOR_AVAILABLE:
+                self.order_executor.shutdown()
             logger.info("👋 Client MT5 AI arrêté")
 
 if __name__ == "__main__":
@@ -6,7 +6,7 @@ Gère la conversion entre symboles TradingView et MT5.
 """
 
 import re
-from typing import Dict, Optional
+from typing import Any, Dict, Optional
 
 # Mappings canoniques: MT5 symbol → TradingView / API canonical form
 SYMBOL_MAPPINGS: Dict[str, Dict[str, str]] = {
@@ -123,8 +123,6 @@ _TV_CDP_TICKERS: Dict[str, str] = {
     "Crash 1000 Index": "DERIV:CRASH_1000_INDEX",
 }
 
-_TV_TO_MT5: Dict[str, str] = {v: k for k, v in _TV_CDP_TICKERS.items()}
-
 
 def get_symbol_mapping(mt5_symbol: str) -> Optional[Dict[str, str]]:
     """
@@ -213,6 +211,172 @@ def get_all_boom_crash_symbols() -> list[str]:
             if map_data["category"] == "boom_crash"]
 
 
+# ---------------------------------------------------------------------------
+# Registre de symboles interné : un alias (MT5, Deriv, TradingView, yfinance) → une SymbolInfo
+# ---------------------------------------------------------------------------
+
+# (id store serveur, nom MT5, yfinance, catégorie, alias supplémentaires)
+_KNOWN_INSTRUMENTS = (
+    ("BTCUSD", "BTCUSD", "BTC-USD", "crypto", ("BTC.X", "BITCOIN")),
+    ("ETHUSD", "ETHUSD", "ETH-USD", "crypto", ("ETH.X", "ETHEREUM")),
+    ("SOLANA", "SOLUSD", "SOL-USD", "crypto", ()),
+    ("BNB", "BNBUSD", "BNB-USD", "crypto", ()),
+    ("XAUUSD", "XAUUSD", "GC=F", "metal", ("GOLD", "OR")),
+    ("ARGENT", "XAGUSD", "SI=F", "metal", ()),
+    ("EURUSD", "EURUSD", "EURUSD=X", "forex", ()),
+    ("GBPUSD", "GBPUSD", "GBPUSD=X", "forex", ()),
+    ("USDJPY", "USDJPY", "USDJPY=X", "forex", ()),
+    ("USDCHF", "USDCHF", "USDCHF=X", "forex", ()),
+    ("AUDUSD", "AUDUSD", "AUDUSD=X", "forex", ()),
+    ("NZDUSD", "NZDUSD", "NZDUSD=X", "forex", ()),
+    ("USDCAD", "USDCAD", "USDCAD=X", "forex", ()),
+) + tuple(
+    (f"{kind.upper()} {n} INDEX", f"{kind} {n} Index", "", "boom_crash",
+     (f"{kind.upper()}300N",) if n == 300 else ())
+    for kind in ("Boom", "Crash") for n in (300, 500, 600, 900, 1000)
+)
+
+# Les redirections MT5 historiques qui ne fusionnent PAS les stores serveur
+_MT5_REDIRECTS: Dict[str, str] = {"XAUEUR": "XAUUSD"}
+
+_CURRENCIES = frozenset(("USD", "EUR", "GBP", "JPY", "CHF", "AUD", "NZD", "CAD", "SEK", "NOK", "ZAR", "MXN", "SGD", "HKD", "TRY", "PLN"))
+_METAL_PREFIXES = ("XAU", "XAG", "XPT", "XPD")
+_CRYPTO_PREFIXES = ("BTC", "ETH", "SOL", "BNB", "XRP", "LTC", "ADA", "DOGE")
+_SYNTHETIC_MARKERS = ("volatility", "step", "jump", "range", "dex", "1hz", "boom", "crash", "gain", "pain", "painx", "gainx")
+_NON_ALNUM = re.compile(r"[^A-Z0-9]")
+_BOOM_CRASH_TIER = re.compile(r"(BOOM|CRASH)(\d+)")
+_BOOM_CRASH_DIGIT = re.compile(r"(boom|crash)\d")
+_REGISTRY_MAX_ALIASES = 10000
+
+
+def _compact(s: str) -> str:
+    return _NON_ALNUM.sub("", s.upper())
+
+
+def _deriv_key(s: str) -> str:
+    """Clé compacte Deriv / bc_heure : 'Boom 500 Index' → 'BOOM500', 'EUR/USD' → 'EURUSD'."""
+    compact = _compact(s)
+    m = _BOOM_CRASH_TIER.match(compact)
+    return f"{m.group(1)}{m.group(2)}" if m else compact
+
+
+def _boom_crash_flag(raw: str) -> bool:
+    s_raw = raw.lower()
+    s = s_raw.replace(" ", "").replace("_", "")
+    if "painx" in s_raw or "gainx" in s_raw:
+        return True
+    boom, crash = "boom" in s_raw, "crash" in s_raw
+    if not boom and not crash:
+        return False
+    return "index" in s_raw or bool(_BOOM_CRASH_DIGIT.search(s))
+
+
+class SymbolInfo:
+    """Instrument interné : id de store, tickers par fournisseur et drapeaux précalculés."""
+
+    __slots__ = (
+        "id", "mt5", "deriv", "tradingview", "yfinance", "api", "category", "known",
+        "is_boom", "is_crash", "is_boom_crash", "is_synthetic", "is_weltrade",
+        "is_forex", "is_metal", "is_crypto", "spellings",
+    )
+
+    def __init__(self, id: str, mt5: str, yfinance: str = "", category: str = "", known: bool = False):
+        self.id = id
+        self.mt5 = mt5
+        self.known = known
+        self.deriv = _deriv_key(mt5)
+        self.api = mt5.replace(" ", "")
+        self.yfinance = yfinance
+        self.tradingview = _TV_CDP_TICKERS.get(mt5, "")
+        low = mt5.lower()
+        compact = self.deriv
+        self.is_boom_crash = _boom_crash_flag(mt5)
+        self.is_boom = self.is_boom_crash and ("boom" in low or "gainx" in low)
+        self.is_crash = self.is_boom_crash and ("crash" in low or "painx" in low)
+        self.is_weltrade = compact.startswith(("PAINX", "GAINX", "FXVOL"))
+        stripped = low.replace(" ", "").replace("_", "")
+        self.is_synthetic = bool(mt5) and (
+            self.is_boom_crash
+            or any(m in low for m in _SYNTHETIC_MARKERS)
+            or low.startswith("r_") or stripped.startswith("1hz")
+        )
+        self.is_metal = category == "metal" or (not self.is_synthetic and compact.startswith(_METAL_PREFIXES))
+        self.is_crypto = category == "crypto" or (not self.is_synthetic and compact.startswith(_CRYPTO_PREFIXES))
+        self.is_forex = category == "forex" or (
+            not (self.is_synthetic or self.is_metal or self.is_crypto)
+            and len(compact) == 6 and compact[:3] in _CURRENCIES and compact[3:] in _CURRENCIES
+        )
+        self.category = category or (
+            "boom_crash" if self.is_boom_crash else "synthetic" if self.is_synthetic
+            else "metal" if self.is_metal else "crypto" if self.is_crypto
+            else "forex" if self.is_forex else ""
+        )
+        spellings = [mt5]
+        if self.is_boom_crash and mt5.endswith(" Index"):
+            short = mt5[: -len(" Index")]
+            spellings += [short.replace(" ", ""), short.upper(), mt5.upper()]
+        self.spellings = tuple(dict.fromkeys(spellings))
+
+    def __repr__(self) -> str:
+        return f"SymbolInfo({self.id!r}, mt5={self.mt5!r}, category={self.category!r})"
+
+
+class SymbolRegistry:
+    """Résolution en une consultation de dict ; les orthographes inconnues sont calculées une fois puis internées."""
+
+    def __init__(self):
+        self._index: Dict[str, SymbolInfo] = {}
+        self._known: Dict[str, SymbolInfo] = {}  # formes normalisées des instruments connus
+        self.by_id: Dict[str, SymbolInfo] = {}
+        self.misses = 0
+        for sid, mt5, yf, category, aliases in _KNOWN_INSTRUMENTS:
+            self.register(SymbolInfo(sid, mt5, yf, category, known=True), aliases)
+
+    def register(self, info: SymbolInfo, aliases=()) -> SymbolInfo:
+        self.by_id[info.id] = info
+        names = (info.id, info.mt5, info.api, info.deriv, info.yfinance, info.tradingview, *info.spellings, *aliases)
+        for name in names:
+            if not name:
+                continue
+            for key in (name, name.upper(), _compact(name)):
+                self._known.setdefault(key, info)
+        return info
+
+    def resolve(self, raw: Any) -> SymbolInfo:
+        info = self._index.get(raw)
+        if info is None:
+            info = self._resolve_slow(raw)
+        return info
+
+    def canonical_id(self, raw: Any) -> str:
+        return self.resolve(raw).id
+
+    def _resolve_slow(self, raw: Any) -> SymbolInfo:
+        self.misses += 1
+        s = str(raw or "").strip()
+        up = s.upper()
+        info = None
+        if s:
+            bare = up.split(":", 1)[1] if ":" in up else up
+            for key in (up, up.replace("=X", "").replace("=F", ""), bare, _compact(bare)):
+                info = self._known.get(key)
+                if info is not None:
+                    break
+        if info is None:
+            # instrument inconnu : clé UPPER pour les synthétiques Deriv, orthographe brute sinon
+            sid = up if any(k in up for k in ("BOOM", "CRASH", "VOLAT")) else s
+            info = SymbolInfo(sid, s)
+        if isinstance(raw, str) and len(self._index) < _REGISTRY_MAX_ALIASES:
+            self._index[raw] = info
+        return info
+
+    def stats(self) -> Dict[str, int]:
+        return {"aliases": len(self._index), "known": len(self.by_id), "misses": self.misses}
+
+
+symbol_registry = SymbolRegistry()
+
+
 def resolve_mt5_symbol(raw: str) -> str:
     """
     Résout toute variante MT5/TV vers le nom canonique MT5.
@@ -220,43 +384,10 @@ def resolve_mt5_symbol(raw: str) -> str:
     """
     if not raw:
         return "XAUUSD"
-    s = raw.strip()
-    if s.upper() in ("XAUEUR", "GOLD", "OR"):
-        return "XAUUSD"
-
-    mapping = get_symbol_mapping(s)
-    if mapping:
-        return mapping["mt5"]
-
-    if s in _TV_TO_MT5:
-        return _TV_TO_MT5[s]
-
-    up = s.upper().replace("DERIV:", "").strip()
-    if up in _TV_TO_MT5:
-        return _TV_TO_MT5[up]
-
-    compact = re.sub(r"[^A-Z0-9]", "", up)
-    for canon, data in SYMBOL_MAPPINGS.items():
-        api_key = re.sub(r"[^A-Z0-9]", "", data.get("api", "").upper())
-        canon_key = re.sub(r"[^A-Z0-9]", "", canon.upper())
-        if compact and compact in (api_key, canon_key):
-            return canon
-
-    m = re.match(r"^(BOOM|CRASH)[_]?(\d+)[_]?(INDEX)?$", compact)
-    if m:
-        kind = m.group(1).title()
-        num = m.group(2)
-        candidate = f"{kind} {num} Index"
-        if get_symbol_mapping(candidate):
-            return candidate
-
-    m2 = re.match(r"^(BOOM|CRASH)(\d+)$", compact)
-    if m2:
-        candidate = f"{m2.group(1).title()} {m2.group(2)} Index"
-        if get_symbol_mapping(candidate):
-            return candidate
-
-    return s
+    redirect = _MT5_REDIRECTS.get(raw.strip().upper())
+    if redirect:
+        return redirect
+    return symbol_registry.resolve(raw).mt5
 
 
 def mt5_to_tv_cdp_ticker(mt5_symbol: str) -> str:
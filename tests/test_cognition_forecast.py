@@ -0,0 +1,80 @@
+"""
+Unit tests for the vectorized cognition forecast and the cached pattern-memory bias.
+
+pytest tests/test_cognition_forecast.py -v
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "Python"))
+
+from ml import pattern_memory
+from ml.cognition_forecast import forecast_200, forecast_200_batch, to_mt5_payload
+
+
+def _frame(seed: int, n: int = 120, start: float = 100.0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = start + np.cumsum(rng.normal(0, 0.5, n))
+    open_ = np.r_[close[0], close[:-1]]
+    spread = rng.uniform(0.1, 0.6, n)
+    return pd.DataFrame({
+        "time": pd.date_range("2026-01-01", periods=n, freq="min"),
+        "open": open_,
+        "high": np.maximum(open_, close) + spread,
+        "low": np.minimum(open_, close) - spread,
+        "close": close,
+    })
+
+
+def test_paths_are_consistent_ohlc_with_ordered_quantiles():
+    df = _frame(3)
+    fc = forecast_200(df, "TEST_SYM", "M1", horizon=150, gom={"verdict_num": 2, "coherence_pct": 80})
+    assert len(fc.closes) == len(fc.highs) == len(fc.lows) == len(fc.opens) == 150
+    assert fc.opens[0] == float(df["close"].iloc[-1])
+    assert fc.opens[1:] == fc.closes[:-1]
+    h, l, o, c = map(np.asarray, (fc.highs, fc.lows, fc.opens, fc.closes))
+    assert np.all(h >= np.maximum(o, c)) and np.all(l <= np.minimum(o, c))
+    assert np.all(np.asarray(fc.q10) <= c) and np.all(c <= np.asarray(fc.q90))
+    assert fc.direction in ("BUY", "SELL", "NEUTRAL") and 0.2 <= fc.confidence <= 0.92
+    assert len(to_mt5_payload(fc)["candles"]) == 150
+
+
+def test_batch_matches_single_calls_and_flat_fallback():
+    frames = {"A": _frame(1), "B": _frame(2, start=50.0), "SHORT": _frame(4, n=20)}
+    gom = {"A": {"verdict_num": -3, "coherence_pct": 70}}
+    batch = forecast_200_batch(frames, "M5", 80, gom=gom, bc_confidence={"B": 65.0})
+    assert list(batch) == ["A", "B", "SHORT"]
+    a = forecast_200(frames["A"], "A", "M5", 80, gom=gom["A"])
+    b = forecast_200(frames["B"], "B", "M5", 80, bc_confidence=65.0)
+    for single, many in ((a, batch["A"]), (b, batch["B"])):
+        assert single.direction == many.direction and single.patterns == many.patterns
+        np.testing.assert_allclose(single.closes, many.closes)
+        np.testing.assert_allclose(single.q90, many.q90)
+    short = batch["SHORT"]
+    assert short.direction == "NEUTRAL" and set(short.closes) == {float(frames["SHORT"]["close"].iloc[-1])}
+
+
+def test_memory_bias_cached_until_file_changes(tmp_path):
+    path = tmp_path / "memory.json"
+    assert pattern_memory.memory_bias_for_symbol("EURUSD", 10, path=path) == 0.0
+
+    data = {"symbols": {}}
+    for _ in range(4):
+        pattern_memory.update_pattern_memory("EURUSD", 2.0, "BUY", hour_utc=10, memory=data, save=False)
+    pattern_memory.save_memory(data, path)
+    first = pattern_memory.memory_bias_for_symbol("EURUSD", 10, path=path)
+    assert first > 0
+    assert pattern_memory.load_memory_cached(path) is pattern_memory.load_memory_cached(path)
+
+    # réécriture externe (autre processus) : détectée par mtime/taille
+    losing = {"symbols": {"EURUSD": {"hours": {"10": {"n": 5, "wins": 0, "net": -9.0}}}}}
+    path.write_text(json.dumps(losing), encoding="utf-8")
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert pattern_memory.memory_bias_for_symbol("EURUSD", 10, path=path) < 0
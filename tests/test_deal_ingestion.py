@@ -0,0 +1,88 @@
+"""
+Unit tests for the idempotent MT5 deal ingestion pipeline.
+
+pytest tests/test_deal_ingestion.py -v
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "Python"))
+
+from deal_ingestion import DealIngestionIndex, build_feedback_rows, normalize_times
+from ml import pattern_memory
+
+
+def _deal(n, **kw):
+    d = {
+        "mt5_deal_id": n,
+        "symbol": "Boom 500 Index",
+        "profit": 1.5 if n % 2 else -0.5,
+        "open_time": 1_700_000_000 + 60 * n,
+        "close_time": 1_700_000_120 + 60 * n,
+        "price": 5000.0,
+    }
+    d.update(kw)
+    return d
+
+
+def test_normalize_times_matches_legacy_format():
+    assert normalize_times([1700000000, 1700000000.5, "2024.01.02 10:11:12", "", None, "2024-01-02T10:00:00+00:00"]) == [
+        "2023-11-14T22:13:20Z",
+        "2023-11-14T22:13:20.500000Z",
+        "2024-01-02T10:11:12Z",
+        None,
+        None,
+        "2024-01-02T10:00:00+00:00",
+    ]
+
+
+def test_build_rows_skips_invalid_and_precomputes_hour():
+    rows, skipped = build_feedback_rows([_deal(1), _deal(2, symbol=""), _deal(3, close_time=None, open_time=None)])
+    assert skipped == 2
+    (row,) = rows
+    assert row["close_time"] == "2023-11-14T22:16:20Z"
+    assert row["entry_price"] == 5000.0 and row["is_win"] is True
+    assert row["_hour_utc"] == 22 and row["_duration_sec"] == 120.0
+
+
+def test_index_dedups_across_uploads_and_within_batch(tmp_path):
+    index = DealIngestionIndex(tmp_path / "idx.sqlite")
+    fresh, dups = index.split_new([_deal(1), _deal(2), _deal(2), _deal(0, mt5_deal_id=None)])
+    assert [d["mt5_deal_id"] for d in fresh] == [1, 2, None] and dups == 1
+    assert index.mark_seen(d["mt5_deal_id"] for d in fresh) == 2
+
+    reloaded = DealIngestionIndex(tmp_path / "idx.sqlite")
+    fresh, dups = reloaded.split_new([_deal(1), _deal(2, mt5_deal_id="2"), _deal(3)])
+    assert [d["mt5_deal_id"] for d in fresh] == [3] and dups == 2
+
+
+
+def test_concurrent_uploads_claim_ids_until_released(tmp_path):
+    path = tmp_path / "idx.sqlite"
+    worker_a, worker_b = DealIngestionIndex(path), DealIngestionIndex(path)
+    fresh_a, _ = worker_a.split_new([_deal(1), _deal(2)])
+    # retry de l'EA sur le même worker, puis upload concurrent sur un autre worker
+    assert worker_a.split_new([_deal(1), _deal(2)]) == ([], 2)
+    assert worker_b.split_new([_deal(1), _deal(2), _deal(3)])[0] == [_deal(3)]
+
+    # échec de persistance de `a` : les ids redeviennent disponibles
+    assert worker_a.release(d["mt5_deal_id"] for d in fresh_a) == 2
+    fresh_b, dups = worker_b.split_new([_deal(1), _deal(2)])
+    assert [d["mt5_deal_id"] for d in fresh_b] == [1, 2] and dups == 0
+    assert worker_b.mark_seen([1, 2, 3]) == 3
+    assert worker_b.release([1, 2, 3]) == 0  # déjà confirmés
+    assert DealIngestionIndex(path).split_new([_deal(1), _deal(3)]) == ([], 2)
+
+def test_pattern_memory_batch_writes_once(tmp_path, monkeypatch):
+    writes = []
+    real_save = pattern_memory.save_memory
+    monkeypatch.setattr(pattern_memory, "save_memory", lambda data, path: writes.append(path) or real_save(data, path))
+
+    rows, _ = build_feedback_rows([_deal(n) for n in range(1, 51)])
+    path = tmp_path / "memory.json"
+    assert pattern_memory.update_pattern_memory_batch(rows, path=path) == 50
+    assert writes == [path]
+    hours = pattern_memory.load_memory(path)["symbols"]["Boom 500 Index"]["hours"]
+    assert sum(h["n"] for h in hours.values()) == 50
+    assert sum(h["wins"] for h in hours.values()) == 25
@@ -0,0 +1,98 @@
+"""
+Unit tests for the Monte Carlo ensemble forecaster behind /robot/predict_ohlc.
+
+pytest tests/test_ensemble_forecast.py -v
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "Python"))
+
+from ml.ensemble_forecast import EnsembleForecaster, simulate_paths, summarize_paths
+
+
+def _frame(seed: int = 0, n: int = 400, sigma: float = 0.001) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0, sigma, n)))
+    open_ = np.r_[close[0], close[:-1]]
+    wick = rng.uniform(0.0, 0.0006, n)
+    return pd.DataFrame({
+        "time": pd.date_range("2026-01-01", periods=n, freq="min"),
+        "open": open_,
+        "high": np.maximum(open_, close) * (1 + wick),
+        "low": np.minimum(open_, close) * (1 - wick),
+        "close": close,
+    })
+
+
+def test_path_matrix_shapes_and_ohlc_coherence():
+    paths = simulate_paths(_frame(), horizon=120, n_paths=500, rng=np.random.default_rng(1))
+    for key in ("open", "high", "low", "close"):
+        assert paths[key].shape == (500, 120)
+    assert np.all(paths["open"][:, 0] == paths["last"])
+    assert np.array_equal(paths["open"][:, 1:], paths["close"][:, :-1])
+    assert np.all(paths["high"] >= np.maximum(paths["open"], paths["close"]))
+    assert np.all(paths["low"] <= np.minimum(paths["open"], paths["close"]))
+
+    s = summarize_paths(paths)
+    np.testing.assert_allclose(s["q10"], np.quantile(paths["close"], 0.1, axis=0))
+    np.testing.assert_allclose(s["q90"], np.quantile(paths["close"], 0.9, axis=0))
+    assert np.all(s["high"] >= np.maximum(s["open"], s["close"]) - 1e-12)
+    # le cône s'élargit avec l'horizon
+    width = s["q90"] - s["q10"]
+    assert width[-1] > width[0] * 3
+
+
+def test_center_path_sets_the_median_drift():
+    df = _frame(2)
+    last = float(df["close"].iloc[-1])
+    center = list(last * np.exp(np.linspace(0.0005, 0.05, 100)))
+    s = summarize_paths(simulate_paths(df, 100, 2000, center=center, rng=np.random.default_rng(3)))
+    assert abs(s["q50"][-1] / center[-1] - 1) < 0.005
+    assert s["prob_up"] > 0.9
+
+
+def test_forecaster_caches_per_symbol_and_last_bar():
+    fc = EnsembleForecaster(n_paths=300, seed=7)
+    df = _frame(4)
+    calls = []
+
+    def center():
+        calls.append(1)
+        return None
+
+    a = fc.forecast(df, 60, symbol="EURUSD", center=center)
+    b = fc.forecast(df, 60, symbol="EURUSD", center=center)
+    assert a is b and calls == [1] and fc.hits == 1 and fc.misses == 1
+    assert not a.q50.flags.writeable and len(a.q10) == 60
+
+    fc.forecast(df, 60, symbol="GBPUSD")
+    nxt = pd.concat([df, df.tail(1).assign(time=df["time"].iloc[-1] + pd.Timedelta(minutes=1))], ignore_index=True)
+    assert fc.forecast(nxt, 60, symbol="EURUSD") is not a
+    assert fc.stats()["entries"] == 3
+    assert fc.forecast(df.head(20), 60, symbol="SHORT") is None
+
+
+def test_default_seed_is_stable_across_processes():
+    # deux workers (PYTHONHASHSEED différents) doivent servir la même prévision pour la même barre
+    script = (
+        "import sys; sys.path[:0] = [sys.argv[1], sys.argv[2]]\n"
+        "from test_ensemble_forecast import _frame\n"
+        "from ml.ensemble_forecast import EnsembleForecaster\n"
+        "print(EnsembleForecaster(n_paths=50).forecast(_frame(2), 10, symbol='Boom 500 Index').q50[-1])\n"
+    )
+    tests_dir, python_dir = str(Path(__file__).parent), str(Path(__file__).parent.parent / "Python")
+    outputs = {
+        subprocess.run(
+            [sys.executable, "-c", script, tests_dir, python_dir],
+            env={**os.environ, "PYTHONHASHSEED": str(hs)}, capture_output=True, text=True, check=True,
+        ).stdout
+        for hs in (1, 2)
+    }
+    assert len(outputs) == 1 and float(outputs.pop()) > 0
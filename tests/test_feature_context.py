@@ -0,0 +1,84 @@
+"""
+Unit tests for the shared GOM feature context.
+
+pytest tests/test_feature_context.py -v
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "Python"))
+
+from correction_cycle_detector import compute_correction_exhaustion
+from ml.cognition_forecast import forecast_200
+from ml.feature_context import FeatureContextRegistry
+
+
+def _candles(n=260, seed=0, start=1_700_000_000, step=60):
+    rng = np.random.default_rng(seed)
+    close = 1000 + np.cumsum(rng.normal(0, 1, n))
+    open_ = np.r_[close[0], close[:-1]]
+    return pd.DataFrame({
+        "time": start + step * np.arange(n),
+        "open": open_,
+        "high": np.maximum(open_, close) + rng.random(n),
+        "low": np.minimum(open_, close) - rng.random(n),
+        "close": close,
+        "tick_volume": rng.integers(50, 500, n),
+    })
+
+
+def test_context_reused_until_new_bar():
+    reg = FeatureContextRegistry(ttl_sec=60)
+    frames = {"M1": _candles()}
+    ctx = reg.get("Boom 500 Index", frames)
+    assert reg.get("Boom 500 Index", frames) is ctx
+
+    frames2 = {"M1": _candles(n=261)}
+    assert reg.get("Boom 500 Index", frames2) is not ctx
+    assert reg.stats()["contexts_created"] == 2
+
+
+def test_correction_cycle_matches_and_reuses_rsi():
+    m1, m5, m15 = _candles(seed=1), _candles(seed=2, step=300), _candles(seed=3, step=900)
+    reg = FeatureContextRegistry()
+    ctx = reg.get("EURUSD", {"M1": m1, "M5": m5, "M15": m15})
+
+    plain = compute_correction_exhaustion(df_m1=m1, df_m5=m5, df_m15=m15)
+    for _ in range(3):
+        shared = compute_correction_exhaustion(df_m1=m1, df_m5=m5, df_m15=m15, feature_ctx=ctx)
+        assert shared == plain
+    rsi = reg.stats()["by_feature"]["rsi"]
+    assert rsi == {"hits": 6, "misses": 3}
+
+
+def test_forecast_matches_and_reuses_atr_patterns():
+    df = _candles(seed=4).sample(frac=1.0, random_state=0)
+    reg = FeatureContextRegistry()
+    ctx = reg.get("Crash 500 Index", {"M1": df})
+
+    plain = forecast_200(df, "Crash 500 Index", "M1", gom={"verdict_num": -2, "coherence_pct": 70})
+    for _ in range(2):
+        shared = forecast_200(
+            df, "Crash 500 Index", "M1", gom={"verdict_num": -2, "coherence_pct": 70}, feature_ctx=ctx,
+        )
+        assert shared == plain
+    by_feature = reg.stats()["by_feature"]
+    for kind in ("sorted", "atr", "patterns"):
+        assert by_feature[kind] == {"hits": 1, "misses": 1}
+
+
+def test_frame_fetch_happens_once_per_context():
+    calls = []
+
+    def fetcher(symbol, tf, count):
+        calls.append((symbol, tf, count))
+        return _candles(n=count)
+
+    ctx = FeatureContextRegistry().get("XAUUSD", {}, fetcher=fetcher)
+    first = ctx.frame("M5", min_len=50, fetch_count=250)
+    assert ctx.frame("M5", min_len=50, fetch_count=250) is first
+    assert calls == [("XAUUSD", "M5", 250)]
@@ -0,0 +1,89 @@
+"""
+Unit tests for the materialized GOM multi-timeframe tableau view.
+
+pytest tests/test_gom_tableau_view.py -v
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "Python"))
+
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from gom_tableau_view import GomTableauView, _ema_last, tf_cell
+
+
+def _candles(closes, start="2026-01-05 10:00"):
+    index = pd.date_range(start, periods=len(closes), freq="15min", name="time")
+    return pd.DataFrame({"close": closes}, index=index)
+
+
+def _ema_reference(closes, period):
+    ema = sum(closes[:period]) / period
+    for price in closes[period:]:
+        ema = (price - ema) * (2.0 / (period + 1)) + ema
+    return ema
+
+
+def test_tf_cell_matches_recursive_ema_rule():
+    closes = list(100 + np.cumsum(np.random.default_rng(3).normal(0, 1, 80)))
+    assert abs(_ema_last(np.array(closes), 20) - _ema_reference(closes, 20)) < 1e-9
+    assert tf_cell(np.linspace(100, 120, 80))["direction"] == "BULL"
+    down = tf_cell(np.linspace(120, 100, 80))
+    assert down["direction"] == "BEAR" and down["rsi"] == 0
+    assert tf_cell([1.0] * 10) == {"direction": "NEUT"}
+
+
+def test_on_candles_only_recomputes_when_a_bar_closes():
+    view = GomTableauView()
+    df = _candles(np.linspace(100, 120, 81))
+    assert view.on_candles("Boom 500 Index", "15", df)
+    # même bougie clôturée, bougie en cours modifiée → pas de recalcul
+    df2 = df.copy()
+    df2.iloc[-1, 0] = 50.0
+    assert not view.on_candles("BOOM 500 INDEX", "M15", df2)
+    assert view.stats()["cell_skips"] == 1
+
+    row = view.get("Boom500")
+    assert row["timeframes"]["M15"]["direction"] == "BULL" and row["revision"] == 1
+    assert view.mtf_fields("Boom 500 Index") == {"tf_m15_dir": "BULL", "tf_m15_rsi": 100}
+
+    assert view.on_candles("Boom 500 Index", "M15", _candles(np.linspace(120, 100, 82)))
+    assert view.get("Boom 500 Index")["timeframes"]["M15"]["direction"] == "BEAR"
+
+
+def test_cells_fresh_expires_when_uploads_stop():
+    view = GomTableauView()
+    view.on_candles("XAUUSD", "M15", _candles(np.linspace(100, 120, 81)))  # clôturée : 2026-01-06 05:45
+    at = lambda ts: datetime.fromisoformat(ts).replace(tzinfo=timezone.utc)
+    assert view.cells_fresh("XAUUSD", ("M15",), 45, now=at("2026-01-06 06:10"))
+    assert not view.cells_fresh("XAUUSD", ("M15",), 45, now=at("2026-01-06 06:30"))
+    assert not view.cells_fresh("XAUUSD", ("M15", "H1"), 45, now=at("2026-01-06 06:10"))  # cellule H1 absente
+
+
+def test_verdict_merge_and_cached_complete():
+    renders = []
+
+    def render(sym, row, verdict):
+        renders.append(sym)
+        return {"ok": True, "symbol": sym, "tf_m15_dir": row["timeframes"]["M15"]["direction"],
+                "verdict": verdict.get("verdict")}
+
+    view = GomTableauView(render_complete=render)
+    view.on_candles("XAUUSD", "M15", _candles(np.linspace(100, 120, 81)))
+    view.on_verdict("XAUUSD", {"verdict": "GOOD BUY", "tf_m15_dir": "NEUT", "tf_h1_dir": 1, "tf_h1_rsi": 61,
+                               "timestamp": "2026-01-05T10:00:00+00:00"})
+    row = view.get("XAUUSD")
+    assert row["timeframes"]["M15"]["direction"] == "BULL"  # NEUT du poller n'écrase pas la bougie
+    assert row["timeframes"]["H1"] == {"direction": "BULL", "rsi": 61}
+    assert row["verdict"]["verdict"] == "GOOD BUY"
+
+    record = {"verdict": "GOOD BUY", "timestamp": "2026-01-05T10:00:00+00:00"}
+    first = view.complete("XAUUSD", record)
+    assert view.complete("XAUUSD", record) is first and len(renders) == 1
+    view.complete("XAUUSD", {**record, "timestamp": "2026-01-05T10:00:05+00:00"})
+    assert len(renders) == 2
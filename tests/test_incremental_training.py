@@ -0,0 +1,126 @@
+"""
+Unit tests for the incremental ML training service.
+
+pytest tests/test_incremental_training.py -v
+"""
+
+import sys
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "Python"))
+
+from ml import incremental_training
+from ml.incremental_training import (
+    ArtifactPublisher,
+    FeedbackCache,
+    IncrementalTrainingService,
+    ModelHotReloader,
+)
+
+
+def _rows(start, stop, symbol="Boom 500 Index"):
+    return [
+        {
+            "id": i,
+            "symbol": symbol,
+            "created_at": f"2026-06-01T{i % 24:02d}:00:{i % 60:02d}Z",
+            "decision": "buy" if i % 2 else "sell",
+            "ai_confidence": 0.5 + (i % 5) / 10,
+            "profit": 2.0 if i % 3 else -1.0,
+            "is_win": bool(i % 3),
+        }
+        for i in range(start, stop)
+    ]
+
+
+@pytest.fixture
+def service(tmp_path):
+    return IncrementalTrainingService(
+        FeedbackCache(tmp_path / "cache.db"), ArtifactPublisher(tmp_path / "models"), max_workers=1
+    )
+
+
+def test_watermark_and_dedup(service):
+    assert service.cache.ingest(_rows(0, 10)) == 10
+    assert service.cache.ingest(_rows(5, 15)) == 5
+    assert service.cache.watermark() == max(r["created_at"] for r in _rows(0, 15))
+
+
+def test_partial_fit_only_consumes_new_rows(service):
+    service.cache.ingest(_rows(0, 30))
+    first = service.train_symbols()["Boom 500 Index"]
+    assert (first["version"], first["new_rows"]) == (1, 30)
+
+    assert service.train_symbols() == {}
+
+    service.cache.ingest(_rows(30, 40))
+    second = service.train_symbols()["Boom 500 Index"]
+    assert (second["version"], second["new_rows"]) == (2, 10)
+    assert second["model"]["total_trades"] == 40
+    assert second["model"]["win_rate"] == pytest.approx(sum(1 for i in range(40) if i % 3) / 40)
+
+
+def test_hot_reload_follows_pointer(service):
+    reloader = ModelHotReloader(service.publisher, check_interval=0)
+    assert reloader.get("Boom 500 Index") is None
+    service.cache.ingest(_rows(0, 12))
+    service.train_symbols()
+    assert reloader.get("Boom 500 Index")["version"] == 1
+
+
+def test_sliding_window_matches_fit_on_last_trades(tmp_path, service):
+    service.window = 25
+    service.cache.ingest(_rows(0, 20))
+    service.train_symbols()
+    service.cache.ingest(_rows(20, 32))
+    service.train_symbols()
+    service.cache.ingest(_rows(32, 40))
+    model = service.train_symbols()["Boom 500 Index"]["model"]
+
+    ref = IncrementalTrainingService(
+        FeedbackCache(tmp_path / "ref.db"), ArtifactPublisher(tmp_path / "ref"), max_workers=1, window=0
+    )
+    ref.cache.ingest(_rows(15, 40))
+    expected = ref.train_symbols()["Boom 500 Index"]["model"]
+    for key in ("total_trades", "wins", "confidence_threshold", "decision_weights", "time_patterns"):
+        assert model[key] == expected[key]
+    assert model["win_rate"] == pytest.approx(expected["win_rate"])
+    assert model["avg_profit"] == pytest.approx(expected["avg_profit"])
+
+
+class _Resp:
+    status_code = 200
+
+    def __init__(self, rows):
+        self._rows = rows
+
+    def json(self):
+        return self._rows
+
+
+def test_sync_pages_on_created_at_and_id(service, monkeypatch):
+    # 7 lignes dont 4 au même timestamp, à cheval sur une fin de page
+    remote = [{"id": i, "symbol": "EURUSD", "created_at": "2026-06-01T10:00:00Z" if 1 <= i <= 4 else f"2026-06-01T1{i}:00:00Z",
+               "profit": 1.0, "is_win": True} for i in range(7)]
+    remote.sort(key=lambda r: (r["created_at"], r["id"]))
+
+    def fake_get(url, headers=None, timeout=None):
+        q = parse_qs(urlparse(url).query)
+        rows = remote
+        if "or" in q:
+            wm = q["or"][0].split('"')[1]
+            wid = int(q["or"][0].rsplit("id.gt.", 1)[1].rstrip("))"))
+            rows = [r for r in rows if (r["created_at"], r["id"]) > (wm, wid)]
+        elif "created_at" in q:
+            rows = [r for r in rows if r["created_at"] >= q["created_at"][0][4:]]
+        return _Resp(rows[: int(q["limit"][0])])
+
+    import requests
+    monkeypatch.setattr(requests, "get", fake_get)
+    monkeypatch.setattr(incremental_training, "FETCH_PAGE_SIZE", 3)
+    assert service.cache.sync("http://supabase", "key") == 7
+    assert len(service.cache.rows_after("EURUSD", 0)) == 7
+    assert service.cache.sync("http://supabase", "key") == 0
@@ -0,0 +1,167 @@
+"""
+Unit tests for the in-process job scheduler behind the autonomous loops.
+
+pytest tests/test_job_scheduler.py -v
+"""
+
+import asyncio
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "Python"))
+
+from autonomous_loops import AutonomousLoopsManager
+from job_scheduler import JobScheduler
+
+
+def test_interval_jobs_run_with_jitter_and_stats():
+    async def scenario():
+        sched = JobScheduler(rng=random.Random(1))
+        calls = []
+
+        async def tick():
+            calls.append(time.monotonic())
+            return len(calls)
+
+        sched.add_job("tick", tick, interval=0.05, jitter=0.02)
+        sched.start()
+        await asyncio.sleep(0.35)
+        await sched.stop()
+        return calls, sched.status()["jobs"]["tick"]
+
+    calls, st = asyncio.run(scenario())
+    assert 3 <= len(calls) <= 8
+    gaps = [b - a for a, b in zip(calls, calls[1:])]
+    assert min(gaps) >= 0.045
+    assert st["runs"] == len(calls) and st["errors"] == 0
+    assert st["last_status"] == "completed" and st["avg_ms"] is not None
+
+
+def test_events_are_coalesced_while_job_runs():
+    async def scenario():
+        sched = JobScheduler()
+        batches = []
+        release = threading.Event()
+
+        def on_bar(events):
+            batches.append(sorted(e["symbol"] for e in events))
+            if len(batches) == 1:
+                release.wait(2)
+
+        sched.add_job("poller", on_bar, events=("new_bar",), pass_events=True)
+        sched.start()
+        assert sched.emit("verdict_change", symbol="X") == 0
+        sched.emit("new_bar", symbol="XAUUSD")
+        await asyncio.sleep(0.05)
+        # pendant l'exécution : trois événements → une seule relance
+        for sym in ("EURUSD", "Boom 500 Index", "EURUSD"):
+            threading.Thread(target=sched.emit, args=("new_bar",), kwargs={"symbol": sym}).start()
+        await asyncio.sleep(0.05)
+        release.set()
+        await asyncio.sleep(0.1)
+        await sched.stop()
+        return batches, sched.status()
+
+    batches, status = asyncio.run(scenario())
+    assert batches == [["XAUUSD"], ["Boom 500 Index", "EURUSD", "EURUSD"]]
+    job = status["jobs"]["poller"]
+    assert job["event_runs"] == 2 and job["coalesced_events"] >= 2
+    assert status["events_emitted"] == {"new_bar": 4}
+
+
+def test_overlap_prevented_until_timed_out_thread_finishes():
+    async def scenario():
+        sched = JobScheduler()
+        done = threading.Event()
+
+        def slow():
+            time.sleep(0.3)
+            done.set()
+
+        sched.add_job("slow", slow, timeout=0.05)
+        first = await sched.run_now("slow")
+        second = await sched.run_now("slow")  # le thread précédent tourne encore
+        await asyncio.to_thread(done.wait, 2)
+        await asyncio.sleep(0.01)
+        third = await sched.run_now("slow")
+        return first, second, third, sched.jobs["slow"].stats
+
+    first, second, third, stats = asyncio.run(scenario())
+    assert first["status"] == "timeout" and "error" in first
+    assert second == {"status": "skipped", "reason": "overlap", "trigger": "manual"}
+    assert third["status"] == "timeout"
+    assert stats.timeouts == 2 and stats.skipped_overlap == 1 and stats.runs == 2
+
+
+def test_loops_manager_reuses_in_process_runner_and_falls_back_to_subprocess():
+    async def scenario():
+        mgr = AutonomousLoopsManager()
+        builds = []
+
+        def build_recycler():
+            builds.append(1)
+            return lambda events: {"recycled": 0, "replaced": 0}
+
+        def broken():
+            raise ImportError("module absent")
+
+        mgr._builders["recycler"] = build_recycler
+        mgr._builders["gom_sync"] = broken
+        mgr._build_subprocess = lambda name: (lambda events: {"exit_code": 0})
+
+        r1 = await mgr.run_loop_iteration("recycler")
+        r2 = await mgr.run_loop_iteration("recycler")
+        r3 = await mgr.run_loop_iteration("gom_sync")
+        started = await mgr.start_loop("recycler")
+        status = mgr.get_status()
+        await mgr.stop_all_loops()
+        return builds, r1, r2, r3, started, status, mgr.running
+
+    builds, r1, r2, r3, started, status, running_after = asyncio.run(scenario())
+    assert builds == [1]
+    assert r1["status"] == "completed" and r1["mode"] == "in_process" and r1["recycled"] == 0
+    assert r2["last_run"] is not None
+    assert r3["mode"] == "subprocess" and r3["exit_code"] == 0
+    assert started["status"] == "started" and status["scheduler_running"]
+    assert status["loops"]["recycler"]["stats"]["runs"] >= 2
+    assert not running_after
+
+
+def test_stop_routes_require_leader_and_a_running_loop():
+    fastapi = pytest.importorskip("fastapi")
+    from fastapi.testclient import TestClient
+
+    from autonomous_routes import create_autonomous_router
+
+    async def scenario():
+        mgr = AutonomousLoopsManager()
+        mgr._builders["recycler"] = lambda: (lambda events: {"recycled": 0})
+        idle = await mgr.stop_loop("recycler")
+        idle_all = await mgr.stop_all_loops()
+        await mgr.start_loop("recycler")
+        stopped = await mgr.stop_loop("recycler")
+        again = await mgr.stop_loop("recycler")
+        await mgr.start_loop("recycler")
+        stopped_all = await mgr.stop_all_loops()
+        return idle, idle_all, stopped, again, stopped_all
+
+    idle, idle_all, stopped, again, stopped_all = asyncio.run(scenario())
+    assert idle["status"] == "not_running" and idle_all["status"] == "not_running"
+    assert stopped["status"] == "stopped" and again["status"] == "not_running"
+    assert stopped_all["status"] == "all_loops_stopped" and stopped_all["loops"] == ["recycler"]
+
+    leader = {"value": False}
+    app = fastapi.FastAPI()
+    app.include_router(create_autonomous_router(AutonomousLoopsManager(), is_leader=lambda: leader["value"]))
+    client = TestClient(app)
+    assert client.post("/autonomous/stop/recycler").status_code == 409
+    assert client.post("/autonomous/stop-all").status_code == 409
+    leader["value"] = True
+    assert client.post("/autonomous/stop/recycler").status_code == 409  # rien ne tournait
+    assert client.post("/autonomous/stop/nope").status_code == 404
+    assert client.post("/autonomous/stop-all").status_code == 409
@@ -0,0 +1,83 @@
+"""
+Unit tests for the on-demand sampling profiler and per-symbol tracer.
+
+pytest tests/test_live_profiler.py -v
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "Python"))
+
+from live_profiler import SamplingProfiler, SymbolTracer, traced
+
+
+def _busy_leaf(seconds):
+    end = time.perf_counter() + seconds
+    n = 0
+    while time.perf_counter() < end:
+        n += 1
+    return n
+
+
+def test_sampling_profiler_collapsed_stacks():
+    profiler = SamplingProfiler(interval=0.002)
+    profiler.start(duration=5)
+    _busy_leaf(0.3)
+    profiler.stop()
+
+    lines = profiler.collapsed().splitlines()
+    assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert any("test_live_profiler.py:_busy_leaf" in line for line in lines)
+    assert all("live-profiler" not in line.split(";")[0] for line in lines)
+    assert profiler.summary()["samples"] > 10
+
+
+def test_tracer_records_spans_only_for_armed_symbol():
+    tracer = SymbolTracer()
+
+    @traced("gate", tracer=tracer)
+    def gate(symbol, direction):
+        return direction == "BUY"
+
+    @traced("enrich", tracer=tracer)
+    async def enrich(out, symbol):
+        out["x"] = gate(symbol, "BUY")
+        await asyncio.sleep(0)
+        return out
+
+    @traced("decision", tracer=tracer)
+    async def decision(request):
+        return await enrich({}, request.symbol)
+
+    asyncio.run(decision(SimpleNamespace(symbol="EURUSD")))
+    assert not tracer.traces
+
+    tracer.arm("boom 500 index", max_traces=2)
+    for sym in ("EURUSD", "Boom 500 Index", "Boom 500 Index", "Boom 500 Index"):
+        asyncio.run(decision(SimpleNamespace(symbol=sym)))
+
+    assert len(tracer.traces) == 2 and not tracer.armed
+    spans = tracer.traces[0]["spans"]
+    assert [(s["name"], s["depth"]) for s in spans] == [("decision", 0), ("enrich", 1), ("gate", 2)]
+    assert spans[0]["dur_ms"] >= spans[1]["dur_ms"] >= spans[2]["dur_ms"]
+
+
+def test_traced_records_errors_and_is_transparent():
+    tracer = SymbolTracer()
+
+    @traced(tracer=tracer)
+    def failing(symbol):
+        raise ValueError(symbol)
+
+    tracer.arm("XAUUSD", max_traces=1)
+    try:
+        failing("XAUUSD")
+    except ValueError:
+        pass
+    (trace,) = tracer.traces
+    assert trace["spans"][0]["error"] == "ValueError"
+    assert failing.__name__ == "failing"
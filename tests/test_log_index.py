@@ -0,0 +1,106 @@
+"""
+Unit tests for the structured log index and the MT5 journal log parse index.
+
+pytest tests/test_log_index.py -v
+"""
+
+import json
+import logging
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "Python"))
+sys.path.insert(0, str(Path(__file__).parent.parent / "dashboard"))
+
+from log_index import LogIndexReader, StructuredLogHandler, attach_structured_log, tail_lines
+
+
+def _logger(tmp_path, **kwargs):
+    log = logging.getLogger(f"test_log_index.{tmp_path.name}")
+    log.setLevel(logging.INFO)
+    log.propagate = False
+    handler = StructuredLogHandler(tmp_path / "app.jsonl", **kwargs)
+    log.addHandler(handler)
+    return log, handler
+
+
+def test_tail_lines_reads_from_end(tmp_path):
+    path = tmp_path / "plain.log"
+    path.write_text("".join(f"line {i}\n" for i in range(10000)), encoding="utf-8")
+    assert tail_lines(path, 3, block_size=128) == ["line 9997", "line 9998", "line 9999"]
+    assert tail_lines(path, 0) == []
+
+
+def test_event_index_and_filters(tmp_path):
+    log, handler = _logger(tmp_path, checkpoint_every=10)
+    for i in range(200):
+        log.info("heartbeat %d", i)
+        if i % 20 == 0:
+            log.error(f"FILLING_MODE_ERROR | Symbol: EURUSD | Attempted: FOK | Code: {i}")
+    log.info("TRADE_SUCCESS | Symbol: Boom 500 Index | Ticket: 1", extra={"fields": {"ticket": 1}})
+    handler.close()
+
+    reader = LogIndexReader(tmp_path / "app.jsonl")
+    errors = reader.tail(limit=3, event="FILLING_MODE_ERROR")
+    assert [r["msg"].rsplit(" ", 1)[-1] for r in errors] == ["140", "160", "180"]
+    assert all(r["symbol"] == "EURUSD" for r in errors)
+
+    last = reader.tail(limit=2)
+    assert last[-1]["event"] == "TRADE_SUCCESS"
+    assert last[-1]["fields"] == {"ticket": 1}
+    assert reader.stats()["events"] == {"FILLING_MODE_ERROR": 10, "TRADE_SUCCESS": 1}
+    assert len(list(reader.query(events=["FILLING_MODE_ERROR"]))) == 10
+
+
+def test_rotation_keeps_index_per_segment(tmp_path):
+    log, handler = _logger(tmp_path, max_bytes=4000, backup_count=3)
+    for i in range(120):
+        log.warning(f"ORDER_SENT | Symbol: XAUUSD | n={i}")
+    handler.close()
+
+    reader = LogIndexReader(tmp_path / "app.jsonl", backup_count=3)
+    assert len(reader.segments()) == 4
+    msgs = [r["msg"] for r in reader.query(events=["ORDER_SENT"])]
+    # Seuls les segments conservés sont lisibles, en ordre chronologique
+    nums = [int(m.rsplit("=", 1)[1]) for m in msgs]
+    assert nums == sorted(nums) and nums[-1] == 119
+    assert reader.tail(limit=1, event="ORDER_SENT")[0]["msg"].endswith("n=119")
+
+    since = json.loads((tmp_path / "app.jsonl").read_text().splitlines()[0])["ts"]
+    assert all(r["ts"] >= since for r in reader.query(since=since))
+
+
+def test_queued_handler_writes_off_the_calling_thread(tmp_path):
+    log = logging.getLogger(f"test_log_index.queued.{tmp_path.name}")
+    log.setLevel(logging.INFO)
+    log.propagate = False
+    handler = attach_structured_log(tmp_path / "app.jsonl", logger=log, queued=True)
+    assert attach_structured_log(tmp_path / "app.jsonl", logger=log, queued=True) is handler
+    assert [type(h).__name__ for h in log.handlers] == ["QueueHandler"]
+    log.info("TRADE_SUCCESS | Symbol: EURUSD | Ticket: 7", extra={"fields": {"ticket": 7}})
+    handler.listener.stop()  # vide la file
+    handler.close()
+
+    rec = LogIndexReader(tmp_path / "app.jsonl").tail(limit=1, event="TRADE_SUCCESS")[0]
+    assert rec["symbol"] == "EURUSD" and rec["fields"] == {"ticket": 7}
+
+
+def test_journal_parse_index_reads_only_appended_lines(tmp_path):
+    from import_journal_from_logs import LogParseIndex
+
+    header = "\ufeff"
+    line = "QQ\t0\t10:00:{s:02d}.100\tTrades\t'1': deal #{n} buy 0.01 Boom 500 Index at 5000.0 done (based on order #{n})\r\n"
+    path = tmp_path / "20260616.log"
+    path.write_bytes((header + "".join(line.format(s=i, n=100 + i) for i in range(3))).encode("utf-16-le"))
+
+    index = LogParseIndex(tmp_path / "idx.json")
+    _, deals, _ = index.parse(path)
+    assert [d["deal_ticket"] for d in deals] == [100, 101, 102]
+
+    with path.open("ab") as f:
+        f.write(line.format(s=9, n=200).encode("utf-16-le"))
+    index.save()
+    reloaded = LogParseIndex(tmp_path / "idx.json")
+    entries, deals, _ = reloaded.parse(path)
+    assert [d["deal_ticket"] for d in deals] == [100, 101, 102, 200]
+    assert entries[200]["open_time"].second == 9
@@ -0,0 +1,89 @@
+"""
+Unit tests for the columnar ML feature pipeline.
+
+pytest tests/test_ml_feature_engineering.py -v
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "Python"))
+
+from ml_feature_engineering import (
+    FEATURE_SCHEMA,
+    FeatureEngineer,
+    compute_ohlcv_features,
+    feature_schema,
+)
+
+
+SNAPSHOT = {
+    'bid': 15750.0,
+    'spread_pips': 10.0,
+    'rsi_m1': 55.0,
+    'atr_m1': 50.0,
+    'atr_m5': 45.0,
+    'ema_fast_m1': 15760.0,
+    'ema_slow_m1': 15750.0,
+    'fvg_detected': True,
+    'tech_buy_score': 4.5,
+    'signal_action': 'buy',
+    'signal_confidence': 0.82,
+}
+
+
+class TestFeatureEngineer:
+    """Single-row and batch paths must agree."""
+
+    def test_schema_matches_matrix_width(self):
+        engineer = FeatureEngineer()
+        vec = engineer.prepare_features_from_snapshot(SNAPSHOT)
+        assert vec.shape == (len(FEATURE_SCHEMA),)
+        assert engineer.get_feature_importance_names() == [s.name for s in FEATURE_SCHEMA]
+        assert feature_schema()['n_features'] == len(FEATURE_SCHEMA)
+
+    def test_single_row_equals_batch_row(self):
+        engineer = FeatureEngineer()
+        other = {'bid': 0, 'signal_action': 'SELL', 'bb_squeeze': 1}
+        batch = engineer.prepare_feature_matrix([SNAPSHOT, other])
+        np.testing.assert_array_equal(batch[0], engineer.prepare_features_from_snapshot(SNAPSHOT))
+        np.testing.assert_array_equal(batch[1], engineer.prepare_features_from_snapshot(other))
+
+    def test_dataframe_equals_records(self):
+        engineer = FeatureEngineer()
+        records = [SNAPSHOT, {'bid': 100.0, 'rsi_h1': 30}]
+        np.testing.assert_array_equal(
+            engineer.prepare_feature_matrix(records),
+            engineer.prepare_feature_matrix(pd.DataFrame(records)),
+        )
+
+    def test_known_values(self):
+        names = [s.name for s in FEATURE_SCHEMA]
+        vec = FeatureEngineer().prepare_features_from_snapshot(SNAPSHOT)
+        assert vec[names.index('rsi_m1')] == pytest.approx(0.55)
+        assert vec[names.index('rsi_m5')] == pytest.approx(0.5)  # default 50
+        assert vec[names.index('fvg_detected')] == 1.0
+        assert vec[names.index('signal_action')] == 1.0
+
+    def test_empty_batch_raises(self):
+        with pytest.raises(ValueError):
+            FeatureEngineer().prepare_feature_matrix([])
+
+    def test_training_labels(self):
+        df = pd.DataFrame({'bid': [1.0, 1.0], 'direction_5min': [1, None], 'profit_5min': [-2.0, None]})
+        X, y = FeatureEngineer.create_training_dataset(df, FeatureEngineer())
+        assert X.shape == (2, len(FEATURE_SCHEMA))
+        assert y.tolist() == [[1, -1], [0, 0]]
+
+
+class TestOhlcvFeatures:
+
+    def test_invalid_price_flagged(self):
+        features, valid = compute_ohlcv_features([{'bid': 100.0, 'atr': 0.5}, {'bid': 0}])
+        assert features.shape == (2, 22)
+        assert valid.tolist() == [True, False]
+        assert features[0, 2] == 50.0  # rsi default
@@ -0,0 +1,169 @@
+"""
+Unit tests for the batched ML scoring path of ai_server (_ml_predict_batch, /ml/predict-batch).
+
+pytest tests/test_ml_predict_batch.py -v
+"""
+
+import importlib.util
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT / "Python"))
+
+sklearn = pytest.importorskip("sklearn")
+joblib = pytest.importorskip("joblib")
+pytest.importorskip("fastapi")
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+
+@pytest.fixture(scope="module")
+def server(tmp_path_factory):
+    # ai_server lit sys.argv et crée logs/ et ses bases relatives au répertoire courant à l'import
+    cwd, argv = os.getcwd(), sys.argv
+    os.chdir(tmp_path_factory.mktemp("ai_server_cwd"))
+    sys.argv = ["ai_server.py"]
+    try:
+        # chargé par chemin : Python/ai_server.py (autre module) précède la racine dans sys.path
+        spec = importlib.util.spec_from_file_location("ai_server", ROOT / "ai_server.py")
+        module = importlib.util.module_from_spec(spec)
+        sys.modules["ai_server"] = module
+        spec.loader.exec_module(module)
+        return module
+    except Exception as exc:
+        pytest.skip(f"ai_server non importable: {exc}")
+    finally:
+        os.chdir(cwd)
+        sys.argv = argv
+
+
+@pytest.fixture
+def watchlist(server, tmp_path, monkeypatch):
+    """Deux modèles RF (dont un avec scaler) et des snapshots GOM en cache pour trois symboles."""
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(400, 22))
+    y = np.where(X[:, 0] > 0.2, 1, np.where(X[:, 2] < -0.2, -1, 0))
+    models = tmp_path / "models"
+    models.mkdir()
+    paths = {}
+    for seed, (sym, base) in enumerate((("EURUSD", "EURUSD"), ("Boom 1000 Index", "Boom_1000_Index"))):
+        path = models / f"{base}_M1_rf.joblib"
+        joblib.dump(RandomForestClassifier(n_estimators=10, random_state=seed).fit(X, y), path)
+        paths[(sym.upper(), "M1")] = path
+    joblib.dump(StandardScaler().fit(X), models / "Boom_1000_Index_M1_scaler.joblib")
+
+    from ml.model_registry import LazyModelStore, ModelRegistry
+
+    monkeypatch.setattr(server, "ml_models", LazyModelStore(ModelRegistry(tmp_path / "registry"), models))
+    monkeypatch.setitem(server._ML_MODEL_INDEX, "paths", paths)
+    monkeypatch.setitem(server._ML_MODEL_INDEX, "built_at", time.time() + 3600)
+    snapshots = {
+        "EURUSD": {"bid": 1.0851, "rsi": 63.0, "atr": 0.0009, "ema_slow_m1": 1.0840, "ema_fast_m1": 1.0848},
+        "Boom 1000 Index": {"bid": 10234.5, "rsi": 31.0, "atr": 4.2, "bb_up": 10240.0, "bb_dn": 10220.0},
+        "GBPUSD": {"bid": 1.2710, "rsi": 48.0},  # features valides mais aucun modèle
+    }
+    for sym, data in snapshots.items():
+        monkeypatch.setitem(server._gom_cache, f"{sym}:M1", {"cached_at": time.time(), "data": data})
+    return snapshots, models
+
+
+def _reference(server, models, sym, snapshot):
+    """Score unitaire via predict_with_model sur les features (mises à l'échelle) du symbole."""
+    base = sym.replace(" ", "_")
+    x = server._ml_build_ohlcv_features(snapshot)
+    scaler_path = models / f"{base}_M1_scaler.joblib"
+    if scaler_path.exists():
+        x = joblib.load(scaler_path).transform(x)
+    out = server.predict_with_model(sym, dict(enumerate(x[0])), model_name=f"{base}_M1_rf")
+    classes = list(server.ml_models.get(f"{base}_M1_rf").classes_)
+    action, conf = server._ml_decide_from_proba(np.asarray(out["probabilities"]), classes)
+    return action, round(conf, 4)
+
+
+def test_batch_matches_per_symbol_predictions(server, watchlist):
+    snapshots, models = watchlist
+    pairs = [("EURUSD", "M1"), ("Boom 1000 Index", "M1"), ("GBPUSD", "M1")]
+    results, timing = server._ml_predict_batch(pairs)
+    assert [(r["symbol"], r["timeframe"]) for r in results] == pairs
+    assert timing["models_invoked"] == 2
+    for res in results[:2]:
+        assert res["ml_available"] and res["model"] == f"{res['symbol'].replace(' ', '_')}_M1_rf"
+        assert (res["action"], res["confidence"]) == _reference(server, models, res["symbol"], snapshots[res["symbol"]])
+    assert not results[2]["ml_available"] and results[2]["reason"] == "no_model"
+    # le chemin unitaire (_ml_predict_direct) est un lot d'une seule paire
+    direct = server._ml_predict_direct("EURUSD", snapshots["EURUSD"])
+    assert direct == {k: results[0][k] for k in ("action", "confidence", "model")}
+
+
+def test_empty_and_unknown_symbols(server, watchlist):
+    results, timing = server._ml_predict_batch([])
+    assert results == [] and timing["models_invoked"] == 0
+    results, timing = server._ml_predict_batch([("NOPE", "M1")])
+    assert results[0]["ml_available"] is False and results[0]["reason"] == "no_features"
+    assert results[0]["action"] == "NEUTRAL" and timing["models_invoked"] == 0
+
+
+def test_predict_batch_route(server, watchlist):
+    from fastapi.testclient import TestClient
+
+    client = TestClient(server.app)
+    body = client.post("/ml/predict-batch", json={"symbols": []}).json()
+    assert body["ok"] and body["count"] == 0 and body["results"] == [] and body["by_symbol"] == {}
+
+    body = client.post("/ml/predict-batch", json={"symbols": ["EURUSD", " EURUSD ", "", "NOPE"],
+                                                   "timeframes": ["m1"]}).json()
+    assert body["count"] == 2
+    assert body["by_symbol"]["EURUSD"]["M1"]["ml_available"] is True
+    assert body["by_symbol"]["NOPE"]["M1"]["reason"] == "no_features"
+
+
+def test_autoscan_and_opportunities_score_in_one_batch(server, watchlist, monkeypatch):
+    import pandas as pd
+    from types import SimpleNamespace
+    from datetime import datetime
+    from fastapi.testclient import TestClient
+
+    calls = []
+    batch = server._ml_predict_batch
+
+    def spy(pairs):
+        calls.append(list(pairs))
+        return batch(pairs)
+
+    monkeypatch.setattr(server, "_ml_predict_batch", spy)
+    expected = {r["symbol"]: r for r in batch([("EURUSD", "M1"), ("Boom 1000 Index", "M1")])[0]}
+    client = TestClient(server.app)
+
+    # /autoscan/signals : clôtures en hausse continue → RSI > 70 → SELL pour chaque symbole
+    closes = pd.Series(np.linspace(100.0, 110.0, 100))
+    frame = pd.DataFrame({"open": closes, "high": closes + 0.05, "low": closes - 0.05, "close": closes})
+    monkeypatch.setattr(server, "mt5_initialized", True)
+    monkeypatch.setattr(server, "get_historical_data", lambda sym, tf, n: frame.copy())
+    monkeypatch.setattr(server, "_AUTOSCAN_ML_VETO_CONFIDENCE", 1.1)  # aucun veto : on vérifie le rattachement
+    for sym in ("EURUSD", "Boom 1000 Index"):
+        body = client.get("/autoscan/signals", params={"symbol": sym}).json()
+        assert body["status"] == "success" and body["count"] == 1
+        sig = body["data"]["signals"][0]
+        assert sig["action"] == "SELL"
+        assert (sig["ml_action"], sig["ml_confidence"]) == (expected[sym]["action"], expected[sym]["confidence"])
+    assert calls == [[("EURUSD", "M1")], [("Boom 1000 Index", "M1")]]
+
+    # /ml/opportunities : un seul lot pour toutes les opportunités
+    calls.clear()
+    opp = lambda sym: SimpleNamespace(symbol=sym, total_score=0.8, buy_opportunity=0.6, sell_opportunity=0.2,
+                                      hold_opportunity=0.2, volatility_risk=0.1, trend_strength=0.5,
+                                      ml_confidence=0.7, last_updated=datetime(2026, 1, 6))
+    monkeypatch.setattr(server, "ML_TRAINER_AVAILABLE", True)
+    monkeypatch.setattr(server, "ML_RECOMMENDATION_AVAILABLE", True)
+    monkeypatch.setattr(server, "ml_recommendation_system", SimpleNamespace(
+        get_top_opportunities=lambda limit: [opp("EURUSD"), opp("GBPUSD")][:limit]))
+    body = client.get("/ml/opportunities", params={"limit": 5}).json()
+    assert calls == [[("EURUSD", "M1"), ("GBPUSD", "M1")]]
+    assert body["data"][0]["ml_signal"]["action"] == expected["EURUSD"]["action"]
+    assert body["data"][1]["ml_signal"] is None and "total_ms" in body["ml_timing"]
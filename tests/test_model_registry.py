@@ -0,0 +1,101 @@
+"""
+Unit tests for the memory-mapped model registry.
+
+pytest tests/test_model_registry.py -v
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "Python"))
+
+sklearn = pytest.importorskip("sklearn")
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+from ml.model_registry import LazyModelStore, MappedModel, ModelRegistry
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(300, 22))
+    y = np.where(X[:, 0] + X[:, 1] > 0.3, 1, np.where(X[:, 2] < -0.5, -1, 0))
+    return X, y
+
+
+@pytest.mark.parametrize("model", [
+    RandomForestClassifier(n_estimators=20, random_state=0),
+    GradientBoostingClassifier(n_estimators=20, random_state=0),
+])
+def test_mapped_predictions_match_sklearn(tmp_path, data, model):
+    X, y = data
+    model.fit(X, y)
+    registry = ModelRegistry(tmp_path, check_interval=0)
+    assert registry.publish("m", model) == 1
+    mapped = registry.get("m")
+    assert isinstance(mapped, MappedModel)
+    np.testing.assert_allclose(mapped.predict_proba(X), model.predict_proba(X), atol=1e-12)
+    np.testing.assert_array_equal(mapped.predict(X), model.predict(X))
+
+
+def test_scaler_roundtrip(tmp_path, data):
+    X, _ = data
+    scaler = StandardScaler().fit(X)
+    registry = ModelRegistry(tmp_path)
+    registry.publish("s", scaler)
+    np.testing.assert_allclose(registry.get("s").transform(X), scaler.transform(X))
+
+
+def test_hot_swap_by_pointer(tmp_path, data):
+    X, y = data
+    registry = ModelRegistry(tmp_path, check_interval=0, keep=2)
+    for seed in range(3):
+        registry.publish("m", RandomForestClassifier(n_estimators=5, random_state=seed).fit(X, y))
+    assert registry.get("m").version == 3
+    assert sorted(p.name for p in (tmp_path / "m").glob("v*")) == ["v000002", "v000003"]
+
+
+def test_legacy_joblib_is_loaded_lazily_and_imported_at_startup(tmp_path, data):
+    joblib = pytest.importorskip("joblib")
+    X, y = data
+    legacy = tmp_path / "models"
+    legacy.mkdir()
+    joblib.dump(RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y), legacy / "EURUSD_M1_rf.joblib")
+    joblib.dump(StandardScaler().fit(X), legacy / "EURUSD_M1_scaler.joblib")
+    store = LazyModelStore(ModelRegistry(tmp_path / "registry"), legacy)
+    assert "EURUSD_M1_rf" in store
+    assert store.model_names() == ["EURUSD_M1_rf"]
+    assert isinstance(store.get("EURUSD_M1_rf"), RandomForestClassifier)
+    assert store.registry.names() == []  # pas de publication sur le chemin de requête
+    assert store.import_legacy() == 2
+    assert store.registry.names() == ["EURUSD_M1_rf", "EURUSD_M1_scaler"]
+    assert isinstance(store.get("EURUSD_M1_scaler"), MappedModel)
+    assert store.import_legacy() == 0
+
+
+def test_name_index_is_cached_until_ttl(tmp_path, data):
+    X, y = data
+    registry = ModelRegistry(tmp_path)
+    store = LazyModelStore(registry, index_ttl=60)
+    assert not store
+    registry.publish("m", RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y))
+    assert "m" not in store  # index servi depuis le cache
+    store.invalidate()
+    assert "m" in store and store.model_names() == ["m"]
+
+
+def test_concurrent_publish_takes_distinct_versions(tmp_path, data):
+    from concurrent.futures import ThreadPoolExecutor
+
+    X, y = data
+    model = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y)
+    registries = [ModelRegistry(tmp_path, keep=10) for _ in range(4)]
+    with ThreadPoolExecutor(4) as pool:
+        versions = list(pool.map(lambda r: r.publish("m", model), registries))
+    assert sorted(versions) == [1, 2, 3, 4]
+    assert not (tmp_path / "m" / ".publish.lock").exists()
+    assert ModelRegistry(tmp_path).publish("m", model, if_absent=True) == 4
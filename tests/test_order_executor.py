@@ -0,0 +1,147 @@
+"""
+Unit tests for the MT5 order executor and its filling-mode / volume-step cache.
+
+pytest tests/test_order_executor.py -v
+"""
+
+import sys
+import threading
+from collections import namedtuple
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "Python"))
+
+from order_executor import PRIORITY_HIGH, ExecutionCache, OrderExecutor, OrderIntent
+
+Result = namedtuple("Result", "retcode comment order price")
+Info = namedtuple("Info", "volume_step volume_min volume_max")
+FOK, IOC, RETURN = 0, 1, 2
+
+
+class _Broker:
+    """Terminal factice : seul IOC est accepté ; `gate` bloque les envois jusqu'à son ouverture."""
+
+    def __init__(self, accepted=IOC, gate=None):
+        self.accepted = accepted
+        self.gate = gate
+        self.sent = []
+
+    def send(self, request):
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.sent.append((request["symbol"], request["type_filling"], request.get("comment")))
+        if request["type_filling"] == self.accepted:
+            return Result(10009, "Request executed", len(self.sent), request["price"])
+        return Result(10030, "Unsupported filling mode", 0, 0.0)
+
+
+def _intent(symbol="EURUSD", volume=0.1, comment=None, ts=None, priority=10):
+    request = {"symbol": symbol, "volume": volume, "type": 0, "price": 1.1, "comment": comment}
+    return OrderIntent(symbol, "BUY", request, priority=priority, preferred_filling=FOK, signal_ts=ts)
+
+
+def test_filling_mode_learned_once_and_persisted(tmp_path):
+    path = tmp_path / "execution_cache.json"
+    broker = _Broker(accepted=IOC)
+    ex = OrderExecutor(broker.send, ExecutionCache(path), (FOK, IOC, RETURN), max_concurrency=1)
+    try:
+        first = ex.execute(_intent())
+        assert first.ok and first.filling_mode == IOC and first.rejected_modes == [FOK]
+        second = ex.execute(_intent(volume=0.2))
+        assert second.ok and second.attempts == 1
+        assert [m for _, m, _ in broker.sent] == [FOK, IOC, IOC]
+        assert ex.stats()["cache_hits"] == 1 and ex.stats()["filling_rejections"] == 1
+    finally:
+        ex.shutdown()
+
+    # redémarrage : le mode appris est relu, FOK n'est plus tenté
+    restored = ExecutionCache(path)
+    assert restored.filling_mode("EURUSD") == IOC
+    assert restored.filling_candidates("EURUSD", FOK, (FOK, IOC, RETURN)) == [IOC, RETURN]
+    assert restored.filling_candidates("GBPUSD", RETURN, (FOK, IOC, RETURN)) == [RETURN, FOK, IOC]
+
+
+def test_volume_step_normalisation_is_cached(tmp_path):
+    cache = ExecutionCache(tmp_path / "execution_cache.json")
+    assert cache.normalize_volume("XAUUSD", 0.137) == 0.137  # spécification inconnue
+    assert cache.normalize_volume("XAUUSD", 0.137, Info(0.01, 0.01, 5.0)) == 0.13
+    assert cache.normalize_volume("XAUUSD", 0.004) == 0.01
+    assert cache.normalize_volume("XAUUSD", 12.0) == 5.0
+    assert cache.normalize_volume("Boom 1000 Index", 0.7, Info(0.2, 0.2, 50.0)) == 0.6
+    assert ExecutionCache(tmp_path / "execution_cache.json").volume_spec("XAUUSD") == (0.01, 0.01, 5.0)
+
+
+def test_exception_is_not_resent_and_other_errors_stop():
+    calls = []
+
+    def send(request):
+        calls.append(request["type_filling"])
+        if len(calls) == 1:
+            raise RuntimeError("IPC")  # l'ordre a pu partir : ni renvoi ni autre mode
+        if len(calls) == 2:
+            return Result(10019, "No money", 0, 0.0)  # autre rejet : pas d'autre mode tenté
+        return Result(10009, "Request executed", 7, request["price"])
+
+    ex = OrderExecutor(send, ExecutionCache(), (FOK, IOC, RETURN), max_concurrency=1)
+    try:
+        crashed = ex.execute(_intent())
+        assert not crashed.ok and crashed.retcode is None and crashed.attempts == 1 and calls == [FOK]
+        failed = ex.execute(_intent())
+        assert not failed.ok and failed.retcode == 10019 and failed.attempts == 1 and calls == [FOK, FOK]
+        filled = ex.execute(_intent(ts=0.0))
+        assert filled.ok and filled.signal_to_fill_ms > 0
+        stats = ex.stats()
+        assert stats["submitted"] == 3 and stats["filled"] == 1 and stats["failed"] == 2 and stats["errors"] == 1
+        assert stats["order_sends"] == 3 and stats["signal_to_fill_ms"]["n"] == 1 and stats["send_ms"]["n"] == 3
+    finally:
+        ex.shutdown()
+
+
+def test_priority_and_dedup_of_pending_and_recent_intents():
+    gate = threading.Event()
+    broker = _Broker(accepted=FOK, gate=gate)
+    ex = OrderExecutor(broker.send, ExecutionCache(), (FOK, IOC, RETURN), max_concurrency=1)
+    try:
+        blocker = ex.submit(_intent("AAA", comment="blocker"))
+        while ex.pending():  # le worker a pris l'ordre bloquant
+            pass
+        low = ex.submit(_intent("BBB", comment="low"))
+        dup = ex.submit(_intent("BBB", comment="dup"))
+        high = ex.submit(_intent("CCC", priority=PRIORITY_HIGH, comment="high", ts=0.0))
+        assert dup is low
+        gate.set()
+        reports = [f.result(5) for f in (blocker, low, high)]
+        assert all(r.ok for r in reports)
+        assert [c for _, _, c in broker.sent] == ["blocker", "high", "low"]
+        assert reports[2].signal_to_fill_ms is not None and reports[2].signal_to_fill_ms > 0
+
+        # même (symbole, sens, volume) juste après l'exécution : rien n'est renvoyé
+        again = ex.execute(_intent("CCC", comment="immediate"))
+        assert again.deduplicated and again.ok and len(broker.sent) == 3
+        other = ex.execute(_intent("CCC", volume=0.2))
+        assert other.ok and not other.deduplicated and len(broker.sent) == 4
+        stats = ex.stats()
+        assert stats["submitted"] == 4 and stats["deduplicated"] == 2 and stats["filled"] == 4
+        assert stats["queue_ms"]["n"] == 4 and stats["queue_ms"]["p95"] >= stats["queue_ms"]["p50"]
+    finally:
+        ex.shutdown()
+
+
+def test_intent_abandoned_on_timeout_is_never_sent():
+    gate = threading.Event()
+    broker = _Broker(accepted=FOK, gate=gate)
+    ex = OrderExecutor(broker.send, ExecutionCache(), (FOK, IOC, RETURN), max_concurrency=1)
+    try:
+        blocker = ex.submit(_intent("AAA", comment="blocker"))
+        while ex.pending():
+            pass
+        late = ex.execute(_intent("BBB", comment="late"), timeout=0.05)
+        assert late.abandoned and not late.ok and late.result is None
+        gate.set()
+        assert blocker.result(5).ok
+        retry = ex.execute(_intent("BBB", comment="retry"), timeout=5)  # la clé n'est plus bloquée
+        assert retry.ok and not retry.abandoned
+        assert [c for _, _, c in broker.sent] == ["blocker", "retry"]
+        assert ex.stats()["abandoned"] == 1 and ex.pending() == 0
+    finally:
+        ex.shutdown()
@@ -0,0 +1,136 @@
+"""
+Unit tests for the event-driven MT5 position-state engine.
+
+pytest tests/test_position_engine.py -v
+"""
+
+import sys
+from collections import namedtuple
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "Python"))
+
+from position_engine import CloseIntent, PositionEngine, SLTPUpdate
+
+Pos = namedtuple("Pos", "ticket symbol type volume price_open price_current sl tp profit magic")
+BUY, SELL = 0, 1
+
+
+def _pos(ticket, type_=BUY, sl=0.0, price=101.0, profit=0.5, symbol="EURUSD"):
+    return Pos(ticket, symbol, type_, 0.1, 100.0, price, sl, 110.0, profit, 123456)
+
+
+class _Terminal:
+    def __init__(self):
+        self.sends, self.closes = [], []
+
+    def send(self, pos, sl, tp, reason):
+        self.sends.append((pos.ticket, sl, tp, reason))
+        return True
+
+    def close(self, pos):
+        self.closes.append(pos.ticket)
+        return True
+
+
+def _engine(clock):
+    term = _Terminal()
+    eng = PositionEngine(term.send, term.close, clock=lambda: clock[0])
+    return eng, term
+
+
+def test_diff_dispatches_open_close_modify():
+    clock = [0.0]
+    eng, _ = _engine(clock)
+    seen = []
+    eng.on("open", lambda p: seen.append(("open", p.ticket)))
+    eng.on("close", lambda p: seen.append(("close", p.ticket)))
+    eng.on("modify", lambda old, new: seen.append(("modify", new.ticket, old.sl, new.sl)))
+    eng.process([_pos(1), _pos(2)], lambda s: 0.0001)
+    eng.process([_pos(1, sl=99.0), _pos(3)], lambda s: 0.0001)
+    assert seen == [("open", 1), ("open", 2), ("open", 3), ("close", 2), ("modify", 1, 0.0, 99.0)]
+    assert set(eng.positions) == {1, 3}
+
+
+def test_proposals_coalesce_into_one_send_per_position():
+    clock = [0.0]
+    eng, term = _engine(clock)
+    eng.add_handler("trail", lambda p, pt: SLTPUpdate(100.5, reason="TRAIL"))
+    eng.add_handler("secure", lambda p, pt: SLTPUpdate(100.8, reason="SECURE"))
+    eng.add_handler("worse", lambda p, pt: SLTPUpdate(98.0, reason="WORSE"))
+    eng.add_handler("sell_only", lambda p, pt: SLTPUpdate(101.5) if p.type == SELL else None)
+    eng.process([_pos(1, sl=99.0), _pos(2, type_=SELL, sl=102.0, price=99.0)], lambda s: 0.0001)
+    # BUY : SL le plus haut ; SELL : SL le plus bas ; un seul envoi chacun
+    assert sorted(term.sends) == [(1, 100.8, 110.0, "SECURE"), (2, 98.0, 110.0, "WORSE")]
+
+    # snapshot pas encore à jour : pas de renvoi du même SL
+    eng.process([_pos(1, sl=99.0), _pos(2, type_=SELL, sl=102.0, price=99.0)], lambda s: 0.0001)
+    assert len(term.sends) == 2 and eng.stats["skipped_pending"] == 2
+    # le TTL expire : nouvel essai
+    clock[0] = 31.0
+    eng.process([_pos(1, sl=99.0)], lambda s: 0.0001)
+    assert term.sends[-1] == (1, 100.8, 110.0, "SECURE")
+
+
+def test_close_wins_and_interval_handlers():
+    clock = [0.0]
+    eng, term = _engine(clock)
+    calls = []
+    eng.add_handler("trail", lambda p, pt: SLTPUpdate(100.9))
+    eng.add_handler("auto_close", lambda p, pt: CloseIntent("PROFIT") if p.profit >= 1.0 else None)
+    eng.add_handler("slow", lambda p, pt: calls.append(p.ticket), interval=60)
+    eng.process([_pos(1, profit=1.2), _pos(2)], lambda s: 0.0001)
+    assert term.closes == [1] and [t for t, *_ in term.sends] == [2]
+    clock[0] = 30.0
+    eng.process([_pos(2)], lambda s: 0.0001)
+    clock[0] = 61.0
+    eng.process([_pos(2)], lambda s: 0.0001)
+    assert calls == [1, 2, 2]
+
+    eng.add_handler("boom", lambda p, pt: 1 / 0)
+    eng.process([_pos(2)], lambda s: 0.0001)
+    assert eng.stats["handler_errors"] == 1
+
+
+def test_handler_errors_are_counted_and_logged(caplog):
+    clock = [0.0]
+    eng, term = _engine(clock)
+
+    def broken(p, pt):
+        raise ValueError("boom")
+
+    eng.add_handler("broken", broken)
+    eng.add_handler("trail", lambda p, pt: SLTPUpdate(100.5, reason="TRAIL"))
+    with caplog.at_level("ERROR", logger="position_engine"):
+        eng.process([_pos(1)], lambda s: 0.0001)
+    assert eng.stats["handler_errors"] == 1 and term.sends == [(1, 100.5, 110.0, "TRAIL")]
+    assert "broken" in caplog.text and "ValueError: boom" in caplog.text
+
+
+def test_sl_is_rounded_and_pending_cleared_once_reflected():
+    clock = [0.0]
+    eng, term = _engine(clock)
+    eng.add_handler("trail", lambda p, pt: SLTPUpdate(100.8000004, reason="TRAIL"))
+    eng.process([_pos(1, sl=99.0)], lambda s: 0.001)
+    assert term.sends == [(1, 100.8, 110.0, "TRAIL")]
+    clock[0] = 1.0
+    eng.process([_pos(1, sl=100.8)], lambda s: 0.001)  # SL arrondi reflété : plus rien à envoyer
+    assert len(term.sends) == 1 and eng.stats["skipped_pending"] == 0
+    clock[0] = 2.0
+    eng.process([_pos(1, sl=99.0)], lambda s: 0.001)  # SL remis à la main : renvoyé sans attendre le TTL
+    assert term.sends[-1] == (1, 100.8, 110.0, "TRAIL") and len(term.sends) == 2
+
+
+def test_refused_sends_are_retried_with_backoff():
+    clock = [0.0]
+    refused = []
+    eng = PositionEngine(lambda pos, sl, tp, reason: refused.append(clock[0]) and False,
+                         lambda pos: True, clock=lambda: clock[0])
+    level = [100.5]
+    eng.add_handler("trail", lambda p, pt: SLTPUpdate(level[0], reason="TRAIL"))
+    for t in (0.0, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0):
+        clock[0] = t
+        level[0] += 0.1  # SL toujours meilleur : le backoff s'applique quand même après un refus
+        eng.process([_pos(1, sl=99.0)], lambda s: 0.01)
+    assert refused == [0.0, 2.0, 6.0]
+    assert eng.stats["send_failures"] == 3 and eng.stats["skipped_pending"] == 4
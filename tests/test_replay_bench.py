@@ -0,0 +1,113 @@
+"""
+Unit tests for the decision-endpoint replay benchmark harness.
+
+pytest tests/test_replay_bench.py -v
+"""
+
+import asyncio
+import json
+import sys
+import types
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "Python"))
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+
+from replay_bench import RecordingMiddleware, compare_reports, load_recording, replay, server_stubs
+
+
+def _app(record_to=None):
+    app = FastAPI()
+
+    @app.post("/decision")
+    async def decision(req: Request):
+        body = await req.json()
+        await asyncio.sleep(0.001)
+        return {"symbol": body.get("symbol"), "action": "hold"}
+
+    @app.post("/gom-verdict")
+    async def gom_verdict(req: Request):
+        return {"ok": bool(await req.body())}
+
+    @app.post("/other")
+    async def other():
+        return {}
+
+    @app.post("/pending-order")
+    async def pending_order(req: Request):
+        body = await req.json()
+        if "symbol" not in body:
+            raise HTTPException(status_code=422, detail="symbol manquant")
+        return {"ok": True}
+
+    if record_to is not None:
+        app.add_middleware(RecordingMiddleware, path=str(record_to))
+    return app
+
+
+def test_recording_middleware_keeps_body_for_endpoint(tmp_path):
+    rec_path = tmp_path / "ea.jsonl"
+    client = TestClient(_app(rec_path))
+    assert client.post("/decision?tf=M1", json={"symbol": "Boom 500 Index"}).json()["symbol"] == "Boom 500 Index"
+    client.post("/gom-verdict", json={"symbol": "XAUUSD"})
+    client.post("/other", json={})
+
+    records = load_recording(rec_path)
+    assert [r["path"] for r in records] == ["/decision", "/gom-verdict"]
+    assert json.loads(records[0]["body"]) == {"symbol": "Boom 500 Index"}
+    assert records[0]["query"] == "tf=M1" and records[0]["status"] == 200
+    assert load_recording(rec_path, routes=["/gom-verdict"])[0]["path"] == "/gom-verdict"
+
+
+def test_replay_reports_percentiles_per_endpoint():
+    records = [
+        {"path": "/decision", "body": json.dumps({"symbol": f"S{i}"})} for i in range(20)
+    ] + [{"path": "/gom-verdict", "body": "{}"}] * 5
+    report = asyncio.run(replay(_app(), records, concurrency=4, repeat=2, warmup=0))
+
+    assert report["requests"] == 50
+    dec = report["endpoints"]["/decision"]
+    assert dec["count"] == 40 and dec["errors"] == 0
+    assert 0 < dec["p50_ms"] <= dec["p95_ms"] <= dec["p99_ms"] <= dec["max_ms"]
+    assert report["endpoints"]["/gom-verdict"]["count"] == 10
+
+
+def test_compare_flags_only_significant_regressions():
+    base = {"endpoints": {"/decision": {"p50_ms": 10.0, "p95_ms": 20.0, "p99_ms": 30.0},
+                          "/gom-verdict": {"p50_ms": 1.0, "p95_ms": 1.0, "p99_ms": 1.0}}}
+    cur = {"endpoints": {"/decision": {"p50_ms": 10.5, "p95_ms": 26.0, "p99_ms": 31.0},
+                         "/gom-verdict": {"p50_ms": 1.5, "p95_ms": 1.5, "p99_ms": 1.5}}}
+    regressions = compare_reports(base, cur, threshold_pct=15, min_delta_ms=2)
+    assert [(r["endpoint"], r["metric"]) for r in regressions] == [("/decision", "p95_ms")]
+    assert regressions[0]["change_pct"] == 30.0
+
+
+def test_client_errors_are_not_counted_as_latencies():
+    records = [{"path": "/pending-order", "body": json.dumps({"symbol": "EURUSD"})},
+               {"path": "/pending-order", "body": "{}"}]
+    report = asyncio.run(replay(_app(), records, concurrency=1, repeat=3, warmup=0))
+    po = report["endpoints"]["/pending-order"]
+    assert po["count"] == 6 and po["errors"] == 3 and po["client_errors"] == 3 and po["server_errors"] == 0
+
+
+def test_server_stubs_do_not_touch_production_state(tmp_path):
+    live = tmp_path / "data"
+    live.mkdir()
+    server = types.SimpleNamespace(
+        DATA_DIR=live,
+        _PENDING_ORDERS_FILE=live / "pending_orders.json",
+        _PENDING_ORDER_STORE={"XAUUSD": {"side": "BUY"}},
+        _GOM_VERDICT_STORE={},
+    )
+    with server_stubs(server):
+        assert server.DATA_DIR != live and server._PENDING_ORDERS_FILE.parent == server.DATA_DIR
+        server._PENDING_ORDERS_FILE.write_text("{}")
+        assert server._PENDING_ORDER_STORE == {"XAUUSD": {"side": "BUY"}}  # état initial copié
+        server._PENDING_ORDER_STORE["EURUSD"] = {"side": "SELL"}
+        server._GOM_VERDICT_STORE["EURUSD"] = {"verdict": "BUY"}
+        scratch = server.DATA_DIR
+    assert server._PENDING_ORDERS_FILE == live / "pending_orders.json" and not any(live.iterdir())
+    assert server._PENDING_ORDER_STORE == {"XAUUSD": {"side": "BUY"}} and server._GOM_VERDICT_STORE == {}
+    assert not scratch.exists()
@@ -0,0 +1,82 @@
+"""
+Unit tests for the in-process server metrics (histograms, /metrics exposition).
+
+pytest tests/test_server_metrics.py -v
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "Python"))
+
+from server_metrics import Histogram, RouteResolver, ServerMetrics
+
+
+def test_histogram_buckets_and_quantile():
+    h = Histogram((0.01, 0.1, 1.0))
+    for v in [0.005] * 90 + [0.5] * 10:
+        h.observe(v)
+    assert h.cumulative() == [("0.01", 90), ("0.1", 90), ("1.0", 100), ("+Inf", 100)]
+    assert h.quantile(0.5) <= 0.01
+    assert 0.1 < h.quantile(0.99) <= 1.0
+
+
+def test_stage_decorator_sync_async_and_errors():
+    m = ServerMetrics()
+
+    @m.timed("ml")
+    def score(x):
+        if x < 0:
+            raise ValueError(x)
+        return x * 2
+
+    @m.timed("storage")
+    async def store(x):
+        return x
+
+    assert score(2) == 4 and score.__name__ == "score"
+    with pytest.raises(ValueError):
+        score(-1)
+    assert asyncio.run(store(3)) == 3
+
+    stages = m.dashboard()["stages"]
+    assert stages["ml"]["count"] == 2 and stages["ml"]["errors"] == 1
+    assert stages["storage"]["count"] == 1
+
+
+def test_prometheus_text_and_dashboard_ring():
+    m = ServerMetrics(ring_size=50)
+    for i in range(100):
+        m.observe_request("/stats/{symbol}", "GET", 200 if i % 10 else 503, 0.001 * (i + 1))
+    m.cache_hit("decision")
+    m.cache_miss("decision")
+    m.register_cache_source("features", lambda: (3, 1))
+
+    text = m.render_prometheus()
+    assert 'tradbot_http_request_duration_seconds_count{route="/stats/{symbol}",method="GET"} 100' in text
+    assert 'tradbot_http_requests_total{route="/stats/{symbol}",method="GET",status="503"} 10' in text
+    assert 'tradbot_cache_requests_total{cache="features",result="hit"} 3' in text
+
+    dash = m.dashboard()
+    (route,) = dash["routes"]
+    assert route["count"] == 50 and route["max_ms"] == 100.0
+    assert route["p50_ms"] <= route["p95_ms"] <= route["p99_ms"]
+    assert dash["caches"]["decision"]["hit_ratio"] == 0.5
+
+
+def test_route_resolver_uses_templates():
+    from fastapi import FastAPI
+
+    app = FastAPI()
+
+    @app.get("/stats/{symbol}")
+    def stats(symbol: str):
+        return {}
+
+    resolver = RouteResolver(app)
+    scope = {"type": "http", "method": "GET", "path": "/stats/EURUSD"}
+    assert resolver.resolve(scope) == "/stats/{symbol}"
+    assert resolver.resolve({"type": "http", "method": "GET", "path": "/nope"}) == "<unmatched>"
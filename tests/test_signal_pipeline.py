@@ -0,0 +1,113 @@
+"""
+Unit tests for the pipelined MT5 client cycle helpers (bar store, stacked features, HTTP fan-out).
+
+pytest tests/test_signal_pipeline.py -v
+"""
+
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "Python"))
+
+from signal_pipeline import BarStore, CycleTelemetry, HttpFanout, batch_features, feature_row
+
+RATES_DTYPE = [("time", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8"), ("tick_volume", "<u8")]
+
+
+def _rates(n, seed=0, t0=1_700_000_000):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 0.2, n))
+    out = np.zeros(n, dtype=RATES_DTYPE)
+    out["time"] = t0 + np.arange(n) * 300
+    out["open"] = np.r_[close[0], close[:-1]]
+    out["high"] = np.maximum(out["open"], close) + 0.05
+    out["low"] = np.minimum(out["open"], close) - 0.05
+    out["close"] = close
+    out["tick_volume"] = rng.integers(10, 100, n)
+    return out
+
+
+def _ema_ref(prices, period):
+    a = 2 / (period + 1)
+    ema = np.mean(prices[:period])
+    for p in prices[period:]:
+        ema = a * p + (1 - a) * ema
+    return ema
+
+
+def test_bar_store_reads_only_the_tail_once_warm():
+    series = {"EURUSD": _rates(260, 1), "XAUUSD": _rates(260, 2)}
+    now = {"n": 220}
+    calls = []
+
+    def fetch(sym, pos, count):
+        calls.append(count)
+        data = series[sym][: now["n"]]
+        return data[len(data) - count:]
+
+    store = BarStore(count=200)
+    store.refresh(list(series), fetch)
+    assert calls == [200, 200]
+    now["n"] = 222  # deux nouvelles bougies
+    store.refresh(list(series), fetch)
+    assert calls[2:] == [3, 3]
+    for sym, full in series.items():
+        assert np.array_equal(store.get(sym), full[22:222])
+    syms, bars = store.stack(["EURUSD", "XAUUSD", "MISSING"])
+    assert syms == ["EURUSD", "XAUUSD"] and bars["close"].shape == (2, 200)
+
+
+def test_batch_features_match_per_symbol_formulas():
+    rates = [_rates(200, s) for s in range(5)]
+    bars = {f: np.stack([r[f].astype(float) for r in rates]) for f in ("open", "high", "low", "close", "tick_volume")}
+    feats = batch_features(bars)
+    for i, r in enumerate(rates):
+        closes = r["close"]
+        for p in (9, 21, 50, 200):
+            assert np.isclose(feats[f"ema_{p}"][i], _ema_ref(closes, p))
+        assert np.isclose(feats["momentum_5"][i], (closes[-1] - closes[-5]) / closes[-5])
+        coeffs = np.polyfit(np.arange(200), closes, 1)
+        assert np.isclose(feats["slope"][i], coeffs[0])
+        assert 0 <= feats["rsi"][i] <= 100 and feats["atr"][i] > 0
+    row = feature_row(feats, 0)
+    assert isinstance(row["rsi"], float) and row["ema_signal"] in ("BUY", "SELL", "HOLD")
+    json.dumps(row)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        out = json.dumps({"action": "buy", "symbol": body["symbol"]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(out)))
+        self.end_headers()
+        self.wfile.write(out)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_fanout_falls_back_to_second_url_and_telemetry():
+    server = HTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        ok = f"http://127.0.0.1:{server.server_port}/decision"
+        dead = "http://127.0.0.1:9/decision"
+        fan = HttpFanout(max_concurrency=8, timeout=2)
+        tel = CycleTelemetry()
+        tel.start_cycle()
+        with tel.stage("decision"):
+            res = fan.post_many({s: ([dead, ok], {"symbol": s}) for s in ("A", "B", "C")})
+        tel.end_cycle(3)
+        assert {k: v["symbol"] for k, v in res.items()} == {"A": "A", "B": "B", "C": "C"}
+        summary = tel.summary()
+        assert summary["cycles"] == 1 and "decision" in summary["stages"]
+        assert summary["per_symbol_ms"] is not None
+    finally:
+        server.shutdown()
@@ -0,0 +1,86 @@
+"""
+Unit tests for the streaming Boom/Crash spike engine.
+
+pytest tests/test_spike_stream_engine.py -v
+"""
+
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "Python"))
+
+from spike_stream_engine import RollingWindow, SpikeStreamEngine, mt5_name_from_deriv
+
+
+def _boom_ticks(n=3000, every=100, seed=1):
+    rng = random.Random(seed)
+    price = 10000.0
+    for i in range(1, n + 1):
+        if i % every == 0:
+            price += 8.0 + rng.random()
+        else:
+            price -= 0.01 + rng.random() * 0.02
+        yield float(i), price
+
+
+def test_rolling_window_matches_direct_stats():
+    w = RollingWindow(50)
+    values = [random.Random(3).gauss(0, 1) * k for k in range(1, 201)]
+    for v in values:
+        w.push(v)
+    tail = values[-50:]
+    mean = sum(tail) / len(tail)
+    std = (sum((v - mean) ** 2 for v in tail) / len(tail)) ** 0.5
+    assert len(w) == 50
+    assert abs(w.mean - mean) < 1e-9
+    assert abs(w.std - std) < 1e-6
+
+
+def test_engine_detects_boom_spikes_and_intervals():
+    engine = SpikeStreamEngine(threshold_points=1.0)
+    events = []
+    engine.add_listener(events.append)
+    for epoch, price in _boom_ticks():
+        engine.on_tick("Boom 1000 Index", price, epoch)
+
+    assert len(events) == 30
+    assert all(e["direction"] == "BOOM" for e in events)
+    snap = engine.snapshot("Boom 1000 Index")
+    assert snap["spike_count"] == 30
+    assert snap["mean_interval_ticks"] == 100.0
+    assert snap["mean_interval_seconds"] == 100.0
+    assert 0.0 < snap["imminence_probability"] < 1.0
+
+
+def test_crash_ignores_upward_moves():
+    engine = SpikeStreamEngine(threshold_points=1.0)
+    for epoch, price in _boom_ticks(n=500):
+        engine.on_tick("Crash 500 Index", price, epoch)
+    assert engine.snapshot("Crash 500 Index")["spike_count"] == 0
+
+
+def test_ea_ticks_ignored_while_stream_is_fresh():
+    engine = SpikeStreamEngine(threshold_points=1.0)
+    engine.on_tick("Boom 500 Index", 5000.0, source="deriv")
+    assert engine.on_tick("Boom 500 Index", 5050.0, source="ea") is None
+    assert engine.snapshot("Boom 500 Index")["tick_count"] == 1
+
+
+def test_ea_ticks_keep_the_fixed_threshold():
+    # 40 ticks baissiers bruités (0.1 / 1.9) : μ + 6σ ≈ 6.4, au-dessus du saut de 3 points
+    def ticks(engine, source):
+        price = 5000.0
+        for i in range(40):
+            price -= 0.1 if i % 2 else 1.9
+            assert engine.on_tick("Boom 500 Index", price, float(i), source=source) is None
+        return engine.on_tick("Boom 500 Index", price + 3.0, 40.0, source=source)
+
+    assert ticks(SpikeStreamEngine(threshold_points=2.0), "deriv") is None
+    event = ticks(SpikeStreamEngine(threshold_points=2.0), "ea")
+    assert event is not None and event["direction"] == "BOOM" and event["source"] == "ea"
+
+
+def test_deriv_code_mapping():
+    assert mt5_name_from_deriv("BOOM1000") == "Boom 1000 Index"
+    assert mt5_name_from_deriv("CRASH300N") == "Crash 300 Index"
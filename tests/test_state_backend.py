@@ -0,0 +1,158 @@
+"""
+Unit tests for the shared state backend (multi-worker mode).
+
+pytest tests/test_state_backend.py -v
+"""
+
+import asyncio
+import multiprocessing
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "Python"))
+
+import pandas as pd
+import pytest
+
+from state_backend import (
+    InProcessBackend,
+    LeaderLease,
+    SharedDeque,
+    SharedFrameCache,
+    SQLiteBackend,
+)
+
+
+def _bump(path, n):
+    store = SQLiteBackend(path).store("counters")
+    for _ in range(n):
+        while True:
+            version, value = store.get_versioned("hits")
+            if store.compare_and_set("hits", version, (value or 0) + 1)[0]:
+                break
+
+
+def test_shared_map_roundtrip_and_cross_process_visibility(tmp_path):
+    db = tmp_path / "state.sqlite"
+    a = SQLiteBackend(db).store("gom_verdicts")
+    b = SQLiteBackend(db).store("gom_verdicts")
+    when = datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+
+    a["XAUUSD"] = {"verdict": "BUY", "time": when, "scores": (1.5, 2)}
+    assert b["XAUUSD"] == {"verdict": "BUY", "time": when, "scores": [1.5, 2]}
+    assert "XAUUSD" in b and len(b) == 1 and b.get("EURUSD") is None
+
+    with b.mutate("XAUUSD") as rec:
+        rec["verdict"] = "SELL"
+    assert a["XAUUSD"]["verdict"] == "SELL"
+    assert a.pop("XAUUSD")["verdict"] == "SELL" and not len(b)
+
+
+def test_compare_and_set_serializes_concurrent_workers(tmp_path):
+    db = tmp_path / "state.sqlite"
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_bump, args=(db, 50)) for _ in range(3)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(60)
+    assert SQLiteBackend(db).store("counters")["hits"] == 150
+
+    store = InProcessBackend().store("x")
+    assert store.compare_and_set("k", 0, 1) == (True, 1)
+    assert store.compare_and_set("k", 0, 2) == (False, 1)
+
+
+@pytest.mark.parametrize("kind", ["memory", "sqlite"])
+def test_versions_stay_monotonic_across_deletes(tmp_path, kind):
+    backend = InProcessBackend() if kind == "memory" else SQLiteBackend(tmp_path / "state.sqlite")
+    orders = backend.store("pending_orders")
+    ok, v1 = orders.compare_and_set("XAUUSD", 0, {"side": "BUY"})
+    assert ok and orders.compare_and_set("XAUUSD", v1, {"side": "BUY", "sl": 1.0})[0]
+    stale = orders.get_versioned("XAUUSD")[0]
+    del orders["XAUUSD"]
+    assert orders.get_versioned("XAUUSD") == (0, None)
+    ok, recreated = orders.compare_and_set("XAUUSD", 0, {"side": "SELL"})
+    assert ok and recreated > stale
+    # un client qui a lu la version avant la suppression ne modifie pas le nouvel ordre
+    assert orders.compare_and_set("XAUUSD", stale, {"side": "BUY"}) == (False, recreated)
+    orders["XAUUSD"] = {"side": "SELL", "sl": 2.0}
+    assert orders.get_versioned("XAUUSD")[0] > recreated
+    if kind == "sqlite":
+        assert SQLiteBackend(tmp_path / "state.sqlite").put("pending_orders", "EURUSD", {}) > recreated + 1
+
+
+def test_shared_deque_and_frame_cache(tmp_path):
+    backend = SQLiteBackend(tmp_path / "state.sqlite")
+    buf = SharedDeque(backend, "ml_feedback", "XAUUSD:M1", maxlen=3)
+    for i in range(5):
+        buf.append({"i": i})
+    assert [x["i"] for x in SharedDeque(backend, "ml_feedback", "XAUUSD:M1")] == [2, 3, 4]
+
+    df = pd.DataFrame(
+        {"open": [1.0, 2.0], "close": [1.5, 2.5]},
+        index=pd.Index(pd.to_datetime([1718049000, 1718049060], unit="s"), name="time"),
+    )
+    writer = SharedFrameCache(backend)
+    reader = SharedFrameCache(SQLiteBackend(tmp_path / "state.sqlite"))
+    writer.put_frame("XAUUSD", "M15", df, aliases=("15",))
+    frames = reader.get("XAUUSD")
+    assert frames["15"] is frames["M15"]
+    pd.testing.assert_frame_equal(frames["M15"], df, check_index_type=False)
+    assert reader.get("XAUUSD") is frames
+    assert reader.get("EURUSD") is None
+
+
+def test_leader_lease_single_owner_and_takeover(tmp_path):
+    backend = SQLiteBackend(tmp_path / "state.sqlite")
+    first = LeaderLease(backend, ttl_sec=0.2)
+    second = LeaderLease(backend, ttl_sec=0.2)
+    assert first.try_acquire() and not second.try_acquire()
+    assert first.try_acquire()
+
+    async def _takeover():
+        elected = asyncio.Event()
+
+        async def on_elected():
+            elected.set()
+
+        await asyncio.sleep(0.3)  # bail de `first` expiré
+        second.start(on_elected)
+        await asyncio.wait_for(elected.wait(), 2)
+        await second.stop()
+
+    asyncio.run(_takeover())
+    assert not second.is_leader and first.try_acquire()  # bail libéré par stop()
+
+
+def test_leader_lease_loss_stops_and_restarts_loops(tmp_path):
+    backend = SQLiteBackend(tmp_path / "state.sqlite")
+    lease = LeaderLease(backend, ttl_sec=0.3)
+    events = []
+
+    async def _scenario():
+        loop_task = {}
+
+        async def on_elected():
+            events.append("elected")
+            loop_task["t"] = asyncio.create_task(asyncio.sleep(3600))
+
+        async def on_lost():
+            events.append("lost")
+            loop_task["t"].cancel()
+
+        lease.start(on_elected, on_lost)
+        await asyncio.sleep(0.05)
+        # un autre worker prend le bail (ex. boucle bloquée au-delà du TTL)
+        backend.release_lease(lease.name, lease.owner)
+        assert backend.acquire_lease(lease.name, "intruder", 60)
+        await asyncio.sleep(0.25)
+        assert events == ["elected", "lost"] and not lease.is_leader
+        assert loop_task["t"].cancelled() and lease._elected_task is None
+        backend.release_lease(lease.name, "intruder")
+        await asyncio.sleep(0.25)
+        assert events == ["elected", "lost", "elected"] and lease.is_leader
+        await lease.stop()
+
+    asyncio.run(_scenario())
@@ -0,0 +1,75 @@
+"""
+Unit tests for the vectorized swing/pivot kernel shared by the pattern detectors.
+
+pytest tests/test_swing_kernel.py -v
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "Python"))
+
+from swing_kernel import SwingTracker, fractals, pivot_points, swing_structure, trailing_max
+
+
+def _bars(seed: int, n: int = 300):
+    rng = np.random.default_rng(seed)
+    # prix arrondis → égalités fréquentes (cas large vs strict)
+    close = np.round(100 + np.cumsum(rng.normal(0, 0.4, n)), 1)
+    high = close + np.round(rng.uniform(0, 0.5, n), 1)
+    low = close - np.round(rng.uniform(0, 0.5, n), 1)
+    return high, low, close
+
+
+def _loop_pivots(x, k, kind, strict):
+    out = []
+    for i in range(k, len(x) - k):
+        w = np.r_[x[i - k:i], x[i + 1:i + k + 1]]
+        if kind == "high":
+            ok = x[i] > w.max() if strict else x[i] >= max(w.max(), x[i])
+        else:
+            ok = x[i] < w.min() if strict else x[i] <= min(w.min(), x[i])
+        if ok:
+            out.append(i)
+    return out
+
+
+def test_pivots_match_reference_loops():
+    for seed in range(5):
+        high, low, close = _bars(seed)
+        for k in (1, 2, 5, 20):
+            for strict in (False, True):
+                assert pivot_points(high, k, "high", strict).tolist() == _loop_pivots(high, k, "high", strict)
+                assert pivot_points(low, k, "low", strict).tolist() == _loop_pivots(low, k, "low", strict)
+        up, dn = fractals(high, low, 5)
+        assert up.tolist() == _loop_pivots(high, 5, "high", True)
+        assert dn.tolist() == _loop_pivots(low, 5, "low", True)
+    assert pivot_points([1.0, 2.0], 2).size == 0
+
+
+def test_structure_levels_and_breaks():
+    high = np.array([1, 2, 5, 2, 1, 1, 2, 3, 6, 7], dtype=float)
+    low = high - 0.5
+    close = high - 0.2
+    st = swing_structure(high, low, close, order=2)
+    assert st.swing_highs.tolist() == [2]
+    # le swing haut (5.0 @2) n'est connu qu'à la bougie 4
+    assert np.isnan(st.high_level[3]) and st.high_level[4] == 5.0
+    assert st.bos.tolist() == [0, 0, 0, 0, 0, 0, 0, 0, 1, 0]
+    assert st.last_bos == 1
+    np.testing.assert_array_equal(trailing_max([3, 1, 2, 5], 2), [np.nan, np.nan, 3, 2])
+
+
+def test_tracker_matches_batch_kernel():
+    high, low, close = _bars(9, 400)
+    full = swing_structure(high, low, close, order=3)
+    tracker = SwingTracker(order=3).seed(high[:150], low[:150], close[:150])
+    bos = []
+    for h, l, c in zip(high[150:], low[150:], close[150:]):
+        bos.append(tracker.update(h, l, c)["bos"])
+    assert [i for i, _ in tracker.swing_highs] == full.swing_highs.tolist()
+    assert [i for i, _ in tracker.swing_lows] == full.swing_lows.tolist()
+    assert bos == full.bos[150:].tolist()
+    assert tracker.trend == full.trend and tracker.last_bos == full.last_bos
@@ -0,0 +1,56 @@
+"""
+Unit tests for the interned symbol registry in symbol_mapper.
+
+pytest tests/test_symbol_registry.py -v
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from symbol_mapper import SymbolRegistry, mt5_to_tv_cdp_ticker, resolve_mt5_symbol
+
+
+def test_every_spelling_resolves_to_one_store_id():
+    reg = SymbolRegistry()
+    spellings = [
+        "Boom 500 Index", "BOOM500", "Boom500Index", "boom_500_index",
+        "BOOM 500 INDEX", "DERIV:BOOM_500_INDEX", " Boom 500 ",
+    ]
+    infos = {id(reg.resolve(s)) for s in spellings}
+    assert len(infos) == 1
+    info = reg.resolve("BOOM500")
+    assert info.id == "BOOM 500 INDEX" and info.mt5 == "Boom 500 Index"
+    assert info.deriv == "BOOM500" and info.tradingview == "DERIV:BOOM_500_INDEX"
+    assert info.is_boom and not info.is_crash and info.is_synthetic
+    assert reg.resolve("Boom300N").id == "BOOM 300 INDEX"
+
+    gold = reg.resolve("GC=F")
+    assert gold is reg.resolve("gold") is reg.resolve("OANDA:XAUUSD")
+    assert gold.id == "XAUUSD" and gold.is_metal and not gold.is_forex
+    assert reg.resolve("XAGUSD").id == "ARGENT" and reg.resolve("BTC-USD").id == "BTCUSD"
+    assert reg.resolve("eurusd").is_forex and reg.resolve("EURUSD=X").id == "EURUSD"
+
+
+def test_unknown_symbols_keep_legacy_keys_and_are_interned():
+    reg = SymbolRegistry()
+    vol = reg.resolve("Volatility 75 Index")
+    assert vol.id == "VOLATILITY 75 INDEX" and vol.mt5 == "Volatility 75 Index"
+    assert vol.is_synthetic and not vol.is_boom_crash and vol.category == "synthetic"
+    painx = reg.resolve("PainX 400")
+    assert painx.id == "PainX 400" and painx.is_weltrade and painx.is_crash
+    assert reg.resolve("R_75").is_synthetic
+    assert reg.resolve("").id == "" and reg.resolve(None).id == ""
+
+    misses = reg.misses
+    assert reg.resolve("Volatility 75 Index") is vol
+    assert reg.misses == misses
+
+
+def test_mt5_resolution_helpers():
+    assert resolve_mt5_symbol("boom_1000_index") == "Boom 1000 Index"
+    assert resolve_mt5_symbol("XAUEUR") == "XAUUSD"
+    assert resolve_mt5_symbol("") == "XAUUSD"
+    assert resolve_mt5_symbol("Jump 25 Index") == "Jump 25 Index"
+    assert mt5_to_tv_cdp_ticker("CRASH1000") == "DERIV:CRASH_1000_INDEX"
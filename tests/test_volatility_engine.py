@@ -0,0 +1,75 @@
+"""
+Unit tests for the recursive GARCH/EWMA volatility engine.
+
+pytest tests/test_volatility_engine.py -v
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "Python"))
+
+from volatility_engine import VolatilityEngine, VolState, fit_garch
+
+
+def _garch_series(n=2000, a=0.08, b=0.9, w=1e-6, seed=0):
+    rng = np.random.default_rng(seed)
+    v = w / (1 - a - b)
+    r = np.empty(n)
+    for t in range(n):
+        r[t] = np.sqrt(v) * rng.standard_normal()
+        v = w + a * r[t] ** 2 + b * v
+    closes = 100 * np.exp(np.cumsum(np.r_[0.0, r]))
+    ts = np.arange(len(closes), dtype="int64") * 300 * 10**9
+    return r, closes, ts
+
+
+def test_fit_recovers_persistence():
+    r, _, _ = _garch_series()
+    fit = fit_garch(r)
+    assert 0.03 <= fit["alpha"] <= 0.15
+    assert 0.95 <= fit["alpha"] + fit["beta"] < 1.0
+    assert fit["omega"] > 0 and 0.8 <= fit["lam"] < 1.0
+
+
+def test_incremental_updates_match_recursion():
+    _, closes, ts = _garch_series(n=600)
+    eng = VolatilityEngine()
+    eng.sync_arrays("EURUSD", "m5", ts[:300], closes[:300])
+    st = eng._states[("EURUSD", "M5")]
+    assert st.fitted_at is not None and st.bars == 298  # dernière bougie en formation exclue
+    for end in range(310, len(ts) + 1, 10):
+        eng.sync_arrays("EURUSD", "M5", ts[:end], closes[:end])
+    eng.sync_arrays("EURUSD", "M5", ts, closes)
+    assert st.bars == len(ts) - 2
+
+    # σ² = ω + α r² + β σ² rejoué à la main depuis l'état
+    ref = VolState.from_dict(st.to_dict())
+    ref.update(st.last_close * 1.01)
+    r = np.log(1.01)
+    expected = st.omega + st.alpha * r * r + st.beta * st.var
+    assert np.isclose(ref.var, expected)
+
+    fc = eng.forecast("EURUSD", "M5", horizon=10)
+    assert fc["signal"] in ("HIGH_VOL", "LOW_VOL", "NORMAL_VOL")
+    assert fc["horizon_volatility"] > fc["volatility"] > 0
+    assert eng.forecast("GBPUSD", "M5") is None
+
+
+def test_refit_schedule_and_persistence(tmp_path):
+    _, closes, ts = _garch_series(n=800, seed=4)
+    eng = VolatilityEngine()
+    eng.sync_arrays("XAUUSD", "M5", ts[:500], closes[:500])
+    assert eng.refit_stale(max_age_sec=3600, min_new_bars=50) == []
+    eng.sync_arrays("XAUUSD", "M5", ts, closes)
+    assert eng.refit_stale(max_age_sec=3600, min_new_bars=50) == ["XAUUSD:M5"]
+
+    path = tmp_path / "volatility_state.json"
+    eng.save(path)
+    restored = VolatilityEngine()
+    assert restored.load(path) == 1
+    assert restored.forecast("XAUUSD", "M5", 5) == eng.forecast("XAUUSD", "M5", 5)
+    # reprise : seules les bougies postérieures à l'état sauvegardé sont ajoutées
+    assert restored.sync_arrays("XAUUSD", "M5", ts, closes) == 0
@@ -0,0 +1,84 @@
+"""
+Unit tests for the incremental volume / market profile engine.
+
+pytest tests/test_volume_profile.py -v
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "Python"))
+
+from volume_profile import ProfileRegistry, VolumeProfileEngine, value_area
+
+
+def _frame(n=300, seed=3, freq="1h"):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 0.3, n))
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) + rng.uniform(0, 0.2, n)
+    low = np.minimum(open_, close) - rng.uniform(0, 0.2, n)
+    idx = pd.date_range("2024-03-04", periods=n, freq=freq, tz="UTC")
+    return pd.DataFrame(
+        {"open": open_, "high": high, "low": low, "close": close, "tick_volume": rng.integers(50, 500, n)},
+        index=idx,
+    )
+
+
+def test_incremental_sync_matches_batch():
+    df = _frame()
+    batch = VolumeProfileEngine(step=0.05)
+    batch.sync_frame(df)
+    inc = VolumeProfileEngine(step=0.05)
+    for end in range(50, len(df) + 1, 17):
+        inc.sync_frame(df.iloc[:end])
+    inc.sync_frame(df)
+    assert inc.bars == batch.bars == len(df) - 1  # dernière bougie en formation exclue
+    assert list(inc.sessions) == list(batch.sessions)
+    for day, s in batch.sessions.items():
+        t = inc.sessions[day]
+        assert t.lo == s.lo and np.allclose(t.volume, s.volume) and np.allclose(t.tpo, s.tpo)
+    assert inc.profile(days=3) == batch.profile(days=3)
+    # volume total conservé
+    assert np.isclose(sum(s.volume.sum() for s in batch.sessions.values()), df["tick_volume"].iloc[:-1].sum())
+
+
+def test_poc_and_value_area():
+    hist = np.array([1, 2, 5, 10, 30, 12, 6, 2, 1], dtype=float)
+    lo, hi = value_area(hist, int(np.argmax(hist)), 0.7)
+    assert lo <= 4 <= hi
+    assert hist[lo:hi + 1].sum() >= 0.7 * hist.sum()
+    assert (hi - lo) <= 4
+
+    eng = VolumeProfileEngine(step=1.0)
+    t0 = pd.Timestamp("2024-03-04", tz="UTC").value
+    for i, (h, l, v) in enumerate([(105, 100, 10), (103, 102, 100), (103, 102, 100), (110, 108, 5)]):
+        eng.add_bar(t0 + i * 3_600 * 10**9, h, l, (h + l) / 2, v)
+    p = eng.profile(num_bins=3)
+    assert 102 <= p["poc"] <= 104
+    assert p["val"] <= p["poc"] <= p["vah"]
+    assert np.isclose(p["total_volume"], 215) and len(p["histogram"]) == 3
+    assert abs(p["hvn"][0]["price"] - p["poc"]) <= p["step"]
+    # lecture répétée servie du cache
+    hits = eng.cache_hits
+    assert eng.profile(num_bins=3) is p and eng.cache_hits == hits + 1
+
+
+def test_composites_and_registry():
+    df = _frame(n=24 * 10 + 1)
+    reg = ProfileRegistry()
+    eng = reg.sync_frame("EURUSD", "h1", df)
+    assert len(eng.sessions) == 10
+    day = reg.profile("EURUSD", "H1")
+    three = reg.profile("EURUSD", "H1", days=3)
+    week = reg.profile("EURUSD", "H1", period="W")
+    assert day["bars"] == 24 and three["bars"] == 72 and len(three["sessions"]) == 3
+    assert week["sessions"][0] == "2024-03-11" and len(week["sessions"]) == 3
+    assert three["total_volume"] >= day["total_volume"]
+    tpo = reg.profile("EURUSD", "H1", use_tpo=True)
+    assert tpo["basis"] == "tpo" and tpo["val"] <= tpo["poc"] <= tpo["vah"]
+    assert reg.profile("GBPUSD", "H1") is None
+    assert reg.stats()["EURUSD:H1"]["sessions"] == 10
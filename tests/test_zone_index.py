@@ -0,0 +1,100 @@
+"""
+Unit tests for the incremental order-block / liquidity-zone index.
+
+pytest tests/test_zone_index.py -v
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "Python"))
+
+import gom_live_calculator
+from swing_kernel import pivot_points
+from zone_index import ZoneIndex, ZoneRegistry
+
+
+def _frame(seed: int = 0, n: int = 400) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 0.5, n))
+    open_ = np.r_[close[0], close[:-1]]
+    return pd.DataFrame({
+        "time": pd.date_range("2026-03-02", periods=n, freq="15min"),
+        "open": open_,
+        "high": np.maximum(open_, close) + rng.uniform(0, 0.4, n),
+        "low": np.minimum(open_, close) - rng.uniform(0, 0.4, n),
+        "close": close,
+    })
+
+
+def test_zones_created_at_each_pivot_and_lifecycle_consistent():
+    df = _frame(1)
+    idx = ZoneIndex(lookback=5)
+    assert idx.sync_frame(df, closed_only=False) == len(df)
+    k = 5
+    ph = [int(i) for i in pivot_points(df["high"], k, "high") if i >= k + 1]
+    pl = [int(i) for i in pivot_points(df["low"], k, "low") if i >= k + 1]
+    every = idx.zones() + list(idx.closed)
+    assert sorted(z.created_bar for z in every if z.kind == "ob_bear") == ph
+    assert sorted(z.created_bar for z in every if z.kind == "liq_low") == pl
+
+    closes = df["close"].to_numpy()
+    for z in idx.closed:
+        bar = z.closed_bar
+        if z.status == "invalidated":
+            seen = closes[z.created_bar + 1:bar + 1]
+            assert seen.min() < z.bottom if z.kind == "ob_bull" else seen.max() > z.top
+        elif z.status == "swept":
+            assert z.kind.startswith("liq")
+    # une zone n'existe qu'à la confirmation du pivot (k bougies plus tard)
+    for z in idx.zones(["ob_bull"]):
+        assert closes[z.created_bar + k + 1:].min(initial=np.inf) >= z.bottom
+    for z in idx.zones(["ob_bear"]):
+        assert closes[z.created_bar + k + 1:].max(initial=-np.inf) <= z.top
+
+
+def test_near_query_matches_brute_force():
+    df = _frame(2, 1500)
+    idx = ZoneIndex(lookback=3)
+    idx.sync_frame(df)
+    zones = idx.zones()
+    assert len(zones) > 20
+    for price in np.linspace(df["low"].min(), df["high"].max(), 25):
+        for mult in (0.0, 0.5, 3.0):
+            d = mult * idx.atr
+            expect = {z.id for z in zones if z.bottom - d <= price <= z.top + d}
+            got = idx.near(price, mult)
+            assert {z.id for z in got} == expect
+            assert [z.distance(price) for z in got] == sorted(z.distance(price) for z in got)
+    assert all(z.kind.startswith("ob") for z in idx.near(df["close"].iloc[-1], 5, kinds=["ob_bull", "ob_bear"]))
+
+
+def test_registry_sync_consumes_only_new_closed_bars():
+    df = _frame(3, 300).set_index("time")
+    reg = ZoneRegistry(lookback=5)
+    idx = reg.sync_frame("EURUSD", "m15", df.iloc[:200])
+    assert idx.bars == 199  # la dernière bougie est en cours
+    reg.sync_frame("EURUSD", "M15", df.iloc[:200])
+    assert idx.bars == 199
+    reg.sync_frame("EURUSD", "M15", df.iloc[150:260])
+    assert idx.bars == 259
+
+    full = ZoneIndex(lookback=5)
+    full.sync_frame(df.iloc[:260])
+    assert [(z.kind, z.bottom, z.top, z.status) for z in idx.zones()] == \
+        [(z.kind, z.bottom, z.top, z.status) for z in full.zones()]
+    assert len(reg.near("EURUSD", "M15", float(df["close"].iloc[259]), 50.0)) == len(idx.zones())
+    assert reg.near("GBPUSD", "M15", 1.0) == []
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_gom_calculator_blocks_and_bos_unchanged_by_kernel(seed, monkeypatch):
+    df = _frame(seed, 120)
+    calc = gom_live_calculator.GOMSignalsLiveCalculator()
+    fast = (calc.compute_order_blocks(df), calc.compute_bos(df))
+    monkeypatch.setattr(gom_live_calculator, "SWING_KERNEL_AVAILABLE", False)
+    assert (calc.compute_order_blocks(df), calc.compute_bos(df)) == fast